@@ -0,0 +1,249 @@
+import enum
+from typing import Iterable, List, Optional
+
+from sqlalchemy import BigInteger, Boolean, String, column, literal_column, table, text
+from sqlmodel import Session, select, delete, insert, func, col, or_
+
+from app.database import engine
+from app.models import Urun, Personel, DemirbasVarlik, DemirbasDurumu
+
+# ----------------------------------------------------------------
+# ARAMA DİZİNİ (Ürün, SKU, Demirbaş kodu, Personel)
+# ----------------------------------------------------------------
+# ILIKE '%...%' her aramada tabloyu baştan sona okur ve Türkçe harfleri
+# (İ/ı) doğru eşlemez. Aranacak metinler Türkçe kurallarla küçük harfe
+# çevrilip ayrı bir dizin tablosunda tutulur:
+# - SQLite: FTS5 sanal tablosu (trigram), PostgreSQL: pg_trgm GIN index.
+#   İkisi de "içinde geçen" aramasını index'ten yapar (en az 3 karakter).
+# - Kayıtlar tanımlama/giriş uç noktalarında, asıl kayıtla aynı transaction
+#   içinde yazılır. Kaynaktan yeniden kurmak için: python -m app.komut arama-yenile
+# - Diğer veritabanlarında dizin yoktur; aramalar ILIKE ile yapılır.
+
+EN_AZ_KARAKTER = 3 # Trigram index'i daha kısa metinde kullanılamaz
+YAZMA_PARCASI = 5000
+ADAY_SAYISI = 200 # Otomatik tamamlamada sıralanacak en fazla eşleşme
+
+class AramaTuru(str, enum.Enum):
+    URUN = "urun"
+    PERSONEL = "personel"
+    DEMIRBAS = "demirbas"
+
+# Dizin anahtarı = kayıt_id * 4 + tür kodu (SQLite'ta rowid; silme/güncelleme rowid ile yapılır)
+TUR_KODLARI = {AramaTuru.URUN: 1, AramaTuru.PERSONEL: 2, AramaTuru.DEMIRBAS: 3}
+KODDAN_TUR = {kod: tur for tur, kod in TUR_KODLARI.items()}
+TUR_MODELLERI = {AramaTuru.URUN: Urun, AramaTuru.PERSONEL: Personel, AramaTuru.DEMIRBAS: DemirbasVarlik}
+
+def turkce_kucuk(metin: str) -> str:
+    """Türkçe küçük harf: İ->i, I->ı. (str.lower() 'İ'yi noktalı 'i̇', 'I'yı 'i' yapar.)"""
+    return metin.replace("İ", "i").replace("I", "ı").lower()
+
+def _anahtar(tur: AramaTuru, kayit_id: int) -> int:
+    return kayit_id * 4 + TUR_KODLARI[tur]
+
+def dizin_destekli(dialect: Optional[str] = None) -> bool:
+    return (dialect or engine.dialect.name) in ("sqlite", "postgresql")
+
+def _dizin(dialect: str):
+    anahtar = "rowid" if dialect == "sqlite" else "anahtar"
+    return table(
+        "arama_dizini",
+        column(anahtar, BigInteger), column("metin", String), column("etiket", String), column("aktif", Boolean)
+    )
+
+# ----------------------------------------------------------------
+# 1. DİZİN KURULUMU
+# ----------------------------------------------------------------
+def dizin_kur(baglanti) -> None:
+    """Dizin tablosunu (yoksa) oluşturur. init_db çağırır."""
+    dialect = baglanti.dialect.name
+    if dialect == "sqlite":
+        baglanti.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS arama_dizini "
+            "USING fts5(metin, etiket UNINDEXED, aktif UNINDEXED, tokenize='trigram')"
+        ))
+    elif dialect == "postgresql":
+        baglanti.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        baglanti.execute(text(
+            "CREATE TABLE IF NOT EXISTS arama_dizini ("
+            "anahtar BIGINT PRIMARY KEY, metin TEXT NOT NULL, etiket TEXT NOT NULL, aktif BOOLEAN NOT NULL)"
+        ))
+        baglanti.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_arama_dizini_metin ON arama_dizini USING gin (metin gin_trgm_ops)"
+        ))
+
+# ----------------------------------------------------------------
+# 2. DİZİNE YAZMA (Commit çağırana aittir)
+# ----------------------------------------------------------------
+def _belge(tur: AramaTuru, kayit) -> dict:
+    if tur == AramaTuru.URUN:
+        metin, etiket, aktif = f"{kayit.ad} {kayit.sku}", f"{kayit.ad} ({kayit.sku})", kayit.aktif_mi
+    elif tur == AramaTuru.PERSONEL:
+        metin, etiket, aktif = kayit.ad_soyad, kayit.ad_soyad, kayit.aktif_mi
+    else:
+        etiket = f"{kayit.ozel_kod} / {kayit.seri_no}" if kayit.seri_no else kayit.ozel_kod
+        metin, aktif = etiket, kayit.durum != DemirbasDurumu.HURDA
+    return {"anahtar": _anahtar(tur, kayit.id), "metin": turkce_kucuk(metin), "etiket": etiket, "aktif": aktif}
+
+def dizine_yaz(db: Session, tur: AramaTuru, kayitlar: Iterable) -> None:
+    """Kayıtları (Urun/Personel/DemirbasVarlik nesneleri) dizine ekler veya günceller."""
+    dialect = db.get_bind().dialect.name
+    if not dizin_destekli(dialect):
+        return
+    belgeler = [_belge(tur, k) for k in kayitlar]
+    dizin = _dizin(dialect)
+    anahtar = dizin.c.rowid if dialect == "sqlite" else dizin.c.anahtar
+    for i in range(0, len(belgeler), YAZMA_PARCASI):
+        parca = belgeler[i:i + YAZMA_PARCASI]
+        # FTS5'te UPSERT yok; iki veritabanında da önce sil, sonra ekle
+        db.exec(delete(dizin).where(anahtar.in_([b["anahtar"] for b in parca])))
+        db.exec(insert(dizin), params=[{anahtar.name: b["anahtar"], **{a: b[a] for a in ("metin", "etiket", "aktif")}} for b in parca])
+
+def dizini_yenile(db: Session) -> int:
+    """Dizini kaynak tablolardan sıfırdan kurar. Yazılan kayıt sayısını döner."""
+    if not dizin_destekli(db.get_bind().dialect.name):
+        return 0
+    db.exec(delete(_dizin(db.get_bind().dialect.name)))
+    toplam = 0
+    for tur, model in TUR_MODELLERI.items():
+        son_id = 0
+        while True:
+            kayitlar = db.exec(
+                select(model).where(model.id > son_id).order_by(model.id).limit(YAZMA_PARCASI)
+            ).all()
+            if not kayitlar:
+                break
+            dizine_yaz(db, tur, kayitlar)
+            son_id = kayitlar[-1].id
+            toplam += len(kayitlar)
+            db.expunge_all() # Bellekte 1M nesne birikmesin
+    return toplam
+
+# ----------------------------------------------------------------
+# 3. ARAMA
+# ----------------------------------------------------------------
+def _eslesme_kosulu(dialect: str, dizin, sorgu: str):
+    metin = turkce_kucuk(sorgu.strip())
+    if dialect == "sqlite":
+        # Tırnaklı ifade: FTS5 sözdizimi (AND, *, -) yorumlanmaz, trigram "içinde geçen" araması
+        return literal_column("arama_dizini").op("MATCH")('"' + metin.replace('"', '""') + '"')
+    desen = "%" + metin.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return dizin.c.metin.like(desen)
+
+def _tur_kosulu(dialect: str, dizin, turler: Iterable[AramaTuru]):
+    anahtar = dizin.c.rowid if dialect == "sqlite" else dizin.c.anahtar
+    return (anahtar % 4).in_([TUR_KODLARI[t] for t in turler])
+
+def ara(
+    db: Session, sorgu: str, turler: Optional[List[AramaTuru]] = None,
+    limit: int = 10, aktif_sadece: bool = True
+) -> List[dict]:
+    """
+    Otomatik tamamlama: Metni içeren en iyi 'limit' kaydı döner. Çok sık geçen
+    metinlerde sıralama ilk ADAY_SAYISI eşleşme içinde yapılır (yaklaşık en iyi).
+    """
+    dialect = db.get_bind().dialect.name
+    turler = turler or list(AramaTuru)
+    if len(sorgu.strip()) < EN_AZ_KARAKTER:
+        return []
+    if not dizin_destekli(dialect):
+        return _ilike_ara(db, sorgu, turler, limit, aktif_sadece)
+
+    dizin = _dizin(dialect)
+    anahtar = dizin.c.rowid if dialect == "sqlite" else dizin.c.anahtar
+    # Tüm eşleşmeleri sıralamak sık geçen metinde (ör. "kablo") yüz binlerce satır
+    # demektir. Index'ten sırasız ilk ADAY_SAYISI eşleşme alınır, sadece onlar sıralanır.
+    adaylar = (
+        select(anahtar.label("anahtar"), dizin.c.etiket, dizin.c.metin)
+        .where(_eslesme_kosulu(dialect, dizin, sorgu))
+        .where(_tur_kosulu(dialect, dizin, turler))
+    )
+    if aktif_sadece:
+        adaylar = adaylar.where(dizin.c.aktif == True)
+    adaylar = adaylar.limit(ADAY_SAYISI).subquery()
+
+    bas = turkce_kucuk(sorgu.strip())
+    q = (
+        select(adaylar.c.anahtar, adaylar.c.etiket)
+        .order_by(
+            func.substr(adaylar.c.metin, 1, len(bas)) != bas, # Metinle başlayanlar önce
+            func.length(adaylar.c.metin),                     # Sonra kısa olanlar (daha yakın eşleşme)
+            adaylar.c.anahtar
+        )
+        .limit(limit)
+    )
+    return [
+        {"tur": KODDAN_TUR[a % 4], "id": a // 4, "etiket": etiket}
+        for a, etiket in db.exec(q).all()
+    ]
+
+def _ilike_ara(db: Session, sorgu: str, turler, limit: int, aktif_sadece: bool) -> List[dict]:
+    """Dizin desteklenmeyen veritabanlarında kaynak tablolarda ILIKE ile arar."""
+    sonuclar = []
+    for tur in turler:
+        model = TUR_MODELLERI[tur]
+        q = select(model).where(eslesen_kosul(tur, sorgu, dialect="")).limit(limit)
+        for kayit in db.exec(q).all():
+            belge = _belge(tur, kayit)
+            if belge["aktif"] or not aktif_sadece:
+                sonuclar.append({"tur": tur, "id": kayit.id, "etiket": belge["etiket"]})
+    return sonuclar[:limit]
+
+def eslesen_kosul(tur: AramaTuru, sorgu: str, sutun=None, dialect: Optional[str] = None):
+    """
+    Rapor filtreleri için WHERE koşulu: 'sutun IN (dizinde eşleşen id'ler)'.
+    'sutun' verilmezse türün kendi id'si kullanılır (Örn: Hareket.urun_id verilebilir).
+    Kısa metinde veya dizin yoksa ILIKE'a düşer; bu durumda türün tablosu sorguda
+    join edilmiş olmalıdır (Ürün için ad ve SKU'da aranır).
+    """
+    dialect = engine.dialect.name if dialect is None else dialect
+    model = TUR_MODELLERI[tur]
+    if dizin_destekli(dialect) and len(sorgu.strip()) >= EN_AZ_KARAKTER:
+        dizin = _dizin(dialect)
+        anahtar = dizin.c.rowid if dialect == "sqlite" else dizin.c.anahtar
+        idler = (
+            select((anahtar // 4).label("id"))
+            .where(_eslesme_kosulu(dialect, dizin, sorgu))
+            .where(_tur_kosulu(dialect, dizin, [tur]))
+        )
+        return col(model.id if sutun is None else sutun).in_(idler)
+
+    desen = f"%{sorgu.strip()}%"
+    if tur == AramaTuru.URUN:
+        return col(Urun.ad).ilike(desen) | col(Urun.sku).ilike(desen)
+    if tur == AramaTuru.PERSONEL:
+        return col(Personel.ad_soyad).ilike(desen)
+    return col(DemirbasVarlik.ozel_kod).ilike(desen) | col(DemirbasVarlik.seri_no).ilike(desen)
+
+def onek_kosulu(sutun, sorgu: str, tur: Optional[AramaTuru] = None, dialect: Optional[str] = None):
+    """
+    Liste uç noktalarının ?q= araması için 'sutun ... ile başlar' koşulu (Türkçe harf duyarsız).
+    'tur' verilmişse ve metin yeterince uzunsa adaylar dizinden gelir (dizin metni
+    Ürün'de 'ad sku' olduğundan ürün adının başı aranır). Aksi halde SQLite'ta sütunun
+    turkce_kucuk() hali (bağlantıda tanımlanan fonksiyon) LIKE ile karşılaştırılır:
+    SQLite'ın lower()/ILIKE'ı sadece ASCII harfleri katlar, 'ı' ile 'inek', 'i' ile
+    'Işık' eşleşirdi. PostgreSQL'in ILIKE'ı Unicode'u bilir; küçük harfli ve baş harfi
+    büyük iki desen yeter.
+    """
+    dialect = engine.dialect.name if dialect is None else dialect
+    metin = turkce_kucuk(sorgu.strip())
+    kacisli = metin.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    # FTS5 trigram 'LIKE abc%'yi index'ten yapar ama ESCAPE desteklemez; joker içeren metin sütunda aranır
+    joker = kacisli != metin and dialect == "sqlite"
+    if tur is not None and dizin_destekli(dialect) and len(metin) >= EN_AZ_KARAKTER and not joker:
+        dizin = _dizin(dialect)
+        anahtar = dizin.c.rowid if dialect == "sqlite" else dizin.c.anahtar
+        idler = (
+            select((anahtar // 4).label("id"))
+            .where(dizin.c.metin.like(kacisli + "%"))
+            .where(_tur_kosulu(dialect, dizin, [tur]))
+        )
+        return col(TUR_MODELLERI[tur].id).in_(idler)
+
+    if dialect == "sqlite":
+        return func.turkce_kucuk(sutun).like(kacisli + "%", escape="\\")
+
+    bas_harf = kacisli[:1].replace("i", "İ").replace("ı", "I").upper()
+    return or_(
+        col(sutun).ilike(kacisli + "%", escape="\\"),
+        col(sutun).ilike(bas_harf + kacisli[1:] + "%", escape="\\"),
+    )
\ No newline at end of file
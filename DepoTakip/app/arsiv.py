@@ -0,0 +1,335 @@
+import enum
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select, delete, insert, func, col, tuple_
+
+from app.models import Hareket, HareketArsivi, HareketArsivToplami, IslemTipi
+from app.ozet import sarf_hareket_toplamlari
+
+# Parquet desteği opsiyoneldir; paket yoksa arşiv gzip'li JSON satırları olarak yazılır.
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+PARQUET_DESTEKLI = pq is not None
+
+# ----------------------------------------------------------------
+# HAREKET ARŞİVİ (Sıcak tablo + aylık soğuk dosyalar)
+# ----------------------------------------------------------------
+# 'hareketler' tablosunda sadece son SICAK_AY ay tutulur. Daha eski ve kapanmış
+# aylar ay ay sıkıştırılmış dosyalara taşınır ve hareket_arsivi tablosuna
+# kaydedilir (hangi ay, hangi dosya, tarih aralığı). Raporlar:
+# - Önce sıcak tabloyu okur, gerekirse arşive devam eder (en yeniden eskiye).
+# - Tarih filtresiyle çakışmayan ayların dosyasını açmaz.
+# Dosyalar (tarih, id) sırasıyla yazılır. Raporlar en yeniden eskiye okuduğu için
+# Parquet dosyası sondan başa satır grubu satır grubu okunur; filtreler pyarrow'a
+# verilir (tarih aralığı dışındaki gruplar istatistiklerden elenir), sayfa dolunca
+# kalan gruplar hiç okunmaz. gzip sondan okunamadığından JSONL dosyası ters
+# (en yeni başta) yazılır ve baştan akarak süzülür.
+# Taşıma sırası: Dosya yazılır ve geri okunarak doğrulanır, SONRA tek transaction
+# içinde katalog + dönem toplamları eklenip satırlar silinir. Yarıda kesilen taşıma
+# tekrar çalıştırıldığında aynı dosyanın üzerine yazar.
+
+# Uygulama dizininin DIŞINDA: Çalışma dizini sunulursa arşiv dosyaları indirilemesin
+# (Eski varsayılan ./veri/arsiv kur sırasında buraya taşınır)
+ARSIV_KLASORU = os.getenv("ARSIV_KLASORU", os.path.join(os.path.expanduser("~"), ".depotakip", "arsiv"))
+SICAK_AY = int(os.getenv("ARSIV_SICAK_AY", "12"))   # Sıcak tabloda kalan ay sayısı (içinde bulunulan ay dahil)
+OKUMA_PARCASI = 50_000                              # Taşırken bir seferde okunan satır (= Parquet satır grubu)
+
+SUTUNLAR = list(Hareket.model_fields) # id, tarih, islem_tipi, urun_id, ...
+
+def _ay_basi(tarih: datetime) -> datetime:
+    return datetime(tarih.year, tarih.month, 1)
+
+def _ay_ekle(tarih: datetime, ay: int) -> datetime:
+    sira = tarih.year * 12 + tarih.month - 1 + ay
+    return datetime(sira // 12, sira % 12 + 1, 1)
+
+def _donem_adi(ay_basi: datetime) -> str:
+    return f"{ay_basi:%Y-%m}"
+
+def _sade(deger):
+    return deger.value if isinstance(deger, enum.Enum) else deger
+
+# ----------------------------------------------------------------
+# 1. DOSYA BİÇİMLERİ (Parquet / JSONL.gz)
+# ----------------------------------------------------------------
+def _parquet_semasi():
+    return pa.schema([
+        ("id", pa.int64()), ("tarih", pa.timestamp("us")), ("islem_tipi", pa.string()),
+        ("urun_id", pa.int64()), ("cikis_depo_id", pa.int64()), ("giris_depo_id", pa.int64()),
+        ("personel_id", pa.int64()), ("bolum_id", pa.int64()), ("miktar", pa.float64()),
+        ("demirbas_id", pa.int64()), ("aciklama", pa.string()), ("kullanici", pa.string()),
+    ])
+
+def _dosya_yaz(yol: str, parcalar: Iterator[List[dict]]) -> int:
+    """Satır parçalarını dosyaya yazar (önce geçici dosyaya, sonra yerine taşır). Satır sayısını döner."""
+    gecici = yol + ".yaziliyor"
+    adet = 0
+    if PARQUET_DESTEKLI:
+        # Sıralama bilgisi dosyaya yazılır; okurken eski (sırasız) dosyalar bundan ayırt edilir
+        sirali = [pq.SortingColumn(SUTUNLAR.index("tarih")), pq.SortingColumn(SUTUNLAR.index("id"))]
+        with pq.ParquetWriter(gecici, _parquet_semasi(), compression="zstd", sorting_columns=sirali) as yazici:
+            for parca in parcalar:
+                yazici.write_table(pa.Table.from_pylist(parca, schema=_parquet_semasi()), row_group_size=OKUMA_PARCASI)
+                adet += len(parca)
+    else:
+        with gzip.open(gecici, "wt", encoding="utf-8") as dosya:
+            for parca in parcalar:
+                for satir in parca:
+                    dosya.write(json.dumps({**satir, "tarih": satir["tarih"].isoformat()}, ensure_ascii=False) + "\n")
+                adet += len(parca)
+    with open(gecici, "rb+") as dosya:
+        os.fsync(dosya.fileno())
+    os.replace(gecici, yol)
+    return adet
+
+def _dosya_satir_sayisi(yol: str) -> int:
+    if yol.endswith(".parquet"):
+        return pq.ParquetFile(yol).metadata.num_rows
+    with gzip.open(yol, "rt", encoding="utf-8") as dosya:
+        return sum(1 for _ in dosya)
+
+def _jsonl_satirlari(yol: str) -> Iterator[dict]:
+    """JSONL.gz dosyasını satır satır okur (dosya belleğe alınmaz)."""
+    with gzip.open(yol, "rt", encoding="utf-8") as dosya:
+        for s in dosya:
+            satir = json.loads(s)
+            satir["tarih"] = datetime.fromisoformat(satir["tarih"])
+            yield satir
+
+def _jsonl_yeniden_eskiye(yol: str, eslesir: Callable[[dict], bool], baslangic: Optional[datetime]) -> Iterator[dict]:
+    """
+    Eşleşen satırları (tarih, id) sırasıyla en yeniden eskiye verir. Dosya bu sırayla
+    yazıldığından satırlar akarak süzülür; 'baslangic'tan eski satıra gelince okuma biter.
+    """
+    satirlar = _jsonl_satirlari(yol)
+    ilk_iki = list(islice(satirlar, 2))
+    satirlar = chain(ilk_iki, satirlar)
+    if len(ilk_iki) == 2 and (ilk_iki[0]["tarih"], ilk_iki[0]["id"]) < (ilk_iki[1]["tarih"], ilk_iki[1]["id"]):
+        # Azalan sıralı yazımdan önceki (artan sıralı) arşiv: Eşleşenler bir kez sıralanır
+        eslesenler = [s for s in satirlar if eslesir(s)]
+        eslesenler.sort(key=lambda s: (s["tarih"], s["id"]), reverse=True)
+        yield from eslesenler
+        return
+    for s in satirlar:
+        if baslangic and s["tarih"] < baslangic:
+            return
+        if eslesir(s):
+            yield s
+
+def _parquet_yeniden_eskiye(yol: str, filtre) -> Iterator[dict]:
+    """
+    Filtreye uyan satırları (tarih, id) sırasıyla en yeniden eskiye verir. Sıralı
+    dosyada satır grupları sondan başa tek tek okunur; bellekte en fazla bir grup durur.
+    """
+    if not PARQUET_DESTEKLI:
+        raise RuntimeError(f"{yol} okunamıyor: Parquet desteği (pyarrow) kurulu değil.")
+    dosya = ds.dataset(yol, format="parquet")
+    if not pq.ParquetFile(yol).metadata.row_group(0).sorting_columns:
+        # Sıralı yazımdan önceki arşiv: Filtrelenmiş tablo bir kez sıralanır
+        tablo = dosya.to_table(filter=filtre).sort_by([("tarih", "descending"), ("id", "descending")])
+        yield from tablo.to_pylist()
+        return
+    for parca in dosya.get_fragments(filter=filtre):
+        for grup in reversed(parca.split_by_row_group(filtre)):
+            yield from reversed(grup.to_table(filter=filtre).to_pylist())
+
+# ----------------------------------------------------------------
+# 2. TAŞIMA (Arşivleme işi)
+# ----------------------------------------------------------------
+def arsivlenecek_donemler(db: Session, sicak_ay: int = SICAK_AY, simdi: Optional[datetime] = None) -> List[datetime]:
+    """Sıcak tabloda kalan ve artık kapanmış (sınırdan eski) ayların başlangıçlarını döner."""
+    sinir = _ay_ekle(_ay_basi(simdi or datetime.now()), -(sicak_ay - 1))
+    en_eski = db.exec(select(func.min(Hareket.tarih)).where(Hareket.tarih < sinir)).first()
+    if en_eski is None:
+        return []
+    aylar, ay = [], _ay_basi(en_eski)
+    while ay < sinir:
+        aylar.append(ay)
+        ay = _ay_ekle(ay, 1)
+    return aylar
+
+def donem_arsivle(db: Session, ay_basi: datetime) -> Optional[HareketArsivi]:
+    """
+    Bir ayın hareketlerini arşiv dosyasına taşır. Commit çağırana aittir;
+    commit edilmezse satırlar yerinde kalır (dosya bir sonraki denemede yeniden yazılır).
+    Ayda hareket yoksa None döner.
+    """
+    donem = _donem_adi(ay_basi)
+    if db.exec(select(HareketArsivi).where(HareketArsivi.donem == donem)).first():
+        raise ValueError(f"{donem} dönemi zaten arşivlenmiş.")
+
+    aralik = (Hareket.tarih >= ay_basi, Hareket.tarih < _ay_ekle(ay_basi, 1))
+    ilk, son, adet = db.exec(select(func.min(Hareket.tarih), func.max(Hareket.tarih), func.count(Hareket.id)).where(*aralik)).one()
+    if not adet:
+        return None
+
+    def parcalar(azalan: bool):
+        # Dosya (tarih, id) sırasıyla yazılır; raporlar dosyayı sıralamadan okur. Parquet
+        # sondan (satır grubu grubu) okunabildiği için artan, gzip okunamadığı için azalan sıradadır.
+        anahtar = tuple_(Hareket.tarih, Hareket.id)
+        sira = (col(Hareket.tarih).desc(), col(Hareket.id).desc()) if azalan else (Hareket.tarih, Hareket.id)
+        son = None
+        while True:
+            sorgu = select(Hareket).where(*aralik)
+            if son:
+                sorgu = sorgu.where(anahtar < tuple_(*son) if azalan else anahtar > tuple_(*son))
+            satirlar = db.exec(sorgu.order_by(*sira).limit(OKUMA_PARCASI)).all()
+            if not satirlar:
+                return
+            yield [{alan: _sade(getattr(h, alan)) for alan in SUTUNLAR} for h in satirlar]
+            son = (satirlar[-1].tarih, satirlar[-1].id)
+            db.expunge_all()
+
+    os.makedirs(os.path.join(ARSIV_KLASORU, "hareketler"), exist_ok=True)
+    dosya = os.path.join("hareketler", f"{donem}.{'parquet' if PARQUET_DESTEKLI else 'jsonl.gz'}")
+    yol = os.path.join(ARSIV_KLASORU, dosya)
+    yazilan = _dosya_yaz(yol, parcalar(azalan=not PARQUET_DESTEKLI))
+    if yazilan != adet or _dosya_satir_sayisi(yol) != adet:
+        raise RuntimeError(f"{donem} arşiv dosyası doğrulanamadı ({adet} satır beklenirken {yazilan}).")
+
+    toplamlar = sarf_hareket_toplamlari(db, *aralik)
+    if toplamlar:
+        db.exec(insert(HareketArsivToplami), params=[
+            {"donem": donem, "urun_id": urun_id, "depo_id": depo_id, "miktar": miktar}
+            for (urun_id, depo_id), miktar in toplamlar.items()
+        ])
+    kayit = HareketArsivi(donem=donem, dosya=dosya, satir_sayisi=adet, ilk_tarih=ilk, son_tarih=son)
+    db.add(kayit)
+    db.exec(delete(Hareket).where(*aralik))
+    return kayit
+
+# ----------------------------------------------------------------
+# 3. OKUMA (Raporlar için)
+# ----------------------------------------------------------------
+def _parquet_filtresi(baslangic, bitis, islem_tipi, depo_id, personel_id, urun_idler, once, sadece_demirbas):
+    """arsiv_hareketleri filtrelerinin pyarrow karşılığı (dosya okunurken uygulanır)."""
+    kosullar = []
+    if sadece_demirbas:
+        kosullar.append(ds.field("demirbas_id").is_valid())
+    if baslangic:
+        kosullar.append(ds.field("tarih") >= baslangic)
+    if bitis:
+        kosullar.append(ds.field("tarih") <= bitis)
+    if once:
+        kosullar.append((ds.field("tarih") < once[0]) | ((ds.field("tarih") == once[0]) & (ds.field("id") < once[1])))
+    if islem_tipi:
+        kosullar.append(ds.field("islem_tipi") == islem_tipi)
+    if depo_id:
+        kosullar.append((ds.field("cikis_depo_id") == depo_id) | (ds.field("giris_depo_id") == depo_id))
+    if personel_id:
+        kosullar.append(ds.field("personel_id") == personel_id)
+    if urun_idler is not None:
+        kosullar.append(ds.field("urun_id").isin(pa.array(list(urun_idler), pa.int64())))
+    filtre = None
+    for kosul in kosullar:
+        filtre = kosul if filtre is None else filtre & kosul
+    return filtre
+
+def _satir_filtresi(baslangic, bitis, islem_tipi, depo_id, personel_id, urun_idler, once, sadece_demirbas) -> Callable[[dict], bool]:
+    """Aynı filtreler, JSONL.gz arşivlerinin satırları için."""
+    def eslesir(s: dict) -> bool:
+        if sadece_demirbas and s["demirbas_id"] is None:
+            return False
+        if (baslangic and s["tarih"] < baslangic) or (bitis and s["tarih"] > bitis):
+            return False
+        if once and (s["tarih"], s["id"]) >= once:
+            return False
+        if islem_tipi and s["islem_tipi"] != islem_tipi:
+            return False
+        if depo_id and depo_id not in (s["cikis_depo_id"], s["giris_depo_id"]):
+            return False
+        if personel_id and s["personel_id"] != personel_id:
+            return False
+        return urun_idler is None or s["urun_id"] in urun_idler
+    return eslesir
+
+def arsiv_hareketleri(
+    db: Session,
+    baslangic: Optional[datetime] = None,
+    bitis: Optional[datetime] = None,
+    islem_tipi=None,
+    depo_id: Optional[int] = None,
+    personel_id: Optional[int] = None,
+    urun_idler: Optional[Set[int]] = None,
+    once: Optional[Tuple[datetime, int]] = None,
+    sadece_demirbas: bool = False,
+) -> Iterator[Hareket]:
+    """
+    Arşivdeki hareketleri filtreleyip (tarih, id) sırasıyla en yeniden eskiye verir.
+    'once': Sadece bu (tarih, id)'den eski olanlar (imleç sayfalaması).
+    'sadece_demirbas': Sadece tekil demirbaş hareketleri (demirbas_id dolu olanlar).
+    Tarih aralığının dışında kalan dönemlerin dosyası açılmaz; üretici tembeldir,
+    istenen kadar satır okununca ne dosyanın kalan satır gruplarına ne de sonraki
+    dönemlere geçilir.
+    """
+    donemler = select(HareketArsivi).order_by(col(HareketArsivi.donem).desc())
+    if baslangic:
+        donemler = donemler.where(HareketArsivi.son_tarih >= baslangic)
+    if bitis:
+        donemler = donemler.where(HareketArsivi.ilk_tarih <= bitis)
+    if once:
+        donemler = donemler.where(HareketArsivi.ilk_tarih <= once[0])
+
+    islem_tipi = _sade(islem_tipi)
+    for donem in db.exec(donemler).all():
+        yol = os.path.join(ARSIV_KLASORU, donem.dosya)
+        if yol.endswith(".parquet"):
+            satirlar = _parquet_yeniden_eskiye(yol, _parquet_filtresi(
+                baslangic, bitis, islem_tipi, depo_id, personel_id, urun_idler, once, sadece_demirbas
+            ))
+        else:
+            satirlar = _jsonl_yeniden_eskiye(yol, _satir_filtresi(
+                baslangic, bitis, islem_tipi, depo_id, personel_id, urun_idler, once, sadece_demirbas
+            ), baslangic)
+        for s in satirlar:
+            yield Hareket.model_validate(s)
+
+def arsiv_tuketim_toplamlari(
+    db: Session,
+    baslangic: datetime,
+    bitis: datetime,
+    bolum_id: Optional[int] = None,
+    urun_id: Optional[int] = None,
+    depo_id: Optional[int] = None,
+) -> Dict[Tuple[str, int, int], float]:
+    """
+    Arşivdeki çıkış (CIKIS) hareketlerinin (dönem, bölüm, ürün) bazında toplamı; [baslangic, bitis).
+    Parquet dosyalarından sadece gereken sütunlar okunur, filtre ve gruplama pyarrow'da
+    yapılır (satır satır nesne oluşturulmaz). JSONL.gz arşivleri okunurken satır satır toplanır.
+    """
+    donemler = select(HareketArsivi).where(HareketArsivi.son_tarih >= baslangic).where(HareketArsivi.ilk_tarih < bitis)
+    toplamlar = defaultdict(float)
+    for donem in db.exec(donemler).all():
+        yol = os.path.join(ARSIV_KLASORU, donem.dosya)
+        if yol.endswith(".parquet") and PARQUET_DESTEKLI:
+            kosullar = [("islem_tipi", "==", IslemTipi.CIKIS.value), ("tarih", ">=", baslangic), ("tarih", "<", bitis)]
+            if bolum_id:
+                kosullar.append(("bolum_id", "==", bolum_id))
+            if urun_id:
+                kosullar.append(("urun_id", "==", urun_id))
+            if depo_id:
+                kosullar.append(("cikis_depo_id", "==", depo_id))
+            tablo = pq.read_table(yol, columns=["bolum_id", "urun_id", "miktar"], filters=kosullar)
+            for satir in tablo.group_by(["bolum_id", "urun_id"]).aggregate([("miktar", "sum")]).to_pylist():
+                toplamlar[(donem.donem, satir["bolum_id"], satir["urun_id"])] += satir["miktar_sum"]
+            continue
+
+        for s in _jsonl_satirlari(yol):
+            if s["islem_tipi"] != IslemTipi.CIKIS.value or not (baslangic <= s["tarih"] < bitis):
+                continue
+            if (bolum_id and s["bolum_id"] != bolum_id) or (urun_id and s["urun_id"] != urun_id) \
+                    or (depo_id and s["cikis_depo_id"] != depo_id):
+                continue
+            toplamlar[(donem.donem, s["bolum_id"], s["urun_id"])] += s["miktar"]
+    return toplamlar
\ No newline at end of file
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+from typing import Iterable, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, func, col, tuple_
+
+from app.database import engine
+from app.models import StokSarf, DemirbasVarlik, Hareket, Urun, Depo
+from app.onbellek import tanim_onbellegi
+from app.routers.rapor import _stok_satiri
+
+# ----------------------------------------------------------------
+# CANLI GÜNCELLEME (Server-Sent Events)
+# ----------------------------------------------------------------
+# Panolar stok durumunu ve depodaki demirbaş listesini bir kez çeker, sonra
+# /canli/akis'a bağlanır. Sadece değişen satırlar olay olarak gelir:
+# - İşlem uç noktaları değiştirdikleri StokSarf/Demirbaş anahtarlarını degisti()
+#   ile session'a bildirir. Commit'ten hemen önce (aynı transaction içinde) bu
+#   satırların güncel hali TEK sorguyla okunur, commit başarılı olursa olay bir
+#   kez JSON'a çevrilip tüm abonelere dağıtılır. Geri alınan işlem yayınlanmaz.
+# - Birden fazla worker varsa abone başka bir süreçte bağlı olabilir. Her süreç,
+#   abonesi varken Hareket logunu CANLI_IZLEME_ARALIGI'nda bir izler ve diğer
+#   süreçlerin commit'lerini de yayınlar (kendi commit'leri ikinci kez gelebilir;
+#   olaylar mutlak değer taşıdığı için tekrar uygulamak zararsızdır).
+#   PostgreSQL'de id'ler commit sırasıyla gelmez: Önce id alan transaction sonra
+#   commit edebilir. Bu yüzden her turda son görülen id'nin CANLI_GECIKME_PENCERESI
+#   kadar gerisinden okunur, daha önce yayınlanan id'ler atlanır.
+# - Her olayda 'surum' (o anki en büyük Hareket id'si) vardır. İstemci bir satıra
+#   daha eski sürümlü bir olayı uygulamaz; geç gelen olay yeni değeri ezemez.
+# - Yetişemeyen abonenin bağlantısı kapatılır; tarayıcı yeniden bağlanıp tam listeyi çeker.
+
+ABONE_KUYRUGU = int(os.getenv("CANLI_KUYRUK_BOYUTU", "256"))        # Abone başına bekleyen en fazla olay
+NABIZ_ARALIGI = float(os.getenv("CANLI_NABIZ_SN", "15"))            # Boşta bağlantı açık kalsın diye yorum satırı
+IZLEME_ARALIGI = float(os.getenv("CANLI_IZLEME_ARALIGI", "1"))      # Hareket logu izleme (sn, 0: kapalı)
+IZLEME_PARCASI = 5000
+GECIKME_PENCERESI = int(os.getenv("CANLI_GECIKME_PENCERESI", "1000")) # Geç commit edilen id'ler için geriye bakış
+IN_PARCASI = 5000 # IN (...) listesi parametre sınırını aşmasın
+
+_BEKLEYEN = "canli_bekleyen" # session.info: (sarf anahtarları, demirbaş id'leri)
+_HAZIR = "canli_olay"        # session.info: commit'ten sonra yayınlanacak olay
+
+class YayinMerkezi:
+    """Süreç içi abone listesi. yayinla() herhangi bir thread'den çağrılabilir."""
+
+    def __init__(self):
+        self._aboneler: Set[asyncio.Queue] = set()
+        self._dongu: Optional[asyncio.AbstractEventLoop] = None
+        self._kilit = threading.Lock()
+
+    def abone_var(self) -> bool:
+        return bool(self._aboneler)
+
+    def abone_sayisi(self) -> int:
+        return len(self._aboneler)
+
+    def abone_ol(self) -> asyncio.Queue:
+        """Event loop içinden çağrılır. Kuyruğa SSE metni (bytes) veya kapanış için None gelir."""
+        kuyruk = asyncio.Queue(maxsize=ABONE_KUYRUGU)
+        with self._kilit:
+            self._dongu = asyncio.get_running_loop()
+            self._aboneler.add(kuyruk)
+        return kuyruk
+
+    def abonelikten_cik(self, kuyruk: asyncio.Queue) -> None:
+        with self._kilit:
+            self._aboneler.discard(kuyruk)
+
+    def yayinla(self, olay: dict) -> None:
+        """Olay bir kez serileştirilir, aynı bayt dizisi her aboneye konur."""
+        if not self._aboneler or self._dongu is None:
+            return
+        veri = json.dumps(jsonable_encoder(olay), ensure_ascii=False, separators=(",", ":"))
+        mesaj = f"id: {olay['surum']}\nevent: degisiklik\ndata: {veri}\n\n".encode("utf-8")
+        try:
+            self._dongu.call_soon_threadsafe(self._dagit, mesaj)
+        except RuntimeError: # Event loop kapanmış (uygulama duruyor)
+            pass
+
+    def _dagit(self, mesaj: Optional[bytes]) -> None:
+        for kuyruk in list(self._aboneler):
+            try:
+                kuyruk.put_nowait(mesaj)
+            except asyncio.QueueFull:
+                # Yavaş istemci: Bağlantısını kapat (kuyrukta yer açıp kapanış işareti koy)
+                self.abonelikten_cik(kuyruk)
+                kuyruk.get_nowait()
+                kuyruk.put_nowait(None)
+
+    def kapat(self) -> None:
+        """Uygulama kapanırken açık akışları sonlandırır (lifespan çağırır)."""
+        self._dagit(None)
+        with self._kilit:
+            self._aboneler.clear()
+
+yayin_merkezi = YayinMerkezi()
+
+def kapanis_sinyaline_bagla() -> None:
+    """
+    uvicorn kapanırken önce açık bağlantıların bitmesini bekler, lifespan kapanışı
+    ondan sonra çalışır; açık SSE akışları kapanışı sonsuza dek bekletirdi. Bu yüzden
+    SIGINT/SIGTERM gelince akışlar hemen sonlandırılır (lifespan başlangıcında çağrılır).
+    """
+    dongu = asyncio.get_running_loop()
+    for sinyal in (signal.SIGINT, signal.SIGTERM):
+        onceki = signal.getsignal(sinyal)
+        if not callable(onceki):
+            continue
+
+        def isleyici(sig, cerceve, onceki=onceki):
+            dongu.call_soon_threadsafe(yayin_merkezi.kapat)
+            onceki(sig, cerceve)
+        try:
+            signal.signal(sinyal, isleyici)
+        except ValueError: # Ana thread dışında (Örn: TestClient) sinyal dinlenemez
+            return
+
+# ----------------------------------------------------------------
+# 1. DEĞİŞİKLİK BİLDİRME (İşlem uç noktaları, commit'ten önce)
+# ----------------------------------------------------------------
+def degisti(db: Session, sarf: Iterable[Tuple[int, int]] = (), demirbas: Iterable[int] = ()) -> None:
+    """
+    Transaction'da değişen stok satırlarını ((depo_id, urun_id)) ve demirbaş id'lerini
+    kaydeder. Dinleyen abone yoksa hiçbir şey yapmaz.
+    """
+    if not yayin_merkezi.abone_var():
+        return
+    sarf_anahtarlari, demirbas_idleri = db.info.setdefault(_BEKLEYEN, (set(), set()))
+    sarf_anahtarlari.update(sarf)
+    demirbas_idleri.update(demirbas)
+
+def degisiklik_olayi(db: Session, sarf: Iterable[Tuple[int, int]], demirbas: Iterable[int]) -> dict:
+    """Verilen satırların güncel halini okur. Her satır tipi için tek sorgu (IN listesi parçalı)."""
+    son_hareket = select(func.max(Hareket.id)).scalar_subquery()
+    surum = 0
+    stok_satirlari = []
+    sarf = list(sarf)
+    for i in range(0, len(sarf), IN_PARCASI):
+        for s_depo, s_urun, miktar, surum in db.exec(
+            select(StokSarf.depo_id, StokSarf.urun_id, StokSarf.miktar, son_hareket)
+            .where(tuple_(StokSarf.depo_id, StokSarf.urun_id).in_(sarf[i:i + IN_PARCASI]))
+        ).all():
+            stok = StokSarf(depo_id=s_depo, urun_id=s_urun, miktar=miktar)
+            satir = _stok_satiri(stok, tanim_onbellegi.getir(db, Urun, s_urun), tanim_onbellegi.getir(db, Depo, s_depo))
+            stok_satirlari.append(satir)
+
+    demirbas_satirlari = []
+    demirbas = list(demirbas)
+    for i in range(0, len(demirbas), IN_PARCASI):
+        for varlik, surum in db.exec(
+            select(DemirbasVarlik, son_hareket).where(col(DemirbasVarlik.id).in_(demirbas[i:i + IN_PARCASI]))
+        ).all():
+            demirbas_satirlari.append(varlik.model_dump())
+    return {"surum": surum or 0, "stok": stok_satirlari, "demirbas": demirbas_satirlari}
+
+@event.listens_for(OrmSession, "before_commit")
+def _commit_oncesi(session: OrmSession) -> None:
+    bekleyen = session.info.pop(_BEKLEYEN, None)
+    if not bekleyen:
+        return
+    try:
+        session.info[_HAZIR] = degisiklik_olayi(session, *bekleyen)
+    except Exception as hata: # Canlı güncelleme stok işlemini asla bozmamalı
+        logging.getLogger(__name__).warning("Canlı güncelleme olayı hazırlanamadı: %s", hata)
+
+@event.listens_for(OrmSession, "after_commit")
+def _commit_sonrasi(session: OrmSession) -> None:
+    olay = session.info.pop(_HAZIR, None)
+    if olay and (olay["stok"] or olay["demirbas"]):
+        yayin_merkezi.yayinla(olay)
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _geri_alindi(session: OrmSession, onceki_transaction) -> None:
+    session.info.pop(_BEKLEYEN, None)
+    session.info.pop(_HAZIR, None)
+
+# ----------------------------------------------------------------
+# 2. DİĞER SÜREÇLERİN COMMIT'LERİ (Hareket logu izleme)
+# ----------------------------------------------------------------
+def _pencere_idleri(db: Session, son_id: int) -> list:
+    """Gecikme penceresindeki (son_id - GECIKME_PENCERESI, ...] hareket id'leri, artan sırayla."""
+    return db.exec(
+        select(Hareket.id).where(Hareket.id > son_id - GECIKME_PENCERESI)
+        .order_by(Hareket.id).limit(GECIKME_PENCERESI + IZLEME_PARCASI)
+    ).all()
+
+def _izleme_baslangici() -> Tuple[int, Set[int]]:
+    """En son id ve penceredeki (zaten commit edilmiş, yayınlanmayacak) id'ler."""
+    with Session(engine) as db:
+        son_id = db.exec(select(func.max(Hareket.id))).one() or 0
+        return son_id, set(_pencere_idleri(db, son_id))
+
+def _logdan_olay(son_id: int, gorulen: Set[int]) -> Tuple[int, Optional[dict]]:
+    """
+    Henüz görülmemiş hareketlerin dokunduğu satırlardan olay üretir. Pencere içinde
+    geç commit edilmiş (son_id'den küçük) id'ler de yakalanır. 'gorulen' yerinde
+    güncellenir ve pencerenin gerisinde kalan id'lerden temizlenir.
+    """
+    with Session(engine) as db:
+        yeniler = [i for i in _pencere_idleri(db, son_id) if i not in gorulen][:IZLEME_PARCASI]
+        if not yeniler:
+            return son_id, None
+        hareketler = db.exec(
+            select(Hareket.urun_id, Hareket.cikis_depo_id, Hareket.giris_depo_id, Hareket.demirbas_id)
+            .where(col(Hareket.id).in_(yeniler))
+        ).all()
+        sarf, demirbas = set(), set()
+        for urun_id, cikis, giris, demirbas_id in hareketler:
+            if demirbas_id:
+                demirbas.add(demirbas_id)
+                continue
+            sarf.update((depo_id, urun_id) for depo_id in (cikis, giris) if depo_id)
+        olay = degisiklik_olayi(db, sarf, demirbas)
+
+    gorulen.update(yeniler)
+    son_id = max(son_id, yeniler[-1])
+    gorulen.difference_update([i for i in gorulen if i <= son_id - GECIKME_PENCERESI])
+    return son_id, olay
+
+async def log_izleme_dongusu() -> None:
+    """
+    Abone varken Hareket logunu izler (main.py lifespan başlatır). Abone yokken sadece
+    en son id takip edilir (tek PK okuması); yeni abone bağlandığında en fazla bir tur
+    öncesinden başlanır, aradaki commit'ler kaçmaz.
+    """
+    if IZLEME_ARALIGI <= 0:
+        return
+    son_id, gorulen = None, set()
+    while True:
+        await asyncio.sleep(IZLEME_ARALIGI)
+        try:
+            if son_id is None or not yayin_merkezi.abone_var():
+                son_id, gorulen = await run_in_threadpool(_izleme_baslangici)
+                continue
+            son_id, olay = await run_in_threadpool(_logdan_olay, son_id, gorulen)
+            if olay and (olay["stok"] or olay["demirbas"]):
+                yayin_merkezi.yayinla(olay)
+        except Exception as hata: # Bir sonraki turda tekrar denenir
+            logging.getLogger(__name__).warning("Canlı güncelleme log izleme hatası: %s", hata)
\ No newline at end of file
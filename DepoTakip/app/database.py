@@ -1,29 +1,469 @@
-import os
-from sqlmodel import SQLModel, Session, create_engine
-
-# 1. VERİTABANI BAĞLANTISI
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./depo.db")
-
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-if "sqlite" in DATABASE_URL:
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
-
-# 2. BAŞLANGIÇ AYARLARI (INIT)
-def init_db():
-    import app.models 
-    
-    # --- DİKKAT: BU SATIR VERİTABANINI SIFIRLAR ---
-    # Tabloları önce siliyoruz ki en güncel haliyle (aktif_mi vb.) tekrar kurulsun.
-    #SQLModel.metadata.drop_all(engine) 
-    # ----------------------------------------------
-
-    SQLModel.metadata.create_all(engine)
-
-# 3. SESSION YÖNETİMİ
-def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from fastapi import Depends
+from fastapi.routing import APIRoute
+from sqlmodel import SQLModel, Session, create_engine, select, func, delete, update, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, inspect as sql_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, ProgrammingError, TimeoutError as HavuzZamanAsimi
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# 1. VERİTABANI BAĞLANTISI
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./depo.db")
+
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+# Havuz ve SQLite ayarları ortam değişkenlerinden okunur (Kod değiştirmeden ayarlanabilir).
+# Değerler worker (uvicorn süreci) başınadır: 4 worker x (5 + 10) = en fazla 60 bağlantı.
+HAVUZ_BOYUTU = int(os.getenv("DB_POOL_SIZE", "5"))              # Sürekli açık tutulan bağlantı
+HAVUZ_TASMA = int(os.getenv("DB_MAX_OVERFLOW", "10"))           # Yoğunlukta açılabilecek ek bağlantı
+HAVUZ_BEKLEME_SURESI = float(os.getenv("DB_POOL_TIMEOUT", "30")) # Boş bağlantı için en fazla bekleme (sn)
+HAVUZ_YENILEME = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # Bu yaştan eski bağlantı yenilenir (sn)
+HAVUZ_ON_KONTROL = os.getenv("DB_POOL_PRE_PING", "1") != "0"    # Kopmuş bağlantıyı kullanmadan önce yakala
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")     # WAL: Okuyucular yazıcıyı beklemez
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")    # WAL ile NORMAL güvenli ve hızlıdır
+# SQLite tek yazıcıya izin verir; diğerleri kilidi bekler. Bekleme adil değildir (birkaç
+# worker süreci x havuz bağlantısı yarışırken bazı istekler 5 sn'yi aşabiliyor), bu yüzden
+# üst sınır havuz bekleme süresiyle aynı tutulur.
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "30000")) # Kilitliyse hata yerine bekle (ms)
+
+# DB_ASYNC=1: Uç noktalar async çalışır (SQLite için aiosqlite, PostgreSQL için asyncpg gerekir)
+ASENKRON_MOD = os.getenv("DB_ASYNC", "0") == "1"
+ASENKRON_SURUCULER = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Her havuz beklemesinde süreyle (sn) çağrılır; metrikler.py istek başına toplar
+bekleme_dinleyicileri = []
+
+class _BeklemeOlcumu:
+    """Havuzdan bağlantı alırken geçen süreyi ölçer. Değerler havuz_durumu() ile okunur."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._olcum_kilidi = threading.Lock()
+        self.bekleme_sayisi = 0
+        self.toplam_bekleme = 0.0
+        self.en_uzun_bekleme = 0.0
+        self.zaman_asimi_sayisi = 0
+
+    def _do_get(self):
+        baslangic = time.perf_counter()
+        try:
+            return super()._do_get()
+        except HavuzZamanAsimi:
+            # Sadece DB_POOL_TIMEOUT dolması sayılır; bağlantı kurulamaması (OperationalError vb.) değil
+            with self._olcum_kilidi:
+                self.zaman_asimi_sayisi += 1
+            raise
+        finally:
+            gecen = time.perf_counter() - baslangic
+            with self._olcum_kilidi:
+                self.bekleme_sayisi += 1
+                self.toplam_bekleme += gecen
+                self.en_uzun_bekleme = max(self.en_uzun_bekleme, gecen)
+            for dinleyici in bekleme_dinleyicileri:
+                dinleyici(gecen)
+
+class OlculenHavuz(_BeklemeOlcumu, QueuePool):
+    pass
+
+class OlculenAsenkronHavuz(_BeklemeOlcumu, AsyncAdaptedQueuePool):
+    pass
+
+def _engine_olustur(url: str, asenkron: bool = False):
+    if asenkron:
+        adres = make_url(url)
+        url = adres.set(drivername=ASENKRON_SURUCULER[adres.get_backend_name()]).render_as_string(hide_password=False)
+    olustur = create_async_engine if asenkron else create_engine
+
+    havuz = dict(
+        poolclass=OlculenAsenkronHavuz if asenkron else OlculenHavuz,
+        pool_size=HAVUZ_BOYUTU,
+        max_overflow=HAVUZ_TASMA,
+        pool_timeout=HAVUZ_BEKLEME_SURESI,
+        pool_recycle=HAVUZ_YENILEME,
+        pool_pre_ping=HAVUZ_ON_KONTROL,
+    )
+    if not url.startswith("sqlite"):
+        return olustur(url, **havuz)
+
+    bellekte = make_url(url).database in (None, "", ":memory:") or "mode=memory" in url
+    # Bellek içi veritabanı tek bağlantıda yaşar; havuz ayarları uygulanmaz
+    yeni = olustur(url, connect_args={"check_same_thread": False}, **({} if bellekte else havuz))
+    olay_hedefi = yeni.sync_engine if asenkron else yeni
+
+    @event.listens_for(olay_hedefi, "connect")
+    def _sqlite_fonksiyonlari(dbapi_baglanti, _):
+        # SQLite'ın lower()/LIKE'ı sadece ASCII harfleri katlar; ?q= ön ek araması bunu kullanır
+        from app.arama import turkce_kucuk
+        dbapi_baglanti.create_function(
+            "turkce_kucuk", 1, lambda metin: None if metin is None else turkce_kucuk(metin), deterministic=True
+        )
+
+    if bellekte:
+        return yeni
+
+    @event.listens_for(olay_hedefi, "connect")
+    def _sqlite_pragmalari(dbapi_baglanti, _):
+        imlec = dbapi_baglanti.cursor()
+        imlec.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        imlec.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        imlec.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+        imlec.close()
+
+    @event.listens_for(olay_hedefi, "checkin")
+    def _yarim_islemi_geri_al(dbapi_baglanti, _):
+        # COMMIT "database is locked" ile düşerse SQLAlchemy işlemi bitmiş sayıp geri
+        # almaz; bağlantı açık bir yazma işlemiyle havuza döner ve onu alan bir sonraki
+        # isteğin COMMIT'i bu yarım işlemi de kalıcı yapar. Havuza dönerken temizlenir.
+        if dbapi_baglanti is None:
+            return
+        surucu = getattr(dbapi_baglanti, "driver_connection", dbapi_baglanti) # aiosqlite sarmalayıcısı
+        if surucu.in_transaction:
+            dbapi_baglanti.rollback()
+
+    return yeni
+
+engine = _engine_olustur(DATABASE_URL)
+# Asenkron modda uç noktalar bu engine'i kullanır. Senkron engine yine kurulur:
+# init_db ve kendi Session'ını açan akış (streaming) raporları onu kullanır.
+async_engine = _engine_olustur(DATABASE_URL, asenkron=True) if ASENKRON_MOD else None
+
+def havuz_durumu(motor=None) -> dict:
+    """Bağlantı havuzunun anlık durumu (İzleme ekranı / metrikler için)."""
+    motor = motor or engine
+    havuz = motor.pool
+    durum = {"havuz": type(havuz).__name__, "veritabani": motor.dialect.name}
+    if isinstance(havuz, QueuePool):
+        durum.update(
+            boyut=havuz.size(),
+            kullanimda=havuz.checkedout(),
+            bosta=havuz.checkedin(),
+            tasma=max(havuz.overflow(), 0),
+            tasma_siniri=havuz._max_overflow,
+        )
+    if isinstance(havuz, _BeklemeOlcumu):
+        durum.update(
+            bekleme_sayisi=havuz.bekleme_sayisi,
+            toplam_bekleme_sn=round(havuz.toplam_bekleme, 6),
+            ortalama_bekleme_ms=round(havuz.toplam_bekleme / havuz.bekleme_sayisi * 1000, 3) if havuz.bekleme_sayisi else 0.0,
+            en_uzun_bekleme_ms=round(havuz.en_uzun_bekleme * 1000, 3),
+            zaman_asimi_sayisi=havuz.zaman_asimi_sayisi,
+        )
+    return durum
+
+# 2. BAŞLANGIÇ AYARLARI (INIT)
+# Şema import sırasında kurulmaz. 'python -m app.komut kur' dağıtımda bir kez
+# çalıştırılır (tablolar, index'ler, tek seferlik veri hazırlıkları); uygulama
+# açılışta sadece sürümü okur. Modellere tablo/index eklendiğinde ya da init_db'ye
+# yeni bir hazırlık adımı eklendiğinde SEMA_SURUMU artırılır.
+SEMA_SURUMU = 7
+
+def init_db():
+    """Şemayı kurar/günceller ve sürümü yazar. Tekrar çalıştırmak güvenlidir."""
+    import app.models 
+    
+    # --- DİKKAT: BU SATIR VERİTABANINI SIFIRLAR ---
+    # Tabloları önce siliyoruz ki en güncel haliyle (aktif_mi vb.) tekrar kurulsun.
+    #SQLModel.metadata.drop_all(engine) 
+    # ----------------------------------------------
+
+    SQLModel.metadata.create_all(engine)
+    _veri_klasorlerini_tasi()
+    _stok_tekillestir()
+    _indeksleri_kur()
+    _ozet_hazirla()
+    _arama_hazirla()
+    _defter_hazirla()
+    _rapor_isi_surumu_hazirla()
+    _uyari_hazirla()
+    _sema_surumunu_yaz()
+
+def _veri_klasorlerini_tasi():
+    """
+    Arşiv ve rapor işi dosyaları eskiden uygulama dizinindeydi (./veri/...). Eski
+    varsayılan klasör varsa yeni varsayılan yere taşınır; kayıtlardaki yollar klasöre
+    göreli olduğu için değişmez. Ortam değişkeniyle yer verilmişse ya da yeni klasör
+    zaten varsa dokunulmaz.
+    """
+    from app import arsiv, rapor_isleri
+
+    for ortam, eski, yeni in (
+        ("ARSIV_KLASORU", "./veri/arsiv", arsiv.ARSIV_KLASORU),
+        ("RAPOR_IS_KLASORU", "./veri/rapor_isleri", rapor_isleri.IS_KLASORU),
+    ):
+        if ortam in os.environ or not os.path.isdir(eski):
+            continue
+        if os.path.exists(yeni):
+            logging.getLogger(__name__).warning("%s taşınmadı: %s zaten var.", eski, yeni)
+            continue
+        os.makedirs(os.path.dirname(yeni), exist_ok=True)
+        shutil.move(eski, yeni)
+
+def _defter_hazirla():
+    """Rapor önbelleğinin kullandığı defter sürümü satırını (yoksa) oluşturur."""
+    from app.models import DefterSurumu
+
+    with Session(engine) as session:
+        if session.get(DefterSurumu, 1) is None:
+            session.add(DefterSurumu(id=1, kimlik=uuid.uuid4().hex, surum=0))
+            session.commit()
+
+def _rapor_isi_surumu_hazirla():
+    """
+    rapor_isleri.defter_surumu sayıdan metne çevrildi (defter sürümü artık sayaç ve
+    Hareket id'lerinden oluşan bir metin). Eski PostgreSQL tablosunda sütun tipi
+    değiştirilir; eski sürümlü işler yeni sürümlerle eşleşmez, sadece yeniden
+    kullanılmazlar. SQLite sütun tipine bakmadığı için bir şey yapılmaz.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    sutunlar = {s["name"]: s["type"] for s in sql_inspect(engine).get_columns("rapor_isleri")}
+    if sutunlar["defter_surumu"].python_type is str:
+        return
+    with engine.begin() as baglanti:
+        baglanti.execute(text(
+            "ALTER TABLE rapor_isleri ALTER COLUMN defter_surumu TYPE VARCHAR(40) USING defter_surumu::text"
+        ))
+
+def _uyari_hazirla():
+    """
+    Kritik stok uyarıları yeni eklendiyse (tablo boşsa) ama sistemde sarf stok
+    varsa bir kereliğine mevcut stoktan açar (webhook olayı yazılmaz).
+    """
+    from app.models import StokSarf, StokUyarisi
+    from app.uyarilar import uyarilari_yenile
+
+    with Session(engine) as session:
+        if session.exec(select(StokUyarisi.id).limit(1)).first():
+            return
+        if not session.exec(select(StokSarf.id).limit(1)).first():
+            return
+        uyarilari_yenile(session)
+        session.commit()
+
+def _sema_surumunu_yaz():
+    from app.models import SemaSurumu
+
+    with Session(engine) as session:
+        kayit = session.get(SemaSurumu, 1) or SemaSurumu(id=1, surum=SEMA_SURUMU)
+        kayit.surum = SEMA_SURUMU
+        kayit.kurulum_tarihi = datetime.now()
+        session.add(kayit)
+        session.commit()
+
+def sema_kontrol():
+    """
+    Uygulama açılışında çağrılır: Şema kurulmuş ve bu kodla aynı sürümde mi?
+    Tek satır okur, DDL çalıştırmaz. Uyumsuzsa RuntimeError verir.
+    """
+    from app.models import SemaSurumu
+
+    try:
+        with Session(engine) as session:
+            kayit = session.get(SemaSurumu, 1)
+    except (OperationalError, ProgrammingError):
+        if sql_inspect(engine).has_table(SemaSurumu.__tablename__):
+            raise # Tablo var, hata başka (bağlantı, yetki...)
+        kayit = None
+
+    if kayit is None:
+        raise RuntimeError("Veritabanı şeması kurulmamış. Önce çalıştırın: python -m app.komut kur")
+    if kayit.surum < SEMA_SURUMU:
+        raise RuntimeError(
+            f"Veritabanı şeması eski (sürüm {kayit.surum}, beklenen {SEMA_SURUMU}). "
+            "Önce çalıştırın: python -m app.komut kur"
+        )
+    if kayit.surum > SEMA_SURUMU:
+        raise RuntimeError(
+            f"Veritabanı şeması bu koddan yeni (sürüm {kayit.surum}, bu kod {SEMA_SURUMU}). Uygulamayı güncelleyin."
+        )
+
+def _stok_tekillestir():
+    """
+    Eski veritabanlarında aynı (depo_id, urun_id) için birden fazla stok satırı
+    oluşmuş olabilir. Bunları tek satırda toplar; tekil index ardından _indeksleri_kur ile kurulur.
+    Yeni kurulumlarda çift satır olmadığı için bu adım hiçbir şey yapmaz.
+    """
+    from app.models import StokSarf
+
+    with Session(engine) as session:
+        ciftler = session.exec(
+            select(StokSarf.depo_id, StokSarf.urun_id, func.min(StokSarf.id), func.sum(StokSarf.miktar))
+            .group_by(StokSarf.depo_id, StokSarf.urun_id)
+            .having(func.count(StokSarf.id) > 1)
+        ).all()
+        for depo_id, urun_id, kalan_id, toplam in ciftler:
+            session.exec(update(StokSarf).where(StokSarf.id == kalan_id).values(miktar=toplam))
+            session.exec(
+                delete(StokSarf)
+                .where(StokSarf.depo_id == depo_id)
+                .where(StokSarf.urun_id == urun_id)
+                .where(StokSarf.id != kalan_id)
+            )
+        session.commit()
+
+def _indeksleri_kur():
+    """
+    create_all var olan tabloya dokunmaz; modellere sonradan eklenen index'ler
+    eski veritabanlarında oluşmaz. Eksik index'leri tek tek kurar, var olanları atlar.
+    Büyük PostgreSQL tablolarında index kurulumu yazmaları bekletir; ilk açılış
+    bakım penceresinde yapılmalıdır.
+    """
+    for tablo in SQLModel.metadata.sorted_tables:
+        for index in sorted(tablo.indexes, key=lambda i: i.name):
+            index.create(engine, checkfirst=True)
+
+def _ozet_hazirla():
+    """
+    Özet tablosu yeni eklendiyse (boşsa) ama sistemde stok/demirbaş varsa
+    bir kereliğine Hareket logundan kurar.
+    """
+    from app.models import StokOzet, StokSarf, DemirbasVarlik
+    from app.ozet import ozet_yenile
+
+    with Session(engine) as session:
+        if session.exec(select(StokOzet.id).limit(1)).first():
+            return
+        if not (session.exec(select(StokSarf.id).limit(1)).first()
+                or session.exec(select(DemirbasVarlik.id).limit(1)).first()):
+            return
+        ozet_yenile(session)
+        session.commit()
+
+def _arama_hazirla():
+    """
+    Arama dizinini (yoksa) oluşturur. Dizin yeni eklendiyse (boşsa) ama
+    ürün/personel varsa bir kereliğine kaynak tablolardan kurar.
+    """
+    from app.models import Urun, Personel
+    from app.arama import dizin_kur, dizini_yenile, dizin_destekli
+
+    if not dizin_destekli(engine.dialect.name):
+        return
+    with engine.begin() as baglanti:
+        dizin_kur(baglanti)
+
+    with Session(engine) as session:
+        if session.exec(text("SELECT 1 FROM arama_dizini LIMIT 1")).first():
+            return
+        if not (session.exec(select(Urun.id).limit(1)).first()
+                or session.exec(select(Personel.id).limit(1)).first()):
+            return
+        dizini_yenile(session)
+        session.commit()
+
+# 3. ORTAK SORGU YARDIMCILARI
+def upsert_artir(db: Session, model, anahtar: dict, artislar: dict) -> None:
+    """
+    'anahtar' sütunlarıyla eşleşen satır varsa sayısal alanları 'artislar' kadar
+    artırır, yoksa bu değerlerle oluşturur. Tek atomik cümledir (INSERT ... ON CONFLICT
+    DO UPDATE); anahtar sütunlarında tekil index bulunmalıdır.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        sorgu = insert(model).values(**anahtar, **artislar)
+        sorgu = sorgu.on_conflict_do_update(
+            index_elements=[getattr(model, alan) for alan in anahtar],
+            set_={alan: getattr(model, alan) + getattr(sorgu.excluded, alan) for alan in artislar}
+        )
+        db.exec(sorgu)
+        return
+
+    # Diğer veritabanları: Önce atomik UPDATE, satır yoksa INSERT
+    sorgu = update(model).values({alan: getattr(model, alan) + deger for alan, deger in artislar.items()})
+    for alan, deger in anahtar.items():
+        sorgu = sorgu.where(getattr(model, alan) == deger)
+    if db.exec(sorgu).rowcount == 0:
+        db.add(model(**anahtar, **artislar))
+        db.flush()
+
+# 4. SESSION YÖNETİMİ
+def get_session():
+    with Session(engine) as session:
+        yield session
+
+async def get_async_session():
+    # Yanıt, uç nokta döndükten sonra (greenlet dışında) serileştirilir; commit sonrası
+    # nesnelerin süresi dolarsa tembel yükleme orada hata verir. Bu yüzden expire edilmez.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+# 5. ASENKRON MOD (DB_ASYNC=1)
+def asenkron_uygun(fonksiyon):
+    """
+    Uç noktayı "sadece kısa veritabanı işi yapar" diye işaretler (router kaydından
+    önce, @router satırının altına). DB_ASYNC=1 iken sadece işaretli uç noktalar
+    event loop'ta çalışır. Dosya okuyan, dışa aktaran ya da geçmişi yeniden hesaplayan
+    uç noktalar işaretlenmez; event loop'ta çalışsalar o süre boyunca diğer tüm
+    istekler, SSE akışları ve arka plan döngüleri beklerdi. Onlar thread havuzunda
+    senkron engine ile çalışmaya devam eder.
+    """
+    fonksiyon.asenkron_uygun = True
+    return fonksiyon
+
+_asenkron_semafor = None
+
+def _asenkron_sira():
+    """
+    Aynı anda havuzdan bağlantı isteyen asenkron gövde sayısını havuz kapasitesiyle
+    sınırlar. Sınır yokken yüzlerce coroutine havuz kuyruğunda bekler, sıradakiler
+    DB_POOL_TIMEOUT'u aşıp 500 döner; semaforda bekleyen istek ise sırasını alır.
+    """
+    global _asenkron_semafor
+    if _asenkron_semafor is None:
+        _asenkron_semafor = asyncio.Semaphore(HAVUZ_BOYUTU + HAVUZ_TASMA)
+    return _asenkron_semafor
+
+def _asenkron_uc_noktasi(fonksiyon):
+    """
+    'db: Session = Depends(get_session)' alan ve asenkron_uygun işaretli senkron uç
+    noktayı async def'e çevirir. Gövde AsyncSession.run_sync() içinde çalışır: Aynı kod
+    senkron bir Session görür ama veritabanı beklemeleri event loop'u (ve FastAPI
+    thread havuzunu) tutmaz.
+    """
+    if inspect.iscoroutinefunction(fonksiyon) or not getattr(fonksiyon, "asenkron_uygun", False):
+        return fonksiyon
+    imza = inspect.signature(fonksiyon)
+    db_adi = next(
+        (p.name for p in imza.parameters.values() if getattr(p.default, "dependency", None) is get_session),
+        None
+    )
+    if db_adi is None:
+        return fonksiyon
+
+    @functools.wraps(fonksiyon)
+    async def sarmal(**kwargs):
+        db = kwargs.pop(db_adi)
+        async with _asenkron_sira():
+            return await db.run_sync(lambda session: fonksiyon(**kwargs, **{db_adi: session}))
+
+    sarmal.__signature__ = imza.replace(parameters=[
+        p.replace(default=Depends(get_async_session), annotation=AsyncSession) if p.name == db_adi else p
+        for p in imza.parameters.values()
+    ])
+    return sarmal
+
+class VeritabaniRoute(APIRoute):
+    """
+    Router'ların route sınıfı. DB_ASYNC=1 iken asenkron_uygun işaretli uç noktaları
+    asenkron olarak kaydeder; diğerleri (ve DB_ASYNC=0'da hepsi) olduğu gibi kalır.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if ASENKRON_MOD:
+            endpoint = _asenkron_uc_noktasi(endpoint)
+        super().__init__(path, endpoint, **kwargs)
\ No newline at end of file
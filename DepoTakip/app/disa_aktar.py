@@ -0,0 +1,79 @@
+import csv
+import enum
+import io
+import tempfile
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+
+# XLSX desteği opsiyoneldir; paket yoksa yalnızca CSV sunulur.
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+XLSX_DESTEKLI = xlsxwriter is not None
+
+# ----------------------------------------------------------------
+# DIŞA AKTARMA (CSV / XLSX) - Sabit bellekle satır satır yazım
+# ----------------------------------------------------------------
+
+CSV_PARCA_SATIR = 1000          # Bu kadar satır birikince istemciye gönderilir
+XLSX_SAYFA_SATIR = 1_048_575    # Excel sayfa sınırı (1 satır başlık)
+DOSYA_PARCA_BAYT = 64 * 1024    # XLSX dosyası bu büyüklükte parçalarla akıtılır
+
+def _hucre(deger):
+    """Veritabanı değerini dosyaya yazılabilir sade tipe çevirir."""
+    if deger is None:
+        return ""
+    if isinstance(deger, enum.Enum):
+        return deger.value
+    if isinstance(deger, datetime):
+        return deger.strftime("%Y-%m-%d %H:%M:%S")
+    return deger
+
+def csv_akisi(basliklar: Sequence[str], satirlar: Iterable[Sequence]) -> Iterator[str]:
+    """
+    Satırları CSV metni olarak parça parça üretir.
+    Türkçe Excel'in doğru açması için BOM ve ';' ayracı kullanılır.
+    """
+    tampon = io.StringIO()
+    yazici = csv.writer(tampon, delimiter=";")
+
+    tampon.write("\ufeff")
+    yazici.writerow(basliklar)
+    for sira, satir in enumerate(satirlar, start=1):
+        yazici.writerow([_hucre(d) for d in satir])
+        if sira % CSV_PARCA_SATIR == 0:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+    yield tampon.getvalue()
+
+def xlsx_akisi(basliklar: Sequence[str], satirlar: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    Satırları XLSX dosyası olarak üretir.
+    XlsxWriter 'constant_memory' modunda her satırı hemen diske yazar; dosya
+    geçici bir dosyada tamamlanıp parça parça akıtılır. Excel'in 1M satır sınırı
+    aşılırsa yeni sayfaya geçilir.
+    """
+    with tempfile.TemporaryFile() as dosya:
+        kitap = xlsxwriter.Workbook(dosya, {"constant_memory": True})
+        kalin = kitap.add_format({"bold": True})
+
+        sayfa, sayfa_satiri, sayfa_no = None, XLSX_SAYFA_SATIR, 0
+        for satir in satirlar:
+            if sayfa_satiri >= XLSX_SAYFA_SATIR:
+                sayfa_no += 1
+                sayfa = kitap.add_worksheet(f"Rapor {sayfa_no}")
+                sayfa.write_row(0, 0, basliklar, kalin)
+                sayfa_satiri = 0
+            sayfa_satiri += 1
+            sayfa.write_row(sayfa_satiri, 0, [_hucre(d) for d in satir])
+
+        if sayfa is None:  # Hiç kayıt yoksa bile başlıklı boş bir sayfa olsun
+            kitap.add_worksheet("Rapor 1").write_row(0, 0, basliklar, kalin)
+        kitap.close()
+
+        dosya.seek(0)
+        while parca := dosya.read(DOSYA_PARCA_BAYT):
+            yield parca
\ No newline at end of file
@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, insert, col
+
+from app.arsiv import _ay_basi, _ay_ekle, arsiv_hareketleri
+from app.models import (
+    Hareket, Urun, StokSarf, DemirbasVarlik, StokGoruntusu, StokGoruntusuSarf, StokGoruntusuDemirbas,
+    IslemTipi, UrunTipi, DemirbasDurumu
+)
+from app.onbellek import tanim_onbellegi
+from app.ozet import sarf_hareket_toplamlari
+
+# ----------------------------------------------------------------
+# STOK GÖRÜNTÜLERİ (Geçmiş bir tarihteki stok)
+# ----------------------------------------------------------------
+# "31 Aralık'ta X deposunda ne vardı?" sorusu için tüm Hareket logunu baştan
+# toplamak yıllar geçtikçe yavaşlar. Her ay başında (00:00) sarf bakiyeleri ve
+# demirbaş konumları stok_goruntuleri tablolarına kopyalanır:
+#     python -m app.komut goruntu-al   (aylık zamanlanmış görev)
+# Geçmiş bir 'sinir' anı sorulduğunda sınırdan SONRAKİ en yakın görüntü (yoksa
+# güncel StokSarf/DemirbasVarlik) alınır ve aradaki hareketler en yeniden eskiye
+# geri alınır. Okunan hareket sayısı en fazla bir dönemliktir.
+# Neden ileri değil geri? Zimmet iadesinde demirbaşın yeni durumu (DEPODA/ARIZALI/
+# HURDA) logda sütun olarak tutulmaz; ama iadeden ÖNCEKİ durum (ZIMMETLI, kimde
+# olduğu) ve zimmetten önceki durum (DEPODA, hangi depo) logdan kesin bilinir.
+# Tüm 'sinir' değerleri dışlayıcıdır: Görüntü, tarihi sınırdan ÖNCE olan hareketleri içerir.
+
+SarfBakiyeleri = Dict[Tuple[int, int], float] # (depo_id, urun_id) -> miktar
+
+@dataclass
+class DemirbasKonumu:
+    urun_id: int
+    durum: DemirbasDurumu
+    depo_id: Optional[int] = None
+    personel_id: Optional[int] = None
+    bolum_id: Optional[int] = None
+
+DemirbasKonumlari = Dict[int, DemirbasKonumu] # demirbas_id -> konum
+
+def _sifir_mi(miktar: float) -> bool:
+    return abs(miktar) < 1e-9 # Ondalıklı toplama/çıkarma artığı
+
+# ----------------------------------------------------------------
+# 1. BAŞLANGIÇ DURUMU (En yakın sonraki görüntü veya güncel tablolar)
+# ----------------------------------------------------------------
+def _sonraki_goruntu(db: Session, sinir: datetime) -> Optional[StokGoruntusu]:
+    return db.exec(
+        select(StokGoruntusu).where(StokGoruntusu.tarih >= sinir).order_by(StokGoruntusu.tarih).limit(1)
+    ).first()
+
+def _baslangic_durumu(db: Session, goruntu: Optional[StokGoruntusu], demirbas_dahil: bool) -> Tuple[SarfBakiyeleri, DemirbasKonumlari]:
+    demirbaslar = []
+    if goruntu is None:
+        sarf = db.exec(select(StokSarf.depo_id, StokSarf.urun_id, StokSarf.miktar)).all()
+        if demirbas_dahil:
+            demirbaslar = db.exec(select(
+                DemirbasVarlik.id, DemirbasVarlik.urun_id, DemirbasVarlik.durum, DemirbasVarlik.bulundugu_depo_id,
+                DemirbasVarlik.zimmetli_personel_id, DemirbasVarlik.zimmetli_bolum_id
+            )).all()
+    else:
+        sarf = db.exec(
+            select(StokGoruntusuSarf.depo_id, StokGoruntusuSarf.urun_id, StokGoruntusuSarf.miktar)
+            .where(StokGoruntusuSarf.goruntu_id == goruntu.id)
+        ).all()
+        if demirbas_dahil:
+            demirbaslar = db.exec(
+                select(
+                    StokGoruntusuDemirbas.demirbas_id, StokGoruntusuDemirbas.urun_id, StokGoruntusuDemirbas.durum,
+                    StokGoruntusuDemirbas.depo_id, StokGoruntusuDemirbas.personel_id, StokGoruntusuDemirbas.bolum_id
+                ).where(StokGoruntusuDemirbas.goruntu_id == goruntu.id)
+            ).all()
+    return (
+        {(depo_id, urun_id): miktar for depo_id, urun_id, miktar in sarf},
+        {d[0]: DemirbasKonumu(*d[1:]) for d in demirbaslar},
+    )
+
+# ----------------------------------------------------------------
+# 2. HAREKETLERİ GERİ ALMA
+# ----------------------------------------------------------------
+def _sarf_geri_al(sarf: SarfBakiyeleri, h: Hareket) -> None:
+    if h.islem_tipi in (IslemTipi.GIRIS, IslemTipi.TRANSFER):
+        sarf[(h.giris_depo_id, h.urun_id)] = sarf.get((h.giris_depo_id, h.urun_id), 0.0) - h.miktar
+    if h.islem_tipi in (IslemTipi.CIKIS, IslemTipi.TRANSFER):
+        sarf[(h.cikis_depo_id, h.urun_id)] = sarf.get((h.cikis_depo_id, h.urun_id), 0.0) + h.miktar
+
+def _demirbas_geri_al(demirbaslar: DemirbasKonumlari, h: Hareket) -> None:
+    if h.islem_tipi == IslemTipi.GIRIS:
+        demirbaslar.pop(h.demirbas_id, None) # Henüz sisteme girmemişti
+    elif h.islem_tipi == IslemTipi.ZIMMET_VER:
+        # Zimmet sadece depodaki demirbaşa verilir (demirbas.zimmet_ver_uygula)
+        demirbaslar[h.demirbas_id] = DemirbasKonumu(h.urun_id, DemirbasDurumu.DEPODA, depo_id=h.cikis_depo_id)
+    elif h.islem_tipi == IslemTipi.ZIMMET_IADE:
+        demirbaslar[h.demirbas_id] = DemirbasKonumu(
+            h.urun_id, DemirbasDurumu.ZIMMETLI, personel_id=h.personel_id, bolum_id=h.bolum_id
+        )
+
+def _geri_al(
+    db: Session, sarf: SarfBakiyeleri, demirbaslar: Optional[DemirbasKonumlari],
+    sinir: datetime, ust: Optional[datetime]
+) -> None:
+    """
+    [sinir, ust) aralığındaki hareketleri en yeniden eskiye geri alır (ust=None: bugüne kadar).
+    demirbaslar=None ise demirbaş hareketleri atlanır.
+    """
+    kosullar = [Hareket.tarih >= sinir] + ([Hareket.tarih < ust] if ust else [])
+
+    # Sıcak tablo: Sarf net toplamları SQL ile, demirbaş hareketleri satır satır
+    for (urun_id, depo_id), toplam in sarf_hareket_toplamlari(db, *kosullar).items():
+        sarf[(depo_id, urun_id)] = sarf.get((depo_id, urun_id), 0.0) - toplam
+    if demirbaslar is not None:
+        demirbas_hareketleri = db.exec(
+            select(Hareket).where(col(Hareket.demirbas_id).is_not(None)).where(*kosullar)
+            .order_by(col(Hareket.tarih).desc(), col(Hareket.id).desc())
+        ).all()
+        for h in demirbas_hareketleri:
+            _demirbas_geri_al(demirbaslar, h)
+
+    # Arşive taşınmış aylar sıcak tablodan eskidir, sıra korunur. Dosyalar bir kez okunur;
+    # arsiv_hareketleri'nin bitişi dahil olduğu için 'ust' elle dışlanır.
+    for h in arsiv_hareketleri(db, baslangic=sinir, bitis=ust):
+        if ust and h.tarih >= ust:
+            continue
+        if h.demirbas_id is not None:
+            if demirbaslar is not None:
+                _demirbas_geri_al(demirbaslar, h)
+        else:
+            urun = tanim_onbellegi.getir(db, Urun, h.urun_id)
+            if urun is None:
+                # Atlanırsa bakiyeler sessizce yanlış hesaplanır
+                raise ValueError(f"Arşivdeki {h.id} numaralı hareketin ürünü ({h.urun_id}) tanımlarda yok.")
+            if urun.tip == UrunTipi.SARF:
+                _sarf_geri_al(sarf, h)
+
+def durum_hesapla(db: Session, sinir: datetime, demirbas_dahil: bool = True) -> Tuple[SarfBakiyeleri, DemirbasKonumlari]:
+    """
+    'sinir' anından ÖNCEKİ hareketlerle oluşmuş sarf bakiyeleri ve demirbaş konumları.
+    Sıfır bakiyeler listeden çıkarılır. demirbas_dahil=False ise sadece sarf hesaplanır.
+    """
+    goruntu = _sonraki_goruntu(db, sinir)
+    sarf, demirbaslar = _baslangic_durumu(db, goruntu, demirbas_dahil)
+    _geri_al(db, sarf, demirbaslar if demirbas_dahil else None, sinir, goruntu.tarih if goruntu else None)
+    return {k: m for k, m in sarf.items() if not _sifir_mi(m)}, demirbaslar
+
+# ----------------------------------------------------------------
+# 3. GÖRÜNTÜ ALMA (Commit çağırana aittir)
+# ----------------------------------------------------------------
+def varsayilan_goruntu_tarihi(simdi: Optional[datetime] = None) -> datetime:
+    """İçinde bulunulan ayın başı (= geçen ayın kapanışı)."""
+    return _ay_basi(simdi or datetime.now())
+
+def goruntu_al(db: Session, tarih: datetime) -> Optional[StokGoruntusu]:
+    """'tarih' anının görüntüsünü kaydeder. Zaten varsa None döner."""
+    if tarih > datetime.now():
+        raise ValueError("Gelecek bir tarihin görüntüsü alınamaz.")
+    if db.exec(select(StokGoruntusu).where(StokGoruntusu.tarih == tarih)).first():
+        return None
+
+    sarf, demirbaslar = durum_hesapla(db, tarih)
+    goruntu = StokGoruntusu(tarih=tarih)
+    db.add(goruntu)
+    db.flush()
+    if sarf:
+        db.exec(insert(StokGoruntusuSarf), params=[
+            {"goruntu_id": goruntu.id, "depo_id": depo_id, "urun_id": urun_id, "miktar": miktar}
+            for (depo_id, urun_id), miktar in sarf.items()
+        ])
+    if demirbaslar:
+        db.exec(insert(StokGoruntusuDemirbas), params=[
+            {"goruntu_id": goruntu.id, "demirbas_id": demirbas_id, **vars(k)}
+            for demirbas_id, k in demirbaslar.items()
+        ])
+    return goruntu
+
+def eksik_goruntu_tarihleri(db: Session, ay: int, simdi: Optional[datetime] = None) -> List[datetime]:
+    """Son 'ay' ay başından görüntüsü olmayanlar, en yeniden eskiye (her biri bir sonrakinden hesaplanır)."""
+    son = varsayilan_goruntu_tarihi(simdi)
+    tarihler = [_ay_ekle(son, -i) for i in range(ay)]
+    mevcut = set(db.exec(select(StokGoruntusu.tarih).where(col(StokGoruntusu.tarih).in_(tarihler))).all())
+    return [t for t in tarihler if t not in mevcut]
\ No newline at end of file
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from fastapi import Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete, insert, update, col
+
+from app.database import engine
+from app.models import IdempotansKaydi
+
+# ----------------------------------------------------------------
+# İSTEK TEKRARI KORUMASI (Idempotency-Key)
+# ----------------------------------------------------------------
+# El terminalleri kopuk Wi-Fi'da aynı isteği tekrar gönderir. İstemci her işlem
+# için benzersiz bir 'Idempotency-Key' başlığı yollarsa:
+# - Anahtar daha önce başarıyla işlenmişse ilk yanıt aynen döner (tek PK okuması);
+#   StokSarf/Hareket'e dokunulmaz. Yanıtta 'Idempotent-Replayed: true' başlığı olur.
+# - İlk kez geliyorsa anahtar, işlemin kendisiyle AYNI transaction içinde önce yazılır
+#   (sahiplenme), işlem uygulanır, yanıt kaydedilir ve birlikte commit edilir. Aynı anda
+#   gelen ikinci istek anahtarın PK'sinde bekler, ilki commit edince çakışma alır,
+#   kendi transaction'ını geri alır ve ilk yanıtı döner. Böylece çift kayıt oluşamaz.
+# - Hata veren istekler (4xx) kaydedilmez; geri alındıkları için tekrar denenebilirler.
+# Başlık gönderilmezse uç noktalar eskisi gibi çalışır.
+
+IDEMPOTANS_SURESI = timedelta(hours=float(os.getenv("IDEMPOTANS_SURESI_SAAT", "24")))
+TEMIZLIK_ARALIGI = float(os.getenv("IDEMPOTANS_TEMIZLIK_DK", "10")) * 60 # sn
+SILME_PARCASI = 5000
+
+@dataclass
+class IdempotansAnahtari:
+    anahtar: str
+    uc_nokta: str
+
+def idempotans_anahtari(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+) -> Optional[IdempotansAnahtari]:
+    """Uç nokta bağımlılığı: Başlık varsa anahtarı ve isteğin yolunu döner."""
+    if not idempotency_key:
+        return None
+    return IdempotansAnahtari(idempotency_key, request.url.path)
+
+def _istek_ozeti(govde) -> str:
+    metin = json.dumps(jsonable_encoder(govde), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(metin.encode("utf-8")).hexdigest()
+
+def _ilk_yanit(kayit: Optional[IdempotansKaydi], anahtar: IdempotansAnahtari, ozet: str) -> JSONResponse:
+    if kayit is None:
+        # Paralel istek geri alındı; istemci aynı anahtarla yeniden denemeli
+        raise HTTPException(status_code=409, detail="Bu Idempotency-Key ile gelen istek henüz tamamlanmadı, tekrar deneyin.")
+    if kayit.uc_nokta != anahtar.uc_nokta or kayit.istek_ozeti != ozet:
+        raise HTTPException(status_code=422, detail="Bu Idempotency-Key farklı bir istek için kullanılmış.")
+    return JSONResponse(content=json.loads(kayit.yanit), headers={"Idempotent-Replayed": "true"})
+
+def idempotent_calistir(db: Session, anahtar: Optional[IdempotansAnahtari], govde, uygula: Callable[[], object]):
+    """
+    'uygula' (commit yapmayan *_uygula çağrısı) sonucunu commit edip döner.
+    'govde': İstek gövdesi; aynı anahtarın farklı bir istekle kullanılmasını yakalamak için özetlenir.
+    'uygula' kendi hatasını geri alıp Response dönerse (toplu işlem) commit edilmez.
+    """
+    if anahtar is None:
+        sonuc = uygula()
+        if not isinstance(sonuc, Response):
+            db.commit()
+        return sonuc
+
+    ozet = _istek_ozeti(govde)
+    simdi = datetime.now()
+    kayit = db.get(IdempotansKaydi, anahtar.anahtar)
+    if kayit and kayit.son_gecerlilik > simdi:
+        return _ilk_yanit(kayit, anahtar, ozet)
+    if kayit: # Süresi dolmuş ama henüz temizlenmemiş
+        db.expunge(kayit)
+        db.exec(delete(IdempotansKaydi).where(IdempotansKaydi.anahtar == anahtar.anahtar))
+
+    try:
+        db.exec(insert(IdempotansKaydi).values(
+            anahtar=anahtar.anahtar, uc_nokta=anahtar.uc_nokta, istek_ozeti=ozet,
+            olusturma_tarihi=simdi, son_gecerlilik=simdi + IDEMPOTANS_SURESI
+        ))
+    except IntegrityError:
+        db.rollback() # Aynı anahtarla paralel gelen istek önce commit etti
+        return _ilk_yanit(db.get(IdempotansKaydi, anahtar.anahtar), anahtar, ozet)
+
+    try:
+        sonuc = uygula()
+    except Exception:
+        db.rollback()
+        raise
+    if isinstance(sonuc, Response):
+        return sonuc
+
+    db.exec(
+        update(IdempotansKaydi).where(IdempotansKaydi.anahtar == anahtar.anahtar)
+        .values(yanit=json.dumps(jsonable_encoder(sonuc), ensure_ascii=False))
+    )
+    db.commit()
+    return sonuc
+
+# ----------------------------------------------------------------
+# SÜRESİ DOLANLARIN TEMİZLİĞİ (Arka plan)
+# ----------------------------------------------------------------
+def suresi_dolanlari_sil(simdi: Optional[datetime] = None) -> int:
+    """Süresi dolan anahtarları parça parça siler (uzun yazma kilidi tutmadan). Silinen sayıyı döner."""
+    simdi = simdi or datetime.now()
+    toplam = 0
+    while True:
+        with Session(engine) as db:
+            parca = select(IdempotansKaydi.anahtar).where(IdempotansKaydi.son_gecerlilik <= simdi).limit(SILME_PARCASI)
+            silinen = db.exec(delete(IdempotansKaydi).where(col(IdempotansKaydi.anahtar).in_(parca))).rowcount
+            db.commit()
+        toplam += silinen
+        if silinen < SILME_PARCASI:
+            return toplam
+
+async def temizlik_dongusu() -> None:
+    """Uygulama açık kaldıkça TEMIZLIK_ARALIGI'nda bir süresi dolanları siler (main.py lifespan başlatır)."""
+    while True:
+        await asyncio.sleep(TEMIZLIK_ARALIGI)
+        try:
+            await run_in_threadpool(suresi_dolanlari_sil)
+        except Exception as hata: # Temizlik hatası uygulamayı durdurmamalı; bir sonraki turda tekrar denenir
+            logging.getLogger(__name__).warning("Idempotency temizliği başarısız: %s", hata)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Yönetim komutları.
+
+Kullanım (DepoTakip klasöründen):
+    python -m app.komut kur                         # Şemayı kurar/günceller (dağıtımda bir kez, uygulamadan önce)
+    python -m app.komut ozet-yenile                 # Özeti Hareket logundan yeniden kurar
+    python -m app.komut ozet-yenile --sadece-dogrula # Sadece karşılaştırır, yazmaz
+    python -m app.komut arama-yenile                # Arama dizinini kaynak tablolardan yeniden kurar
+    python -m app.komut arsivle [--sicak-ay 12]     # Kapanmış eski ayları soğuk arşive taşır
+    python -m app.komut arsivle --kuru              # Sadece taşınacak ayları listeler
+    python -m app.komut goruntu-al                  # Bu ay başının stok görüntüsünü alır (aylık çalıştırılır)
+    python -m app.komut goruntu-al --ay 24          # Son 24 ay başından eksik olanları tamamlar
+    python -m app.komut mutabakat [--surec 4]       # Logu oynatıp StokSarf/DemirbasVarlik ile karşılaştırır
+    python -m app.komut mutabakat --onar            # Farkları logdaki değerlere göre düzeltir
+    python -m app.komut uyari-yenile [--bildir]     # Kritik stok uyarılarını mevcut stoğa göre açar/kapatır
+"""
+import argparse
+import sys
+import time
+
+from sqlmodel import Session
+
+from app.database import SEMA_SURUMU, engine, init_db, sema_kontrol
+import app.rapor_onbellegi # Defter sürümü olayları: Komutların yazdıkları da rapor önbelleğini eskitir
+
+def kur_komutu(argumanlar) -> int:
+    baslangic = time.perf_counter()
+    init_db()
+    print(f"Şema kuruldu: sürüm {SEMA_SURUMU} ({time.perf_counter() - baslangic:.1f} sn).")
+    return 0
+
+def ozet_yenile_komutu(argumanlar) -> int:
+    from app.ozet import ozet_yenile
+
+    with Session(engine) as db:
+        farklar = ozet_yenile(db, sadece_dogrula=argumanlar.sadece_dogrula)
+        if not argumanlar.sadece_dogrula:
+            db.commit()
+
+    for fark in farklar:
+        print(fark)
+    if argumanlar.sadece_dogrula:
+        print(f"Doğrulama: {len(farklar)} fark bulundu.")
+        return 1 if farklar else 0
+    print(f"Özet tablosu yeniden kuruldu. Önceki durumda {len(farklar)} fark vardı.")
+    return 0
+
+def arama_yenile_komutu(argumanlar) -> int:
+    from app.arama import dizini_yenile
+
+    with Session(engine) as db:
+        adet = dizini_yenile(db)
+        db.commit()
+    print(f"Arama dizini yeniden kuruldu: {adet} kayıt.")
+    return 0
+
+def arsivle_komutu(argumanlar) -> int:
+    from app.arsiv import ARSIV_KLASORU, PARQUET_DESTEKLI, SICAK_AY, arsivlenecek_donemler, donem_arsivle
+
+    with Session(engine) as db:
+        aylar = arsivlenecek_donemler(db, argumanlar.sicak_ay or SICAK_AY)
+    if not aylar:
+        print("Arşivlenecek kapanmış dönem yok.")
+        return 0
+    if argumanlar.kuru:
+        print("Taşınacak dönemler: " + ", ".join(f"{ay:%Y-%m}" for ay in aylar))
+        return 0
+
+    print(f"Arşiv klasörü: {ARSIV_KLASORU} ({'Parquet' if PARQUET_DESTEKLI else 'JSONL.gz, pyarrow kurulu değil'})")
+    for ay in aylar:
+        # Her ay ayrı transaction: yarıda kesilirse taşınan aylar kalıcı, kalanlar yerinde
+        with Session(engine) as db:
+            kayit = donem_arsivle(db, ay)
+            db.commit()
+            if kayit:
+                print(f"{kayit.donem}: {kayit.satir_sayisi} hareket -> {kayit.dosya}")
+    return 0
+
+def goruntu_al_komutu(argumanlar) -> int:
+    from app.goruntu import eksik_goruntu_tarihleri, goruntu_al
+
+    with Session(engine) as db:
+        tarihler = eksik_goruntu_tarihleri(db, argumanlar.ay)
+    if not tarihler:
+        print("Eksik stok görüntüsü yok.")
+        return 0
+    # En yeniden eskiye: Her görüntü bir öncekinden (bir ay sonrasından) hesaplanır
+    for tarih in tarihler:
+        with Session(engine) as db:
+            try:
+                goruntu = goruntu_al(db, tarih)
+            except ValueError as hata:
+                print(f"Hata: {hata}")
+                return 2
+            db.commit()
+            if goruntu:
+                print(f"{tarih:%Y-%m-%d %H:%M}: Stok görüntüsü alındı.")
+    return 0
+
+def mutabakat_komutu(argumanlar) -> int:
+    from app.mutabakat import mutabakat
+    from app.ozet import ozet_yenile
+    from app.uyarilar import uyarilari_yenile
+
+    baslangic = time.perf_counter()
+    try:
+        sonuc = mutabakat(surec=argumanlar.surec, onar=argumanlar.onar)
+    except ValueError as hata:
+        print(f"Hata: {hata}")
+        return 2
+    sure = time.perf_counter() - baslangic
+
+    for fark in sonuc.farklar:
+        print(fark)
+    print(f"Mutabakat: {sonuc.okunan_hareket} hareket {sure:.1f} sn'de oynatıldı, {len(sonuc.farklar)} fark bulundu.")
+    if not argumanlar.onar:
+        return 1 if sonuc.farklar else 0
+
+    if sonuc.onarilan:
+        # Demirbaş adetleri özet tablosunda DemirbasVarlik'tan sayılır; onarımdan sonra tazelenir.
+        # Düzeltilen stok miktarları kritik stok uyarılarına da yansıtılır.
+        with Session(engine) as db:
+            ozet_yenile(db)
+            uyarilari_yenile(db)
+            db.commit()
+    print(f"Onarım: {sonuc.onarilan} kayıt düzeltildi, özet tablosu ve stok uyarıları yeniden kuruldu.")
+    return 0
+
+def uyari_yenile_komutu(argumanlar) -> int:
+    from app.uyarilar import uyarilari_yenile
+
+    with Session(engine) as db:
+        acilan, kapanan = uyarilari_yenile(db, bildir=argumanlar.bildir)
+        db.commit()
+    print(f"Stok uyarıları yenilendi: {acilan} açıldı, {kapanan} kapandı.")
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.komut", description="Depo Takip yönetim komutları")
+    alt = parser.add_subparsers(dest="komut", required=True)
+
+    kur = alt.add_parser("kur", help="Tabloları, index'leri ve tek seferlik hazırlıkları kurar; şema sürümünü yazar")
+    kur.set_defaults(calistir=kur_komutu)
+
+    ozet = alt.add_parser("ozet-yenile", help="Stok özet tablosunu Hareket logundan yeniden kurar ve doğrular")
+    ozet.add_argument("--sadece-dogrula", action="store_true", help="Tabloyu değiştirmeden farkları raporla")
+    ozet.set_defaults(calistir=ozet_yenile_komutu)
+
+    arama = alt.add_parser("arama-yenile", help="Ürün/personel/demirbaş arama dizinini yeniden kurar")
+    arama.set_defaults(calistir=arama_yenile_komutu)
+
+    arsiv = alt.add_parser("arsivle", help="Kapanmış eski ayların hareketlerini soğuk arşiv dosyalarına taşır")
+    arsiv.add_argument("--sicak-ay", type=int, default=None, help="Tabloda kalacak ay sayısı (Varsayılan: ARSIV_SICAK_AY)")
+    arsiv.add_argument("--kuru", action="store_true", help="Taşımadan sadece listele")
+    arsiv.set_defaults(calistir=arsivle_komutu)
+
+    goruntu = alt.add_parser("goruntu-al", help="Ay başı stok görüntüsü alır (geçmiş tarihli stok raporları için)")
+    goruntu.add_argument("--ay", type=int, default=1, help="Son kaç ay başı için eksik görüntü tamamlanacak (Varsayılan: 1)")
+    goruntu.set_defaults(calistir=goruntu_al_komutu)
+
+    mutabakat = alt.add_parser("mutabakat", help="Hareket logunu oynatıp stok ve demirbaş tablolarıyla karşılaştırır")
+    mutabakat.add_argument("--onar", action="store_true", help="Farkları logdaki değerlere göre düzelt")
+    mutabakat.add_argument("--surec", type=int, default=1, help="Ürünlere göre bölünmüş paralel süreç sayısı")
+    mutabakat.set_defaults(calistir=mutabakat_komutu)
+
+    uyari = alt.add_parser("uyari-yenile", help="Kritik stok uyarılarını tüm sarf stoğunu tarayarak açar/kapatır")
+    uyari.add_argument("--bildir", action="store_true", help="Açılan/kapanan uyarılar için webhook olayı da yaz")
+    uyari.set_defaults(calistir=uyari_yenile_komutu)
+
+    argumanlar = parser.parse_args(argv)
+    if argumanlar.calistir is not kur_komutu:
+        try:
+            sema_kontrol()
+        except RuntimeError as hata:
+            print(hata)
+            return 1
+    return argumanlar.calistir(argumanlar)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,32 +1,90 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-import os
-
-# DİKKAT: Başına nokta (.) koyduk. Bu "yanımdaki dosyalara bak" demektir.
-# Böylece "app.database" hatası almayız.
-from .database import engine, init_db
-from .routers import demirbas, islemler, rapor, tanimlamalar
-
-# Veritabanı tablolarını oluştur
-init_db()
-
-app = FastAPI()
-
-# Router'ları (Sayfaları) sisteme dahil et
-app.include_router(demirbas.router)
-app.include_router(islemler.router)
-app.include_router(rapor.router)
-app.include_router(tanimlamalar.router)
-
-# Statik dosyalar (HTML, CSS) için ayar
-# index.html dosyanın ana dizinde (DepoTakip içinde) olduğunu varsayıyoruz.
-if os.path.exists("index.html"):
-    app.mount("/static", StaticFiles(directory="."), name="static")
-
-@app.get("/")
-async def root():
-    # Eğer index.html varsa onu döndür, yoksa mesaj ver
-    if os.path.exists("index.html"):
-        from fastapi.responses import FileResponse
-        return FileResponse("index.html")
-    return {"message": "Depo Takip Sistemi Çalışıyor! (index.html bulunamadı)"}
\ No newline at end of file
+import time
+
+ACILIS_BASLANGICI = time.perf_counter() # Açılış süresi uygulama import'undan itibaren ölçülür
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+import asyncio
+import logging
+import os
+
+# DİKKAT: Başına nokta (.) koyduk. Bu "yanımdaki dosyalara bak" demektir.
+# Böylece "app.database" hatası almayız.
+from .canli import kapanis_sinyaline_bagla, log_izleme_dongusu, yayin_merkezi
+from .database import engine, async_engine, init_db, sema_kontrol, havuz_durumu
+from .idempotans import temizlik_dongusu
+from .metrikler import MetrikMiddleware, metrikleri_yazdir, acilis_suresini_kaydet
+from .rapor_isleri import is_dongusu
+from .uyarilar import webhook_dongusu
+from .routers import arama, canli, demirbas, islemler, rapor, tanimlamalar
+
+# Tablolar import sırasında kurulmaz (her worker DDL yarışına girerdi). Dağıtımda bir kez:
+#     python -m app.komut kur
+# Açılışta sadece şema sürümü kontrol edilir. Tek süreçli geliştirme ortamında
+# DB_OTOMATIK_KUR=1 verilirse şema açılışta kurulur/güncellenir.
+OTOMATIK_KUR = os.getenv("DB_OTOMATIK_KUR", "0") == "1"
+ACILIS_BUTCESI = float(os.getenv("ACILIS_BUTCESI_SN", "3")) # Aşılırsa uyarı loglanır (/metrics'te de görünür)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if OTOMATIK_KUR:
+        init_db()
+    else:
+        sema_kontrol()
+    sure = time.perf_counter() - ACILIS_BASLANGICI
+    acilis_suresini_kaydet(sure, ACILIS_BUTCESI)
+    if sure > ACILIS_BUTCESI:
+        logging.getLogger(__name__).warning("Açılış %.2f sn sürdü (bütçe %.2f sn).", sure, ACILIS_BUTCESI)
+
+    # Süresi dolan Idempotency-Key kayıtlarını arka planda temizle
+    temizlik = asyncio.create_task(temizlik_dongusu())
+    # Diğer worker'ların commit'lerini canlı güncelleme abonelerine ilet
+    log_izleme = asyncio.create_task(log_izleme_dongusu())
+    # Sıradaki ağır rapor işlerini çalıştır (tüm worker'larda RAPOR_IS_SAYISI sınırı)
+    rapor_isleri = asyncio.create_task(is_dongusu())
+    # Kritik stok uyarılarını webhook'a gönder (STOK_UYARI_WEBHOOK verildiyse)
+    webhook = asyncio.create_task(webhook_dongusu())
+    kapanis_sinyaline_bagla()
+    yield
+    yayin_merkezi.kapat()
+    rapor_isleri.cancel()
+    await asyncio.gather(rapor_isleri, return_exceptions=True) # Yarım işler sıraya geri konsun
+    webhook.cancel()
+    log_izleme.cancel()
+    temizlik.cancel()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetrikMiddleware)
+
+# Router'ları (Sayfaları) sisteme dahil et
+app.include_router(demirbas.router)
+app.include_router(islemler.router)
+app.include_router(rapor.router)
+app.include_router(tanimlamalar.router)
+app.include_router(arama.router)
+app.include_router(canli.router)
+
+# Arayüz tek dosyadır (index.html, "/" adresinden). Çalışma dizini /static ile
+# sunulmaz: Veritabanı ve veri dosyaları da bu dizinde olabilir.
+
+@app.get("/")
+async def root():
+    # Eğer index.html varsa onu döndür, yoksa mesaj ver
+    if os.path.exists("index.html"):
+        from fastapi.responses import FileResponse
+        return FileResponse("index.html")
+    return {"message": "Depo Takip Sistemi Çalışıyor! (index.html bulunamadı)"}
+
+@app.get("/sistem/havuz", tags=["Sistem"])
+def havuz_izle():
+    """Veritabanı bağlantı havuzunun anlık durumu (kullanımdaki/taşan bağlantı, bekleme süreleri)."""
+    durum = havuz_durumu()
+    if async_engine is not None:
+        durum["asenkron"] = havuz_durumu(async_engine)
+    return durum
+
+@app.get("/metrics", tags=["Sistem"])
+def metrikler():
+    """Prometheus metrikleri: Route başına süre, SQL sayısı, DB süresi ve havuz beklemesi."""
+    return PlainTextResponse(metrikleri_yazdir(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
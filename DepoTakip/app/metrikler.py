@@ -0,0 +1,257 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.database import engine, async_engine, havuz_durumu, bekleme_dinleyicileri
+
+# ----------------------------------------------------------------
+# METRİKLER (Prometheus /metrics)
+# ----------------------------------------------------------------
+# Her HTTP isteği için (route şablonu bazında, örn. /rapor/hareket/{id}):
+# - Toplam süre (yanıtın son baytına kadar; akış raporları dahil)
+# - Çalışan SQL cümlesi sayısı (N+1 sorgu kalıplarını yakalamak için)
+# - Veritabanında geçen süre ve havuzdan bağlantı beklerken geçen süre
+# Sayaçlar SQLAlchemy cursor olaylarından ve OlculenHavuz'dan toplanır; istek,
+# ContextVar ile takip edilir (thread havuzu ve run_sync bağlamı kopyalar).
+# Değerler worker (uvicorn süreci) başınadır; Prometheus her worker'ı ayrı toplar.
+#
+# Yavaş sorgu logu (opsiyonel): YAVAS_SORGU_MS=200 verilirse bu süreyi aşan her
+# sorgu, parametreleriyle birlikte 'app.yavas_sorgu' logger'ına yazılır.
+
+YAVAS_SORGU_MS = float(os.getenv("YAVAS_SORGU_MS", "0"))  # 0: Kapalı
+PARAMETRE_SINIRI = 2000 # Loga yazılan parametre metninin en fazla uzunluğu (toplu INSERT'ler uzun olur)
+
+SURE_ARALIKLARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SORGU_ARALIKLARI = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+yavas_sorgu_logu = logging.getLogger("app.yavas_sorgu")
+
+# ----------------------------------------------------------------
+# 1. METRİK TİPLERİ (Prometheus metin formatı)
+# ----------------------------------------------------------------
+def _etiketler(adlar: Tuple[str, ...], degerler: tuple, **ek) -> str:
+    ciftler = list(zip(adlar, degerler)) + list(ek.items())
+    kacisli = (
+        (ad, str(deger).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for ad, deger in ciftler
+    )
+    return "{" + ",".join(f'{ad}="{deger}"' for ad, deger in kacisli) + "}" if ciftler else ""
+
+def _sayi(deger: float) -> str:
+    return repr(float(deger)) if isinstance(deger, float) else str(deger)
+
+class Sayac:
+    def __init__(self, ad: str, aciklama: str, etiketler: Tuple[str, ...]):
+        self.ad, self.aciklama, self.etiketler = ad, aciklama, etiketler
+        self._kilit = threading.Lock()
+        self._seriler: Dict[tuple, float] = {}
+
+    def artir(self, degerler: tuple, miktar: float = 1) -> None:
+        with self._kilit:
+            self._seriler[degerler] = self._seriler.get(degerler, 0) + miktar
+
+    def yazdir(self) -> List[str]:
+        with self._kilit:
+            seriler = sorted(self._seriler.items())
+        satirlar = [f"# HELP {self.ad} {self.aciklama}", f"# TYPE {self.ad} counter"]
+        satirlar += [f"{self.ad}{_etiketler(self.etiketler, d)} {_sayi(v)}" for d, v in seriler]
+        return satirlar
+
+class Histogram:
+    def __init__(self, ad: str, aciklama: str, etiketler: Tuple[str, ...], araliklar: tuple):
+        self.ad, self.aciklama, self.etiketler, self.araliklar = ad, aciklama, etiketler, araliklar
+        self._kilit = threading.Lock()
+        # Etiket değerleri -> [kova adetleri..., toplam, adet] (kovalar birikimli değil)
+        self._seriler: Dict[tuple, list] = {}
+
+    def gozlemle(self, degerler: tuple, deger: float) -> None:
+        kova = bisect.bisect_left(self.araliklar, deger) # Değerin sığdığı ilk üst sınır (le)
+        with self._kilit:
+            seri = self._seriler.get(degerler)
+            if seri is None:
+                seri = self._seriler[degerler] = [0] * len(self.araliklar) + [0.0, 0]
+            if kova < len(self.araliklar):
+                seri[kova] += 1
+            seri[-2] += deger
+            seri[-1] += 1
+
+    def yazdir(self) -> List[str]:
+        with self._kilit:
+            seriler = sorted((d, list(s)) for d, s in self._seriler.items())
+        satirlar = [f"# HELP {self.ad} {self.aciklama}", f"# TYPE {self.ad} histogram"]
+        for degerler, seri in seriler:
+            birikimli = 0
+            for sinir, adet in zip(self.araliklar, seri):
+                birikimli += adet
+                satirlar.append(f"{self.ad}_bucket{_etiketler(self.etiketler, degerler, le=_sayi(sinir))} {birikimli}")
+            satirlar.append(f"{self.ad}_bucket{_etiketler(self.etiketler, degerler, le='+Inf')} {seri[-1]}")
+            satirlar.append(f"{self.ad}_sum{_etiketler(self.etiketler, degerler)} {_sayi(seri[-2])}")
+            satirlar.append(f"{self.ad}_count{_etiketler(self.etiketler, degerler)} {seri[-1]}")
+        return satirlar
+
+ISTEK_SAYISI = Sayac(
+    "depo_http_requests_total", "Tamamlanan HTTP istekleri.", ("method", "route", "status"))
+ISTEK_SURESI = Histogram(
+    "depo_http_request_duration_seconds", "İsteğin toplam süresi (yanıt gövdesinin sonuna kadar).",
+    ("method", "route"), SURE_ARALIKLARI)
+ISTEK_SORGU_SAYISI = Histogram(
+    "depo_http_request_db_queries", "İstek başına çalışan SQL cümlesi sayısı.",
+    ("method", "route"), SORGU_ARALIKLARI)
+ISTEK_DB_SURESI = Histogram(
+    "depo_http_request_db_seconds", "İstek başına veritabanında geçen süre.",
+    ("method", "route"), SURE_ARALIKLARI)
+ISTEK_HAVUZ_BEKLEMESI = Histogram(
+    "depo_http_request_pool_wait_seconds", "İstek başına havuzdan bağlantı beklerken geçen süre.",
+    ("method", "route"), SURE_ARALIKLARI)
+YAVAS_SORGU_SAYISI = Sayac(
+    "depo_db_slow_queries_total", "YAVAS_SORGU_MS eşiğini aşan sorgular.", ("route",))
+RAPOR_ONBELLEK_SONUCU = Sayac(
+    "depo_report_cache_total", "Rapor önbelleği isabetleri (hit) ve ıskaları (miss).", ("rapor", "sonuc"))
+WEBHOOK_GONDERIMI = Sayac(
+    "depo_webhook_deliveries_total", "Stok uyarısı webhook gönderim denemeleri (basarili/hata).", ("sonuc",))
+
+# ----------------------------------------------------------------
+# 2. İSTEK BAŞINA ÖLÇÜM
+# ----------------------------------------------------------------
+@dataclass
+class IstekOlcumu:
+    kapsam: dict # ASGI scope; route, eşleşme sonrası buraya yazılır
+    sorgu_sayisi: int = 0
+    db_suresi: float = 0.0
+    havuz_beklemesi: float = 0.0
+
+_istek_olcumu: ContextVar[Optional[IstekOlcumu]] = ContextVar("istek_olcumu", default=None)
+
+def _route_adi(kapsam: dict) -> str:
+    # Ham yol yerine şablon: /tanim/urun/5 ve /tanim/urun/6 aynı seridir.
+    # Eşleşmeyen yollar (404, statik dosyalar) tek seride toplanır.
+    return getattr(kapsam.get("route"), "path", None) or "diger"
+
+def _sorgu_basladi(baglanti, imlec, cumle, parametreler, baglam, coklu):
+    baglanti.info.setdefault("sorgu_baslangiclari", []).append(time.perf_counter())
+
+def _sorgu_bitti(baglanti, imlec, cumle, parametreler, baglam, coklu):
+    gecen = time.perf_counter() - baglanti.info["sorgu_baslangiclari"].pop()
+    olcum = _istek_olcumu.get()
+    if olcum is not None:
+        olcum.sorgu_sayisi += 1
+        olcum.db_suresi += gecen
+    if YAVAS_SORGU_MS and gecen * 1000 >= YAVAS_SORGU_MS:
+        route = _route_adi(olcum.kapsam) if olcum else "-"
+        YAVAS_SORGU_SAYISI.artir((route,))
+        yavas_sorgu_logu.warning(
+            "Yavaş sorgu %.1f ms [%s]%s: %s | parametreler: %.*s",
+            gecen * 1000, route, " (toplu)" if coklu else "", cumle, PARAMETRE_SINIRI, repr(parametreler)
+        )
+
+def _sorgu_hatasi(baglam):
+    # Hata veren cümle için after_cursor_execute çağrılmaz; başlangıç zamanı yığından atılır
+    baslangiclar = baglam.connection.info.get("sorgu_baslangiclari") if baglam.connection is not None else None
+    if baslangiclar:
+        baslangiclar.pop()
+
+def _havuz_beklemesi(gecen: float) -> None:
+    olcum = _istek_olcumu.get()
+    if olcum is not None:
+        olcum.havuz_beklemesi += gecen
+
+for _motor in filter(None, (engine, async_engine.sync_engine if async_engine is not None else None)):
+    event.listen(_motor, "before_cursor_execute", _sorgu_basladi)
+    event.listen(_motor, "after_cursor_execute", _sorgu_bitti)
+    event.listen(_motor, "handle_error", _sorgu_hatasi)
+bekleme_dinleyicileri.append(_havuz_beklemesi)
+
+class MetrikMiddleware:
+    """Saf ASGI middleware: Akış yanıtlarını tamponlamaz, süreyi son bayta kadar ölçer."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        olcum = IstekOlcumu(kapsam=scope)
+        jeton = _istek_olcumu.set(olcum)
+        durum = 500 # Yanıt başlamadan düşen istek
+
+        async def gonder(mesaj):
+            nonlocal durum
+            if mesaj["type"] == "http.response.start":
+                durum = mesaj["status"]
+            await send(mesaj)
+
+        baslangic = time.perf_counter()
+        try:
+            await self.app(scope, receive, gonder)
+        finally:
+            gecen = time.perf_counter() - baslangic
+            _istek_olcumu.reset(jeton)
+            etiket = (scope["method"], _route_adi(scope))
+            ISTEK_SAYISI.artir(etiket + (str(durum),))
+            ISTEK_SURESI.gozlemle(etiket, gecen)
+            ISTEK_SORGU_SAYISI.gozlemle(etiket, olcum.sorgu_sayisi)
+            ISTEK_DB_SURESI.gozlemle(etiket, olcum.db_suresi)
+            ISTEK_HAVUZ_BEKLEMESI.gozlemle(etiket, olcum.havuz_beklemesi)
+
+# ----------------------------------------------------------------
+# 3. ÇIKTI
+# ----------------------------------------------------------------
+# havuz_durumu() alanı -> (metrik adı, tip, açıklama)
+HAVUZ_METRIKLERI = {
+    "boyut": ("depo_db_pool_size", "gauge", "Havuzda sürekli açık tutulan bağlantı sayısı."),
+    "kullanimda": ("depo_db_pool_checked_out", "gauge", "Şu an kullanımdaki bağlantılar."),
+    "bosta": ("depo_db_pool_idle", "gauge", "Havuzda boşta bekleyen bağlantılar."),
+    "tasma": ("depo_db_pool_overflow", "gauge", "Havuz boyutunun üstünde açılmış bağlantılar."),
+    "bekleme_sayisi": ("depo_db_pool_checkouts_total", "counter", "Havuzdan bağlantı alma sayısı."),
+    "toplam_bekleme_sn": ("depo_db_pool_wait_seconds_total", "counter", "Havuzdan bağlantı beklerken geçen toplam süre."),
+    "zaman_asimi_sayisi": ("depo_db_pool_timeouts_total", "counter", "Bağlantı beklerken zaman aşımına düşen istekler."),
+}
+
+def _havuz_satirlari() -> List[str]:
+    motorlar = [("senkron", engine)] + ([("asenkron", async_engine)] if async_engine is not None else [])
+    durumlar = [(ad, havuz_durumu(motor)) for ad, motor in motorlar]
+    satirlar = []
+    for alan, (ad, tip, aciklama) in HAVUZ_METRIKLERI.items():
+        degerler = [(motor, d[alan]) for motor, d in durumlar if alan in d]
+        if not degerler:
+            continue
+        satirlar += [f"# HELP {ad} {aciklama}", f"# TYPE {ad} {tip}"]
+        satirlar += [f'{ad}{{engine="{motor}"}} {_sayi(deger)}' for motor, deger in degerler]
+    return satirlar
+
+_acilis: Dict[str, float] = {}
+
+def acilis_suresini_kaydet(sure: float, butce: float) -> None:
+    """main.py lifespan'i çağırır: Import'tan isteğe hazır olana kadar geçen süre ve bütçesi."""
+    _acilis.update(sure=sure, butce=butce)
+
+def _acilis_satirlari() -> List[str]:
+    if not _acilis:
+        return []
+    return [
+        "# HELP depo_startup_seconds Uygulama import'undan isteklere hazır olana kadar geçen süre.",
+        "# TYPE depo_startup_seconds gauge",
+        f"depo_startup_seconds {_sayi(_acilis['sure'])}",
+        "# HELP depo_startup_budget_seconds Açılış süresi bütçesi (ACILIS_BUTCESI_SN).",
+        "# TYPE depo_startup_budget_seconds gauge",
+        f"depo_startup_budget_seconds {_sayi(_acilis['butce'])}",
+    ]
+
+def metrikleri_yazdir() -> str:
+    """Tüm metrikler, Prometheus metin formatında (text/plain; version=0.0.4)."""
+    satirlar = []
+    for metrik in (ISTEK_SAYISI, ISTEK_SURESI, ISTEK_SORGU_SAYISI, ISTEK_DB_SURESI, ISTEK_HAVUZ_BEKLEMESI, YAVAS_SORGU_SAYISI,
+                   RAPOR_ONBELLEK_SONUCU, WEBHOOK_GONDERIMI):
+        satirlar += metrik.yazdir()
+    satirlar += _havuz_satirlari()
+    satirlar += _acilis_satirlari()
+    return "\n".join(satirlar) + "\n"
\ No newline at end of file
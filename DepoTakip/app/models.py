@@ -1,118 +1,370 @@
-from typing import Optional, List
-from datetime import datetime
-from sqlmodel import SQLModel, Field, Relationship, Enum
-import enum
-
-# --- ENUM TİPLERİ (Sistemin Kırmızı Çizgileri) ---
-
-class UrunTipi(str, enum.Enum):
-    SARF = "SARF"           # Adet/Miktar ile takip edilir, tükenir.
-    DEMIRBAS = "DEMIRBAS"   # Tekil takip edilir, zimmetlenir, tükenmez.
-
-class DemirbasDurumu(str, enum.Enum):
-    DEPODA = "DEPODA"       # Depo rafında bekliyor
-    ZIMMETLI = "ZIMMETLI"   # Bir personel veya bölümde kullanımda
-    ARIZALI = "ARIZALI"     # Tamir bekliyor veya bozuk
-    HURDA = "HURDA"         # Kullanım dışı (Çöp)
-
-class IslemTipi(str, enum.Enum):
-    GIRIS = "GIRIS"                 # Satın alma / İlk giriş
-    CIKIS = "CIKIS"                 # Sarf tüketim çıkışı
-    TRANSFER = "TRANSFER"           # Depolar arası transfer
-    ZIMMET_VER = "ZIMMET_VER"       # Demirbaşın personele/bölüme verilmesi
-    ZIMMET_IADE = "ZIMMET_IADE"     # Demirbaşın depoya geri dönmesi
-    DURUM_DEGISTIR = "DURUM_DEGISTIR" # Sağlam -> Arızalı vb.
-
-# --- TEMEL VARLIKLAR ---
-
-class Depo(SQLModel, table=True):
-    __tablename__ = "depolar"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    ad: str = Field(unique=True, index=True)
-    aciklama: Optional[str] = None
-    aktif_mi: bool = Field(default=True) # Silme yok, pasife alma var.
-    olusturma_tarihi: datetime = Field(default_factory=datetime.now)
-
-class Bolum(SQLModel, table=True):
-    __tablename__ = "bolumler"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    ad: str = Field(unique=True, index=True) # Örn: Kaynak Atölyesi
-    aktif_mi: bool = Field(default=True)
-
-class Personel(SQLModel, table=True):
-    __tablename__ = "personel"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    ad_soyad: str = Field(index=True)
-    bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
-    aktif_mi: bool = Field(default=True) # Pasif personel zimmet alamaz.
-
-class Urun(SQLModel, table=True):
-    __tablename__ = "urunler"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    ad: str = Field(index=True)
-    sku: str = Field(unique=True, index=True) # Barkod / Stok Kodu
-    tip: UrunTipi = Field(index=True) # SARF veya DEMIRBAS
-    birim: str # Adet, Kg, Metre, Koli
-    guvenlik_stogu: int = Field(default=0) # Kritik seviye uyarısı için
-    aktif_mi: bool = Field(default=True)
-
-# --- STOK YÖNETİMİ (SARF) ---
-
-class StokSarf(SQLModel, table=True):
-    """
-    Sarf malzemelerin hangi depoda ne kadar olduğunu tutar.
-    Demirbaşlar bu tabloda ASLA yer almaz.
-    """
-    __tablename__ = "stok_sarf"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    depo_id: int = Field(foreign_key="depolar.id", index=True)
-    urun_id: int = Field(foreign_key="urunler.id", index=True)
-    miktar: float = Field(default=0) # Negatif olamaz (Logic ile korunacak)
-
-# --- VARLIK YÖNETİMİ (DEMİRBAŞ) ---
-
-class DemirbasVarlik(SQLModel, table=True):
-    """
-    Her bir satır, fiziksel bir demirbaşı temsil eder.
-    10 tane Laptop aldıysak, burada 10 ayrı satır (ID) oluşur.
-    """
-    __tablename__ = "demirbas_varliklar"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    urun_id: int = Field(foreign_key="urunler.id")
-    seri_no: Optional[str] = Field(default=None) # Cihaz üzerindeki seri no
-    ozel_kod: str = Field(unique=True, index=True) # Şirketin verdiği demirbaş no (QR Kodu)
-    
-    durum: DemirbasDurumu = Field(default=DemirbasDurumu.DEPODA)
-    
-    # Lokasyon Bilgisi (Sadece biri dolu olabilir mantığı kod tarafında yönetilecek)
-    bulundugu_depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
-    zimmetli_personel_id: Optional[int] = Field(default=None, foreign_key="personel.id")
-    zimmetli_bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
-
-# --- HAREKET LOGLARI (LOGGING) ---
-
-class Hareket(SQLModel, table=True):
-    """
-    Sistemdeki her işlemin izi burada tutulur. Asla silinmez.
-    """
-    __tablename__ = "hareketler"
-    id: Optional[int] = Field(default=None, primary_key=True)
-    tarih: datetime = Field(default_factory=datetime.now, index=True)
-    islem_tipi: IslemTipi
-    
-    urun_id: int = Field(foreign_key="urunler.id")
-    
-    # Kaynak ve Hedef (Nereden Nereye?)
-    cikis_depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
-    giris_depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
-    
-    # İlgili Kişi/Bölüm (Zimmet için)
-    personel_id: Optional[int] = Field(default=None, foreign_key="personel.id")
-    bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
-    
-    # Detaylar
-    miktar: float = Field(default=1) # Sarf için miktar, Demirbaş için genelde 1
-    demirbas_id: Optional[int] = Field(default=None, foreign_key="demirbas_varliklar.id")
-    
-    aciklama: Optional[str] = None
-    kullanici: str = Field(default="Sistem") # İşlemi yapan admin/kullanıcı adı
\ No newline at end of file
+from typing import Optional, List
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Relationship, Enum, Index, text
+import enum
+
+# --- ENUM TİPLERİ (Sistemin Kırmızı Çizgileri) ---
+
+class UrunTipi(str, enum.Enum):
+    SARF = "SARF"           # Adet/Miktar ile takip edilir, tükenir.
+    DEMIRBAS = "DEMIRBAS"   # Tekil takip edilir, zimmetlenir, tükenmez.
+
+class DemirbasDurumu(str, enum.Enum):
+    DEPODA = "DEPODA"       # Depo rafında bekliyor
+    ZIMMETLI = "ZIMMETLI"   # Bir personel veya bölümde kullanımda
+    ARIZALI = "ARIZALI"     # Tamir bekliyor veya bozuk
+    HURDA = "HURDA"         # Kullanım dışı (Çöp)
+
+class IslemTipi(str, enum.Enum):
+    GIRIS = "GIRIS"                 # Satın alma / İlk giriş
+    CIKIS = "CIKIS"                 # Sarf tüketim çıkışı
+    TRANSFER = "TRANSFER"           # Depolar arası transfer
+    ZIMMET_VER = "ZIMMET_VER"       # Demirbaşın personele/bölüme verilmesi
+    ZIMMET_IADE = "ZIMMET_IADE"     # Demirbaşın depoya geri dönmesi
+    DURUM_DEGISTIR = "DURUM_DEGISTIR" # Sağlam -> Arızalı vb.
+
+class RaporIsiDurumu(str, enum.Enum):
+    BEKLIYOR = "BEKLIYOR"   # Sırada, çalıştırılacak süreci bekliyor
+    CALISIYOR = "CALISIYOR" # Bir worker dosyayı üretiyor
+    TAMAM = "TAMAM"         # Dosya hazır, indirilebilir
+    HATA = "HATA"           # Başarısız (Aynı istek tekrar gönderilirse yeniden denenir)
+
+class StokUyariDurumu(str, enum.Enum):
+    AKTIF = "AKTIF"         # Stok güvenlik seviyesine indi, henüz toparlanmadı
+    KAPANDI = "KAPANDI"     # Stok kapanış eşiğinin üstüne çıktı
+
+class WebhookDurumu(str, enum.Enum):
+    BEKLIYOR = "BEKLIYOR"       # Gönderilecek (ya da sonraki_deneme'de yeniden denenecek)
+    GONDERILDI = "GONDERILDI"   # Karşı taraf 2xx döndü
+    HATA = "HATA"               # Deneme hakkı bitti
+
+# --- TEMEL VARLIKLAR ---
+
+class Depo(SQLModel, table=True):
+    __tablename__ = "depolar"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ad: str = Field(unique=True, index=True)
+    aciklama: Optional[str] = None
+    aktif_mi: bool = Field(default=True) # Silme yok, pasife alma var.
+    olusturma_tarihi: datetime = Field(default_factory=datetime.now)
+
+class Bolum(SQLModel, table=True):
+    __tablename__ = "bolumler"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ad: str = Field(unique=True, index=True) # Örn: Kaynak Atölyesi
+    aktif_mi: bool = Field(default=True)
+
+class Personel(SQLModel, table=True):
+    __tablename__ = "personel"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ad_soyad: str = Field(index=True)
+    bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
+    aktif_mi: bool = Field(default=True) # Pasif personel zimmet alamaz.
+
+class Urun(SQLModel, table=True):
+    __tablename__ = "urunler"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ad: str = Field(index=True)
+    sku: str = Field(unique=True, index=True) # Barkod / Stok Kodu
+    tip: UrunTipi = Field(index=True) # SARF veya DEMIRBAS
+    birim: str # Adet, Kg, Metre, Koli
+    guvenlik_stogu: int = Field(default=0) # Kritik seviye uyarısı için
+    aktif_mi: bool = Field(default=True)
+
+# --- STOK YÖNETİMİ (SARF) ---
+
+class StokSarf(SQLModel, table=True):
+    """
+    Sarf malzemelerin hangi depoda ne kadar olduğunu tutar.
+    Demirbaşlar bu tabloda ASLA yer almaz.
+    """
+    __tablename__ = "stok_sarf"
+    __table_args__ = (
+        # Bir depoda bir ürün için tek stok satırı olabilir (UPSERT bu index'e dayanır)
+        Index("uq_stok_sarf_depo_urun", "depo_id", "urun_id", unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    depo_id: int = Field(foreign_key="depolar.id", index=True)
+    urun_id: int = Field(foreign_key="urunler.id", index=True)
+    miktar: float = Field(default=0) # Negatif olamaz (app/stok.py atomik UPDATE ile korur)
+
+# --- VARLIK YÖNETİMİ (DEMİRBAŞ) ---
+
+class DemirbasVarlik(SQLModel, table=True):
+    """
+    Her bir satır, fiziksel bir demirbaşı temsil eder.
+    10 tane Laptop aldıysak, burada 10 ayrı satır (ID) oluşur.
+    """
+    __tablename__ = "demirbas_varliklar"
+    __table_args__ = (
+        # Liste/zimmet raporu filtreleri: durum (+ ürün), kime zimmetli, hangi depoda
+        Index("ix_demirbas_durum_urun", "durum", "urun_id"),
+        Index("ix_demirbas_personel", "zimmetli_personel_id"),
+        Index("ix_demirbas_bolum", "zimmetli_bolum_id"),
+        Index("ix_demirbas_depo_durum", "bulundugu_depo_id", "durum"),
+        Index("ix_demirbas_urun", "urun_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    urun_id: int = Field(foreign_key="urunler.id")
+    seri_no: Optional[str] = Field(default=None) # Cihaz üzerindeki seri no
+    ozel_kod: str = Field(unique=True, index=True) # Şirketin verdiği demirbaş no (QR Kodu)
+    
+    durum: DemirbasDurumu = Field(default=DemirbasDurumu.DEPODA)
+    
+    # Lokasyon Bilgisi (Sadece biri dolu olabilir mantığı kod tarafında yönetilecek)
+    bulundugu_depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
+    zimmetli_personel_id: Optional[int] = Field(default=None, foreign_key="personel.id")
+    zimmetli_bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
+
+# --- HAREKET LOGLARI (LOGGING) ---
+
+class Hareket(SQLModel, table=True):
+    """
+    Sistemdeki her işlemin izi burada tutulur. Asla silinmez; kapanmış eski
+    aylar soğuk arşiv dosyalarına taşınır (app/arsiv.py, HareketArsivi).
+    """
+    __tablename__ = "hareketler"
+    __table_args__ = (
+        # Geçmiş raporu: her filtre kendi index'inden (tarih, id) sırasıyla okunur;
+        # "tarih desc, id desc" sıralaması ve imleç sayfalaması ek sıralama gerektirmez.
+        Index("ix_hareket_tip_tarih", "islem_tipi", "tarih", "id"),
+        Index("ix_hareket_personel_tarih", "personel_id", "tarih", "id"),
+        Index("ix_hareket_cikis_depo_tarih", "cikis_depo_id", "tarih", "id"),
+        Index("ix_hareket_giris_depo_tarih", "giris_depo_id", "tarih", "id"),
+        Index("ix_hareket_urun_tarih", "urun_id", "tarih", "id"),
+        Index("ix_hareket_demirbas", "demirbas_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    tarih: datetime = Field(default_factory=datetime.now, index=True)
+    islem_tipi: IslemTipi
+    
+    urun_id: int = Field(foreign_key="urunler.id")
+    
+    # Kaynak ve Hedef (Nereden Nereye?)
+    cikis_depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
+    giris_depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
+    
+    # İlgili Kişi/Bölüm (Zimmet için)
+    personel_id: Optional[int] = Field(default=None, foreign_key="personel.id")
+    bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
+    
+    # Detaylar
+    miktar: float = Field(default=1) # Sarf için miktar, Demirbaş için genelde 1
+    demirbas_id: Optional[int] = Field(default=None, foreign_key="demirbas_varliklar.id")
+    
+    aciklama: Optional[str] = None
+    kullanici: str = Field(default="Sistem") # İşlemi yapan admin/kullanıcı adı
+
+class HareketArsivi(SQLModel, table=True):
+    """
+    Soğuk arşive taşınmış kapalı dönemlerin (ay) kataloğu. Dönemin hareketleri
+    sıcak tablodan silinip sıkıştırılmış dosyaya (Parquet / JSONL.gz) yazılmıştır.
+    Raporlar tarih filtresiyle çakışmayan dönemlerin dosyasını hiç açmaz.
+    """
+    __tablename__ = "hareket_arsivi"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    donem: str = Field(unique=True, index=True) # "2024-03"
+    dosya: str # Arşiv klasörüne göre yol
+    satir_sayisi: int
+    ilk_tarih: datetime
+    son_tarih: datetime
+    olusturma_tarihi: datetime = Field(default_factory=datetime.now)
+
+class HareketArsivToplami(SQLModel, table=True):
+    """
+    Arşivlenen dönemdeki sarf hareketlerinin (ürün, depo) bazında net toplamı.
+    Özet/stok doğrulaması arşiv dosyalarını okumadan bu satırları kullanır.
+    """
+    __tablename__ = "hareket_arsiv_toplami"
+    __table_args__ = (
+        Index("uq_hareket_arsiv_toplami", "donem", "urun_id", "depo_id", unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    donem: str
+    urun_id: int = Field(foreign_key="urunler.id")
+    depo_id: int = Field(foreign_key="depolar.id")
+    miktar: float # Giren - çıkan
+
+# --- ÖZET TABLO (DASHBOARD) ---
+
+class StokOzet(SQLModel, table=True):
+    """
+    Ürün bazında hazır (materialized) stok özeti. Her hareketle aynı transaction
+    içinde artımlı güncellenir; dashboard join/hesap yapmadan buradan okur.
+    depo_id = 0 olan satır ürünün TÜM depolardaki toplamıdır.
+    Hareket logundan yeniden kurmak için: python -m app.komut ozet-yenile
+    """
+    __tablename__ = "stok_ozet"
+    __table_args__ = (
+        Index("uq_stok_ozet_urun_depo", "urun_id", "depo_id", unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    urun_id: int = Field(foreign_key="urunler.id")
+    depo_id: int = Field(default=0, index=True) # 0 = Tüm depolar (Bu yüzden FK yok)
+
+    sarf_miktar: float = Field(default=0)
+
+    # Demirbaş adetleri (Duruma göre). Zimmetliler depoda olmadığı için sadece toplam satırında.
+    depoda: int = Field(default=0)
+    zimmetli: int = Field(default=0)
+    arizali: int = Field(default=0)
+    hurda: int = Field(default=0)
+
+    kritik_mi: bool = Field(default=False, index=True) # Sarf miktarı <= Güvenlik stoğu
+
+# --- STOK GÖRÜNTÜLERİ (GEÇMİŞ TARİHLİ STOK) ---
+
+class StokGoruntusu(SQLModel, table=True):
+    """
+    Dönem sınırında (ay başı 00:00) stok durumunun görüntüsü.
+    'tarih' anından ÖNCEKİ tüm hareketler dahildir. Oluşturmak için:
+    python -m app.komut goruntu-al
+    """
+    __tablename__ = "stok_goruntuleri"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    tarih: datetime = Field(unique=True, index=True)
+    olusturma_tarihi: datetime = Field(default_factory=datetime.now)
+
+class StokGoruntusuSarf(SQLModel, table=True):
+    """Görüntü anındaki sarf bakiyeleri (StokSarf kopyası, sıfır olmayanlar)."""
+    __tablename__ = "stok_goruntusu_sarf"
+    __table_args__ = (
+        Index("ix_stok_goruntusu_sarf_depo", "goruntu_id", "depo_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    goruntu_id: int = Field(foreign_key="stok_goruntuleri.id")
+    depo_id: int = Field(foreign_key="depolar.id")
+    urun_id: int = Field(foreign_key="urunler.id")
+    miktar: float
+
+class StokGoruntusuDemirbas(SQLModel, table=True):
+    """Görüntü anında her demirbaşın durumu ve konumu (DemirbasVarlik kopyası)."""
+    __tablename__ = "stok_goruntusu_demirbas"
+    __table_args__ = (
+        Index("ix_stok_goruntusu_demirbas_depo", "goruntu_id", "depo_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    goruntu_id: int = Field(foreign_key="stok_goruntuleri.id")
+    demirbas_id: int = Field(foreign_key="demirbas_varliklar.id")
+    urun_id: int = Field(foreign_key="urunler.id")
+    durum: DemirbasDurumu
+    depo_id: Optional[int] = Field(default=None, foreign_key="depolar.id")
+    personel_id: Optional[int] = Field(default=None, foreign_key="personel.id")
+    bolum_id: Optional[int] = Field(default=None, foreign_key="bolumler.id")
+
+# --- İSTEK TEKRARI KORUMASI (IDEMPOTENCY-KEY) ---
+
+class IdempotansKaydi(SQLModel, table=True):
+    """
+    El terminallerinin tekrar gönderdiği isteklerin ilk yanıtı. Aynı anahtarla gelen
+    istek işlem yapılmadan bu yanıtı alır. Süresi dolanlar arka planda silinir (app/idempotans.py).
+    """
+    __tablename__ = "idempotans_kayitlari"
+    anahtar: str = Field(primary_key=True, max_length=255) # İstemcinin gönderdiği Idempotency-Key
+    uc_nokta: str # Örn: /islem/cikis
+    istek_ozeti: str # Gövdenin SHA-256 özeti (Aynı anahtar başka istekte kullanılamaz)
+    yanit: Optional[str] = None # İlk yanıt (JSON)
+    olusturma_tarihi: datetime = Field(default_factory=datetime.now)
+    son_gecerlilik: datetime = Field(index=True)
+
+# --- ARKA PLAN RAPOR İŞLERİ ---
+
+class RaporIsi(SQLModel, table=True):
+    """
+    Arka planda dosyaya üretilen ağır rapor (app/rapor_isleri.py). İstemci iş
+    durumunu sorgular, hazır olunca dosyayı indirir. Saklama süresi dolanlar silinir.
+    """
+    __tablename__ = "rapor_isleri"
+    __table_args__ = (
+        # Aynı filtre + biçim için sırada/çalışan tek iş olabilir (eşzamanlı aynı istekler birleşir)
+        Index(
+            "uq_rapor_isleri_aktif", "ozet", unique=True,
+            sqlite_where=text("durum IN ('BEKLIYOR', 'CALISIYOR')"),
+            postgresql_where=text("durum IN ('BEKLIYOR', 'CALISIYOR')"),
+        ),
+    )
+    id: str = Field(primary_key=True, max_length=32) # uuid4 (Tahmin edilemez; indirme adresinde kullanılır)
+    ozet: str = Field(index=True, max_length=40) # Normalize filtre + biçim özeti
+    bicim: str # csv / xlsx
+    parametreler: str # HareketFiltre (JSON)
+    durum: RaporIsiDurumu = Field(default=RaporIsiDurumu.BEKLIYOR, index=True)
+    satir_sayisi: int = Field(default=0)
+    defter_surumu: Optional[str] = Field(default=None, max_length=40) # Sorgu başlarken defter sürümü; değişmediyse sonuç yeniden kullanılır
+    dosya: Optional[str] = None # Rapor işleri klasörüne göre yol
+    hata: Optional[str] = None
+    olusturma_tarihi: datetime = Field(default_factory=datetime.now, index=True)
+    baslama_tarihi: Optional[datetime] = None
+    yoklama_tarihi: Optional[datetime] = None # Çalıştıran süreç hayatta mı? (Düzenli yenilenir)
+    bitis_tarihi: Optional[datetime] = None
+
+# --- KRİTİK STOK UYARILARI ---
+
+class StokUyarisi(SQLModel, table=True):
+    """
+    Bir depodaki sarf ürünün güvenlik stoğuna inmesiyle açılan uyarı (app/uyarilar.py).
+    Stok kapanış eşiğinin üstüne çıkınca kapanır; kapanan satırlar geçmiş olarak kalır.
+    """
+    __tablename__ = "stok_uyarilari"
+    __table_args__ = (
+        # Bir depo-ürün için tek açık uyarı olabilir (eşzamanlı çıkışlar ikinci uyarı açamaz)
+        Index(
+            "uq_stok_uyarilari_aktif", "depo_id", "urun_id", unique=True,
+            sqlite_where=text("durum = 'AKTIF'"),
+            postgresql_where=text("durum = 'AKTIF'"),
+        ),
+        Index("ix_stok_uyarilari_urun_depo", "urun_id", "depo_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    depo_id: int = Field(foreign_key="depolar.id")
+    urun_id: int = Field(foreign_key="urunler.id")
+    durum: StokUyariDurumu = Field(default=StokUyariDurumu.AKTIF, index=True)
+    esik: int # Açılıştaki güvenlik stoğu
+    acilis_miktari: float
+    kapanis_miktari: Optional[float] = None
+    acilis_tarihi: datetime = Field(default_factory=datetime.now, index=True)
+    kapanis_tarihi: Optional[datetime] = None
+
+class WebhookOlayi(SQLModel, table=True):
+    """
+    Dışarıya gönderilecek uyarı olayı (giden kutusu). Uyarıyla aynı transaction'da
+    yazılır; uygulama süreçleri sırayla gönderir, başarısızları bekleyerek yeniden dener.
+    """
+    __tablename__ = "webhook_kuyrugu"
+    __table_args__ = (
+        Index("ix_webhook_kuyrugu_sira", "durum", "sonraki_deneme", "id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True) # Alıcıya X-Olay-Id olarak gider (tekrarları ayıklar)
+    olay: str # stok.kritik / stok.normal
+    govde: str # JSON
+    durum: WebhookDurumu = Field(default=WebhookDurumu.BEKLIYOR)
+    deneme: int = Field(default=0)
+    sonraki_deneme: datetime = Field(default_factory=datetime.now)
+    son_hata: Optional[str] = None
+    olusturma_tarihi: datetime = Field(default_factory=datetime.now)
+    gonderim_tarihi: Optional[datetime] = None
+
+# --- ŞEMA SÜRÜMÜ ---
+
+class SemaSurumu(SQLModel, table=True):
+    """
+    Kurulu şemanın sürümü (tek satır). 'python -m app.komut kur' yazar;
+    uygulama açılışta sadece okur (app/database.py, sema_kontrol).
+    """
+    __tablename__ = "sema_surumu"
+    id: int = Field(default=1, primary_key=True)
+    surum: int
+    kurulum_tarihi: datetime = Field(default_factory=datetime.now)
+
+# --- DEFTER SÜRÜMÜ (Rapor önbelleği) ---
+
+class DefterSurumu(SQLModel, table=True):
+    """
+    Hareket defterinin sürüm sayacı (tek satır). Defter sürümü bu sayaç ile en büyük
+    Hareket id'sinden oluşur; sayacı sadece Hareket eklemeden raporlanan tablolara
+    yazan transaction'lar artırır (app/rapor_onbellegi.py). 'kimlik' kurulumda bir kez
+    üretilir; paylaşılan önbellekte farklı veritabanlarının kayıtları karışmaz.
+    """
+    __tablename__ = "defter_surumu"
+    id: int = Field(default=1, primary_key=True)
+    kimlik: str
+    surum: int = Field(default=0)
\ No newline at end of file
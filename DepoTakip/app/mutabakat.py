@@ -0,0 +1,286 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import true
+from sqlmodel import Session, select, update, insert
+
+from app.arsiv import arsiv_hareketleri
+from app.database import engine
+from app.rapor_onbellegi import defter_surumunu_artir
+from app.models import (
+    Hareket, HareketArsivToplami, Urun, StokSarf, DemirbasVarlik,
+    UrunTipi, IslemTipi, DemirbasDurumu
+)
+
+# ----------------------------------------------------------------
+# MUTABAKAT (Hareket logunu baştan oynatıp tablolarla karşılaştırma)
+# ----------------------------------------------------------------
+# ozet-yenile sarf toplamlarını SQL GROUP BY ile alır. Bu motor ise logu id
+# sırasıyla akıtır (sunucu taraflı imleç, PARCA satırlık parçalar) ve her hareketi
+# sırayla uygular:
+# - Sarf: (depo_id, urun_id) -> bakiye sözlüğü. Bellek satır sayısıyla değil anahtar
+#   sayısıyla büyür. Bakiyenin eksiye düştüğü ilk hareket de yakalanır (GROUP BY bunu göremez).
+# - Demirbaş: demirbas_id -> son hareketin belirlediği konum.
+# - Arşive taşınmış aylar: Sarf için dönem toplamları (HareketArsivToplami), demirbaş
+#   için dosyadaki demirbaş satırları okunur.
+# Log ve tablolar tek bir anlık görüntüden (snapshot) okunur, onarım da aynı transaction'da
+# yazılır. Bu arada başka bir yazma olduysa onarım kilit/serileştirme hatasıyla düşer;
+# tekrar çalıştırmak yeterlidir.
+# Çok süreçli modda iş urun_id'ye göre parçalanır (urun_id % N). Bir hareket tek ürüne
+# ait olduğu için her parça kendi anlık görüntüsünde tutarlıdır.
+
+PARCA = 50_000        # İmleçten tek seferde çekilen satır
+KUSURAT = 1e-6        # Ondalıklı toplama sırasından doğan farklar yok sayılır
+EN_FAZLA_EKSI = 1000  # Raporlanacak en fazla eksi bakiye
+
+GIRIS_TIPLERI = frozenset({IslemTipi.GIRIS, IslemTipi.TRANSFER})
+CIKIS_TIPLERI = frozenset({IslemTipi.CIKIS, IslemTipi.TRANSFER})
+
+# Logdan beklenen demirbaş konumu: (urun_id, durum, depo_id, personel_id, bolum_id).
+# İadede yeni durum logda sütun olarak tutulmaz; durum=None "ZIMMETLI dışında herhangi biri" demektir.
+Konum = Tuple[int, Optional[DemirbasDurumu], Optional[int], Optional[int], Optional[int]]
+
+@dataclass
+class SarfFarki:
+    depo_id: int
+    urun_id: int
+    tabloda: float
+    logda: float
+
+    def __str__(self):
+        return f"StokSarf depo={self.depo_id} ürün={self.urun_id}: tabloda {self.tabloda}, Hareket logunda {self.logda}"
+
+def _konum_metni(konum: Konum) -> str:
+    urun_id, durum, depo_id, personel_id, bolum_id = konum
+    durum = durum.value if durum else "ZIMMETLI dışı"
+    return f"ürün={urun_id} durum={durum} depo={depo_id} personel={personel_id} bölüm={bolum_id}"
+
+@dataclass
+class DemirbasFarki:
+    demirbas_id: int
+    tabloda: Optional[Konum]
+    logda: Optional[Konum]
+
+    def __str__(self):
+        if self.logda is None:
+            return f"Demirbaş id={self.demirbas_id}: Hareket logunda giriş kaydı yok (tabloda {_konum_metni(self.tabloda)})"
+        if self.tabloda is None:
+            return f"Demirbaş id={self.demirbas_id}: Tabloda yok (Hareket logunda {_konum_metni(self.logda)})"
+        return f"Demirbaş id={self.demirbas_id}: tabloda {_konum_metni(self.tabloda)}, Hareket logunda {_konum_metni(self.logda)}"
+
+@dataclass
+class EksiBakiye:
+    hareket_id: int
+    depo_id: int
+    urun_id: int
+    bakiye: float
+
+    def __str__(self):
+        return f"Eksi bakiye: hareket id={self.hareket_id} sonrası depo={self.depo_id} ürün={self.urun_id} bakiye {self.bakiye}"
+
+@dataclass
+class MutabakatSonucu:
+    okunan_hareket: int = 0
+    sarf_farklari: List[SarfFarki] = field(default_factory=list)
+    demirbas_farklari: List[DemirbasFarki] = field(default_factory=list)
+    eksi_bakiyeler: List[EksiBakiye] = field(default_factory=list)
+    onarilan: int = 0
+
+    @property
+    def farklar(self) -> list:
+        return [*self.sarf_farklari, *self.demirbas_farklari, *self.eksi_bakiyeler]
+
+    @classmethod
+    def birlestir(cls, sonuclar: List["MutabakatSonucu"]) -> "MutabakatSonucu":
+        toplam = cls()
+        for s in sonuclar:
+            toplam.okunan_hareket += s.okunan_hareket
+            toplam.sarf_farklari += s.sarf_farklari
+            toplam.demirbas_farklari += s.demirbas_farklari
+            toplam.eksi_bakiyeler += s.eksi_bakiyeler[:EN_FAZLA_EKSI - len(toplam.eksi_bakiyeler)]
+            toplam.onarilan += s.onarilan
+        return toplam
+
+# ----------------------------------------------------------------
+# 1. TUTARLI OKUMA (Log ve tablolar aynı anlık görüntüden)
+# ----------------------------------------------------------------
+@contextmanager
+def _anlik_goruntu_oturumu() -> Iterator[Session]:
+    with engine.connect() as baglanti:
+        if baglanti.dialect.name == "postgresql":
+            baglanti = baglanti.execution_options(isolation_level="REPEATABLE READ")
+        elif baglanti.dialect.name == "sqlite":
+            # pysqlite SELECT'ten önce BEGIN göndermez; her sorgu ayrı görüntü görürdü
+            baglanti.exec_driver_sql("BEGIN")
+        with Session(bind=baglanti) as db:
+            yield db
+            db.flush()
+        baglanti.commit()
+
+def _parca_kosulu(sutun, parca: int, parca_sayisi: int):
+    return sutun % parca_sayisi == parca if parca_sayisi > 1 else true()
+
+# ----------------------------------------------------------------
+# 2. LOGU OYNATMA
+# ----------------------------------------------------------------
+def _demirbas_konumu(h) -> Optional[Konum]:
+    if h.islem_tipi == IslemTipi.GIRIS:
+        return (h.urun_id, DemirbasDurumu.DEPODA, h.giris_depo_id, None, None)
+    if h.islem_tipi == IslemTipi.ZIMMET_VER:
+        # Personel seçildiyse bölüm temizlenir (demirbas.zimmet_ver_uygula)
+        return (h.urun_id, DemirbasDurumu.ZIMMETLI, None, h.personel_id, None if h.personel_id else h.bolum_id)
+    if h.islem_tipi == IslemTipi.ZIMMET_IADE:
+        return (h.urun_id, None, h.giris_depo_id, None, None)
+    return None
+
+def _logu_oynat(db: Session, parca: int, parca_sayisi: int, sonuc: MutabakatSonucu):
+    """Logu uygular; (sarf bakiyeleri, demirbaş konumları) döner."""
+    sarf_urunleri = set(db.exec(
+        select(Urun.id).where(Urun.tip == UrunTipi.SARF).where(_parca_kosulu(Urun.id, parca, parca_sayisi))
+    ).all())
+    bakiyeler: Dict[Tuple[int, int], float] = {}
+    konumlar: Dict[int, Konum] = {}
+
+    # Arşiv: Sarf için dönem toplamları başlangıç bakiyesidir
+    arsiv = db.exec(
+        select(HareketArsivToplami.depo_id, HareketArsivToplami.urun_id, HareketArsivToplami.miktar)
+        .where(_parca_kosulu(HareketArsivToplami.urun_id, parca, parca_sayisi))
+    ).all()
+    for depo_id, urun_id, miktar in arsiv:
+        bakiyeler[(depo_id, urun_id)] = bakiyeler.get((depo_id, urun_id), 0.0) + miktar
+    # Arşivdeki demirbaş hareketleri en yeniden eskiye gelir; her demirbaşın ilk görülen (son) hareketi geçerlidir
+    for h in arsiv_hareketleri(db, sadece_demirbas=True):
+        if h.demirbas_id not in konumlar and (parca_sayisi == 1 or h.urun_id % parca_sayisi == parca):
+            konum = _demirbas_konumu(h)
+            if konum:
+                konumlar[h.demirbas_id] = konum
+
+    # Sıcak tablo: id sırasıyla akış
+    q = (
+        select(
+            Hareket.id, Hareket.islem_tipi, Hareket.urun_id, Hareket.cikis_depo_id, Hareket.giris_depo_id,
+            Hareket.personel_id, Hareket.bolum_id, Hareket.miktar, Hareket.demirbas_id
+        )
+        .where(_parca_kosulu(Hareket.urun_id, parca, parca_sayisi))
+        .order_by(Hareket.id)
+    )
+    # Session yerine doğrudan bağlantı: ORM satır işleme maliyeti (satır başına ~%40) olmadan
+    imlec = db.connection().execution_options(yield_per=PARCA).execute(q)
+    eksiye_dusenler = set()
+    for satirlar in imlec.partitions():
+        sonuc.okunan_hareket += len(satirlar)
+        for h in satirlar:
+            hareket_id, tip, urun_id, cikis_depo_id, giris_depo_id, _, _, miktar, demirbas_id = h
+            if demirbas_id is not None:
+                konum = _demirbas_konumu(h)
+                if konum:
+                    konumlar[demirbas_id] = konum
+                continue
+            if urun_id not in sarf_urunleri:
+                continue
+            if tip in GIRIS_TIPLERI:
+                anahtar = (giris_depo_id, urun_id)
+                bakiyeler[anahtar] = bakiyeler.get(anahtar, 0.0) + miktar
+            if tip in CIKIS_TIPLERI:
+                anahtar = (cikis_depo_id, urun_id)
+                bakiye = bakiyeler[anahtar] = bakiyeler.get(anahtar, 0.0) - miktar
+                if bakiye < -KUSURAT and anahtar not in eksiye_dusenler:
+                    eksiye_dusenler.add(anahtar) # Her anahtar için sadece ilk düşüş
+                    if len(sonuc.eksi_bakiyeler) < EN_FAZLA_EKSI:
+                        sonuc.eksi_bakiyeler.append(EksiBakiye(hareket_id, cikis_depo_id, urun_id, bakiye))
+    return bakiyeler, konumlar
+
+# ----------------------------------------------------------------
+# 3. KARŞILAŞTIRMA VE ONARIM
+# ----------------------------------------------------------------
+def _demirbas_uyuyor_mu(logda: Konum, tabloda: Konum) -> bool:
+    if logda[1] is None: # İade: Durum ZIMMETLI olmamalı, gerisi birebir
+        return tabloda[1] != DemirbasDurumu.ZIMMETLI and logda[2:] == tabloda[2:] and logda[0] == tabloda[0]
+    return logda == tabloda
+
+def _sarf_karsilastir(db: Session, bakiyeler, parca: int, parca_sayisi: int, sonuc: MutabakatSonucu) -> None:
+    stoklar = db.exec(
+        select(StokSarf.depo_id, StokSarf.urun_id, StokSarf.miktar)
+        .where(_parca_kosulu(StokSarf.urun_id, parca, parca_sayisi))
+    ).all()
+    tablodakiler = {(depo_id, urun_id): miktar for depo_id, urun_id, miktar in stoklar}
+    for anahtar in sorted(set(tablodakiler) | set(bakiyeler)):
+        tabloda, logda = tablodakiler.get(anahtar, 0.0), bakiyeler.get(anahtar, 0.0)
+        if abs(tabloda - logda) > KUSURAT:
+            sonuc.sarf_farklari.append(SarfFarki(anahtar[0], anahtar[1], tabloda, logda))
+
+def _demirbas_karsilastir(db: Session, konumlar, parca: int, parca_sayisi: int, sonuc: MutabakatSonucu) -> None:
+    satirlar = db.exec(
+        select(
+            DemirbasVarlik.id, DemirbasVarlik.urun_id, DemirbasVarlik.durum, DemirbasVarlik.bulundugu_depo_id,
+            DemirbasVarlik.zimmetli_personel_id, DemirbasVarlik.zimmetli_bolum_id
+        ).where(_parca_kosulu(DemirbasVarlik.urun_id, parca, parca_sayisi))
+    ).all()
+    tablodakiler = {s[0]: tuple(s[1:]) for s in satirlar}
+    for demirbas_id in sorted(set(tablodakiler) | set(konumlar)):
+        tabloda, logda = tablodakiler.get(demirbas_id), konumlar.get(demirbas_id)
+        if tabloda is None or logda is None or not _demirbas_uyuyor_mu(logda, tabloda):
+            sonuc.demirbas_farklari.append(DemirbasFarki(demirbas_id, tabloda, logda))
+
+def _onar(db: Session, sonuc: MutabakatSonucu) -> None:
+    """
+    Tabloları logdaki değerlere çeker. Log da tutarsızsa (eksi bakiye) ya da kaynak
+    kayıt yoksa (logu olmayan demirbaş, tabloda olmayan demirbaş) dokunulmaz; sadece raporlanır.
+    """
+    for fark in sonuc.sarf_farklari:
+        if fark.logda < -KUSURAT:
+            continue
+        guncellenen = db.exec(
+            update(StokSarf).where(StokSarf.depo_id == fark.depo_id).where(StokSarf.urun_id == fark.urun_id)
+            .values(miktar=fark.logda)
+        ).rowcount
+        if not guncellenen:
+            db.exec(insert(StokSarf).values(depo_id=fark.depo_id, urun_id=fark.urun_id, miktar=fark.logda))
+        sonuc.onarilan += 1
+
+    for fark in sonuc.demirbas_farklari:
+        if fark.tabloda is None or fark.logda is None:
+            continue
+        _, durum, depo_id, personel_id, bolum_id = fark.logda
+        if durum is None: # İade sonrası durum bilinmiyor; tablodaki geçerliyse korunur
+            durum = fark.tabloda[1] if fark.tabloda[1] != DemirbasDurumu.ZIMMETLI else DemirbasDurumu.DEPODA
+        db.exec(
+            update(DemirbasVarlik).where(DemirbasVarlik.id == fark.demirbas_id).values(
+                durum=durum, bulundugu_depo_id=depo_id,
+                zimmetli_personel_id=personel_id, zimmetli_bolum_id=bolum_id
+            )
+        )
+        sonuc.onarilan += 1
+
+    if sonuc.onarilan:
+        # Bu session commit edilmez (bağlantı commit'lenir); sürüm olayı çalışmadığı için elle
+        defter_surumunu_artir(db)
+
+def _parca_mutabakati(parca: int, parca_sayisi: int, onar: bool) -> MutabakatSonucu:
+    sonuc = MutabakatSonucu()
+    with _anlik_goruntu_oturumu() as db:
+        bakiyeler, konumlar = _logu_oynat(db, parca, parca_sayisi, sonuc)
+        _sarf_karsilastir(db, bakiyeler, parca, parca_sayisi, sonuc)
+        _demirbas_karsilastir(db, konumlar, parca, parca_sayisi, sonuc)
+        if onar:
+            _onar(db, sonuc)
+    return sonuc
+
+def mutabakat(surec: int = 1, onar: bool = False) -> MutabakatSonucu:
+    """
+    Logu oynatıp StokSarf ve DemirbasVarlik ile karşılaştırır; onar=True ise farkları
+    düzeltir (özet tablosu ayrıca ozet_yenile ile tazelenmelidir).
+    surec > 1: Ürünler süreçlere bölünür, her süreç kendi bağlantısıyla çalışır.
+    """
+    if surec <= 1:
+        return _parca_mutabakati(0, 1, onar)
+    if onar and engine.dialect.name == "sqlite":
+        # SQLite tek yazıcılıdır; bir parçanın commit'i diğerlerinin anlık görüntüsünü eskitir
+        raise ValueError("SQLite'ta onarım tek süreçle yapılmalıdır.")
+    # spawn: Her süreç engine'i (bağlantı havuzunu) kendisi kurar, ebeveynin bağlantıları paylaşılmaz
+    with ProcessPoolExecutor(surec, mp_context=multiprocessing.get_context("spawn")) as havuz:
+        sonuclar = list(havuz.map(_parca_mutabakati, range(surec), [surec] * surec, [onar] * surec))
+    return MutabakatSonucu.birlestir(sonuclar)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple, Type
+
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session, SQLModel, select, col
+
+from app.models import Depo, Bolum, Personel, Urun
+
+# ----------------------------------------------------------------
+# TANIM ÖNBELLEĞİ (Depo, Bölüm, Personel, Ürün)
+# ----------------------------------------------------------------
+# Bu tablolar günde birkaç kez değişir ama her işlemde okunur. Kayıtlar
+# süreç içinde, boyut sınırlı (LRU) bir önbellekte tutulur.
+# - Tanımlama uç noktaları yazdıktan sonra ilgili tabloyu geçersiz kılar.
+# - Her tablonun bir sürümü vardır; okuma sürerken tablo geçersiz kılınırsa
+#   okunan eski değer önbelleğe yazılmaz.
+# - Birden fazla worker süreci varsa diğer süreçler değişikliği en geç
+#   TANIM_ONBELLEK_SURESI saniye sonra görür.
+
+TANIM_MODELLERI = (Depo, Bolum, Personel, Urun)
+ONBELLEK_BOYUTU = int(os.getenv("TANIM_ONBELLEK_BOYUTU", "5000"))     # En fazla kayıt/liste sayısı
+ONBELLEK_SURESI = float(os.getenv("TANIM_ONBELLEK_SURESI", "60"))      # Saniye
+
+class TanimOnbellegi:
+    def __init__(self, boyut: int, sure: float):
+        self.boyut = boyut
+        self.sure = sure
+        self._kayitlar = OrderedDict() # (tablo, anahtar) -> (zaman, değer)
+        self._surumler = {m.__tablename__: 0 for m in TANIM_MODELLERI}
+        self._kilit = threading.Lock()
+
+    # --- İç yardımcılar ---
+    def _oku(self, anahtar):
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is None:
+                return None
+            if time.monotonic() - kayit[0] > self.sure:
+                del self._kayitlar[anahtar]
+                return None
+            self._kayitlar.move_to_end(anahtar)
+            return kayit[1]
+
+    def _yaz(self, anahtar, deger, surum: int) -> None:
+        with self._kilit:
+            if self._surumler[anahtar[0]] != surum:
+                return # Okuma sırasında tablo değişti, eski değeri saklama
+            self._kayitlar[anahtar] = (time.monotonic(), deger)
+            self._kayitlar.move_to_end(anahtar)
+            while len(self._kayitlar) > self.boyut:
+                self._kayitlar.popitem(last=False)
+
+    def surum(self, model: Type[SQLModel]) -> int:
+        return self._surumler[model.__tablename__]
+
+    # --- Dış arayüz ---
+    def getir(self, db: Session, model: Type[SQLModel], id: Optional[int]):
+        """
+        db.get() yerine kullanılır. Dönen nesne session'a bağlı olmayan bir
+        kopyadır; sadece okunmalıdır (Güncelleme için db.get kullanın).
+        Bulunamayan kayıtlar saklanmaz, yeni eklenen kayıt hemen görünür.
+        """
+        if id is None:
+            return None
+        anahtar = (model.__tablename__, id)
+        veri = self._oku(anahtar)
+        if veri is None:
+            surum = self.surum(model)
+            nesne = db.get(model, id)
+            if nesne is None:
+                return None
+            veri = nesne.model_dump()
+            self._yaz(anahtar, veri, surum)
+        return model.model_validate(veri)
+
+    def on_yukle(self, db: Session, model: Type[SQLModel], idler: Iterable[int]) -> None:
+        """Önbellekte olmayan kayıtları tek IN (...) sorgusuyla yükler (Toplu işlemler için)."""
+        eksikler = {i for i in idler if self._oku((model.__tablename__, i)) is None}
+        if not eksikler:
+            return
+        surum = self.surum(model)
+        for nesne in db.exec(select(model).where(col(model.id).in_(eksikler))).all():
+            self._yaz((model.__tablename__, nesne.id), nesne.model_dump(), surum)
+
+    def liste(self, db: Session, model: Type[SQLModel], anahtar: tuple, uret: Callable[[Session], tuple]) -> Tuple[bytes, str, Optional[str]]:
+        """
+        Liste gövdesini, ETag'ini ve sonraki sayfanın imlecini döner.
+        'uret(db)' -> (satırlar, sonraki imleç veya None); önbellekte yoksa çağrılır.
+        """
+        anahtar = (model.__tablename__, ("liste",) + anahtar)
+        veri = self._oku(anahtar)
+        if veri is None:
+            surum = self.surum(model)
+            veri = liste_govdesi(*uret(db))
+            self._yaz(anahtar, veri, surum)
+        return veri
+
+    def gecersiz_kil(self, *modeller: Type[SQLModel]) -> None:
+        """Tablo(lar)ın tüm kayıt ve listelerini siler, sürümünü artırır. Commit'ten SONRA çağrılmalıdır."""
+        tablolar = {m.__tablename__ for m in modeller}
+        with self._kilit:
+            for tablo in tablolar:
+                self._surumler[tablo] += 1
+            for anahtar in [a for a in self._kayitlar if a[0] in tablolar]:
+                del self._kayitlar[anahtar]
+
+    def temizle(self) -> None:
+        self.gecersiz_kil(*TANIM_MODELLERI)
+
+def liste_govdesi(satirlar, sonraki: Optional[str] = None) -> Tuple[bytes, str, Optional[str]]:
+    """
+    Satırları JSON gövdesine çevirir. ETag içerikten (ve imleçten) üretilir; böylece
+    farklı worker süreçleri aynı liste için aynı ETag'i verir.
+    """
+    govde = json.dumps(
+        jsonable_encoder(satirlar), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    ozet = hashlib.sha1(govde)
+    if sonraki:
+        ozet.update(sonraki.encode("utf-8"))
+    return govde, '"' + ozet.hexdigest() + '"', sonraki
+
+tanim_onbellegi = TanimOnbellegi(ONBELLEK_BOYUTU, ONBELLEK_SURESI)
\ No newline at end of file
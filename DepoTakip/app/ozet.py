@@ -0,0 +1,178 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, update, delete, func, col, insert
+
+from app.database import upsert_artir
+from app.models import (
+    StokOzet, StokSarf, DemirbasVarlik, Hareket, HareketArsivToplami, Urun,
+    UrunTipi, IslemTipi, DemirbasDurumu
+)
+
+# ----------------------------------------------------------------
+# STOK ÖZETİ (Artımlı güncellenen hazır dashboard tablosu)
+# ----------------------------------------------------------------
+# Her hareket, kendi transaction'ı içinde etkilediği özet satırlarını
+# atomik artırım (UPSERT) ile günceller. Ayrı bir commit yapılmaz; hareket
+# geri alınırsa özet de geri alınır.
+
+TUM_DEPOLAR = 0 # Ürünün tüm depolardaki toplam satırı
+
+DURUM_ALANLARI = {
+    DemirbasDurumu.DEPODA: "depoda",
+    DemirbasDurumu.ZIMMETLI: "zimmetli",
+    DemirbasDurumu.ARIZALI: "arizali",
+    DemirbasDurumu.HURDA: "hurda",
+}
+
+# (durum, depo_id) -> Demirbaşın bir andaki konumu
+Konum = Tuple[DemirbasDurumu, Optional[int]]
+
+def _kritik_guncelle(db: Session, urun: Urun, depo_idler: List[int]) -> None:
+    """Etkilenen satırların kritik bayrağını yeni miktara göre tek UPDATE ile tazeler."""
+    db.exec(
+        update(StokOzet)
+        .where(StokOzet.urun_id == urun.id)
+        .where(col(StokOzet.depo_id).in_(depo_idler))
+        .values(kritik_mi=StokOzet.sarf_miktar <= urun.guvenlik_stogu)
+    )
+
+def sarf_ozet_guncelle(db: Session, urun: Urun, farklar: Dict[int, float]) -> None:
+    """
+    Sarf miktar değişimlerini özete yansıtır. 'farklar': {depo_id: +/- miktar}
+    Transferde toplam değişmediği için toplam satırına dokunulmaz.
+    """
+    for depo_id, fark in farklar.items():
+        upsert_artir(db, StokOzet, {"urun_id": urun.id, "depo_id": depo_id}, {"sarf_miktar": fark})
+
+    depo_idler = list(farklar)
+    toplam_fark = sum(farklar.values())
+    if toplam_fark:
+        upsert_artir(db, StokOzet, {"urun_id": urun.id, "depo_id": TUM_DEPOLAR}, {"sarf_miktar": toplam_fark})
+        depo_idler.append(TUM_DEPOLAR)
+    _kritik_guncelle(db, urun, depo_idler)
+
+def demirbas_ozet_guncelle(
+    db: Session, urun_id: int, eski: Optional[Konum], yeni: Optional[Konum], adet: int = 1
+) -> None:
+    """
+    Demirbaşın durum/konum değişimini özete yansıtır.
+    eski=None: Yeni giriş, yeni=None: Sistemden çıkış.
+    """
+    farklar = defaultdict(lambda: defaultdict(int)) # depo_id -> alan -> fark
+    if eski:
+        durum, depo_id = eski
+        farklar[TUM_DEPOLAR][DURUM_ALANLARI[durum]] -= adet
+        if depo_id:
+            farklar[depo_id][DURUM_ALANLARI[durum]] -= adet
+    if yeni:
+        durum, depo_id = yeni
+        farklar[TUM_DEPOLAR][DURUM_ALANLARI[durum]] += adet
+        if depo_id:
+            farklar[depo_id][DURUM_ALANLARI[durum]] += adet
+
+    for depo_id, alanlar in farklar.items():
+        alanlar = {alan: fark for alan, fark in alanlar.items() if fark}
+        if alanlar:
+            upsert_artir(db, StokOzet, {"urun_id": urun_id, "depo_id": depo_id}, alanlar)
+
+# ----------------------------------------------------------------
+# YENİDEN KURMA VE DOĞRULAMA
+# ----------------------------------------------------------------
+def sarf_hareket_toplamlari(db: Session, *kosullar) -> Dict[Tuple[int, int], float]:
+    """
+    Sarf hareketlerinin (ürün, depo) bazında net toplamı (GIRIS/TRANSFER girişi -
+    CIKIS/TRANSFER çıkışı). 'kosullar' Hareket sorgusuna eklenir (Örn: tarih aralığı).
+    """
+    toplamlar = defaultdict(float)
+    for depo_sutunu, tipler, isaret in (
+        (Hareket.giris_depo_id, [IslemTipi.GIRIS, IslemTipi.TRANSFER], 1),
+        (Hareket.cikis_depo_id, [IslemTipi.CIKIS, IslemTipi.TRANSFER], -1),
+    ):
+        satirlar = db.exec(
+            select(Hareket.urun_id, depo_sutunu, func.sum(Hareket.miktar))
+            .join(Urun)
+            .where(Urun.tip == UrunTipi.SARF)
+            .where(col(Hareket.islem_tipi).in_(tipler))
+            .where(*kosullar)
+            .group_by(Hareket.urun_id, depo_sutunu)
+        ).all()
+        for urun_id, depo_id, toplam in satirlar:
+            toplamlar[(urun_id, depo_id)] += isaret * toplam
+    return dict(toplamlar)
+
+def _ozet_hesapla(db: Session) -> Dict[Tuple[int, int], dict]:
+    """
+    Özeti sıfırdan hesaplar.
+    - Sarf miktarları Hareket logundan (GIRIS/CIKIS/TRANSFER toplamları) SQL ile toplanır;
+      arşive taşınmış dönemler için HareketArsivToplami'ndaki net toplamlar eklenir.
+    - Demirbaş adetleri DemirbasVarlik'ın güncel durumundan sayılır (İade sonrası
+      durum logda ayrı bir sütunda tutulmadığı için kaynak varlık tablosudur).
+    """
+    satirlar = defaultdict(lambda: {"sarf_miktar": 0.0, "depoda": 0, "zimmetli": 0, "arizali": 0, "hurda": 0})
+
+    def sarf_ekle(urun_id, depo_id, toplam):
+        satirlar[(urun_id, depo_id)]["sarf_miktar"] += toplam
+        satirlar[(urun_id, TUM_DEPOLAR)]["sarf_miktar"] += toplam
+
+    # Soğuk arşive taşınmış dönemlerin net toplamları + sıcak tablodaki hareketler
+    arsiv = db.exec(
+        select(HareketArsivToplami.urun_id, HareketArsivToplami.depo_id, func.sum(HareketArsivToplami.miktar))
+        .group_by(HareketArsivToplami.urun_id, HareketArsivToplami.depo_id)
+    ).all()
+    for urun_id, depo_id, toplam in arsiv:
+        sarf_ekle(urun_id, depo_id, toplam)
+    for (urun_id, depo_id), toplam in sarf_hareket_toplamlari(db).items():
+        sarf_ekle(urun_id, depo_id, toplam)
+
+    demirbaslar = db.exec(
+        select(DemirbasVarlik.urun_id, DemirbasVarlik.bulundugu_depo_id, DemirbasVarlik.durum, func.count(DemirbasVarlik.id))
+        .group_by(DemirbasVarlik.urun_id, DemirbasVarlik.bulundugu_depo_id, DemirbasVarlik.durum)
+    ).all()
+    for urun_id, depo_id, durum, adet in demirbaslar:
+        alan = DURUM_ALANLARI[durum]
+        satirlar[(urun_id, TUM_DEPOLAR)][alan] += adet
+        if depo_id:
+            satirlar[(urun_id, depo_id)][alan] += adet
+
+    guvenlik = dict(db.exec(select(Urun.id, Urun.guvenlik_stogu).where(Urun.tip == UrunTipi.SARF)).all())
+    for (urun_id, _), degerler in satirlar.items():
+        degerler["kritik_mi"] = urun_id in guvenlik and degerler["sarf_miktar"] <= guvenlik[urun_id]
+    return satirlar
+
+def ozet_yenile(db: Session, sadece_dogrula: bool = False) -> List[str]:
+    """
+    Özeti Hareket logundan yeniden hesaplar; mevcut özet ve StokSarf ile
+    karşılaştırıp farkları döner. sadece_dogrula=False ise özet tablosunu
+    hesaplanan değerlerle değiştirir (commit çağırana aittir).
+    """
+    hesaplanan = _ozet_hesapla(db)
+    farklar = []
+
+    mevcut = {(o.urun_id, o.depo_id): o for o in db.exec(select(StokOzet)).all()}
+    for anahtar in sorted(set(hesaplanan) | set(mevcut), key=lambda a: (a[0], a[1] or TUM_DEPOLAR)):
+        beklenen = hesaplanan.get(anahtar)
+        kayit = mevcut.get(anahtar)
+        for alan in ("sarf_miktar", "depoda", "zimmetli", "arizali", "hurda"):
+            b = beklenen[alan] if beklenen else 0
+            m = getattr(kayit, alan) if kayit else 0
+            if b != m:
+                farklar.append(f"Özet ürün={anahtar[0]} depo={anahtar[1]} {alan}: tabloda {m}, hesaplanan {b}")
+
+    # Sarf stok tablosu da logla tutarlı mı?
+    stoklar = db.exec(select(StokSarf.urun_id, StokSarf.depo_id, StokSarf.miktar)).all()
+    for urun_id, depo_id, miktar in stoklar:
+        beklenen = hesaplanan.get((urun_id, depo_id), {}).get("sarf_miktar", 0)
+        if beklenen != miktar:
+            farklar.append(f"StokSarf ürün={urun_id} depo={depo_id}: tabloda {miktar}, Hareket logunda {beklenen}")
+
+    if not sadece_dogrula:
+        db.exec(delete(StokOzet))
+        yeni_satirlar = [
+            {"urun_id": urun_id, "depo_id": depo_id, **degerler}
+            for (urun_id, depo_id), degerler in hesaplanan.items()
+            if depo_id is not None
+        ]
+        if yeni_satirlar:
+            db.exec(insert(StokOzet), params=yeni_satirlar)
+    return farklar
\ No newline at end of file
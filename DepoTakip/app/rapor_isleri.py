@@ -0,0 +1,298 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update, func, col, text
+
+from app.database import engine
+from app.models import RaporIsi, RaporIsiDurumu
+from app.rapor_onbellegi import defter_surumu, parametre_ozeti
+
+# ----------------------------------------------------------------
+# ARKA PLAN RAPOR İŞLERİ (Uzun hareket geçmişi dökümleri)
+# ----------------------------------------------------------------
+# Yıllık /rapor/gecmis dökümü dakikalar sürebilir; istek worker'ı o süre boyunca
+# meşgul kalır ve vekil sunucu zaman aşımına düşer. Bunun yerine:
+# - İstemci filtreyi gönderir (POST /rapor/isler), hemen bir iş numarası alır.
+# - İşler 'rapor_isleri' tablosunda sıraya girer. Her uygulama süreci sırayı
+#   RAPOR_IS_ARALIGI'nda bir yoklar; bir işi koşullu UPDATE ile üstlenir ve
+#   dosyayı ayrı bir süreçte (RAPOR_IS_HAVUZU=surec, düşük öncelikli) ya da
+#   thread'de (thread) RAPOR_IS_KLASORU'na yazar.
+# - Tüm worker'larda aynı anda en fazla RAPOR_IS_SAYISI iş çalışır; sıradakiler
+#   bekler, stok işlemleri için bağlantı ve CPU kalır.
+# - Aynı filtre + biçimle sırada/çalışan iş varsa yeni iş açılmaz, o döner. Biten
+#   işin dosyası, defter sürümü (app/rapor_onbellegi.py) değişmediyse yeniden kullanılır.
+# - Çalıştıran süreç işi düzenli "yoklar"; süreç ölürse iş RAPOR_IS_ZAMAN_ASIMI_SN
+#   sonra sıraya geri döner. Biten işler RAPOR_IS_SAKLAMA_SAAT sonra silinir.
+
+IS_KLASORU = os.getenv("RAPOR_IS_KLASORU", os.path.join(os.path.expanduser("~"), ".depotakip", "rapor_isleri")) # Uygulama dizini dışında
+ESZAMANLI_IS = int(os.getenv("RAPOR_IS_SAYISI", "1"))                 # Tüm worker'larda (0: Bu süreç iş çalıştırmaz)
+IS_HAVUZU = os.getenv("RAPOR_IS_HAVUZU", "surec")                    # surec / thread
+IS_ARALIGI = float(os.getenv("RAPOR_IS_ARALIGI", "1"))               # Sıra yoklama (sn)
+ZAMAN_ASIMI = timedelta(seconds=float(os.getenv("RAPOR_IS_ZAMAN_ASIMI_SN", "120")))
+SAKLAMA_SURESI = timedelta(hours=float(os.getenv("RAPOR_IS_SAKLAMA_SAAT", "24")))
+BAKIM_ARALIGI = ZAMAN_ASIMI.total_seconds() / 4 # Yoklama + sahipsiz iş + eski iş temizliği (sn)
+ILERLEME_ADIMI = 10_000 # Bu kadar satırda bir satir_sayisi yazılır (durum sorgusunda ilerleme)
+SUREC_ONCELIGI = 10     # Ayrı süreçteki işin nice değeri (Stok işlemleri önce CPU alsın)
+
+AKTIF_DURUMLAR = (RaporIsiDurumu.BEKLIYOR, RaporIsiDurumu.CALISIYOR)
+SIRA_KILIDI = 7_240_023 # PostgreSQL advisory lock anahtarı (iş üstlenme)
+
+logger = logging.getLogger(__name__)
+
+def dosya_yolu(isi: RaporIsi) -> Optional[str]:
+    return os.path.join(IS_KLASORU, isi.dosya) if isi.dosya else None
+
+# ----------------------------------------------------------------
+# 1. İŞ GÖNDERME (Uç noktalar)
+# ----------------------------------------------------------------
+def is_gonder(db: Session, parametreler: dict, bicim: str) -> RaporIsi:
+    """
+    Filtre için iş açar ya da aynı işi döner (sırada/çalışan veya sürümü güncel
+    biten). Yeni iş commit edilir; yerel döngü hemen uyandırılır.
+    """
+    ozet = parametre_ozeti({"filtre": parametreler, "bicim": bicim})
+    aktif = db.exec(
+        select(RaporIsi).where(RaporIsi.ozet == ozet).where(col(RaporIsi.durum).in_(AKTIF_DURUMLAR))
+    ).first()
+    if aktif:
+        return aktif
+
+    surum = defter_surumu(db)
+    if surum is not None:
+        biten = db.exec(
+            select(RaporIsi).where(RaporIsi.ozet == ozet).where(RaporIsi.durum == RaporIsiDurumu.TAMAM)
+            .where(RaporIsi.defter_surumu == surum[1]).order_by(col(RaporIsi.bitis_tarihi).desc())
+        ).first()
+        if biten and os.path.exists(dosya_yolu(biten)):
+            return biten
+
+    isi = RaporIsi(id=uuid.uuid4().hex, ozet=ozet, bicim=bicim, parametreler=json.dumps(parametreler, ensure_ascii=False))
+    db.add(isi)
+    try:
+        db.commit()
+    except IntegrityError: # Aynı iş başka bir istekte az önce açıldı
+        db.rollback()
+        return db.exec(
+            select(RaporIsi).where(RaporIsi.ozet == ozet).where(col(RaporIsi.durum).in_(AKTIF_DURUMLAR))
+        ).one()
+    db.refresh(isi)
+    _uyandir()
+    return isi
+
+# ----------------------------------------------------------------
+# 2. ÇALIŞTIRMA (Havuzdaki thread ya da süreç)
+# ----------------------------------------------------------------
+def _guncelle(is_id: str, **degerler) -> None:
+    with Session(engine) as db:
+        db.exec(update(RaporIsi).where(RaporIsi.id == is_id).values(**degerler))
+        db.commit()
+
+def is_calistir(is_id: str) -> None:
+    """İşin dosyasını üretir, işi TAMAM ya da HATA olarak kapatır. Hata fırlatmaz."""
+    from app.disa_aktar import csv_akisi, xlsx_akisi
+    from app.routers.rapor import (
+        HareketFiltre, RaporAdi, StokFiltre, _disa_aktarim_kaynagi, _disa_aktarim_satirlari
+    )
+
+    with Session(engine) as db:
+        isi = db.get(RaporIsi, is_id)
+    dosya_adi = f"{is_id}.{isi.bicim}"
+    hedef = os.path.join(IS_KLASORU, dosya_adi)
+    gecici = hedef + ".yaziliyor"
+    sayac = 0
+    try:
+        filtre = HareketFiltre.model_validate_json(isi.parametreler)
+        os.makedirs(IS_KLASORU, exist_ok=True)
+        with Session(engine) as db:
+            # Sorgudan ÖNCE okunur: Dosya en az bu sürüm kadar günceldir
+            surum = defter_surumu(db)
+            query, formatla, basliklar = _disa_aktarim_kaynagi(RaporAdi.GECMIS, filtre, StokFiltre(), None)
+
+            def satirlar():
+                nonlocal sayac
+                for satir in _disa_aktarim_satirlari(db, RaporAdi.GECMIS, query, formatla, basliklar, filtre):
+                    sayac += 1
+                    if sayac % ILERLEME_ADIMI == 0:
+                        _guncelle(is_id, satir_sayisi=sayac)
+                    yield satir
+
+            if isi.bicim == "xlsx":
+                with open(gecici, "wb") as dosya:
+                    for parca in xlsx_akisi(basliklar, satirlar()):
+                        dosya.write(parca)
+            else:
+                with open(gecici, "w", encoding="utf-8", newline="") as dosya:
+                    for parca in csv_akisi(basliklar, satirlar()):
+                        dosya.write(parca)
+        os.replace(gecici, hedef) # Yarım dosya asla indirilmez
+    except Exception as hata:
+        logger.exception("Rapor işi %s başarısız", is_id)
+        if os.path.exists(gecici):
+            os.remove(gecici)
+        _guncelle(is_id, durum=RaporIsiDurumu.HATA, hata=str(hata)[:1000], satir_sayisi=sayac, bitis_tarihi=datetime.now())
+        return
+
+    _guncelle(
+        is_id, durum=RaporIsiDurumu.TAMAM, dosya=dosya_adi, satir_sayisi=sayac,
+        defter_surumu=surum[1] if surum else None, bitis_tarihi=datetime.now()
+    )
+
+def _surecte_calistir(is_id: str) -> None:
+    """Ayrı süreçte çalışan işin girişi: Düşük öncelik (web süreçleri önce CPU alır)."""
+    if hasattr(os, "nice"):
+        os.nice(SUREC_ONCELIGI)
+    is_calistir(is_id)
+
+def _baslat(is_id: str):
+    """İşi arka planda başlatır; is_alive() ile izlenen thread ya da süreç döner."""
+    if IS_HAVUZU == "thread":
+        calisan = threading.Thread(target=is_calistir, args=(is_id,), name=f"rapor-isi-{is_id[:8]}", daemon=True)
+    else:
+        # spawn: Süreç engine'i kendisi kurar, ebeveynin bağlantıları paylaşılmaz
+        calisan = multiprocessing.get_context("spawn").Process(target=_surecte_calistir, args=(is_id,), daemon=True)
+    calisan.start()
+    return calisan
+
+# ----------------------------------------------------------------
+# 3. SIRA YÖNETİMİ (Her uygulama sürecinde bir döngü)
+# ----------------------------------------------------------------
+def _is_al() -> Optional[str]:
+    """
+    Sıradaki işi üstlenir. Tüm worker'larda çalışan iş sayısı sınırdaysa ya da
+    iş başka bir süreç tarafından alındıysa None. Sayım ve üstlenme tek cümledir;
+    SQLite'ta yazma kilidi, PostgreSQL'de transaction'a bağlı advisory lock
+    üstlenmeleri sıraya koyar (READ COMMITTED'da iki worker aynı anda "0 çalışan"
+    görüp ikisi de iş alabilirdi). Kilit commit'te bırakılır; kilidi bekleyen
+    cümle önceki üstlenmeyi görür.
+    """
+    with Session(engine) as db:
+        aday = db.exec(
+            select(RaporIsi.id).where(RaporIsi.durum == RaporIsiDurumu.BEKLIYOR)
+            .order_by(RaporIsi.olusturma_tarihi).limit(1)
+        ).first()
+        if aday is None:
+            return None
+        if db.get_bind().dialect.name == "postgresql":
+            db.exec(text("SELECT pg_advisory_xact_lock(:anahtar)"), params={"anahtar": SIRA_KILIDI})
+        calisan = select(func.count()).select_from(RaporIsi)\
+            .where(RaporIsi.durum == RaporIsiDurumu.CALISIYOR).scalar_subquery()
+        simdi = datetime.now()
+        alindi = db.exec(
+            update(RaporIsi)
+            .where(RaporIsi.id == aday).where(RaporIsi.durum == RaporIsiDurumu.BEKLIYOR)
+            .where(calisan < ESZAMANLI_IS)
+            .values(durum=RaporIsiDurumu.CALISIYOR, baslama_tarihi=simdi, yoklama_tarihi=simdi)
+        ).rowcount
+        db.commit()
+    return aday if alindi else None
+
+def _bakim(calisan_idler: List[str]) -> None:
+    """Bu sürecin işlerini yoklar, sahipsiz kalan işleri sıraya geri koyar, eskileri siler."""
+    simdi = datetime.now()
+    with Session(engine) as db:
+        if calisan_idler:
+            db.exec(update(RaporIsi).where(col(RaporIsi.id).in_(calisan_idler)).values(yoklama_tarihi=simdi))
+        # Çalıştıran süreç öldü (yoklama kesildi)
+        db.exec(
+            update(RaporIsi).where(RaporIsi.durum == RaporIsiDurumu.CALISIYOR)
+            .where(RaporIsi.yoklama_tarihi < simdi - ZAMAN_ASIMI)
+            .values(durum=RaporIsiDurumu.BEKLIYOR, satir_sayisi=0)
+        )
+        eskiler = db.exec(
+            select(RaporIsi).where(col(RaporIsi.durum).not_in(AKTIF_DURUMLAR))
+            .where(RaporIsi.bitis_tarihi < simdi - SAKLAMA_SURESI)
+        ).all()
+        for isi in eskiler:
+            yol = dosya_yolu(isi)
+            if yol and os.path.exists(yol):
+                os.remove(yol)
+            db.delete(isi)
+        db.commit()
+
+def _bitmeyen_isi_kapat(is_id: str, cikis_kodu) -> None:
+    """Süreç işi kapatmadan öldüyse (bellek yetmedi, sinyal...) HATA yazar."""
+    with Session(engine) as db:
+        db.exec(
+            update(RaporIsi).where(RaporIsi.id == is_id).where(RaporIsi.durum == RaporIsiDurumu.CALISIYOR).values(
+                durum=RaporIsiDurumu.HATA, bitis_tarihi=datetime.now(),
+                hata=f"Rapor süreci beklenmedik şekilde sonlandı (çıkış kodu {cikis_kodu})."
+            )
+        )
+        db.commit()
+
+def _geri_birak(is_idler: List[str]) -> None:
+    """Kapanışta yarım kalan işler beklemeden sıraya döner (başka worker ya da sonraki açılış alır)."""
+    with Session(engine) as db:
+        db.exec(
+            update(RaporIsi).where(col(RaporIsi.id).in_(is_idler)).where(RaporIsi.durum == RaporIsiDurumu.CALISIYOR)
+            .values(durum=RaporIsiDurumu.BEKLIYOR, satir_sayisi=0)
+        )
+        db.commit()
+
+_dongu: Optional[asyncio.AbstractEventLoop] = None
+_uyari: Optional[asyncio.Event] = None
+
+def _uyandir() -> None:
+    """Yeni iş açıldı: Bu süreçteki döngü aralığı beklemeden sıraya baksın (herhangi bir thread'den)."""
+    if _dongu is not None and _uyari is not None:
+        try:
+            _dongu.call_soon_threadsafe(_uyari.set)
+        except RuntimeError: # Event loop kapanmış
+            pass
+
+async def is_dongusu() -> None:
+    """Rapor işi sırasını işletir (main.py lifespan başlatır, kapanışta iptal eder)."""
+    global _dongu, _uyari
+    if ESZAMANLI_IS <= 0:
+        return
+    _dongu, _uyari = asyncio.get_running_loop(), asyncio.Event()
+    calisanlar: Dict[str, object] = {}
+    son_bakim = 0.0
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(_uyari.wait(), IS_ARALIGI)
+            except asyncio.TimeoutError:
+                pass
+            _uyari.clear()
+            try:
+                for is_id, calisan in list(calisanlar.items()):
+                    if calisan.is_alive():
+                        continue
+                    del calisanlar[is_id]
+                    cikis_kodu = getattr(calisan, "exitcode", 0)
+                    if cikis_kodu:
+                        await run_in_threadpool(_bitmeyen_isi_kapat, is_id, cikis_kodu)
+
+                if time.monotonic() - son_bakim >= BAKIM_ARALIGI:
+                    await run_in_threadpool(_bakim, list(calisanlar))
+                    son_bakim = time.monotonic()
+
+                while len(calisanlar) < ESZAMANLI_IS:
+                    is_id = await run_in_threadpool(_is_al)
+                    if is_id is None:
+                        break
+                    calisanlar[is_id] = _baslat(is_id)
+            except Exception as hata: # Bir sonraki turda tekrar denenir
+                logger.warning("Rapor işi sırası işletilemedi: %s", hata)
+    finally:
+        yarim = [is_id for is_id, calisan in calisanlar.items() if calisan.is_alive()]
+        for is_id in yarim:
+            calisan = calisanlar[is_id]
+            if hasattr(calisan, "terminate"):
+                calisan.terminate()
+        if yarim:
+            try:
+                _geri_birak(yarim)
+            except Exception as hata:
+                logger.warning("Yarım kalan rapor işleri sıraya geri konamadı: %s", hata)
\ No newline at end of file
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, func
+
+from app.metrikler import RAPOR_ONBELLEK_SONUCU
+from app.models import (
+    DefterSurumu, Hareket, Urun, Depo, Personel, Bolum, StokSarf, StokOzet, DemirbasVarlik, StokUyarisi
+)
+
+try:
+    import redis
+    REDIS_DESTEKLI = True
+except ImportError:
+    REDIS_DESTEKLI = False
+
+# ----------------------------------------------------------------
+# RAPOR ÖNBELLEĞİ (/rapor/* sonuçları, defter sürümüyle geçersiz kılınır)
+# ----------------------------------------------------------------
+# Aynı stok durumu / zimmet listesi sorguları iki hareket arasında defalarca çalışır.
+# Sonuç, normalize edilmiş filtre + "defter sürümü" anahtarıyla saklanır:
+# - Sürüm "sayaç.son hareket id'si.penceredeki hareket sayısı" metnidir. Stok
+#   işlemleri zaten yeni bir Hareket satırı ekler; en büyük id (ya da penceredeki
+#   sayı) değiştiği için aynı transaction'daki stok, özet ve uyarı yazmaları da
+#   sürümü değiştirmiş olur. Bu işlemler sayaç satırına dokunmaz (her yazmanın aynı
+#   satırı kilitleyip sıraya girmesi olmaz).
+# - defter_surumu tablosundaki sayaç sadece Hareket eklemeden raporların okuduğu
+#   tablolara yazan transaction'larda (tanım değişikliği, özet yenileme, onarım,
+#   arşivleme...) commit'ten hemen önce, AYNI transaction içinde bir artırılır.
+#   Geri alınan işlem sürümü değiştirmez.
+# - PostgreSQL'de id'ler commit sırasıyla gelmez: Daha büyük id'li bir hareket önce
+#   commit edilmişse geç kalan commit en büyük id'yi değiştirmez. Bu yüzden sürüm son
+#   SURUM_PENCERESI id içindeki hareket sayısını da taşır; pencere içinde geç commit
+#   edilen hareket sayıyı, dolayısıyla sürümü commit anında değiştirir. Pencereden
+#   daha geride kalan bir commit, bir sonraki yazmaya kadar görünmeyebilir.
+# - Her rapor isteği önce sürümü okur (sayaç satırı + pencere sayımı, iki index okuması).
+#   Sürüm değiştiyse eski kayıtlar bir daha okunmaz; bellek deposu onları hemen atar,
+#   Redis'te süreleri dolar.
+# - Depo seçimi RAPOR_ONBELLEK ile: "bellek" (süreç içi LRU, varsayılan),
+#   "redis://..." (worker'lar arası paylaşılan; Redis protokolünü konuşan herhangi bir
+#   yerel sunucu olur) veya "kapali".
+# - Sürüm satırını kurulumda üretilen 'kimlik' de anahtara girer: Veritabanı baştan
+#   kurulursa paylaşılan depodaki eski sonuçlar eşleşmez.
+
+ONBELLEK_ADRESI = os.getenv("RAPOR_ONBELLEK", "bellek")
+ONBELLEK_MB = float(os.getenv("RAPOR_ONBELLEK_MB", "64"))           # Bellek deposunun üst sınırı
+ONBELLEK_SURESI = int(os.getenv("RAPOR_ONBELLEK_SURESI", "3600"))   # Redis kayıt ömrü (sn)
+REDIS_BEKLEME = 30 # Redis hatasından sonra bu kadar saniye doğrudan veritabanına gidilir
+
+# Raporların okuduğu tablolar; bunlara yazan transaction defter sürümünü artırır
+DEFTER_MODELLERI = (Hareket, Urun, Depo, Personel, Bolum, StokSarf, StokOzet, DemirbasVarlik, StokUyarisi)
+_DEFTER_TABLOLARI = frozenset(m.__table__ for m in DEFTER_MODELLERI)
+_DEGISTI = "defter_degisti" # session.info bayrağı
+_EKLENDI = "defter_hareket_eklendi" # session.info: Transaction Hareket ekledi (sürüm kendiliğinden değişir)
+SURUM_PENCERESI = 1000 # Geç commit edilen id'lerin sürümü değiştirdiği geriye bakış (id)
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------
+# 1. DEFTER SÜRÜMÜ
+# ----------------------------------------------------------------
+def defter_surumunu_artir(db: Session) -> None:
+    """Sürümü çağıranın transaction'ında artırır (commit çağırana aittir)."""
+    db.exec(update(DefterSurumu).where(DefterSurumu.id == 1).values(surum=DefterSurumu.surum + 1))
+
+def defter_surumu(db: Session) -> Optional[Tuple[str, str]]:
+    """(kimlik, "sayaç.son id.penceredeki hareket"). Satır yoksa (eski şema) None: Önbellek kullanılmaz."""
+    satir = db.exec(select(DefterSurumu.kimlik, DefterSurumu.surum).where(DefterSurumu.id == 1)).first()
+    if not satir:
+        return None
+    son_id = select(func.max(Hareket.id)).scalar_subquery()
+    en_buyuk, adet = db.exec(
+        select(func.max(Hareket.id), func.count(Hareket.id)).where(Hareket.id > son_id - SURUM_PENCERESI)
+    ).one()
+    return satir[0], f"{satir[1]}.{en_buyuk or 0}.{adet}"
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _toplu_yazma(state) -> None:
+    # insert()/update()/delete() cümleleri (upsert_artir, toplu INSERT, onarım)
+    if state.is_insert or state.is_update or state.is_delete:
+        tablo = getattr(state.statement, "table", None)
+        if tablo in _DEFTER_TABLOLARI:
+            state.session.info[_DEGISTI] = True
+        if state.is_insert and getattr(tablo, "name", None) == Hareket.__tablename__:
+            state.session.info[_EKLENDI] = True
+
+@event.listens_for(OrmSession, "before_flush")
+def _nesne_yazma(session: OrmSession, flush_context, nesneler) -> None:
+    # session.add() / nesne güncelleme / silme
+    if any(isinstance(n, DEFTER_MODELLERI) for n in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_DEGISTI] = True
+    if any(isinstance(n, Hareket) for n in session.new):
+        session.info[_EKLENDI] = True
+
+@event.listens_for(OrmSession, "before_commit")
+def _commit_oncesi(session: OrmSession) -> None:
+    session.flush() # Bekleyen nesneler bayrağı koysun
+    eklendi = session.info.pop(_EKLENDI, False)
+    if session.info.pop(_DEGISTI, False) and not eklendi: # Eklenen hareket sürümü zaten değiştirir
+        defter_surumunu_artir(session)
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _geri_alindi(session: OrmSession, onceki_transaction) -> None:
+    session.info.pop(_DEGISTI, None)
+    session.info.pop(_EKLENDI, None)
+
+# ----------------------------------------------------------------
+# 2. DEPOLAR (Süreç içi LRU / Redis)
+# ----------------------------------------------------------------
+class BellekDeposu:
+    """
+    Süreç içi, bayt sınırlı LRU. Sadece güncel sürümün kayıtları tutulur; sürüm
+    değişince hepsi atılır. Sınırın 1/8'inden büyük sonuçlar saklanmaz (tek bir
+    dev rapor diğer her şeyi silmesin).
+    """
+
+    def __init__(self, en_fazla_bayt: int):
+        self.en_fazla_bayt = en_fazla_bayt
+        self._kayitlar: "OrderedDict[str, bytes]" = OrderedDict()
+        self._surum = None
+        self._boyut = 0
+        self._kilit = threading.Lock()
+
+    def _surum_kontrol(self, surum) -> None:
+        if surum != self._surum:
+            self._kayitlar.clear()
+            self._boyut = 0
+            self._surum = surum
+
+    def getir(self, surum, anahtar: str) -> Optional[bytes]:
+        with self._kilit:
+            self._surum_kontrol(surum)
+            deger = self._kayitlar.get(anahtar)
+            if deger is not None:
+                self._kayitlar.move_to_end(anahtar)
+            return deger
+
+    def yaz(self, surum, anahtar: str, deger: bytes) -> None:
+        if len(deger) > self.en_fazla_bayt // 8:
+            return
+        with self._kilit:
+            self._surum_kontrol(surum)
+            eski = self._kayitlar.pop(anahtar, None)
+            if eski is not None:
+                self._boyut -= len(eski)
+            self._kayitlar[anahtar] = deger
+            self._boyut += len(deger)
+            while self._boyut > self.en_fazla_bayt:
+                _, atilan = self._kayitlar.popitem(last=False)
+                self._boyut -= len(atilan)
+
+class RedisDeposu:
+    """
+    Worker'lar (ve sunucular) arası paylaşılan depo. Eski sürümlerin kayıtları
+    RAPOR_ONBELLEK_SURESI sonunda düşer; bellek sınırı ve LRU sunucunun ayarıdır
+    (maxmemory + maxmemory-policy allkeys-lru). Redis'e ulaşılamazsa rapor
+    veritabanından üretilir, istek asla hata vermez.
+    """
+
+    def __init__(self, adres: str, sure: int):
+        self.sure = sure
+        self._istemci = redis.Redis.from_url(adres, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._hata_zamani = 0.0
+
+    def _kullanilabilir(self) -> bool:
+        return time.monotonic() - self._hata_zamani > REDIS_BEKLEME
+
+    def _hata(self, hata: Exception) -> None:
+        self._hata_zamani = time.monotonic()
+        logger.warning("Rapor önbelleği (Redis) kullanılamıyor, %s sn atlanacak: %s", REDIS_BEKLEME, hata)
+
+    def getir(self, surum, anahtar: str) -> Optional[bytes]:
+        if not self._kullanilabilir():
+            return None
+        try:
+            return self._istemci.get(anahtar)
+        except redis.RedisError as hata:
+            self._hata(hata)
+            return None
+
+    def yaz(self, surum, anahtar: str, deger: bytes) -> None:
+        if not self._kullanilabilir():
+            return
+        try:
+            self._istemci.set(anahtar, deger, ex=self.sure)
+        except redis.RedisError as hata:
+            self._hata(hata)
+
+def depo_olustur(adres: str):
+    if adres in ("", "kapali"):
+        return None
+    if adres == "bellek":
+        return BellekDeposu(int(ONBELLEK_MB * 1024 * 1024))
+    if adres.startswith(("redis://", "rediss://", "unix://")):
+        if not REDIS_DESTEKLI:
+            logger.warning("RAPOR_ONBELLEK Redis adresi ama 'redis' paketi kurulu değil; bellek deposu kullanılıyor.")
+            return BellekDeposu(int(ONBELLEK_MB * 1024 * 1024))
+        return RedisDeposu(adres, ONBELLEK_SURESI)
+    raise ValueError(f"Bilinmeyen RAPOR_ONBELLEK değeri: {adres}")
+
+# ----------------------------------------------------------------
+# 3. RAPOR ÖNBELLEĞİ
+# ----------------------------------------------------------------
+def _normalize(deger):
+    """Aynı anlama gelen filtreler aynı anahtarı üretsin (baştaki/sondaki boşluk, '' = None)."""
+    if isinstance(deger, dict):
+        return {k: _normalize(v) for k, v in sorted(deger.items())}
+    if isinstance(deger, str):
+        return deger.strip() or None
+    return deger
+
+def parametre_ozeti(parametreler: dict) -> str:
+    """Normalize edilmiş parametrelerin SHA-1 özeti (önbellek / iş anahtarı)."""
+    return hashlib.sha1(json.dumps(_normalize(jsonable_encoder(parametreler)), sort_keys=True).encode()).hexdigest()
+
+def _json(veri) -> bytes:
+    # Starlette JSONResponse ile aynı biçim. jsonable_encoder sadece JSON'un doğrudan
+    # yazamadığı değerlere (tarih, model...) uygulanır; on binlerce satırlık listede
+    # her değeri dolaşması serileştirmeyi kat kat yavaşlatıyordu.
+    return json.dumps(
+        veri, default=jsonable_encoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+class RaporOnbellegi:
+    def __init__(self, depo):
+        self.depo = depo # None: Kapalı
+
+    def yanit(
+        self, db: Session, rapor: str, parametreler: dict,
+        uret: Callable[[], Tuple[object, Dict[str, str]]]
+    ) -> Response:
+        """
+        Raporu önbellekten ya da uret() ile üretip JSON yanıt olarak döner.
+        uret() -> (veri, yanıt başlıkları); başlıklar da (örn. X-Sonraki-Imlec) saklanır.
+        'parametreler' sonucu belirleyen her şeyi içermelidir (filtre, sayfa, tarih...).
+        """
+        surum = defter_surumu(db) if self.depo is not None else None
+        if surum is None:
+            veri, basliklar = uret()
+            return self._yanit(_json(veri), basliklar, None)
+
+        anahtar = f"rapor:{surum[0]}:{surum[1]}:{rapor}:{parametre_ozeti(parametreler)}"
+        kayit = self.depo.getir(surum, anahtar)
+        if kayit is not None:
+            RAPOR_ONBELLEK_SONUCU.artir((rapor, "hit"))
+            baslik_metni, govde = kayit.split(b"\n", 1)
+            return self._yanit(govde, json.loads(baslik_metni), "HIT")
+
+        RAPOR_ONBELLEK_SONUCU.artir((rapor, "miss"))
+        veri, basliklar = uret()
+        govde = _json(veri)
+        self.depo.yaz(surum, anahtar, json.dumps(basliklar).encode() + b"\n" + govde)
+        return self._yanit(govde, basliklar, "MISS")
+
+    @staticmethod
+    def _yanit(govde: bytes, basliklar: Dict[str, str], durum: Optional[str]) -> Response:
+        basliklar = dict(basliklar)
+        if durum:
+            basliklar["X-Rapor-Onbellek"] = durum
+        return Response(content=govde, media_type="application/json", headers=basliklar)
+
+rapor_onbellegi = RaporOnbellegi(depo_olustur(ONBELLEK_ADRESI))
\ No newline at end of file
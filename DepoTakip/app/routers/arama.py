@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Kendi modüllerimiz
+from app.arama import AramaTuru, EN_AZ_KARAKTER, ara
+from app.database import asenkron_uygun, get_session, VeritabaniRoute
+
+router = APIRouter(
+    prefix="/arama",
+    tags=["Arama (Otomatik Tamamlama)"],
+    route_class=VeritabaniRoute
+)
+
+class AramaSonucu(BaseModel):
+    tur: AramaTuru
+    id: int
+    etiket: str # Ekranda gösterilecek metin: "Laptop (SKU-1)", "DEM-1A2B3C4D / SN123", "Ali Veli"
+
+@router.get("/", response_model=List[AramaSonucu])
+@asenkron_uygun
+def otomatik_tamamla(
+    q: str = Query(..., min_length=EN_AZ_KARAKTER, max_length=100),
+    tur: Optional[List[AramaTuru]] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    aktif_sadece: bool = True,
+    db: Session = Depends(get_session)
+):
+    """
+    Ürün adı/SKU, demirbaş kodu/seri no ve personel adında arar.
+    Türkçe büyük/küçük harf duyarsızdır (IŞIK = ışık, İsmail = ismail).
+    Tür kısıtlamak için: ?q=kablo&tur=urun&tur=demirbas
+    """
+    return ara(db, q, tur, limit, aktif_sadece)
\ No newline at end of file
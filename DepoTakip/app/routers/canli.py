@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+import asyncio
+
+# Kendi modüllerimiz
+from app.canli import NABIZ_ARALIGI, yayin_merkezi
+from app.database import VeritabaniRoute
+
+router = APIRouter(
+    prefix="/canli",
+    tags=["Canlı Güncelleme (SSE)"],
+    route_class=VeritabaniRoute
+)
+
+@router.get("/akis")
+async def canli_akis():
+    """
+    Stok ve demirbaş değişikliklerini Server-Sent Events olarak akıtır ('degisiklik' olayı).
+    Olay: {"surum": ..., "stok": [stok-durumu satırları], "demirbas": [demirbaş kayıtları]}
+    İstemci önce bağlanmalı, sonra tam listeyi çekip gelen olayları üzerine uygulamalıdır.
+    Bağlantı koparsa (veya istemci yetişemezse) yeniden bağlanıp tam listeyi tekrar çekmelidir.
+    """
+    async def olaylar():
+        kuyruk = yayin_merkezi.abone_ol()
+        try:
+            yield b"retry: 3000\n\n" # Tarayıcı koparsa 3 sn sonra yeniden bağlansın
+            while True:
+                try:
+                    mesaj = await asyncio.wait_for(kuyruk.get(), NABIZ_ARALIGI)
+                except asyncio.TimeoutError:
+                    yield b": nabiz\n\n" # Vekil sunucular boşta bağlantıyı kesmesin
+                    continue
+                if mesaj is None: # Uygulama kapanıyor veya abone geride kaldı
+                    return
+                yield mesaj
+        finally:
+            yayin_merkezi.abonelikten_cik(kuyruk)
+
+    return StreamingResponse(
+        olaylar(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
@@ -1,171 +1,202 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from pydantic import BaseModel
-from typing import Optional, List
-
-# Kendi modüllerimiz
-from app.database import get_session
-from app.models import (
-    DemirbasVarlik, Personel, Bolum, Depo, Hareket, 
-    DemirbasDurumu, IslemTipi
-)
-
-router = APIRouter(
-    prefix="/demirbas",
-    tags=["Demirbaş & Zimmet Yönetimi"]
-)
-
-# --- İSTEK MODELLERİ ---
-
-class ZimmetVerModel(BaseModel):
-    demirbas_id: int
-    personel_id: Optional[int] = None
-    bolum_id: Optional[int] = None
-    aciklama: str = ""
-
-class ZimmetIadeModel(BaseModel):
-    demirbas_id: int
-    hedef_depo_id: int # İade nereye bırakıldı?
-    durum: DemirbasDurumu # SAGLAM, ARIZALI veya HURDA
-    aciklama: str = ""
-
-# ----------------------------------------------------------------
-# 1. ZİMMET VERME (Personel veya Bölüme)
-# ----------------------------------------------------------------
-@router.post("/zimmetle")
-def zimmet_ver(veri: ZimmetVerModel, db: Session = Depends(get_session)):
-    """
-    Seçilen demirbaşı depodan alır, personelin/bölümün üzerine kaydeder.
-    """
-    # 1. Demirbaşı Bul
-    demirbas = db.get(DemirbasVarlik, veri.demirbas_id)
-    if not demirbas:
-        raise HTTPException(status_code=404, detail="Demirbaş bulunamadı.")
-    
-    # 2. Müsaitlik Kontrolü (Manifesto Kuralı)
-    if demirbas.durum != DemirbasDurumu.DEPODA:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Bu ürün zimmetlenemez! Şu anki durumu: {demirbas.durum}. Sadece DEPODA olanlar verilebilir."
-        )
-
-    # 3. Hedef Kontrolü (Kime veriyoruz?)
-    hedef_isim = ""
-    if veri.personel_id:
-        personel = db.get(Personel, veri.personel_id)
-        if not personel or not personel.aktif_mi:
-            raise HTTPException(status_code=400, detail="Personel bulunamadı veya pasif.")
-        hedef_isim = f"Personel: {personel.ad_soyad}"
-        
-        # Atama
-        demirbas.zimmetli_personel_id = veri.personel_id
-        demirbas.zimmetli_bolum_id = None # Temizle
-        
-    elif veri.bolum_id:
-        bolum = db.get(Bolum, veri.bolum_id)
-        if not bolum or not bolum.aktif_mi:
-            raise HTTPException(status_code=400, detail="Bölüm bulunamadı veya pasif.")
-        hedef_isim = f"Bölüm: {bolum.ad}"
-        
-        # Atama
-        demirbas.zimmetli_bolum_id = veri.bolum_id
-        demirbas.zimmetli_personel_id = None # Temizle
-        
-    else:
-        raise HTTPException(status_code=400, detail="Zimmet için Personel ID veya Bölüm ID seçilmelidir.")
-
-    # 4. Durum Güncelleme
-    eski_depo_id = demirbas.bulundugu_depo_id
-    demirbas.durum = DemirbasDurumu.ZIMMETLI
-    demirbas.bulundugu_depo_id = None # Artık depoda değil, sahada.
-
-    # 5. Loglama
-    log = Hareket(
-        islem_tipi=IslemTipi.ZIMMET_VER,
-        urun_id=demirbas.urun_id,
-        demirbas_id=demirbas.id,
-        cikis_depo_id=eski_depo_id,
-        personel_id=veri.personel_id,
-        bolum_id=veri.bolum_id,
-        miktar=1,
-        aciklama=f"{hedef_isim} - {veri.aciklama}"
-    )
-    
-    db.add(log)
-    db.add(demirbas)
-    db.commit()
-    return {"mesaj": f"Demirbaş ({demirbas.ozel_kod}) başarıyla zimmetlendi."}
-
-# ----------------------------------------------------------------
-# 2. ZİMMET İADE ALMA
-# ----------------------------------------------------------------
-@router.post("/iade")
-def zimmet_iade(veri: ZimmetIadeModel, db: Session = Depends(get_session)):
-    """
-    Sahadaki demirbaşı depoya geri alır. Durumu (Sağlam/Arızalı) burada belirlenir.
-    """
-    demirbas = db.get(DemirbasVarlik, veri.demirbas_id)
-    if not demirbas:
-        raise HTTPException(status_code=404, detail="Demirbaş bulunamadı.")
-    
-    # Sadece zimmettekiler iade alınabilir
-    if demirbas.durum != DemirbasDurumu.ZIMMETLI:
-        raise HTTPException(status_code=400, detail="Bu ürün şu an zimmette görünmüyor.")
-
-    depo = db.get(Depo, veri.hedef_depo_id)
-    if not depo:
-        raise HTTPException(status_code=404, detail="Hedef depo bulunamadı.")
-
-    # Kimden geldiğini loglamak için saklayalım
-    eski_personel = demirbas.zimmetli_personel_id
-    eski_bolum = demirbas.zimmetli_bolum_id
-
-    # Durum Güncelleme
-    # İade edilen ürün seçilen duruma geçer (SAGLAM, ARIZALI, HURDA)
-    demirbas.durum = veri.durum 
-    demirbas.bulundugu_depo_id = veri.hedef_depo_id # Fiziksel olarak depoya girdi
-    
-    # Zimmet kayıtlarını temizle
-    demirbas.zimmetli_personel_id = None
-    demirbas.zimmetli_bolum_id = None
-
-    # Loglama
-    log = Hareket(
-        islem_tipi=IslemTipi.ZIMMET_IADE,
-        urun_id=demirbas.urun_id,
-        demirbas_id=demirbas.id,
-        giris_depo_id=veri.hedef_depo_id,
-        personel_id=eski_personel,
-        bolum_id=eski_bolum,
-        miktar=1,
-        aciklama=f"İade Durumu: {veri.durum} - {veri.aciklama}"
-    )
-
-    db.add(log)
-    db.add(demirbas)
-    db.commit()
-    return {"mesaj": f"Demirbaş iade alındı. Yeni Durum: {veri.durum}"}
-
-# ----------------------------------------------------------------
-# 3. LİSTELEME (Sorgulama)
-# ----------------------------------------------------------------
-
-@router.get("/list", response_model=List[DemirbasVarlik])
-def demirbas_listele(
-    durum: Optional[DemirbasDurumu] = None, 
-    personel_id: Optional[int] = None,
-    db: Session = Depends(get_session)
-):
-    """
-    Demirbaşları filtreleyerek listeler.
-    Örn: Sadece ZIMMETLI olanlar veya sadece bir personele ait olanlar.
-    """
-    query = select(DemirbasVarlik)
-    
-    if durum:
-        query = query.where(DemirbasVarlik.durum == durum)
-    
-    if personel_id:
-        query = query.where(DemirbasVarlik.zimmetli_personel_id == personel_id)
-        
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session, select
+from pydantic import BaseModel
+from typing import Optional, List
+
+# Kendi modüllerimiz
+from app.arama import AramaTuru, dizine_yaz
+from app.canli import degisti
+from app.database import asenkron_uygun, get_session, VeritabaniRoute
+from app.idempotans import IdempotansAnahtari, idempotans_anahtari, idempotent_calistir
+from app.onbellek import tanim_onbellegi
+from app.ozet import demirbas_ozet_guncelle
+from app.models import (
+    DemirbasVarlik, Personel, Bolum, Depo, Hareket, 
+    DemirbasDurumu, IslemTipi
+)
+
+router = APIRouter(
+    prefix="/demirbas",
+    tags=["Demirbaş & Zimmet Yönetimi"],
+    route_class=VeritabaniRoute
+)
+
+# --- İSTEK MODELLERİ ---
+
+class ZimmetVerModel(BaseModel):
+    demirbas_id: int
+    personel_id: Optional[int] = None
+    bolum_id: Optional[int] = None
+    aciklama: str = ""
+
+class ZimmetIadeModel(BaseModel):
+    demirbas_id: int
+    hedef_depo_id: int # İade nereye bırakıldı?
+    durum: DemirbasDurumu # SAGLAM, ARIZALI veya HURDA
+    aciklama: str = ""
+
+# ----------------------------------------------------------------
+# 1. ZİMMET VERME (Personel veya Bölüme)
+# ----------------------------------------------------------------
+def zimmet_ver_uygula(veri: ZimmetVerModel, db: Session) -> dict:
+    """
+    Zimmet işleminin kendisi. Commit YAPMAZ (tekli ve toplu uç noktalar ortak kullanır).
+    """
+    # 1. Demirbaşı Bul
+    demirbas = db.get(DemirbasVarlik, veri.demirbas_id)
+    if not demirbas:
+        raise HTTPException(status_code=404, detail="Demirbaş bulunamadı.")
+    
+    # 2. Müsaitlik Kontrolü (Manifesto Kuralı)
+    if demirbas.durum != DemirbasDurumu.DEPODA:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Bu ürün zimmetlenemez! Şu anki durumu: {demirbas.durum}. Sadece DEPODA olanlar verilebilir."
+        )
+
+    # 3. Hedef Kontrolü (Kime veriyoruz?)
+    hedef_isim = ""
+    if veri.personel_id:
+        personel = tanim_onbellegi.getir(db, Personel, veri.personel_id)
+        if not personel or not personel.aktif_mi:
+            raise HTTPException(status_code=400, detail="Personel bulunamadı veya pasif.")
+        hedef_isim = f"Personel: {personel.ad_soyad}"
+        
+        # Atama
+        demirbas.zimmetli_personel_id = veri.personel_id
+        demirbas.zimmetli_bolum_id = None # Temizle
+        
+    elif veri.bolum_id:
+        bolum = tanim_onbellegi.getir(db, Bolum, veri.bolum_id)
+        if not bolum or not bolum.aktif_mi:
+            raise HTTPException(status_code=400, detail="Bölüm bulunamadı veya pasif.")
+        hedef_isim = f"Bölüm: {bolum.ad}"
+        
+        # Atama
+        demirbas.zimmetli_bolum_id = veri.bolum_id
+        demirbas.zimmetli_personel_id = None # Temizle
+        
+    else:
+        raise HTTPException(status_code=400, detail="Zimmet için Personel ID veya Bölüm ID seçilmelidir.")
+
+    # 4. Durum Güncelleme
+    eski_depo_id = demirbas.bulundugu_depo_id
+    demirbas_ozet_guncelle(db, demirbas.urun_id, (demirbas.durum, eski_depo_id), (DemirbasDurumu.ZIMMETLI, None))
+    demirbas.durum = DemirbasDurumu.ZIMMETLI
+    demirbas.bulundugu_depo_id = None # Artık depoda değil, sahada.
+
+    # 5. Loglama
+    log = Hareket(
+        islem_tipi=IslemTipi.ZIMMET_VER,
+        urun_id=demirbas.urun_id,
+        demirbas_id=demirbas.id,
+        cikis_depo_id=eski_depo_id,
+        personel_id=veri.personel_id,
+        bolum_id=veri.bolum_id,
+        miktar=1,
+        aciklama=f"{hedef_isim} - {veri.aciklama}"
+    )
+    
+    db.add(log)
+    db.add(demirbas)
+    degisti(db, demirbas=[demirbas.id])
+    return {"mesaj": f"Demirbaş ({demirbas.ozel_kod}) başarıyla zimmetlendi."}
+
+@router.post("/zimmetle")
+@asenkron_uygun
+def zimmet_ver(
+    veri: ZimmetVerModel, db: Session = Depends(get_session),
+    idempotans: Optional[IdempotansAnahtari] = Depends(idempotans_anahtari)
+):
+    """
+    Seçilen demirbaşı depodan alır, personelin/bölümün üzerine kaydeder.
+    """
+    return idempotent_calistir(db, idempotans, veri, lambda: zimmet_ver_uygula(veri, db))
+
+# ----------------------------------------------------------------
+# 2. ZİMMET İADE ALMA
+# ----------------------------------------------------------------
+def zimmet_iade_uygula(veri: ZimmetIadeModel, db: Session) -> dict:
+    """İade işleminin kendisi. Commit YAPMAZ."""
+    demirbas = db.get(DemirbasVarlik, veri.demirbas_id)
+    if not demirbas:
+        raise HTTPException(status_code=404, detail="Demirbaş bulunamadı.")
+    
+    # Sadece zimmettekiler iade alınabilir
+    if demirbas.durum != DemirbasDurumu.ZIMMETLI:
+        raise HTTPException(status_code=400, detail="Bu ürün şu an zimmette görünmüyor.")
+    if veri.durum == DemirbasDurumu.ZIMMETLI:
+        raise HTTPException(status_code=400, detail="İade edilen demirbaşın yeni durumu ZIMMETLI olamaz.")
+
+    depo = tanim_onbellegi.getir(db, Depo, veri.hedef_depo_id)
+    if not depo:
+        raise HTTPException(status_code=404, detail="Hedef depo bulunamadı.")
+
+    # Kimden geldiğini loglamak için saklayalım
+    eski_personel = demirbas.zimmetli_personel_id
+    eski_bolum = demirbas.zimmetli_bolum_id
+
+    # Durum Güncelleme
+    # İade edilen ürün seçilen duruma geçer (SAGLAM, ARIZALI, HURDA)
+    demirbas.durum = veri.durum 
+    demirbas.bulundugu_depo_id = veri.hedef_depo_id # Fiziksel olarak depoya girdi
+    
+    # Zimmet kayıtlarını temizle
+    demirbas.zimmetli_personel_id = None
+    demirbas.zimmetli_bolum_id = None
+    demirbas_ozet_guncelle(db, demirbas.urun_id, (DemirbasDurumu.ZIMMETLI, None), (veri.durum, veri.hedef_depo_id))
+    if veri.durum == DemirbasDurumu.HURDA:
+        dizine_yaz(db, AramaTuru.DEMIRBAS, [demirbas]) # Hurdalar otomatik tamamlamada çıkmasın
+
+    # Loglama
+    log = Hareket(
+        islem_tipi=IslemTipi.ZIMMET_IADE,
+        urun_id=demirbas.urun_id,
+        demirbas_id=demirbas.id,
+        giris_depo_id=veri.hedef_depo_id,
+        personel_id=eski_personel,
+        bolum_id=eski_bolum,
+        miktar=1,
+        aciklama=f"İade Durumu: {veri.durum} - {veri.aciklama}"
+    )
+
+    db.add(log)
+    db.add(demirbas)
+    degisti(db, demirbas=[demirbas.id])
+    return {"mesaj": f"Demirbaş iade alındı. Yeni Durum: {veri.durum}"}
+
+@router.post("/iade")
+@asenkron_uygun
+def zimmet_iade(
+    veri: ZimmetIadeModel, db: Session = Depends(get_session),
+    idempotans: Optional[IdempotansAnahtari] = Depends(idempotans_anahtari)
+):
+    """
+    Sahadaki demirbaşı depoya geri alır. Durumu (Sağlam/Arızalı) burada belirlenir.
+    """
+    return idempotent_calistir(db, idempotans, veri, lambda: zimmet_iade_uygula(veri, db))
+
+# ----------------------------------------------------------------
+# 3. LİSTELEME (Sorgulama)
+# ----------------------------------------------------------------
+
+@router.get("/list", response_model=List[DemirbasVarlik])
+@asenkron_uygun
+def demirbas_listele(
+    durum: Optional[DemirbasDurumu] = None, 
+    personel_id: Optional[int] = None,
+    db: Session = Depends(get_session)
+):
+    """
+    Demirbaşları filtreleyerek listeler.
+    Örn: Sadece ZIMMETLI olanlar veya sadece bir personele ait olanlar.
+    """
+    query = select(DemirbasVarlik)
+    
+    if durum:
+        query = query.where(DemirbasVarlik.durum == durum)
+    
+    if personel_id:
+        query = query.where(DemirbasVarlik.zimmetli_personel_id == personel_id)
+        
     return db.exec(query).all()
\ No newline at end of file
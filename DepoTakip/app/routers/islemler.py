@@ -1,228 +1,412 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-import uuid
-
-# Kendi modüllerimiz
-from app.database import get_session
-from app.models import (
-    Urun, Depo, Bolum, StokSarf, DemirbasVarlik, Hareket, 
-    IslemTipi, UrunTipi, DemirbasDurumu
-)
-
-router = APIRouter(
-    prefix="/islem",
-    tags=["Stok İşlemleri (Giriş/Çıkış/Transfer)"]
-)
-
-# --- GİRİŞ MODELLERİ (Veri Doğrulama İçin) ---
-# Kullanıcının göndereceği veriyi kontrol eden şablonlar
-
-class StokGirisModel(BaseModel):
-    urun_id: int
-    depo_id: int
-    miktar: float
-    aciklama: str = ""
-
-class StokTransferModel(BaseModel):
-    urun_id: int
-    cikis_depo_id: int
-    giris_depo_id: int
-    miktar: float
-    aciklama: str = ""
-
-class StokCikisModel(BaseModel):
-    urun_id: int
-    depo_id: int
-    bolum_id: int # Hangi birime çıkılıyor?
-    miktar: float
-    aciklama: str = ""
-
-# ----------------------------------------------------------------
-# 1. MAL KABUL (GİRİŞ)
-# ----------------------------------------------------------------
-@router.post("/giris")
-def stok_giris(veri: StokGirisModel, db: Session = Depends(get_session)):
-    """
-    Depoya ürün girişi yapar.
-    - Eğer SARF ise: Depodaki miktarı artırır.
-    - Eğer DEMİRBAŞ ise: Girilen miktar kadar 'Tekil Varlık' oluşturur.
-    """
-    # 1. Ürünü Bul
-    urun = db.get(Urun, veri.urun_id)
-    if not urun:
-        raise HTTPException(status_code=404, detail="Ürün bulunamadı")
-    
-    # 2. Depoyu Bul
-    depo = db.get(Depo, veri.depo_id)
-    if not depo or not depo.aktif_mi:
-        raise HTTPException(status_code=400, detail="Depo bulunamadı veya pasif.")
-
-    # --- SENARYO A: SARF MALZEME GİRİŞİ ---
-    if urun.tip == UrunTipi.SARF:
-        # Stok kaydı var mı bak, yoksa 0 ile oluştur.
-        stok = db.exec(
-            select(StokSarf)
-            .where(StokSarf.depo_id == veri.depo_id)
-            .where(StokSarf.urun_id == veri.urun_id)
-        ).first()
-        
-        if not stok:
-            stok = StokSarf(depo_id=veri.depo_id, urun_id=veri.urun_id, miktar=0)
-            db.add(stok)
-        
-        # Miktarı artır
-        stok.miktar += veri.miktar
-        
-        # Hareket Logu Oluştur
-        log = Hareket(
-            islem_tipi=IslemTipi.GIRIS,
-            urun_id=veri.urun_id,
-            giris_depo_id=veri.depo_id,
-            miktar=veri.miktar,
-            aciklama=veri.aciklama
-        )
-        db.add(log)
-        db.commit()
-        return {"mesaj": f"{urun.ad} ({veri.miktar} {urun.birim}) depoya eklendi."}
-
-    # --- SENARYO B: DEMİRBAŞ GİRİŞİ (KRİTİK) ---
-    elif urun.tip == UrunTipi.DEMIRBAS:
-        # Demirbaş adedi tam sayı olmalı
-        adet = int(veri.miktar)
-        if adet <= 0:
-            raise HTTPException(status_code=400, detail="Demirbaş adedi en az 1 olmalıdır.")
-        
-        yaratilan_kodlar = []
-        
-        # Adet kadar döngü kurup tek tek varlık yaratıyoruz
-        for i in range(adet):
-            # Benzersiz Kod Üretimi (Örn: DEM-20231025-X8Y1)
-            ozel_kod = f"DEM-{uuid.uuid4().hex[:8].upper()}"
-            
-            yeni_demirbas = DemirbasVarlik(
-                urun_id=urun.id,
-                ozel_kod=ozel_kod,
-                durum=DemirbasDurumu.DEPODA,
-                bulundugu_depo_id=veri.depo_id
-            )
-            db.add(yeni_demirbas)
-            db.commit() # ID oluşması için commit gerek
-            db.refresh(yeni_demirbas)
-            
-            # Her bir demirbaş için ayrı giriş logu (İzlenebilirlik için şart)
-            log = Hareket(
-                islem_tipi=IslemTipi.GIRIS,
-                urun_id=urun.id,
-                giris_depo_id=veri.depo_id,
-                miktar=1, # Demirbaş her zaman 1
-                demirbas_id=yeni_demirbas.id,
-                aciklama=f"Toplu Giriş - {veri.aciklama}"
-            )
-            db.add(log)
-            yaratilan_kodlar.append(ozel_kod)
-            
-        db.commit()
-        return {
-            "mesaj": f"{adet} adet demirbaş tekil olarak sisteme işlendi.",
-            "kodlar": yaratilan_kodlar
-        }
-
-# ----------------------------------------------------------------
-# 2. SARF TRANSFER (Depo -> Depo)
-# ----------------------------------------------------------------
-@router.post("/transfer")
-def stok_transfer(veri: StokTransferModel, db: Session = Depends(get_session)):
-    """
-    Sadece SARF malzemeler için depolar arası transfer.
-    Demirbaşlar 'Zimmet' ile yer değiştirir veya 'Demirbaş Transfer' modülü gerekir.
-    Burada sadece Sarf'a izin veriyoruz (Manifesto gereği).
-    """
-    urun = db.get(Urun, veri.urun_id)
-    if urun.tip != UrunTipi.SARF:
-        raise HTTPException(status_code=400, detail="Demirbaşlar bu menüden transfer edilemez! Zimmet veya Demirbaş Atama kullanın.")
-
-    # Kaynak Depo Stok Kontrolü
-    kaynak_stok = db.exec(
-        select(StokSarf)
-        .where(StokSarf.depo_id == veri.cikis_depo_id)
-        .where(StokSarf.urun_id == veri.urun_id)
-    ).first()
-
-    if not kaynak_stok or kaynak_stok.miktar < veri.miktar:
-        mevcut = kaynak_stok.miktar if kaynak_stok else 0
-        raise HTTPException(status_code=400, detail=f"Yetersiz Stok! Kaynak depoda mevcut: {mevcut}")
-
-    # Hedef Depo Stok Bul/Oluştur
-    hedef_stok = db.exec(
-        select(StokSarf)
-        .where(StokSarf.depo_id == veri.giris_depo_id)
-        .where(StokSarf.urun_id == veri.urun_id)
-    ).first()
-
-    if not hedef_stok:
-        hedef_stok = StokSarf(depo_id=veri.giris_depo_id, urun_id=veri.urun_id, miktar=0)
-        db.add(hedef_stok)
-
-    # Transfer İşlemi
-    kaynak_stok.miktar -= veri.miktar
-    hedef_stok.miktar += veri.miktar
-
-    # Loglama
-    log = Hareket(
-        islem_tipi=IslemTipi.TRANSFER,
-        urun_id=veri.urun_id,
-        cikis_depo_id=veri.cikis_depo_id,
-        giris_depo_id=veri.giris_depo_id,
-        miktar=veri.miktar,
-        aciklama=veri.aciklama
-    )
-    db.add(log)
-    db.commit()
-    return {"mesaj": "Transfer başarıyla tamamlandı."}
-
-# ----------------------------------------------------------------
-# 3. SARF ÇIKIŞ (Tüketim)
-# ----------------------------------------------------------------
-@router.post("/cikis")
-def stok_cikis(veri: StokCikisModel, db: Session = Depends(get_session)):
-    """
-    Depodan bir bölüme sarf malzeme çıkışı (Tüketim).
-    Stoktan düşer. Geri dönüşü yoktur (İade hariç).
-    """
-    urun = db.get(Urun, veri.urun_id)
-    if urun.tip != UrunTipi.SARF:
-        raise HTTPException(status_code=400, detail="Demirbaşlar 'Çıkış' yapılamaz, Zimmetlenmelidir!")
-
-    # Stok Kontrolü
-    stok = db.exec(
-        select(StokSarf)
-        .where(StokSarf.depo_id == veri.depo_id)
-        .where(StokSarf.urun_id == veri.urun_id)
-    ).first()
-
-    if not stok or stok.miktar < veri.miktar:
-        raise HTTPException(status_code=400, detail="Yetersiz Stok!")
-
-    # Bölüm Kontrolü
-    bolum = db.get(Bolum, veri.bolum_id)
-    if not bolum:
-        raise HTTPException(status_code=404, detail="Hedef bölüm bulunamadı.")
-
-    # İşlem
-    stok.miktar -= veri.miktar
-    
-    # Loglama
-    log = Hareket(
-        islem_tipi=IslemTipi.CIKIS,
-        urun_id=veri.urun_id,
-        cikis_depo_id=veri.depo_id,
-        bolum_id=veri.bolum_id, # Hangi bölüme gitti?
-        miktar=veri.miktar,
-        aciklama=veri.aciklama
-    )
-    db.add(log)
-    db.commit()
-    return {"mesaj": "Çıkış işlemi onaylandı."}
\ No newline at end of file
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel import Session, select, col, insert
+from pydantic import BaseModel, model_validator
+from typing import Optional, List, Union
+from collections import defaultdict
+from datetime import datetime
+import uuid
+
+# Kendi modüllerimiz
+from app.arama import AramaTuru, dizine_yaz
+from app.canli import degisti
+from app.database import asenkron_uygun, get_session, VeritabaniRoute
+from app.idempotans import IdempotansAnahtari, idempotans_anahtari, idempotent_calistir
+from app.models import (
+    Urun, Depo, Bolum, Personel, DemirbasVarlik, Hareket, 
+    IslemTipi, UrunTipi, DemirbasDurumu
+)
+from app.onbellek import TANIM_MODELLERI, tanim_onbellegi
+from app.stok import stok_artir, stok_dus, stok_aktar, stok_miktari
+from app.ozet import sarf_ozet_guncelle, demirbas_ozet_guncelle
+from app.uyarilar import stok_uyarilarini_degerlendir
+from app.routers.demirbas import (
+    ZimmetVerModel, ZimmetIadeModel, zimmet_ver_uygula, zimmet_iade_uygula
+)
+
+router = APIRouter(
+    prefix="/islem",
+    tags=["Stok İşlemleri (Giriş/Çıkış/Transfer)"],
+    route_class=VeritabaniRoute
+)
+
+# --- GİRİŞ MODELLERİ (Veri Doğrulama İçin) ---
+# Kullanıcının göndereceği veriyi kontrol eden şablonlar
+
+class StokGirisModel(BaseModel):
+    urun_id: int
+    depo_id: int
+    miktar: float
+    aciklama: str = ""
+
+class StokTransferModel(BaseModel):
+    urun_id: int
+    cikis_depo_id: int
+    giris_depo_id: int
+    miktar: float
+    aciklama: str = ""
+
+class StokCikisModel(BaseModel):
+    urun_id: int
+    depo_id: int
+    bolum_id: int # Hangi birime çıkılıyor?
+    miktar: float
+    aciklama: str = ""
+
+# --- YARDIMCI FONKSİYONLAR ---
+
+KOD_SORGU_PARCASI = 500 # IN (...) sorgularında tek seferde gönderilecek kod sayısı
+
+def _demirbas_kodlari_uret(db: Session, adet: int) -> List[str]:
+    """
+    Toplu giriş için benzersiz demirbaş kodları (DEM-XXXXXXXX) üretir.
+    Çakışma kontrolü her satır için ayrı ayrı değil, tüm parti için
+    IN (...) sorgularıyla yapılır. Çakışan az sayıdaki kod yeniden üretilir.
+    """
+    kodlar = {}  # Sıra korunsun diye dict kullanıyoruz
+    while len(kodlar) < adet:
+        adaylar = {}
+        while len(kodlar) + len(adaylar) < adet:
+            kod = f"DEM-{uuid.uuid4().hex[:8].upper()}"
+            if kod not in kodlar:
+                adaylar[kod] = None
+
+        mevcut = set()
+        aday_listesi = list(adaylar)
+        for i in range(0, len(aday_listesi), KOD_SORGU_PARCASI):
+            parca = aday_listesi[i:i + KOD_SORGU_PARCASI]
+            mevcut.update(db.exec(
+                select(DemirbasVarlik.ozel_kod).where(col(DemirbasVarlik.ozel_kod).in_(parca))
+            ).all())
+
+        for kod in aday_listesi:
+            if kod not in mevcut:
+                kodlar[kod] = None
+    return list(kodlar)
+
+def _demirbas_toplu_giris(db: Session, urun: Urun, depo_id: int, adet: int, aciklama: str) -> List[str]:
+    """
+    'adet' kadar tekil demirbaş ve her biri için GIRIS logu oluşturur.
+    Commit YAPMAZ; çağıran taraf transaction'ı tek seferde onaylar.
+    Satırlar toplu INSERT (executemany + RETURNING) ile yazılır.
+    """
+    kodlar = _demirbas_kodlari_uret(db, adet)
+
+    varlik_satirlari = [
+        {
+            "urun_id": urun.id,
+            "ozel_kod": kod,
+            "durum": DemirbasDurumu.DEPODA,
+            "bulundugu_depo_id": depo_id,
+        }
+        for kod in kodlar
+    ]
+    # Oluşan ID'leri tek seferde geri alıyoruz (satır başına commit/refresh yok)
+    idler = db.exec(
+        insert(DemirbasVarlik).returning(DemirbasVarlik.id),
+        params=varlik_satirlari
+    ).scalars().all()
+    dizine_yaz(db, AramaTuru.DEMIRBAS, [DemirbasVarlik(id=i, **satir) for i, satir in zip(idler, varlik_satirlari)])
+    degisti(db, demirbas=idler)
+
+    # Her bir demirbaş için ayrı giriş logu (İzlenebilirlik için şart)
+    simdi = datetime.now()
+    log_satirlari = [
+        {
+            "tarih": simdi,
+            "islem_tipi": IslemTipi.GIRIS,
+            "urun_id": urun.id,
+            "giris_depo_id": depo_id,
+            "miktar": 1, # Demirbaş her zaman 1
+            "demirbas_id": demirbas_id,
+            "aciklama": f"Toplu Giriş - {aciklama}",
+            "kullanici": "Sistem",
+        }
+        for demirbas_id in idler
+    ]
+    db.exec(insert(Hareket), params=log_satirlari)
+    return kodlar
+
+# ----------------------------------------------------------------
+# 1. MAL KABUL (GİRİŞ)
+# ----------------------------------------------------------------
+def stok_giris_uygula(veri: StokGirisModel, db: Session) -> dict:
+    """
+    Giriş işleminin kendisi. Commit YAPMAZ (tekli ve toplu uç noktalar ortak kullanır).
+    """
+    # 1. Ürünü Bul
+    urun = tanim_onbellegi.getir(db, Urun, veri.urun_id)
+    if not urun:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı")
+    
+    # 2. Depoyu Bul
+    depo = tanim_onbellegi.getir(db, Depo, veri.depo_id)
+    if not depo or not depo.aktif_mi:
+        raise HTTPException(status_code=400, detail="Depo bulunamadı veya pasif.")
+
+    # --- SENARYO A: SARF MALZEME GİRİŞİ ---
+    if urun.tip == UrunTipi.SARF:
+        # Miktarı artır (Stok kaydı yoksa atomik olarak oluşturulur)
+        stok_artir(db, veri.depo_id, veri.urun_id, veri.miktar)
+        sarf_ozet_guncelle(db, urun, {veri.depo_id: veri.miktar})
+        stok_uyarilarini_degerlendir(db, urun, [veri.depo_id])
+        degisti(db, sarf=[(veri.depo_id, veri.urun_id)])
+        
+        # Hareket Logu Oluştur
+        log = Hareket(
+            islem_tipi=IslemTipi.GIRIS,
+            urun_id=veri.urun_id,
+            giris_depo_id=veri.depo_id,
+            miktar=veri.miktar,
+            aciklama=veri.aciklama
+        )
+        db.add(log)
+        return {"mesaj": f"{urun.ad} ({veri.miktar} {urun.birim}) depoya eklendi."}
+
+    # --- SENARYO B: DEMİRBAŞ GİRİŞİ (KRİTİK) ---
+    # Demirbaş adedi tam sayı olmalı
+    adet = int(veri.miktar)
+    if adet <= 0:
+        raise HTTPException(status_code=400, detail="Demirbaş adedi en az 1 olmalıdır.")
+    
+    # Tüm varlıklar ve giriş logları tek transaction içinde, toplu INSERT ile yazılır.
+    # Yarıda kalan bir hata durumunda hiçbir kayıt oluşmaz.
+    yaratilan_kodlar = _demirbas_toplu_giris(db, urun, veri.depo_id, adet, veri.aciklama)
+    demirbas_ozet_guncelle(db, urun.id, None, (DemirbasDurumu.DEPODA, veri.depo_id), adet=adet)
+    return {
+        "mesaj": f"{adet} adet demirbaş tekil olarak sisteme işlendi.",
+        "kodlar": yaratilan_kodlar
+    }
+
+@router.post("/giris")
+@asenkron_uygun
+def stok_giris(
+    veri: StokGirisModel, db: Session = Depends(get_session),
+    idempotans: Optional[IdempotansAnahtari] = Depends(idempotans_anahtari)
+):
+    """
+    Depoya ürün girişi yapar.
+    - Eğer SARF ise: Depodaki miktarı artırır.
+    - Eğer DEMİRBAŞ ise: Girilen miktar kadar 'Tekil Varlık' oluşturur.
+    """
+    return idempotent_calistir(db, idempotans, veri, lambda: stok_giris_uygula(veri, db))
+
+# ----------------------------------------------------------------
+# 2. SARF TRANSFER (Depo -> Depo)
+# ----------------------------------------------------------------
+def stok_transfer_uygula(veri: StokTransferModel, db: Session) -> dict:
+    """Transfer işleminin kendisi. Commit YAPMAZ."""
+    if veri.cikis_depo_id == veri.giris_depo_id:
+        raise HTTPException(status_code=400, detail="Kaynak ve hedef depo aynı olamaz.")
+    urun = tanim_onbellegi.getir(db, Urun, veri.urun_id)
+    if not urun:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı")
+    if urun.tip != UrunTipi.SARF:
+        raise HTTPException(status_code=400, detail="Demirbaşlar bu menüden transfer edilemez! Zimmet veya Demirbaş Atama kullanın.")
+
+    # Transfer İşlemi (Stok kontrolü ve düşüm tek atomik UPDATE içinde)
+    if not stok_aktar(db, veri.cikis_depo_id, veri.giris_depo_id, veri.urun_id, veri.miktar):
+        mevcut = stok_miktari(db, veri.cikis_depo_id, veri.urun_id)
+        raise HTTPException(status_code=400, detail=f"Yetersiz Stok! Kaynak depoda mevcut: {mevcut}")
+    farklar = defaultdict(float) # Depo başına toplanır: Aynı depo iki kez gelse de fark kaybolmaz
+    farklar[veri.cikis_depo_id] -= veri.miktar
+    farklar[veri.giris_depo_id] += veri.miktar
+    sarf_ozet_guncelle(db, urun, farklar)
+    stok_uyarilarini_degerlendir(db, urun, [veri.cikis_depo_id, veri.giris_depo_id])
+    degisti(db, sarf=[(veri.cikis_depo_id, veri.urun_id), (veri.giris_depo_id, veri.urun_id)])
+
+    # Loglama
+    log = Hareket(
+        islem_tipi=IslemTipi.TRANSFER,
+        urun_id=veri.urun_id,
+        cikis_depo_id=veri.cikis_depo_id,
+        giris_depo_id=veri.giris_depo_id,
+        miktar=veri.miktar,
+        aciklama=veri.aciklama
+    )
+    db.add(log)
+    return {"mesaj": "Transfer başarıyla tamamlandı."}
+
+@router.post("/transfer")
+@asenkron_uygun
+def stok_transfer(
+    veri: StokTransferModel, db: Session = Depends(get_session),
+    idempotans: Optional[IdempotansAnahtari] = Depends(idempotans_anahtari)
+):
+    """
+    Sadece SARF malzemeler için depolar arası transfer.
+    Demirbaşlar 'Zimmet' ile yer değiştirir veya 'Demirbaş Transfer' modülü gerekir.
+    Burada sadece Sarf'a izin veriyoruz (Manifesto gereği).
+    """
+    return idempotent_calistir(db, idempotans, veri, lambda: stok_transfer_uygula(veri, db))
+
+# ----------------------------------------------------------------
+# 3. SARF ÇIKIŞ (Tüketim)
+# ----------------------------------------------------------------
+def stok_cikis_uygula(veri: StokCikisModel, db: Session) -> dict:
+    """Çıkış işleminin kendisi. Commit YAPMAZ."""
+    urun = tanim_onbellegi.getir(db, Urun, veri.urun_id)
+    if not urun:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı")
+    if urun.tip != UrunTipi.SARF:
+        raise HTTPException(status_code=400, detail="Demirbaşlar 'Çıkış' yapılamaz, Zimmetlenmelidir!")
+
+    # Bölüm Kontrolü
+    bolum = tanim_onbellegi.getir(db, Bolum, veri.bolum_id)
+    if not bolum:
+        raise HTTPException(status_code=404, detail="Hedef bölüm bulunamadı.")
+
+    # Stok Kontrolü + İşlem (Tek atomik UPDATE, yetersizse hiçbir şey değişmez)
+    if not stok_dus(db, veri.depo_id, veri.urun_id, veri.miktar):
+        raise HTTPException(status_code=400, detail="Yetersiz Stok!")
+    sarf_ozet_guncelle(db, urun, {veri.depo_id: -veri.miktar})
+    stok_uyarilarini_degerlendir(db, urun, [veri.depo_id])
+    degisti(db, sarf=[(veri.depo_id, veri.urun_id)])
+    
+    # Loglama
+    log = Hareket(
+        islem_tipi=IslemTipi.CIKIS,
+        urun_id=veri.urun_id,
+        cikis_depo_id=veri.depo_id,
+        bolum_id=veri.bolum_id, # Hangi bölüme gitti?
+        miktar=veri.miktar,
+        aciklama=veri.aciklama
+    )
+    db.add(log)
+    return {"mesaj": "Çıkış işlemi onaylandı."}
+
+@router.post("/cikis")
+@asenkron_uygun
+def stok_cikis(
+    veri: StokCikisModel, db: Session = Depends(get_session),
+    idempotans: Optional[IdempotansAnahtari] = Depends(idempotans_anahtari)
+):
+    """
+    Depodan bir bölüme sarf malzeme çıkışı (Tüketim).
+    Stoktan düşer. Geri dönüşü yoktur (İade hariç).
+    """
+    return idempotent_calistir(db, idempotans, veri, lambda: stok_cikis_uygula(veri, db))
+
+# ----------------------------------------------------------------
+# 4. TOPLU İŞLEM (Vardiya sonu el terminali kuyruğu)
+# ----------------------------------------------------------------
+TOPLU_ISLEM_LIMITI = 1000 # Tek istekte kabul edilen en fazla işlem sayısı
+
+# Toplu istekte hangi işlem tipinin hangi şablonla doğrulanacağı
+TOPLU_MODELLER = {
+    IslemTipi.GIRIS: StokGirisModel,
+    IslemTipi.CIKIS: StokCikisModel,
+    IslemTipi.TRANSFER: StokTransferModel,
+    IslemTipi.ZIMMET_VER: ZimmetVerModel,
+    IslemTipi.ZIMMET_IADE: ZimmetIadeModel,
+}
+
+TOPLU_UYGULAYICILAR = {
+    IslemTipi.GIRIS: stok_giris_uygula,
+    IslemTipi.CIKIS: stok_cikis_uygula,
+    IslemTipi.TRANSFER: stok_transfer_uygula,
+    IslemTipi.ZIMMET_VER: zimmet_ver_uygula,
+    IslemTipi.ZIMMET_IADE: zimmet_iade_uygula,
+}
+
+# Şablondaki alan adı -> Önceden yüklenecek tablo
+ON_YUKLEME_ALANLARI = {
+    "urun_id": Urun,
+    "depo_id": Depo,
+    "cikis_depo_id": Depo,
+    "giris_depo_id": Depo,
+    "hedef_depo_id": Depo,
+    "bolum_id": Bolum,
+    "personel_id": Personel,
+    "demirbas_id": DemirbasVarlik,
+}
+
+class TopluIslemKalemi(BaseModel):
+    tip: IslemTipi
+    veri: Union[StokGirisModel, StokCikisModel, StokTransferModel, ZimmetVerModel, ZimmetIadeModel]
+
+    @model_validator(mode="before")
+    @classmethod
+    def _veri_modelini_sec(cls, deger):
+        # 'veri' alanını işlem tipine göre doğru şablonla doğrula (Union tahmine bırakılmaz)
+        if isinstance(deger, dict):
+            model = TOPLU_MODELLER.get(deger.get("tip"))
+            if model is None:
+                raise ValueError(f"Toplu işlemde desteklenmeyen işlem tipi: {deger.get('tip')}")
+            deger = {**deger, "veri": model.model_validate(deger.get("veri") or {})}
+        return deger
+
+def _toplu_on_yukle(kalemler: List[TopluIslemKalemi], db: Session):
+    """
+    Toplu işlemin ihtiyaç duyduğu tüm kayıtları tablo başına tek IN (...) sorgusuyla çeker.
+    Tanım kayıtları (Ürün, Depo...) tanım önbelleğine, demirbaşlar session'a
+    yüklenir; böylece işlemlerdeki okumalar veritabanına gitmez. Stok miktarları
+    önceden okunmaz; atomik UPDATE'ler aynı transaction içinde önceki kalemlerin
+    etkisini zaten görür.
+    """
+    idler = {}
+    for kalem in kalemler:
+        for alan, tablo in ON_YUKLEME_ALANLARI.items():
+            deger = getattr(kalem.veri, alan, None)
+            if deger:
+                idler.setdefault(tablo, set()).add(deger)
+
+    # Nesneler session'da zayıf referansla tutulur, işlem bitene kadar elimizde kalsın
+    yuklenenler = []
+    for tablo, kume in idler.items():
+        if tablo in TANIM_MODELLERI:
+            tanim_onbellegi.on_yukle(db, tablo, kume)
+            continue
+        yuklenenler.extend(db.exec(select(tablo).where(col(tablo.id).in_(kume))).all())
+    return yuklenenler
+
+def _toplu_uygula(kalemler: List[TopluIslemKalemi], db: Session):
+    """
+    Kalemleri sırasıyla uygular. Commit YAPMAZ; bir kalem hata verirse her şeyi
+    geri alır ve kalem sonuçlarını içeren hata yanıtını döner.
+    """
+    if not kalemler:
+        raise HTTPException(status_code=400, detail="İşlem listesi boş.")
+    if len(kalemler) > TOPLU_ISLEM_LIMITI:
+        raise HTTPException(status_code=400, detail=f"Tek seferde en fazla {TOPLU_ISLEM_LIMITI} işlem gönderilebilir.")
+
+    yuklenenler = _toplu_on_yukle(kalemler, db)
+
+    sonuclar = []
+    hata, hata_sira = None, None
+    for sira, kalem in enumerate(kalemler):
+        if hata:
+            sonuclar.append({"sira": sira, "tip": kalem.tip, "durum": "ATLANDI"})
+            continue
+        try:
+            sonuc = TOPLU_UYGULAYICILAR[kalem.tip](kalem.veri, db)
+            sonuclar.append({"sira": sira, "tip": kalem.tip, "durum": "BASARILI", **sonuc})
+        except HTTPException as e:
+            hata, hata_sira = e, sira
+            sonuclar.append({"sira": sira, "tip": kalem.tip, "durum": "HATA", "mesaj": e.detail})
+
+    if hata:
+        db.rollback()
+        return JSONResponse(
+            status_code=hata.status_code,
+            content=jsonable_encoder({
+                "detail": f"{hata_sira + 1}. işlem hata verdi, hiçbir işlem kaydedilmedi: {hata.detail}",
+                "sonuclar": sonuclar
+            })
+        )
+
+    return {"mesaj": f"{len(kalemler)} işlem tek seferde onaylandı.", "sonuclar": sonuclar}
+
+@router.post("/toplu")
+def toplu_islem(
+    kalemler: List[TopluIslemKalemi], db: Session = Depends(get_session),
+    idempotans: Optional[IdempotansAnahtari] = Depends(idempotans_anahtari)
+):
+    """
+    Giriş/Çıkış/Transfer/Zimmet/İade işlemlerini sırasıyla uygular ve TEK seferde onaylar.
+    Hepsi ya da hiçbiri: Bir işlem hata verirse tüm liste geri alınır.
+    Yanıtta her kalemin sonucu ayrı ayrı raporlanır.
+    Vardiya sonu kuyruğu tekrar gönderilebileceği için 'Idempotency-Key' başlığı önerilir.
+    """
+    return idempotent_calistir(db, idempotans, kalemler, lambda: _toplu_uygula(kalemler, db))
\ No newline at end of file
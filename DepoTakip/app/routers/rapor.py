@@ -1,196 +1,713 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select, col, or_
-from typing import List, Optional
-from pydantic import BaseModel
-from datetime import datetime
-
-# Kendi modüllerimiz
-from app.database import get_session
-from app.models import (
-    Hareket, Urun, Depo, Personel, Bolum, 
-    StokSarf, DemirbasVarlik, IslemTipi, UrunTipi, DemirbasDurumu
-)
-
-router = APIRouter(
-    prefix="/rapor",
-    tags=["Raporlama Merkezi"]
-)
-
-# --- FİLTRE MODELLERİ (Kullanıcının Seçenekleri) ---
-
-class HareketFiltre(BaseModel):
-    baslangic_tarihi: Optional[datetime] = None
-    bitis_tarihi: Optional[datetime] = None
-    urun_adi: Optional[str] = None # "Eldiven" yazınca tüm eldivenleri bulur
-    islem_tipi: Optional[IslemTipi] = None # Sadece ZIMMET_VER olanları getir gibi
-    depo_id: Optional[int] = None
-    personel_id: Optional[int] = None
-
-class StokFiltre(BaseModel):
-    depo_id: Optional[int] = None
-    urun_tipi: Optional[UrunTipi] = None # Sadece SARF veya DEMIRBAS
-    kritik_stok_altinda: bool = False # Güvenlik stoğunun altına düşenleri göster
-
-# --- ÇIKTI MODELLERİ (Frontend'e Gidecek Temiz Veri) ---
-# Veritabanı ID'leri yerine isimleri gönderiyoruz.
-
-class HareketRaporu(BaseModel):
-    tarih: datetime
-    islem: str
-    urun: str
-    miktar: float
-    kaynak: str # Depo adı veya 'Dışarıdan'
-    hedef: str # Personel adı, Bölüm adı veya Depo adı
-    aciklama: str
-
-# ----------------------------------------------------------------
-# 1. HAREKET GEÇMİŞİ (Timeline) - DETAYLI FİLTRELEME
-# ----------------------------------------------------------------
-@router.post("/gecmis", response_model=List[HareketRaporu])
-def hareket_gecmisi(filtre: HareketFiltre, db: Session = Depends(get_session)):
-    """
-    Tarih aralığı, ürün ismi, personel veya işlem tipine göre
-    geçmişteki tüm olayları filtreleyip getirir.
-    """
-    # Sorguyu başlat (Join'ler ile isimleri de alacağız)
-    query = select(Hareket, Urun, Depo, Personel, Bolum).join(Urun)
-    
-    # Left Join çünkü bazı alanlar boş olabilir (Personel ID yoksa işlem Depo'yadır vb.)
-    query = query.join(Depo, Hareket.cikis_depo_id == Depo.id, isouter=True)
-    query = query.join(Personel, Hareket.personel_id == Personel.id, isouter=True)
-    query = query.join(Bolum, Hareket.bolum_id == Bolum.id, isouter=True)
-
-    # --- DİNAMİK FİLTRELER ---
-    
-    # 1. Tarih Aralığı
-    if filtre.baslangic_tarihi:
-        query = query.where(Hareket.tarih >= filtre.baslangic_tarihi)
-    if filtre.bitis_tarihi:
-        query = query.where(Hareket.tarih <= filtre.bitis_tarihi)
-        
-    # 2. Ürün Arama (İçinde geçen kelimeye göre)
-    if filtre.urun_adi:
-        # Case insensitive (Büyük/küçük harf duyarsız) arama
-        query = query.where(col(Urun.ad).ilike(f"%{filtre.urun_adi}%"))
-        
-    # 3. İşlem Tipi
-    if filtre.islem_tipi:
-        query = query.where(Hareket.islem_tipi == filtre.islem_tipi)
-        
-    # 4. Depo ve Personel
-    if filtre.depo_id:
-        # Hem giriş hem çıkış yapılan işlemde bu depo var mı?
-        query = query.where(or_(Hareket.cikis_depo_id == filtre.depo_id, Hareket.giris_depo_id == filtre.depo_id))
-        
-    if filtre.personel_id:
-        query = query.where(Hareket.personel_id == filtre.personel_id)
-
-    # Sonuçları Tarihe Göre Sırala (En yeni en üstte)
-    sonuclar = db.exec(query.order_by(Hareket.tarih.desc())).all()
-    
-    # Veriyi Formatla (Frontend için okunabilir hale getir)
-    rapor_listesi = []
-    for h, u, d, p, b in sonuclar:
-        # Kaynak İsmi Belirleme
-        kaynak_isim = "-"
-        if h.cikis_depo_id:
-            # Kaynak depoyu bulmak için tekrar sorgu gerekebilir veya join mantığını genişletebiliriz.
-            # Basitlik adına sorgu anında alınan 'd' değişkeni çıkış deposuysa onu kullanıyoruz.
-            kaynak_isim = d.ad if d and d.id == h.cikis_depo_id else "Depo Transfer/Giriş"
-        elif h.islem_tipi == IslemTipi.GIRIS:
-            kaynak_isim = "Satın Alma / Tedarikçi"
-            
-        # Hedef İsmi Belirleme
-        hedef_isim = "-"
-        if h.giris_depo_id:
-             # Eğer giriş deposu joinlenen 'd' değilse veritabanından adını çekmek gerekebilir.
-             # Ancak hızlı çözüm için:
-             hedef_isim = "Depo" 
-        if p: hedef_isim = f"Personel: {p.ad_soyad}"
-        if b: hedef_isim = f"Bölüm: {b.ad}"
-
-        rapor_listesi.append(HareketRaporu(
-            tarih=h.tarih,
-            islem=h.islem_tipi,
-            urun=u.ad,
-            miktar=h.miktar,
-            kaynak=kaynak_isim,
-            hedef=hedef_isim,
-            aciklama=h.aciklama or ""
-        ))
-        
-    return rapor_listesi
-
-# ----------------------------------------------------------------
-# 2. ANLIK STOK DURUMU (Depoda ne var?)
-# ----------------------------------------------------------------
-@router.post("/stok-durumu")
-def stok_durumu(filtre: StokFiltre, db: Session = Depends(get_session)):
-    """
-    Depolardaki sarf malzemelerin güncel durumunu gösterir.
-    Kritik stok seviyesinin altındakileri filtreleyebilir.
-    """
-    query = select(StokSarf, Urun, Depo).join(Urun).join(Depo)
-    
-    if filtre.depo_id:
-        query = query.where(StokSarf.depo_id == filtre.depo_id)
-        
-    if filtre.urun_tipi:
-        query = query.where(Urun.tip == filtre.urun_tipi)
-
-    # Kritik Stok Filtresi
-    if filtre.kritik_stok_altinda:
-        query = query.where(StokSarf.miktar <= Urun.guvenlik_stogu)
-        
-    sonuclar = db.exec(query).all()
-    
-    liste = []
-    for s, u, d in sonuclar:
-        durum = "NORMAL"
-        if s.miktar <= u.guvenlik_stogu:
-            durum = "KRİTİK"
-            
-        liste.append({
-            "depo": d.ad,
-            "urun": u.ad,
-            "sku": u.sku,
-            "miktar": s.miktar,
-            "birim": u.birim,
-            "guvenlik_stogu": u.guvenlik_stogu,
-            "durum_analizi": durum
-        })
-    return liste
-
-# ----------------------------------------------------------------
-# 3. ZİMMET RAPORU (Kimde ne var?)
-# ----------------------------------------------------------------
-@router.get("/zimmet-listesi")
-def zimmet_listesi(
-    personel_adi: Optional[str] = None, 
-    db: Session = Depends(get_session)
-):
-    """
-    Şu an sahada (zimmette) olan tüm demirbaşları listeler.
-    İsimle arama yapılabilir.
-    """
-    query = select(DemirbasVarlik, Urun, Personel, Bolum)\
-        .join(Urun)\
-        .join(Personel, isouter=True)\
-        .join(Bolum, isouter=True)\
-        .where(DemirbasVarlik.durum == DemirbasDurumu.ZIMMETLI)
-    
-    if personel_adi:
-        query = query.where(col(Personel.ad_soyad).ilike(f"%{personel_adi}%"))
-        
-    sonuclar = db.exec(query).all()
-    
-    liste = []
-    for d, u, p, b in sonuclar:
-        sahip = p.ad_soyad if p else (b.ad if b else "Bilinmiyor")
-        liste.append({
-            "demirbas_no": d.ozel_kod,
-            "urun": u.ad,
-            "zimmetli_kisi_birim": sahip,
-            "seri_no": d.seri_no
-        })
-    return liste
\ No newline at end of file
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlmodel import Session, select, col, tuple_, union_all, and_
+from sqlalchemy.orm import aliased
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+import base64
+import enum
+import os
+
+# Kendi modüllerimiz
+from app.arama import AramaTuru, eslesen_kosul
+from app.arsiv import arsiv_hareketleri
+from app.database import engine, asenkron_uygun, get_session, VeritabaniRoute
+from app.disa_aktar import csv_akisi, xlsx_akisi, XLSX_DESTEKLI
+from app.goruntu import durum_hesapla
+from app.models import (
+    Hareket, Urun, Depo, Personel, Bolum, 
+    StokSarf, StokOzet, DemirbasVarlik, HareketArsivi, RaporIsi, StokUyarisi,
+    IslemTipi, UrunTipi, DemirbasDurumu, RaporIsiDurumu, StokUyariDurumu
+)
+from app.onbellek import tanim_onbellegi
+from app.ozet import TUM_DEPOLAR
+from app.rapor_isleri import dosya_yolu, is_gonder
+from app.rapor_onbellegi import rapor_onbellegi
+from app.tuketim import EN_FAZLA_AY, TuketimGrubu, ay_araligi, tuketim_analizi
+from app.uyarilar import kapanis_esigi, kuyruk_durumu
+
+# Hareketin kaynak ve hedef deposu için Depo tablosunun iki ayrı takma adı
+CikisDepo = aliased(Depo, name="cikis_depo")
+GirisDepo = aliased(Depo, name="giris_depo")
+
+router = APIRouter(
+    prefix="/rapor",
+    tags=["Raporlama Merkezi"],
+    route_class=VeritabaniRoute
+)
+
+# --- FİLTRE MODELLERİ (Kullanıcının Seçenekleri) ---
+
+class HareketFiltre(BaseModel):
+    baslangic_tarihi: Optional[datetime] = None
+    bitis_tarihi: Optional[datetime] = None
+    urun_adi: Optional[str] = None # "Eldiven" yazınca tüm eldivenleri bulur
+    islem_tipi: Optional[IslemTipi] = None # Sadece ZIMMET_VER olanları getir gibi
+    depo_id: Optional[int] = None
+    personel_id: Optional[int] = None
+
+class StokFiltre(BaseModel):
+    depo_id: Optional[int] = None
+    urun_tipi: Optional[UrunTipi] = None # Sadece SARF veya DEMIRBAS
+    kritik_stok_altinda: bool = False # Güvenlik stoğunun altına düşenleri göster
+
+# --- ÇIKTI MODELLERİ (Frontend'e Gidecek Temiz Veri) ---
+# Veritabanı ID'leri yerine isimleri gönderiyoruz.
+
+class HareketRaporu(BaseModel):
+    tarih: datetime
+    islem: str
+    urun: str
+    miktar: float
+    kaynak: str # Depo adı veya 'Dışarıdan'
+    hedef: str # Personel adı, Bölüm adı veya Depo adı
+    aciklama: str
+
+# ----------------------------------------------------------------
+# 1. HAREKET GEÇMİŞİ (Timeline) - DETAYLI FİLTRELEME
+# ----------------------------------------------------------------
+VARSAYILAN_SAYFA_BOYUTU = int(os.getenv("RAPOR_SAYFA_BOYUTU", "500"))
+EN_BUYUK_SAYFA_BOYUTU = 5000
+AKIS_PARCA_BOYUTU = 1000 # Akış modunda veritabanından tek seferde çekilen satır
+
+def _imlec_olustur(h: Hareket) -> str:
+    """Son satırın (tarih, id) çiftini URL'de taşınabilir bir metne çevirir."""
+    ham = f"{h.tarih.isoformat()}|{h.id}"
+    return base64.urlsafe_b64encode(ham.encode()).decode()
+
+def _imlec_coz(imlec: str):
+    try:
+        tarih, hareket_id = base64.urlsafe_b64decode(imlec.encode()).decode().split("|")
+        return datetime.fromisoformat(tarih), int(hareket_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci.")
+
+def _gecmis_sorgusu(filtre: HareketFiltre):
+    """Filtreye göre hareket sorgusunu kurar. Sıralama: (tarih, id) en yeni en üstte."""
+    # Sorguyu başlat (Join'ler ile isimleri de alacağız)
+    query = select(Hareket, Urun, CikisDepo, GirisDepo, Personel, Bolum).join(Urun)
+    
+    # Left Join çünkü bazı alanlar boş olabilir (Personel ID yoksa işlem Depo'yadır vb.)
+    # Depo tablosu iki farklı takma adla (alias) iki kez bağlanır: Kaynak ve Hedef.
+    query = query.join(CikisDepo, Hareket.cikis_depo_id == CikisDepo.id, isouter=True)
+    query = query.join(GirisDepo, Hareket.giris_depo_id == GirisDepo.id, isouter=True)
+    query = query.join(Personel, Hareket.personel_id == Personel.id, isouter=True)
+    query = query.join(Bolum, Hareket.bolum_id == Bolum.id, isouter=True)
+
+    # --- DİNAMİK FİLTRELER ---
+    
+    # 1. Tarih Aralığı
+    if filtre.baslangic_tarihi:
+        query = query.where(Hareket.tarih >= filtre.baslangic_tarihi)
+    if filtre.bitis_tarihi:
+        query = query.where(Hareket.tarih <= filtre.bitis_tarihi)
+        
+    # 2. Ürün Arama (Ad veya SKU içinde geçen kelimeye göre)
+    if filtre.urun_adi:
+        # Türkçe büyük/küçük harf duyarsız, arama dizininden (app/arama.py)
+        query = query.where(eslesen_kosul(AramaTuru.URUN, filtre.urun_adi, Hareket.urun_id))
+        
+    # 3. İşlem Tipi
+    if filtre.islem_tipi:
+        query = query.where(Hareket.islem_tipi == filtre.islem_tipi)
+        
+    # 4. Depo ve Personel
+    if filtre.depo_id:
+        # Hem giriş hem çıkış yapılan işlemde bu depo var mı?
+        # OR yerine iki ayrı index aramasının birleşimi: OR ile planlayıcı tabloyu
+        # ürün üzerinden baştan sona okuyabiliyor (1M harekette ~2 sn yerine ~0.15 sn).
+        depo_hareketleri = union_all(
+            select(Hareket.id).where(Hareket.cikis_depo_id == filtre.depo_id),
+            select(Hareket.id).where(Hareket.giris_depo_id == filtre.depo_id),
+        )
+        query = query.where(col(Hareket.id).in_(depo_hareketleri))
+        
+    if filtre.personel_id:
+        query = query.where(Hareket.personel_id == filtre.personel_id)
+
+    # Sonuçları Tarihe Göre Sırala (En yeni en üstte). Aynı saniyedeki kayıtlar için id ikinci anahtar.
+    return query.order_by(col(Hareket.tarih).desc(), col(Hareket.id).desc())
+
+def _arsiv_satirlari(db: Session, filtre: HareketFiltre, once=None):
+    """
+    Soğuk arşivdeki (eski aylar) hareketleri _gecmis_sorgusu satırlarıyla aynı
+    biçimde (Hareket, Urun, CikisDepo, GirisDepo, Personel, Bolum) verir.
+    Arşivdeki her ay sıcak tablodaki tüm hareketlerden eskidir; bu yüzden sıcak
+    tablonun sonuçlarının ardına eklenince sıralama (tarih, id) bozulmaz.
+    """
+    if not db.exec(select(HareketArsivi.id).limit(1)).first():
+        return
+    urun_idler = None
+    if filtre.urun_adi:
+        urun_idler = set(db.exec(select(Urun.id).where(eslesen_kosul(AramaTuru.URUN, filtre.urun_adi))).all())
+    hareketler = arsiv_hareketleri(
+        db, filtre.baslangic_tarihi, filtre.bitis_tarihi, filtre.islem_tipi,
+        filtre.depo_id, filtre.personel_id, urun_idler, once
+    )
+    for h in hareketler:
+        # İsimler önbellekten (Arşivde join yok)
+        yield (
+            h, tanim_onbellegi.getir(db, Urun, h.urun_id),
+            tanim_onbellegi.getir(db, Depo, h.cikis_depo_id), tanim_onbellegi.getir(db, Depo, h.giris_depo_id),
+            tanim_onbellegi.getir(db, Personel, h.personel_id), tanim_onbellegi.getir(db, Bolum, h.bolum_id),
+        )
+
+def _rapor_satiri(
+    h: Hareket, u: Urun, cd: Optional[Depo], gd: Optional[Depo],
+    p: Optional[Personel], b: Optional[Bolum]
+) -> HareketRaporu:
+    """
+    Veriyi Formatla (Frontend için okunabilir hale getir).
+    Tüm isimler sorgudaki join'lerden gelir; satır başına ek sorgu atılmaz.
+    """
+    kisi_birim = None
+    if p: kisi_birim = f"Personel: {p.ad_soyad}"
+    elif b: kisi_birim = f"Bölüm: {b.ad}"
+
+    # İadede yön tersine döner: Kişiden/Bölümden -> Depoya
+    if h.islem_tipi == IslemTipi.ZIMMET_IADE:
+        kaynak_isim = kisi_birim or "-"
+        hedef_isim = gd.ad if gd else "-"
+    else:
+        # Kaynak İsmi Belirleme
+        kaynak_isim = "-"
+        if cd:
+            kaynak_isim = cd.ad
+        elif h.islem_tipi == IslemTipi.GIRIS:
+            kaynak_isim = "Satın Alma / Tedarikçi"
+
+        # Hedef İsmi Belirleme (Depo, yoksa Personel/Bölüm)
+        hedef_isim = gd.ad if gd else (kisi_birim or "-")
+
+    return HareketRaporu(
+        tarih=h.tarih,
+        islem=h.islem_tipi,
+        urun=u.ad,
+        miktar=h.miktar,
+        kaynak=kaynak_isim,
+        hedef=hedef_isim,
+        aciklama=h.aciklama or ""
+    )
+
+def _gecmis_sayfasi(db: Session, filtre: HareketFiltre, limit: int, imlec: Optional[str]):
+    """Bir sayfa rapor satırı ve devamı varsa sonraki sayfanın imleci."""
+    query = _gecmis_sorgusu(filtre)
+
+    # Keyset (imleç) sayfalama: OFFSET yok, son görülen (tarih, id)'den devam
+    once = None
+    if imlec:
+        once = _imlec_coz(imlec)
+        query = query.where(tuple_(Hareket.tarih, Hareket.id) < tuple_(*once))
+
+    # Bir fazla satır isteyip sonraki sayfa olup olmadığını anlıyoruz
+    sonuclar = list(db.exec(query.limit(limit + 1)).all())
+
+    # Sıcak tablo bu sayfayı doldurmadıysa daha eski aylar arşivden gelir
+    if len(sonuclar) <= limit:
+        if sonuclar:
+            once = (sonuclar[-1][0].tarih, sonuclar[-1][0].id)
+        sonuclar += islice(_arsiv_satirlari(db, filtre, once), limit + 1 - len(sonuclar))
+    sonraki = None
+    if len(sonuclar) > limit:
+        sonuclar = sonuclar[:limit]
+        sonraki = _imlec_olustur(sonuclar[-1][0])
+
+    return [_rapor_satiri(*satir) for satir in sonuclar], sonraki
+
+@router.post("/gecmis", response_model=List[HareketRaporu])
+def hareket_gecmisi(
+    filtre: HareketFiltre,
+    limit: int = Query(VARSAYILAN_SAYFA_BOYUTU, ge=1, le=EN_BUYUK_SAYFA_BOYUTU),
+    imlec: Optional[str] = None,
+    db: Session = Depends(get_session)
+):
+    """
+    Tarih aralığı, ürün ismi, personel veya işlem tipine göre
+    geçmişteki olayları filtreleyip sayfa sayfa getirir.
+    Devamı varsa bir sonraki sayfanın imleci 'X-Sonraki-Imlec' başlığında döner;
+    aynı filtreyle ?imlec=... gönderilerek kalınan yerden devam edilir.
+    Sonuç, yeni bir hareket gelene kadar önbellekten verilir (app/rapor_onbellegi.py).
+    """
+    def uret():
+        satirlar, sonraki = _gecmis_sayfasi(db, filtre, limit, imlec)
+        return satirlar, ({"X-Sonraki-Imlec": sonraki} if sonraki else {})
+
+    return rapor_onbellegi.yanit(db, "gecmis", {"filtre": filtre, "limit": limit, "imlec": imlec}, uret)
+
+@router.post("/gecmis/akis")
+def hareket_gecmisi_akis(filtre: HareketFiltre):
+    """
+    Filtreye uyan TÜM hareketleri satır satır NDJSON (her satır bir JSON) olarak akıtır.
+    Satırlar sunucu taraflı imleçle parça parça okunur; tarih aralığı ne kadar
+    büyük olursa olsun bellek kullanımı sabit kalır (Arşivden ay ay okunur).
+    """
+    query = _gecmis_sorgusu(filtre).execution_options(yield_per=AKIS_PARCA_BOYUTU)
+
+    def satirlar():
+        # Akış yanıt döndükten sonra da sürdüğü için kendi session'ını açar
+        with Session(engine) as db:
+            for satir in chain(db.exec(query), _arsiv_satirlari(db, filtre)):
+                yield _rapor_satiri(*satir).model_dump_json() + "\n"
+
+    return StreamingResponse(satirlar(), media_type="application/x-ndjson")
+
+# ----------------------------------------------------------------
+# 2. ANLIK STOK DURUMU (Depoda ne var?)
+# ----------------------------------------------------------------
+def _stok_sorgusu(filtre: StokFiltre):
+    query = select(StokSarf, Urun, Depo).join(Urun).join(Depo)
+    
+    if filtre.depo_id:
+        query = query.where(StokSarf.depo_id == filtre.depo_id)
+        
+    if filtre.urun_tipi:
+        query = query.where(Urun.tip == filtre.urun_tipi)
+
+    # Kritik Stok Filtresi
+    if filtre.kritik_stok_altinda:
+        query = query.where(StokSarf.miktar <= Urun.guvenlik_stogu)
+    return query
+
+def _stok_satiri(s: StokSarf, u: Urun, d: Depo) -> dict:
+    durum = "NORMAL"
+    if s.miktar <= u.guvenlik_stogu:
+        durum = "KRİTİK"
+        
+    return {
+        "depo_id": d.id,
+        "urun_id": u.id,
+        "depo": d.ad,
+        "urun": u.ad,
+        "sku": u.sku,
+        "miktar": s.miktar,
+        "birim": u.birim,
+        "guvenlik_stogu": u.guvenlik_stogu,
+        "durum_analizi": durum
+    }
+
+def _gun_sonu(tarih: date) -> datetime:
+    """O günün tüm hareketlerini kapsayan dışlayıcı sınır (ertesi gün 00:00)."""
+    return datetime.combine(tarih + timedelta(days=1), datetime.min.time())
+
+def _gecmis_durum(db: Session, tarih: date, demirbas_dahil: bool = True):
+    """Günün sonundaki durum; arşiv tanımlarla uyuşmuyorsa 409."""
+    try:
+        return durum_hesapla(db, _gun_sonu(tarih), demirbas_dahil=demirbas_dahil)
+    except ValueError as hata:
+        raise HTTPException(status_code=409, detail=str(hata))
+
+def _gecmis_stok_satirlari(db: Session, filtre: StokFiltre, tarih: date):
+    """Verilen günün sonundaki sarf bakiyeleri, _stok_sorgusu satırlarıyla aynı biçimde."""
+    sarf, _ = _gecmis_durum(db, tarih, demirbas_dahil=False)
+    for (depo_id, urun_id), miktar in sorted(sarf.items()):
+        if filtre.depo_id and depo_id != filtre.depo_id:
+            continue
+        u = tanim_onbellegi.getir(db, Urun, urun_id)
+        if filtre.urun_tipi and u.tip != filtre.urun_tipi:
+            continue
+        if filtre.kritik_stok_altinda and miktar > u.guvenlik_stogu:
+            continue
+        yield StokSarf(depo_id=depo_id, urun_id=urun_id, miktar=miktar), u, tanim_onbellegi.getir(db, Depo, depo_id)
+
+@router.post("/stok-durumu")
+def stok_durumu(filtre: StokFiltre, tarih: Optional[date] = None, db: Session = Depends(get_session)):
+    """
+    Depolardaki sarf malzemelerin güncel durumunu gösterir.
+    Kritik stok seviyesinin altındakileri filtreleyebilir (Sürekli izleme için
+    /rapor/stok-uyarilari stok tablosunu taramadan açık uyarıları döner).
+    ?tarih=2025-12-31 verilirse o günün sonundaki durum gösterilir (sıfır bakiyeler hariç).
+    Geçmiş durum en yakın aylık stok görüntüsünden hesaplanır (app/goruntu.py).
+    Sonuç, yeni bir hareket gelene kadar önbellekten verilir.
+    """
+    def uret():
+        if tarih:
+            return [_stok_satiri(*satir) for satir in _gecmis_stok_satirlari(db, filtre, tarih)], {}
+        sonuclar = db.exec(_stok_sorgusu(filtre)).all()
+        return [_stok_satiri(*satir) for satir in sonuclar], {}
+
+    return rapor_onbellegi.yanit(db, "stok-durumu", {"filtre": filtre, "tarih": tarih}, uret)
+
+def _demirbas_durumu(db: Session, tarih: date, depo_id: Optional[int], personel_id: Optional[int]) -> list:
+    _, konumlar = _gecmis_durum(db, tarih)
+    secilenler = {
+        demirbas_id: k for demirbas_id, k in konumlar.items()
+        if (not depo_id or k.depo_id == depo_id) and (not personel_id or k.personel_id == personel_id)
+    }
+    idler = sorted(secilenler)
+    kodlar = {}
+    for i in range(0, len(idler), 5000): # IN listesi parametre sınırını aşmasın
+        kodlar.update((d_id, (kod, seri)) for d_id, kod, seri in db.exec(
+            select(DemirbasVarlik.id, DemirbasVarlik.ozel_kod, DemirbasVarlik.seri_no)
+            .where(col(DemirbasVarlik.id).in_(idler[i:i + 5000]))
+        ).all())
+
+    liste = []
+    for demirbas_id in idler:
+        k = secilenler[demirbas_id]
+        if k.depo_id:
+            konum = tanim_onbellegi.getir(db, Depo, k.depo_id).ad
+        elif k.personel_id:
+            konum = tanim_onbellegi.getir(db, Personel, k.personel_id).ad_soyad
+        elif k.bolum_id:
+            konum = tanim_onbellegi.getir(db, Bolum, k.bolum_id).ad
+        else:
+            konum = "Bilinmiyor"
+        ozel_kod, seri_no = kodlar[demirbas_id]
+        liste.append({
+            "demirbas_no": ozel_kod,
+            "urun": tanim_onbellegi.getir(db, Urun, k.urun_id).ad,
+            "durum": k.durum,
+            "konum": konum,
+            "seri_no": seri_no
+        })
+    return liste
+
+@router.get("/demirbas-durumu")
+def demirbas_durumu(
+    tarih: date,
+    depo_id: Optional[int] = None,
+    personel_id: Optional[int] = None,
+    db: Session = Depends(get_session)
+):
+    """
+    Verilen günün sonunda demirbaşların durumu ve yeri.
+    "31 Aralık'ta X deposunda hangi demirbaşlar vardı?" -> ?tarih=2025-12-31&depo_id=X
+    """
+    return rapor_onbellegi.yanit(
+        db, "demirbas-durumu", {"tarih": tarih, "depo_id": depo_id, "personel_id": personel_id},
+        lambda: (_demirbas_durumu(db, tarih, depo_id, personel_id), {})
+    )
+
+def _stok_ozeti(db: Session, depo_id: Optional[int], sadece_kritik: bool, depo_bazinda: bool = False) -> list:
+    # Sadece gereken sütunlar (depo bazında on binlerce satır; ORM nesnesi kurulmaz)
+    query = select(
+        StokOzet.depo_id, StokOzet.sarf_miktar, StokOzet.depoda, StokOzet.zimmetli, StokOzet.arizali,
+        StokOzet.hurda, StokOzet.kritik_mi, Urun.id, Urun.ad, Urun.sku, Urun.tip, Urun.birim, Urun.guvenlik_stogu
+    ).join(Urun, StokOzet.urun_id == Urun.id)
+    if depo_bazinda and not depo_id:
+        query = query.where(StokOzet.depo_id != TUM_DEPOLAR)
+    else:
+        query = query.where(StokOzet.depo_id == (depo_id or TUM_DEPOLAR))
+    if sadece_kritik:
+        query = query.where(StokOzet.kritik_mi == True)
+
+    depo_adlari = {TUM_DEPOLAR: "Tüm Depolar"}
+    liste = []
+    for (o_depo, sarf_miktar, depoda, zimmetli, arizali, hurda, kritik_mi,
+         u_id, u_ad, sku, tip, birim, guvenlik_stogu) in db.exec(query.order_by(Urun.ad, StokOzet.depo_id)).all():
+        if o_depo not in depo_adlari:
+            depo = tanim_onbellegi.getir(db, Depo, o_depo)
+            depo_adlari[o_depo] = depo.ad if depo else "-"
+        liste.append({
+            "depo_id": o_depo,
+            "depo": depo_adlari[o_depo],
+            "urun_id": u_id,
+            "urun": u_ad,
+            "sku": sku,
+            "tip": tip,
+            "birim": birim,
+            "sarf_miktar": sarf_miktar,
+            "guvenlik_stogu": guvenlik_stogu,
+            "demirbas": {"DEPODA": depoda, "ZIMMETLI": zimmetli, "ARIZALI": arizali, "HURDA": hurda},
+            "kritik_mi": kritik_mi
+        })
+    return liste
+
+@router.get("/ozet")
+def stok_ozeti(
+    depo_id: Optional[int] = None,
+    sadece_kritik: bool = False,
+    depo_bazinda: bool = False,
+    db: Session = Depends(get_session)
+):
+    """
+    Dashboard için hazır özet: Ürün başına toplam sarf miktarı, duruma göre
+    demirbaş adetleri ve kritik bayrağı. Hesaplama yapılmaz, her hareketle
+    güncellenen 'stok_ozet' tablosu okunur (ürün sayısı kadar satır).
+    depo_id verilirse o deponun satırları döner. depo_bazinda=true: Tüm depoların
+    ayrı satırları (panodaki stok tablosu).
+    """
+    return rapor_onbellegi.yanit(
+        db, "ozet", {"depo_id": depo_id, "sadece_kritik": sadece_kritik, "depo_bazinda": depo_bazinda},
+        lambda: (_stok_ozeti(db, depo_id, sadece_kritik, depo_bazinda), {})
+    )
+
+# ----------------------------------------------------------------
+# 3. ZİMMET RAPORU (Kimde ne var?)
+# ----------------------------------------------------------------
+def _zimmet_sorgusu(personel_adi: Optional[str]):
+    # Personel ve Bölüm, demirbaşın kendi zimmet alanlarından bağlanır
+    query = select(DemirbasVarlik, Urun, Personel, Bolum)\
+        .join(Urun)\
+        .join(Personel, DemirbasVarlik.zimmetli_personel_id == Personel.id, isouter=True)\
+        .join(Bolum, DemirbasVarlik.zimmetli_bolum_id == Bolum.id, isouter=True)\
+        .where(DemirbasVarlik.durum == DemirbasDurumu.ZIMMETLI)
+    
+    if personel_adi:
+        query = query.where(eslesen_kosul(AramaTuru.PERSONEL, personel_adi, DemirbasVarlik.zimmetli_personel_id))
+    return query
+
+def _zimmet_satiri(d: DemirbasVarlik, u: Urun, p: Optional[Personel], b: Optional[Bolum]) -> dict:
+    sahip = p.ad_soyad if p else (b.ad if b else "Bilinmiyor")
+    return {
+        "demirbas_no": d.ozel_kod,
+        "urun": u.ad,
+        "zimmetli_kisi_birim": sahip,
+        "seri_no": d.seri_no
+    }
+
+@router.get("/zimmet-listesi")
+@asenkron_uygun
+def zimmet_listesi(
+    personel_adi: Optional[str] = None, 
+    db: Session = Depends(get_session)
+):
+    """
+    Şu an sahada (zimmette) olan tüm demirbaşları listeler.
+    İsimle arama yapılabilir. Sonuç, yeni bir hareket gelene kadar önbellekten verilir.
+    """
+    def uret():
+        sonuclar = db.exec(_zimmet_sorgusu(personel_adi)).all()
+        return [_zimmet_satiri(*satir) for satir in sonuclar], {}
+
+    return rapor_onbellegi.yanit(db, "zimmet-listesi", {"personel_adi": personel_adi}, uret)
+
+# ----------------------------------------------------------------
+# 4. DIŞA AKTARMA (Denetim için tam döküm: CSV / XLSX)
+# ----------------------------------------------------------------
+class RaporAdi(str, enum.Enum):
+    STOK_DURUMU = "stok-durumu"
+    GECMIS = "gecmis"
+    ZIMMET_LISTESI = "zimmet-listesi"
+
+class DisaAktarimBicimi(str, enum.Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+def _disa_aktarim_kaynagi(rapor: RaporAdi, hareket_filtre: HareketFiltre, stok_filtre: StokFiltre, personel_adi: Optional[str]):
+    """Rapora göre (sorgu, satır formatlayıcı, başlıklar) üçlüsünü döner."""
+    if rapor == RaporAdi.GECMIS:
+        return _gecmis_sorgusu(hareket_filtre), _rapor_satiri, list(HareketRaporu.model_fields)
+    if rapor == RaporAdi.STOK_DURUMU:
+        return _stok_sorgusu(stok_filtre), _stok_satiri, ["depo", "urun", "sku", "miktar", "birim", "guvenlik_stogu", "durum_analizi"]
+    return _zimmet_sorgusu(personel_adi), _zimmet_satiri, ["demirbas_no", "urun", "zimmetli_kisi_birim", "seri_no"]
+
+def _disa_aktarim_satirlari(db: Session, rapor: RaporAdi, query, formatla, basliklar, hareket_filtre: HareketFiltre):
+    """Dosyaya yazılacak satırlar (başlık sırasıyla). Veritabanından parça parça okunur."""
+    kaynak = db.exec(query.execution_options(yield_per=AKIS_PARCA_BOYUTU))
+    if rapor == RaporAdi.GECMIS:
+        kaynak = chain(kaynak, _arsiv_satirlari(db, hareket_filtre))
+    for satir in kaynak:
+        kayit = formatla(*satir)
+        if isinstance(kayit, BaseModel):
+            kayit = kayit.model_dump()
+        yield [kayit[b] for b in basliklar]
+
+@router.get("/export/{rapor}")
+def rapor_disa_aktar(
+    rapor: RaporAdi,
+    bicim: DisaAktarimBicimi = Query(DisaAktarimBicimi.CSV, alias="format"),
+    hareket_filtre: HareketFiltre = Depends(),
+    stok_filtre: StokFiltre = Depends(),
+    personel_adi: Optional[str] = None,
+):
+    """
+    Stok durumu, hareket geçmişi veya zimmet listesini dosya olarak indirir.
+    Filtreler ilgili raporun alanlarıyla aynıdır ve sorgu parametresi olarak verilir.
+    Satırlar veritabanından parça parça okunup dosyaya yazıldığı için
+    milyonlarca satırda da bellek kullanımı sabit kalır.
+    """
+    if bicim == DisaAktarimBicimi.XLSX and not XLSX_DESTEKLI:
+        raise HTTPException(status_code=400, detail="XLSX desteği kurulu değil (XlsxWriter). CSV kullanın.")
+
+    query, formatla, basliklar = _disa_aktarim_kaynagi(rapor, hareket_filtre, stok_filtre, personel_adi)
+
+    def satirlar():
+        with Session(engine) as db:
+            yield from _disa_aktarim_satirlari(db, rapor, query, formatla, basliklar, hareket_filtre)
+
+    dosya_adi = f"{rapor.value}_{datetime.now():%Y%m%d_%H%M}.{bicim.value}"
+    if bicim == DisaAktarimBicimi.XLSX:
+        govde = xlsx_akisi(basliklar, satirlar())
+        tur = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        govde = csv_akisi(basliklar, satirlar())
+        tur = "text/csv; charset=utf-8"
+
+    return StreamingResponse(
+        govde, media_type=tur,
+        headers={"Content-Disposition": f'attachment; filename="{dosya_adi}"'}
+    )
+
+# ----------------------------------------------------------------
+# 5. ARKA PLAN RAPOR İŞLERİ (Uzun tarih aralıkları, app/rapor_isleri.py)
+# ----------------------------------------------------------------
+DOSYA_TURLERI = {
+    DisaAktarimBicimi.CSV.value: "text/csv; charset=utf-8",
+    DisaAktarimBicimi.XLSX.value: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def _is_durumu(isi: RaporIsi) -> dict:
+    return {
+        "is_id": isi.id,
+        "durum": isi.durum,
+        "bicim": isi.bicim,
+        "satir_sayisi": isi.satir_sayisi,
+        "olusturma_tarihi": isi.olusturma_tarihi,
+        "baslama_tarihi": isi.baslama_tarihi,
+        "bitis_tarihi": isi.bitis_tarihi,
+        "hata": isi.hata,
+        "indirme_adresi": f"/rapor/isler/{isi.id}/indir" if isi.durum == RaporIsiDurumu.TAMAM else None,
+    }
+
+@router.post("/isler", status_code=202)
+@asenkron_uygun
+def rapor_isi_gonder(
+    filtre: HareketFiltre,
+    response: Response,
+    bicim: DisaAktarimBicimi = Query(DisaAktarimBicimi.CSV, alias="format"),
+    db: Session = Depends(get_session)
+):
+    """
+    Hareket geçmişi dökümünü arka planda dosyaya üretir; hemen iş numarası döner (202).
+    Durum 'Location' başlığındaki adresten sorgulanır, TAMAM olunca 'indirme_adresi'nden indirilir.
+    Aynı filtre ve biçimle sırada/çalışan iş varsa yenisi açılmaz, o iş döner. Veri
+    değişmediyse daha önce üretilen dosya hemen döner (200).
+    """
+    if bicim == DisaAktarimBicimi.XLSX and not XLSX_DESTEKLI:
+        raise HTTPException(status_code=400, detail="XLSX desteği kurulu değil (XlsxWriter). CSV kullanın.")
+
+    isi = is_gonder(db, filtre.model_dump(mode="json"), bicim.value)
+    if isi.durum == RaporIsiDurumu.TAMAM:
+        response.status_code = 200
+    response.headers["Location"] = f"/rapor/isler/{isi.id}"
+    return _is_durumu(isi)
+
+@router.get("/isler/{is_id}")
+@asenkron_uygun
+def rapor_isi_durumu(is_id: str, db: Session = Depends(get_session)):
+    """İşin durumu: BEKLIYOR, CALISIYOR (satir_sayisi ilerler), TAMAM veya HATA."""
+    isi = db.get(RaporIsi, is_id)
+    if not isi:
+        raise HTTPException(status_code=404, detail="Rapor işi bulunamadı (süresi dolmuş olabilir).")
+    return _is_durumu(isi)
+
+@router.get("/isler/{is_id}/indir")
+def rapor_isi_indir(is_id: str, db: Session = Depends(get_session)):
+    """Tamamlanan işin dosyasını indirir."""
+    isi = db.get(RaporIsi, is_id)
+    if not isi:
+        raise HTTPException(status_code=404, detail="Rapor işi bulunamadı (süresi dolmuş olabilir).")
+    if isi.durum != RaporIsiDurumu.TAMAM:
+        raise HTTPException(status_code=409, detail=f"Rapor henüz hazır değil ({isi.durum.value}).")
+    yol = dosya_yolu(isi)
+    if not os.path.exists(yol):
+        raise HTTPException(status_code=410, detail="Rapor dosyası silinmiş. İşi yeniden gönderin.")
+    return FileResponse(
+        yol, media_type=DOSYA_TURLERI[isi.bicim],
+        filename=f"{RaporAdi.GECMIS.value}_{isi.olusturma_tarihi:%Y%m%d_%H%M}.{isi.bicim}"
+    )
+
+# ----------------------------------------------------------------
+# 6. TÜKETİM ANALİZİ (Bölüm / ürün bazında aylık sarf, app/tuketim.py)
+# ----------------------------------------------------------------
+@router.get("/tuketim")
+def tuketim_raporu(
+    baslangic: Optional[date] = None,
+    bitis: Optional[date] = None,
+    bolum_id: Optional[int] = None,
+    urun_id: Optional[int] = None,
+    depo_id: Optional[int] = None,
+    grup: TuketimGrubu = TuketimGrubu.BOLUM_URUN,
+    pencere: int = Query(3, ge=1, le=24),
+    limit: int = Query(500, ge=1, le=100000),
+    db: Session = Depends(get_session)
+):
+    """
+    Aylık tüketim tablosu: Satırlar bölüm-ürün (grup=urun ise ürün), sütunlar aylar.
+    Her satırda aylık miktarlar, toplam, aylık ortalama, 'pencere' aylık hareketli
+    ortalama ve eğilim (ayda ortalama artış) bulunur. En çok tüketenler önce.
+    Tarihler tam aya yuvarlanır; verilmezse içinde bulunulan ay dahil son 12 ay.
+    Arşivlenmiş aylar da dahildir. depo_id: Sadece o depodan yapılan çıkışlar.
+    """
+    bas, bit = ay_araligi(baslangic, bitis)
+    if bas >= bit:
+        raise HTTPException(status_code=400, detail="Başlangıç tarihi bitiş tarihinden sonra olamaz.")
+    if (bit.year - bas.year) * 12 + bit.month - bas.month > EN_FAZLA_AY:
+        raise HTTPException(status_code=400, detail=f"Tüketim raporu en fazla {EN_FAZLA_AY} ay kapsayabilir.")
+
+    parametreler = {
+        "baslangic": bas, "bitis": bit, "bolum_id": bolum_id, "urun_id": urun_id, "depo_id": depo_id,
+        "grup": grup, "pencere": pencere, "limit": limit,
+    }
+    return rapor_onbellegi.yanit(
+        db, "tuketim", parametreler,
+        lambda: (tuketim_analizi(db, bas, bit, grup, pencere, limit, bolum_id, urun_id, depo_id), {})
+    )
+
+# ----------------------------------------------------------------
+# 7. KRİTİK STOK UYARILARI (Her stok hareketiyle güncellenir, app/uyarilar.py)
+# ----------------------------------------------------------------
+def _stok_uyarilari(
+    db: Session, durum: StokUyariDurumu, depo_id: Optional[int], urun_id: Optional[int], limit: int
+) -> list:
+    query = select(StokUyarisi, StokSarf.miktar).outerjoin(StokSarf, and_(
+        StokSarf.depo_id == StokUyarisi.depo_id, StokSarf.urun_id == StokUyarisi.urun_id
+    )).where(StokUyarisi.durum == durum)
+    if depo_id:
+        query = query.where(StokUyarisi.depo_id == depo_id)
+    if urun_id:
+        query = query.where(StokUyarisi.urun_id == urun_id)
+    if durum == StokUyariDurumu.AKTIF:
+        query = query.order_by(StokUyarisi.acilis_tarihi, StokUyarisi.id)
+    else:
+        query = query.order_by(col(StokUyarisi.id).desc())
+
+    liste = []
+    for uyari, miktar in db.exec(query.limit(limit)).all():
+        u = tanim_onbellegi.getir(db, Urun, uyari.urun_id)
+        liste.append({
+            "uyari_id": uyari.id,
+            "depo_id": uyari.depo_id,
+            "depo": tanim_onbellegi.getir(db, Depo, uyari.depo_id).ad,
+            "urun_id": u.id,
+            "urun": u.ad,
+            "sku": u.sku,
+            "birim": u.birim,
+            "miktar": miktar or 0,
+            "guvenlik_stogu": u.guvenlik_stogu,
+            "kapanis_esigi": kapanis_esigi(u.guvenlik_stogu),
+            "acilis_miktari": uyari.acilis_miktari,
+            "acilis_tarihi": uyari.acilis_tarihi,
+            "kapanis_miktari": uyari.kapanis_miktari,
+            "kapanis_tarihi": uyari.kapanis_tarihi,
+        })
+    return liste
+
+@router.get("/stok-uyarilari")
+@asenkron_uygun
+def stok_uyarilari(
+    durum: StokUyariDurumu = StokUyariDurumu.AKTIF,
+    depo_id: Optional[int] = None,
+    urun_id: Optional[int] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_session)
+):
+    """
+    Şu an kritik seviyede olan depo-ürünler (en eski uyarı önce). Stok tablosu
+    taranmaz; açık uyarılar ve onların güncel miktarı okunur.
+    Uyarı stok güvenlik stoğuna inince açılır, kapanış eşiğinin üstüne çıkınca kapanır.
+    durum=KAPANDI: Kapanmış uyarıların geçmişi (en yeni önce).
+    """
+    return rapor_onbellegi.yanit(
+        db, "stok-uyarilari", {"durum": durum, "depo_id": depo_id, "urun_id": urun_id, "limit": limit},
+        lambda: (_stok_uyarilari(db, durum, depo_id, urun_id, limit), {})
+    )
+
+@router.get("/stok-uyarilari/webhook")
+@asenkron_uygun
+def stok_uyarisi_webhook_kuyrugu(db: Session = Depends(get_session)):
+    """Webhook kuyruğundaki olay sayıları: BEKLIYOR, GONDERILDI, HATA."""
+    return kuyruk_durumu(db)
\ No newline at end of file
@@ -1,163 +1,313 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List
-
-# Kendi modüllerimiz
-from app.database import get_session
-from app.models import Depo, Bolum, Personel, Urun, UrunTipi
-
-# Router Tanımı
-router = APIRouter(
-    prefix="/tanim",
-    tags=["Tanımlamalar (Depo, Ürün, Personel)"]
-)
-
-# ----------------------------------------------------------------
-# 1. DEPO İŞLEMLERİ
-# ----------------------------------------------------------------
-
-@router.post("/depo", response_model=Depo)
-def depo_ekle(depo: Depo, db: Session = Depends(get_session)):
-    """Yeni bir depo oluşturur. Aynı isimde varsa hata verir."""
-    # Aynı isimde depo var mı kontrol et
-    mevcut = db.exec(select(Depo).where(Depo.ad == depo.ad)).first()
-    if mevcut:
-        raise HTTPException(status_code=400, detail="Bu isimde bir depo zaten var.")
-    
-    db.add(depo)
-    db.commit()
-    db.refresh(depo)
-    return depo
-
-@router.get("/depo", response_model=List[Depo])
-def depo_listele(aktif_sadece: bool = True, db: Session = Depends(get_session)):
-    """Depoları listeler. Varsayılan olarak sadece aktifleri getirir."""
-    if aktif_sadece:
-        return db.exec(select(Depo).where(Depo.aktif_mi == True)).all()
-    return db.exec(select(Depo)).all()
-
-@router.put("/depo/{id}/pasif")
-def depo_pasife_al(id: int, db: Session = Depends(get_session)):
-    """Depoyu silmez, pasife alır."""
-    depo = db.get(Depo, id)
-    if not depo:
-        raise HTTPException(status_code=404, detail="Depo bulunamadı")
-    
-    depo.aktif_mi = False
-    db.add(depo)
-    db.commit()
-    return {"mesaj": f"{depo.ad} pasife alındı."}
-
-# ----------------------------------------------------------------
-# 2. BÖLÜM İŞLEMLERİ
-# ----------------------------------------------------------------
-
-@router.post("/bolum", response_model=Bolum)
-def bolum_ekle(bolum: Bolum, db: Session = Depends(get_session)):
-    mevcut = db.exec(select(Bolum).where(Bolum.ad == bolum.ad)).first()
-    if mevcut:
-        raise HTTPException(status_code=400, detail="Bu isimde bir bölüm zaten var.")
-    
-    db.add(bolum)
-    db.commit()
-    db.refresh(bolum)
-    return bolum
-
-@router.get("/bolum", response_model=List[Bolum])
-def bolum_listele(aktif_sadece: bool = True, db: Session = Depends(get_session)):
-    if aktif_sadece:
-        return db.exec(select(Bolum).where(Bolum.aktif_mi == True)).all()
-    return db.exec(select(Bolum)).all()
-
-@router.put("/bolum/{id}/pasif")
-def bolum_pasife_al(id: int, db: Session = Depends(get_session)):
-    bolum = db.get(Bolum, id)
-    if not bolum:
-        raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
-    
-    bolum.aktif_mi = False
-    db.add(bolum)
-    db.commit()
-    return {"mesaj": f"{bolum.ad} pasife alındı."}
-
-# ----------------------------------------------------------------
-# 3. PERSONEL İŞLEMLERİ
-# ----------------------------------------------------------------
-
-@router.post("/personel", response_model=Personel)
-def personel_ekle(personel: Personel, db: Session = Depends(get_session)):
-    # Bölüm kontrolü
-    if personel.bolum_id:
-        bolum = db.get(Bolum, personel.bolum_id)
-        if not bolum:
-            raise HTTPException(status_code=404, detail="Seçilen bölüm bulunamadı.")
-            
-    db.add(personel)
-    db.commit()
-    db.refresh(personel)
-    return personel
-
-@router.get("/personel", response_model=List[Personel])
-def personel_listele(aktif_sadece: bool = True, db: Session = Depends(get_session)):
-    if aktif_sadece:
-        return db.exec(select(Personel).where(Personel.aktif_mi == True)).all()
-    return db.exec(select(Personel)).all()
-
-@router.put("/personel/{id}/pasif")
-def personel_pasife_al(id: int, db: Session = Depends(get_session)):
-    per = db.get(Personel, id)
-    if not per:
-        raise HTTPException(status_code=404, detail="Personel bulunamadı")
-    
-    per.aktif_mi = False
-    db.add(per)
-    db.commit()
-    return {"mesaj": f"{per.ad_soyad} pasife alındı."}
-
-# ----------------------------------------------------------------
-# 4. ÜRÜN İŞLEMLERİ (ÖNEMLİ)
-# ----------------------------------------------------------------
-
-@router.post("/urun", response_model=Urun)
-def urun_ekle(urun: Urun, db: Session = Depends(get_session)):
-    """
-    Ürün eklerken SKU (Stok Kodu) benzersiz olmalıdır.
-    """
-    # SKU kontrolü
-    mevcut = db.exec(select(Urun).where(Urun.sku == urun.sku)).first()
-    if mevcut:
-        raise HTTPException(status_code=400, detail="Bu SKU koduna sahip bir ürün zaten var!")
-    
-    # Demirbaş Mantık Kontrolü (Opsiyonel ama iyi bir pratik)
-    # Demirbaş ise birim genelde 'ADET' olur, ama kullanıcıya bırakıyoruz.
-    
-    db.add(urun)
-    db.commit()
-    db.refresh(urun)
-    return urun
-
-@router.get("/urun", response_model=List[Urun])
-def urun_listele(tip: UrunTipi = None, aktif_sadece: bool = True, db: Session = Depends(get_session)):
-    """
-    İsteğe bağlı olarak 'SARF' veya 'DEMIRBAS' filtresi yapılabilir.
-    """
-    query = select(Urun)
-    
-    if aktif_sadece:
-        query = query.where(Urun.aktif_mi == True)
-    
-    if tip:
-        query = query.where(Urun.tip == tip)
-        
-    return db.exec(query).all()
-
-@router.put("/urun/{id}/pasif")
-def urun_pasife_al(id: int, db: Session = Depends(get_session)):
-    urun = db.get(Urun, id)
-    if not urun:
-        raise HTTPException(status_code=404, detail="Ürün bulunamadı")
-    
-    urun.aktif_mi = False
-    db.add(urun)
-    db.commit()
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from sqlmodel import Session, select, tuple_
+from typing import List, Optional
+from dataclasses import dataclass
+import base64
+import os
+
+# Kendi modüllerimiz
+from app.arama import AramaTuru, dizine_yaz, onek_kosulu
+from app.database import asenkron_uygun, get_session, VeritabaniRoute
+from app.models import Depo, Bolum, Personel, Urun, UrunTipi
+from app.onbellek import tanim_onbellegi, liste_govdesi
+
+# Router Tanımı
+router = APIRouter(
+    prefix="/tanim",
+    tags=["Tanımlamalar (Depo, Ürün, Personel)"],
+    route_class=VeritabaniRoute
+)
+
+# ----------------------------------------------------------------
+# 0. ORTAK: SAYFALI, ÖNBELLEKLİ LİSTE YANITI
+# ----------------------------------------------------------------
+# Ürün (40 bin) ve personel (8 bin) listelerinin tamamı açılır kutular için
+# megabaytlarca JSON demek. Liste uç noktaları şu parametreleri alır:
+# - ?q=...      : Adı bu metinle başlayanlar (Türkçe harf duyarsız)
+# - ?limit=...  : Sayfa boyutu; devamı varsa sonraki sayfanın imleci 'X-Sonraki-Imlec'
+#                 başlığında döner, ?imlec=... ile kalınan yerden devam edilir
+# - ?alanlar=id,ad : Sadece istenen alanlar (açılır kutular için)
+# Sayfalı/aramalı listeler (ad, id) sırasındadır. Hiçbiri verilmezse eskisi gibi tüm liste döner.
+VARSAYILAN_SAYFA_BOYUTU = int(os.getenv("TANIM_SAYFA_BOYUTU", "50"))
+EN_BUYUK_SAYFA_BOYUTU = 1000
+
+@dataclass
+class ListeSecenekleri:
+    limit: Optional[int]
+    imlec: Optional[str]
+    q: Optional[str]
+    alanlar: Optional[List[str]]
+
+    @property
+    def sayfali(self) -> bool:
+        return bool(self.limit or self.imlec or self.q)
+
+def liste_secenekleri(
+    limit: Optional[int] = Query(None, ge=1, le=EN_BUYUK_SAYFA_BOYUTU),
+    imlec: Optional[str] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    alanlar: Optional[str] = Query(None, description="Virgülle ayrılmış alan adları (Örn: id,ad)"),
+) -> ListeSecenekleri:
+    alan_listesi = [a.strip() for a in alanlar.split(",") if a.strip()] if alanlar else None
+    q = q.strip() if q else None
+    return ListeSecenekleri(limit, imlec, q or None, alan_listesi)
+
+def _imlec_olustur(ad: str, kayit_id: int) -> str:
+    """Son satırın (ad, id) çiftini URL'de taşınabilir bir metne çevirir."""
+    return base64.urlsafe_b64encode(f"{ad}|{kayit_id}".encode()).decode()
+
+def _imlec_coz(imlec: str):
+    try:
+        ad, kayit_id = base64.urlsafe_b64decode(imlec.encode()).decode().rsplit("|", 1)
+        return ad, int(kayit_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci.")
+
+def _liste_yaniti(
+    model, ad_sutunu, kosullar: list, anahtar: tuple, secenekler: ListeSecenekleri,
+    db: Session, if_none_match: Optional[str], tur: Optional[AramaTuru] = None
+) -> Response:
+    """
+    Listeyi önbellekten (yoksa veritabanından) verir ve ETag ekler.
+    İstemcinin elindeki liste değişmediyse (If-None-Match) gövdesiz 304 döner.
+    Aramalı (?q=) listeler önbelleğe alınmaz; yazarken oluşan her ön ek LRU'daki
+    sıcak kayıtları itmesin.
+    """
+    alanlar = secenekler.alanlar
+    if alanlar:
+        bilinmeyen = [a for a in alanlar if a not in model.model_fields]
+        if bilinmeyen:
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen alan: {', '.join(bilinmeyen)}")
+    limit = secenekler.limit or VARSAYILAN_SAYFA_BOYUTU
+    once = _imlec_coz(secenekler.imlec) if secenekler.imlec else None
+
+    def uret(db: Session):
+        # İmleç için ad ve id her zaman okunur, yanıtta sadece istenen alanlar olur
+        sutunlar = [getattr(model, a) for a in dict.fromkeys(alanlar + ["id", ad_sutunu.key])] if alanlar else [model]
+        sorgu = select(*sutunlar).where(*kosullar)
+        if not secenekler.sayfali:
+            satirlar = db.exec(sorgu).all()
+            sonraki = None
+        else:
+            if secenekler.q:
+                sorgu = sorgu.where(onek_kosulu(ad_sutunu, secenekler.q, tur))
+            if once:
+                sorgu = sorgu.where(tuple_(ad_sutunu, model.id) > tuple_(*once))
+            satirlar = db.exec(sorgu.order_by(ad_sutunu, model.id).limit(limit + 1)).all()
+            sonraki = None
+            if len(satirlar) > limit:
+                satirlar = satirlar[:limit]
+                son = satirlar[-1]
+                sonraki = _imlec_olustur(getattr(son, ad_sutunu.key), son.id)
+        if alanlar:
+            satirlar = [{a: getattr(s, a) for a in alanlar} for s in satirlar]
+        return satirlar, sonraki
+
+    if secenekler.q:
+        govde, etag, sonraki = liste_govdesi(*uret(db))
+    else:
+        anahtar += (limit if secenekler.sayfali else None, once, tuple(alanlar or ()))
+        govde, etag, sonraki = tanim_onbellegi.liste(db, model, anahtar, uret)
+    basliklar = {"ETag": etag, "Cache-Control": "no-cache"} # Tarayıcı her seferinde ETag ile sorsun
+    if sonraki:
+        basliklar["X-Sonraki-Imlec"] = sonraki
+    if if_none_match:
+        istenenler = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        if etag in istenenler or "*" in istenenler:
+            return Response(status_code=304, headers=basliklar)
+    return Response(content=govde, media_type="application/json", headers=basliklar)
+
+# ----------------------------------------------------------------
+# 1. DEPO İŞLEMLERİ
+# ----------------------------------------------------------------
+
+@router.post("/depo", response_model=Depo)
+@asenkron_uygun
+def depo_ekle(depo: Depo, db: Session = Depends(get_session)):
+    """Yeni bir depo oluşturur. Aynı isimde varsa hata verir."""
+    # Aynı isimde depo var mı kontrol et
+    mevcut = db.exec(select(Depo).where(Depo.ad == depo.ad)).first()
+    if mevcut:
+        raise HTTPException(status_code=400, detail="Bu isimde bir depo zaten var.")
+    
+    db.add(depo)
+    db.commit()
+    db.refresh(depo)
+    tanim_onbellegi.gecersiz_kil(Depo)
+    return depo
+
+@router.get("/depo", response_model=List[Depo])
+@asenkron_uygun
+def depo_listele(
+    aktif_sadece: bool = True,
+    secenekler: ListeSecenekleri = Depends(liste_secenekleri),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_session)
+):
+    """Depoları listeler. Varsayılan olarak sadece aktifleri getirir."""
+    kosullar = [Depo.aktif_mi == True] if aktif_sadece else []
+    return _liste_yaniti(Depo, Depo.ad, kosullar, (aktif_sadece,), secenekler, db, if_none_match)
+
+@router.put("/depo/{id}/pasif")
+@asenkron_uygun
+def depo_pasife_al(id: int, db: Session = Depends(get_session)):
+    """Depoyu silmez, pasife alır."""
+    depo = db.get(Depo, id)
+    if not depo:
+        raise HTTPException(status_code=404, detail="Depo bulunamadı")
+    
+    depo.aktif_mi = False
+    db.add(depo)
+    db.commit()
+    tanim_onbellegi.gecersiz_kil(Depo)
+    return {"mesaj": f"{depo.ad} pasife alındı."}
+
+# ----------------------------------------------------------------
+# 2. BÖLÜM İŞLEMLERİ
+# ----------------------------------------------------------------
+
+@router.post("/bolum", response_model=Bolum)
+@asenkron_uygun
+def bolum_ekle(bolum: Bolum, db: Session = Depends(get_session)):
+    mevcut = db.exec(select(Bolum).where(Bolum.ad == bolum.ad)).first()
+    if mevcut:
+        raise HTTPException(status_code=400, detail="Bu isimde bir bölüm zaten var.")
+    
+    db.add(bolum)
+    db.commit()
+    db.refresh(bolum)
+    tanim_onbellegi.gecersiz_kil(Bolum)
+    return bolum
+
+@router.get("/bolum", response_model=List[Bolum])
+@asenkron_uygun
+def bolum_listele(
+    aktif_sadece: bool = True,
+    secenekler: ListeSecenekleri = Depends(liste_secenekleri),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_session)
+):
+    kosullar = [Bolum.aktif_mi == True] if aktif_sadece else []
+    return _liste_yaniti(Bolum, Bolum.ad, kosullar, (aktif_sadece,), secenekler, db, if_none_match)
+
+@router.put("/bolum/{id}/pasif")
+@asenkron_uygun
+def bolum_pasife_al(id: int, db: Session = Depends(get_session)):
+    bolum = db.get(Bolum, id)
+    if not bolum:
+        raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
+    
+    bolum.aktif_mi = False
+    db.add(bolum)
+    db.commit()
+    tanim_onbellegi.gecersiz_kil(Bolum)
+    return {"mesaj": f"{bolum.ad} pasife alındı."}
+
+# ----------------------------------------------------------------
+# 3. PERSONEL İŞLEMLERİ
+# ----------------------------------------------------------------
+
+@router.post("/personel", response_model=Personel)
+@asenkron_uygun
+def personel_ekle(personel: Personel, db: Session = Depends(get_session)):
+    # Bölüm kontrolü
+    if personel.bolum_id:
+        bolum = db.get(Bolum, personel.bolum_id)
+        if not bolum:
+            raise HTTPException(status_code=404, detail="Seçilen bölüm bulunamadı.")
+            
+    db.add(personel)
+    db.flush() # id lazım
+    dizine_yaz(db, AramaTuru.PERSONEL, [personel])
+    db.commit()
+    db.refresh(personel)
+    tanim_onbellegi.gecersiz_kil(Personel)
+    return personel
+
+@router.get("/personel", response_model=List[Personel])
+@asenkron_uygun
+def personel_listele(
+    aktif_sadece: bool = True,
+    secenekler: ListeSecenekleri = Depends(liste_secenekleri),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_session)
+):
+    kosullar = [Personel.aktif_mi == True] if aktif_sadece else []
+    return _liste_yaniti(Personel, Personel.ad_soyad, kosullar, (aktif_sadece,), secenekler, db, if_none_match, AramaTuru.PERSONEL)
+
+@router.put("/personel/{id}/pasif")
+@asenkron_uygun
+def personel_pasife_al(id: int, db: Session = Depends(get_session)):
+    per = db.get(Personel, id)
+    if not per:
+        raise HTTPException(status_code=404, detail="Personel bulunamadı")
+    
+    per.aktif_mi = False
+    db.add(per)
+    dizine_yaz(db, AramaTuru.PERSONEL, [per])
+    db.commit()
+    tanim_onbellegi.gecersiz_kil(Personel)
+    return {"mesaj": f"{per.ad_soyad} pasife alındı."}
+
+# ----------------------------------------------------------------
+# 4. ÜRÜN İŞLEMLERİ (ÖNEMLİ)
+# ----------------------------------------------------------------
+
+@router.post("/urun", response_model=Urun)
+@asenkron_uygun
+def urun_ekle(urun: Urun, db: Session = Depends(get_session)):
+    """
+    Ürün eklerken SKU (Stok Kodu) benzersiz olmalıdır.
+    """
+    # SKU kontrolü
+    mevcut = db.exec(select(Urun).where(Urun.sku == urun.sku)).first()
+    if mevcut:
+        raise HTTPException(status_code=400, detail="Bu SKU koduna sahip bir ürün zaten var!")
+    
+    # Demirbaş Mantık Kontrolü (Opsiyonel ama iyi bir pratik)
+    # Demirbaş ise birim genelde 'ADET' olur, ama kullanıcıya bırakıyoruz.
+    
+    db.add(urun)
+    db.flush() # id lazım
+    dizine_yaz(db, AramaTuru.URUN, [urun])
+    db.commit()
+    db.refresh(urun)
+    tanim_onbellegi.gecersiz_kil(Urun)
+    return urun
+
+@router.get("/urun", response_model=List[Urun])
+@asenkron_uygun
+def urun_listele(
+    tip: UrunTipi = None,
+    aktif_sadece: bool = True,
+    secenekler: ListeSecenekleri = Depends(liste_secenekleri),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_session)
+):
+    """
+    İsteğe bağlı olarak 'SARF' veya 'DEMIRBAS' filtresi yapılabilir.
+    Açılır kutular için: ?q=kab&alanlar=id,ad&limit=50 (Sayfalama için bkz. bölüm 0)
+    """
+    kosullar = []
+    
+    if aktif_sadece:
+        kosullar.append(Urun.aktif_mi == True)
+    
+    if tip:
+        kosullar.append(Urun.tip == tip)
+        
+    return _liste_yaniti(Urun, Urun.ad, kosullar, (tip, aktif_sadece), secenekler, db, if_none_match, AramaTuru.URUN)
+
+@router.put("/urun/{id}/pasif")
+@asenkron_uygun
+def urun_pasife_al(id: int, db: Session = Depends(get_session)):
+    urun = db.get(Urun, id)
+    if not urun:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı")
+    
+    urun.aktif_mi = False
+    db.add(urun)
+    dizine_yaz(db, AramaTuru.URUN, [urun])
+    db.commit()
+    tanim_onbellegi.gecersiz_kil(Urun)
     return {"mesaj": f"{urun.ad} ({urun.sku}) pasife alındı."}
\ No newline at end of file
@@ -0,0 +1,59 @@
+from sqlmodel import Session, select, update
+
+from app.database import upsert_artir
+from app.models import StokSarf
+
+# ----------------------------------------------------------------
+# STOK MOTORU (Eşzamanlı işlemlere dayanıklı sarf stok hareketleri)
+# ----------------------------------------------------------------
+# Miktar Python'da okunup geri yazılmaz. Her değişiklik tek bir atomik SQL
+# cümlesidir; kontrol (miktar >= x) ile düşüm aynı UPDATE içinde yapılır.
+# Böylece aynı anda çalışan terminaller birbirinin güncellemesini ezemez
+# ve stok asla eksiye düşmez.
+
+def stok_miktari(db: Session, depo_id: int, urun_id: int) -> float:
+    """Depodaki güncel sarf miktarını döner (kayıt yoksa 0)."""
+    miktar = db.exec(
+        select(StokSarf.miktar)
+        .where(StokSarf.depo_id == depo_id)
+        .where(StokSarf.urun_id == urun_id)
+    ).first()
+    return miktar or 0
+
+def stok_artir(db: Session, depo_id: int, urun_id: int, miktar: float) -> None:
+    """
+    Stoğu artırır, kayıt yoksa oluşturur (UPSERT).
+    (depo_id, urun_id) tekil index'i sayesinde aynı anda gelen iki giriş
+    ikinci bir stok satırı yaratamaz.
+    """
+    upsert_artir(db, StokSarf, {"depo_id": depo_id, "urun_id": urun_id}, {"miktar": miktar})
+
+def stok_dus(db: Session, depo_id: int, urun_id: int, miktar: float) -> bool:
+    """
+    Yeterli stok varsa düşer ve True döner, yoksa hiçbir şeye dokunmadan False döner.
+    UPDATE ... SET miktar = miktar - :x WHERE miktar >= :x
+    """
+    sonuc = db.exec(
+        update(StokSarf)
+        .where(StokSarf.depo_id == depo_id)
+        .where(StokSarf.urun_id == urun_id)
+        .where(StokSarf.miktar >= miktar)
+        .values(miktar=StokSarf.miktar - miktar)
+    )
+    return sonuc.rowcount == 1
+
+def stok_aktar(db: Session, kaynak_depo_id: int, hedef_depo_id: int, urun_id: int, miktar: float) -> bool:
+    """
+    Kaynak depodan düşüp hedef depoya ekler. Kaynakta yeterli stok yoksa False döner;
+    bu durumda hedefe yazılmış olabilecek artış için çağıran taraf transaction'ı geri almalıdır.
+    Satır kilitleri her zaman küçük depo_id'den başlanarak alınır; böylece
+    A->B ve B->A transferleri aynı anda çalışsa da kilitlenme (deadlock) oluşmaz.
+    """
+    if hedef_depo_id < kaynak_depo_id:
+        stok_artir(db, hedef_depo_id, urun_id, miktar)
+        return stok_dus(db, kaynak_depo_id, urun_id, miktar)
+
+    if not stok_dus(db, kaynak_depo_id, urun_id, miktar):
+        return False
+    stok_artir(db, hedef_depo_id, urun_id, miktar)
+    return True
\ No newline at end of file
@@ -0,0 +1,141 @@
+import enum
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, func
+
+from app.arsiv import _ay_basi, _ay_ekle, _donem_adi, arsiv_tuketim_toplamlari
+from app.models import Hareket, IslemTipi, Urun, Bolum
+from app.onbellek import tanim_onbellegi
+
+# ----------------------------------------------------------------
+# TÜKETİM ANALİZİ (Bölüm / ürün / ay bazında sarf çıkışları)
+# ----------------------------------------------------------------
+# "Hangi bölüm hangi sarf malzemeden ayda ne kadar tüketti?" sorusu için tek tek
+# hareket okunmaz:
+# - Sıcak tablo: Çıkışlar veritabanında (ay, bölüm, ürün) bazında toplanır (GROUP BY,
+#   ix_hareket_tip_tarih index'inden tarih aralığı). Python'a sadece toplamlar gelir.
+# - Arşiv: Her ay tek dosyadır; Parquet'ten sadece gereken sütunlar okunup pyarrow
+#   ile gruplanır (app/arsiv.py, arsiv_tuketim_toplamlari).
+# - Trend hesapları (aylık ortalama, hareketli ortalama, eğilim) bu küçük
+#   (seri x ay) matris üzerinde yapılır.
+
+EN_FAZLA_AY = 120
+
+class TuketimGrubu(str, enum.Enum):
+    BOLUM_URUN = "bolum-urun" # Her bölüm-ürün çifti ayrı seri
+    URUN = "urun"             # Ürünün tüm bölümlerdeki toplamı
+
+def ay_araligi(baslangic: Optional[date], bitis: Optional[date], ay_sayisi: int = 12) -> Tuple[datetime, datetime]:
+    """
+    Tam aylara yuvarlanmış [başlangıç, bitiş) aralığı. Varsayılan: İçinde bulunulan ay
+    dahil son 'ay_sayisi' ay.
+    """
+    bitis_ayi = _ay_basi(datetime.combine(bitis or date.today(), datetime.min.time()))
+    baslangic_ayi = _ay_basi(datetime.combine(baslangic, datetime.min.time())) if baslangic \
+        else _ay_ekle(bitis_ayi, -(ay_sayisi - 1))
+    return baslangic_ayi, _ay_ekle(bitis_ayi, 1)
+
+def _aylar(baslangic: datetime, bitis: datetime) -> List[str]:
+    aylar, ay = [], baslangic
+    while ay < bitis:
+        aylar.append(_donem_adi(ay))
+        ay = _ay_ekle(ay, 1)
+    return aylar
+
+def _ay_ifadesi(dialect: str):
+    """Hareket tarihinin 'YYYY-AA' metni (arşiv dönem adıyla aynı biçim)."""
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m", Hareket.tarih)
+    return func.to_char(Hareket.tarih, "YYYY-MM")
+
+def tuketim_toplamlari(
+    db: Session,
+    baslangic: datetime,
+    bitis: datetime,
+    bolum_id: Optional[int] = None,
+    urun_id: Optional[int] = None,
+    depo_id: Optional[int] = None,
+) -> Dict[Tuple[str, int, int], float]:
+    """[baslangic, bitis) aralığındaki çıkışların (ay, bölüm, ürün) toplamları; sıcak tablo + arşiv."""
+    ay = _ay_ifadesi(db.get_bind().dialect.name).label("ay")
+    sorgu = select(ay, Hareket.bolum_id, Hareket.urun_id, func.sum(Hareket.miktar))\
+        .where(Hareket.islem_tipi == IslemTipi.CIKIS)\
+        .where(Hareket.tarih >= baslangic).where(Hareket.tarih < bitis)
+    if bolum_id:
+        sorgu = sorgu.where(Hareket.bolum_id == bolum_id)
+    if urun_id:
+        sorgu = sorgu.where(Hareket.urun_id == urun_id)
+    if depo_id:
+        sorgu = sorgu.where(Hareket.cikis_depo_id == depo_id)
+    sorgu = sorgu.group_by(ay, Hareket.bolum_id, Hareket.urun_id)
+
+    toplamlar = arsiv_tuketim_toplamlari(db, baslangic, bitis, bolum_id, urun_id, depo_id)
+    for donem, s_bolum, s_urun, miktar in db.exec(sorgu).all():
+        toplamlar[(donem, s_bolum, s_urun)] += miktar
+    return toplamlar
+
+# ----------------------------------------------------------------
+# TREND HESAPLARI (Seri başına)
+# ----------------------------------------------------------------
+def hareketli_ortalama(degerler: List[float], pencere: int) -> List[Optional[float]]:
+    """Son 'pencere' ayın ortalaması; pencere dolmayan ilk aylar None."""
+    sonuc, toplam = [], 0.0
+    for i, deger in enumerate(degerler):
+        toplam += deger
+        if i >= pencere:
+            toplam -= degerler[i - pencere]
+        sonuc.append(round(toplam / pencere, 4) if i >= pencere - 1 else None)
+    return sonuc
+
+def egilim(degerler: List[float]) -> float:
+    """En küçük kareler doğrusunun eğimi: Aylık tüketimin ayda ortalama artışı (birim/ay)."""
+    n = len(degerler)
+    if n < 2:
+        return 0.0
+    x_ort, y_ort = (n - 1) / 2, sum(degerler) / n
+    pay = sum((i - x_ort) * (y - y_ort) for i, y in enumerate(degerler))
+    payda = sum((i - x_ort) ** 2 for i in range(n))
+    return round(pay / payda, 4)
+
+def tuketim_analizi(
+    db: Session,
+    baslangic: datetime,
+    bitis: datetime,
+    grup: TuketimGrubu = TuketimGrubu.BOLUM_URUN,
+    pencere: int = 3,
+    limit: Optional[int] = None,
+    bolum_id: Optional[int] = None,
+    urun_id: Optional[int] = None,
+    depo_id: Optional[int] = None,
+) -> dict:
+    """
+    Aylık pivot: Her seri (bölüm-ürün ya da ürün) için ay ay tüketim, toplam,
+    aylık ortalama, hareketli ortalama ve eğilim. En çok tüketen seriler önce.
+    """
+    aylar = _aylar(baslangic, bitis)
+    sira = {ay: i for i, ay in enumerate(aylar)}
+    seriler: Dict[tuple, List[float]] = defaultdict(lambda: [0.0] * len(aylar))
+    for (ay, s_bolum, s_urun), miktar in tuketim_toplamlari(db, baslangic, bitis, bolum_id, urun_id, depo_id).items():
+        anahtar = (s_urun,) if grup == TuketimGrubu.URUN else (s_bolum, s_urun)
+        seriler[anahtar][sira[ay]] += miktar
+
+    toplamlar = sorted(((sum(d), anahtar) for anahtar, d in seriler.items()), key=lambda t: -t[0])
+    satirlar = []
+    for toplam, anahtar in toplamlar[:limit]:
+        degerler = [round(d, 4) for d in seriler[anahtar]]
+        u = tanim_onbellegi.getir(db, Urun, anahtar[-1])
+        satir = {"urun_id": u.id, "urun": u.ad, "sku": u.sku, "birim": u.birim}
+        if grup == TuketimGrubu.BOLUM_URUN:
+            b = tanim_onbellegi.getir(db, Bolum, anahtar[0])
+            satir = {"bolum_id": anahtar[0], "bolum": b.ad if b else "-", **satir}
+        satirlar.append({
+            **satir,
+            "aylik": degerler,
+            "toplam": round(toplam, 4),
+            "aylik_ortalama": round(toplam / len(aylar), 4),
+            "hareketli_ortalama": hareketli_ortalama(degerler, pencere),
+            "egilim": egilim(degerler),
+        })
+    return {"aylar": aylar, "grup": grup, "pencere": pencere, "seri_sayisi": len(seriler), "satirlar": satirlar}
\ No newline at end of file
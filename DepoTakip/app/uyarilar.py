@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, update, delete, func, col, text
+
+from app.database import engine
+from app.metrikler import WEBHOOK_GONDERIMI
+from app.models import (
+    StokSarf, StokUyarisi, WebhookOlayi, Urun, Depo, UrunTipi, StokUyariDurumu, WebhookDurumu
+)
+from app.onbellek import tanim_onbellegi
+
+# ----------------------------------------------------------------
+# KRİTİK STOK UYARILARI (Artımlı, histerezisli)
+# ----------------------------------------------------------------
+# Kritik stok raporu tüm StokSarf x Urun birleşimini taramak yerine uyarı
+# tablosundan okunur. Uyarılar stok hareketinin kendisiyle güncellenir:
+# - Sarf giriş/çıkış/transfer, değiştirdiği (depo, ürün) satırlarını aynı transaction
+#   içinde yeniden değerlendirir (tek index'li sorgu; eşik geçilmediyse yazma yok).
+# - Miktar güvenlik stoğuna inince (miktar <= guvenlik_stogu, stok raporuyla aynı ölçü)
+#   uyarı açılır. Kapanması için miktarın güvenlik stoğunun STOK_UYARI_HISTEREZIS
+#   oranı kadar üstüne çıkması gerekir; eşik çevresinde gidip gelen stok her
+#   harekette yeni uyarı üretmez.
+# - Bir depo-ürün için tek açık uyarı olabilir (kısmi tekil index). Eşzamanlı iki
+#   çıkış ikinci uyarıyı açamaz; sadece uyarıyı gerçekten açan/kapatan işlem olay yazar.
+# - STOK_UYARI_WEBHOOK verilmişse açılış/kapanış olayı 'webhook_kuyrugu'na aynı
+#   transaction'da yazılır (işlem geri alınırsa olay da yok olur). Uygulama süreçleri
+#   kuyruğu sırayla gönderir; başarısız gönderim artan aralıklarla yeniden denenir.
+#   Gönderim "en az bir kez"dir: Alıcı tekrarları X-Olay-Id ile ayıklar.
+
+HISTEREZIS = float(os.getenv("STOK_UYARI_HISTEREZIS", "0.2"))            # Kapanış eşiği = güvenlik stoğu x (1 + oran)
+WEBHOOK_ADRESI = os.getenv("STOK_UYARI_WEBHOOK", "")                     # Boşsa olay kuyruğa yazılmaz
+WEBHOOK_SIRRI = os.getenv("STOK_UYARI_WEBHOOK_SIRRI", "")                # Verilirse gövde HMAC-SHA256 ile imzalanır
+WEBHOOK_ARALIGI = float(os.getenv("STOK_UYARI_WEBHOOK_ARALIGI", "2"))    # Kuyruk yoklama (sn)
+WEBHOOK_ZAMAN_ASIMI = float(os.getenv("STOK_UYARI_WEBHOOK_ZAMAN_ASIMI_SN", "5"))
+EN_FAZLA_DENEME = int(os.getenv("STOK_UYARI_WEBHOOK_DENEME", "10"))      # Sonra olay HATA olur, sıra ilerler
+SAKLAMA_SURESI = timedelta(days=float(os.getenv("STOK_UYARI_WEBHOOK_SAKLAMA_GUN", "7")))
+ILK_BEKLEME = 5         # İlk yeniden deneme (sn); her denemede iki katına çıkar
+EN_UZUN_BEKLEME = 3600  # sn
+KIRALAMA = timedelta(seconds=WEBHOOK_ZAMAN_ASIMI * 3) # Gönderen süreç ölürse olay bu süre sonra tekrar alınır
+TUR_BASINA_OLAY = 100
+BAKIM_ARALIGI = 3600    # Eski olay temizliği (sn)
+
+KRITIK, NORMAL = "stok.kritik", "stok.normal"
+_YENI_OLAY = "webhook_olayi_var" # session.info bayrağı
+
+logger = logging.getLogger(__name__)
+
+def kapanis_esigi(guvenlik_stogu: float) -> float:
+    return guvenlik_stogu * (1 + HISTEREZIS)
+
+# ----------------------------------------------------------------
+# 1. DEĞERLENDİRME (Stok işlemleri, commit'ten önce)
+# ----------------------------------------------------------------
+def stok_uyarilarini_degerlendir(db: Session, urun: Urun, depo_idler: Iterable[int]) -> None:
+    """
+    Ürünün verilen depolardaki güncel miktarına göre uyarı açar/kapatır.
+    Stok değiştikten sonra, aynı transaction içinde çağrılır. Commit YAPMAZ.
+    """
+    if urun.tip != UrunTipi.SARF:
+        return
+    satirlar = db.exec(
+        select(StokSarf.depo_id, StokSarf.miktar, StokUyarisi.id)
+        .outerjoin(StokUyarisi, and_(
+            StokUyarisi.urun_id == StokSarf.urun_id,
+            StokUyarisi.depo_id == StokSarf.depo_id,
+            StokUyarisi.durum == StokUyariDurumu.AKTIF,
+        ))
+        .where(StokSarf.urun_id == urun.id)
+        .where(col(StokSarf.depo_id).in_(list(depo_idler)))
+    ).all()
+    for depo_id, miktar, uyari_id in satirlar:
+        if uyari_id is None and miktar <= urun.guvenlik_stogu:
+            _uyari_ac(db, urun, depo_id, miktar)
+        elif uyari_id is not None and miktar > kapanis_esigi(urun.guvenlik_stogu):
+            _uyari_kapat(db, urun, depo_id, uyari_id, miktar)
+
+def _uyari_ac(db: Session, urun: Urun, depo_id: int, miktar: float, bildir: bool = True) -> bool:
+    """Açık uyarı yoksa açar. Başka bir işlem aynı anda açtıysa hiçbir şey yapmaz (False)."""
+    simdi = datetime.now()
+    degerler = dict(
+        depo_id=depo_id, urun_id=urun.id, durum=StokUyariDurumu.AKTIF,
+        esik=urun.guvenlik_stogu, acilis_miktari=miktar, acilis_tarihi=simdi,
+    )
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        sorgu = insert(StokUyarisi).values(**degerler).on_conflict_do_nothing(
+            index_elements=[StokUyarisi.depo_id, StokUyarisi.urun_id],
+            index_where=text("durum = 'AKTIF'"),
+        )
+        if db.exec(sorgu).rowcount != 1:
+            return False
+    else:
+        try:
+            with db.begin_nested():
+                db.add(StokUyarisi(**degerler))
+        except IntegrityError:
+            return False
+
+    if bildir:
+        _kuyruga_yaz(db, KRITIK, urun, depo_id, miktar, simdi)
+    return True
+
+def _uyari_kapat(db: Session, urun: Urun, depo_id: int, uyari_id: int, miktar: float, bildir: bool = True) -> bool:
+    simdi = datetime.now()
+    kapandi = db.exec(
+        update(StokUyarisi)
+        .where(StokUyarisi.id == uyari_id).where(StokUyarisi.durum == StokUyariDurumu.AKTIF)
+        .values(durum=StokUyariDurumu.KAPANDI, kapanis_miktari=miktar, kapanis_tarihi=simdi)
+    ).rowcount == 1
+    if kapandi and bildir:
+        _kuyruga_yaz(db, NORMAL, urun, depo_id, miktar, simdi)
+    return kapandi
+
+def _kuyruga_yaz(db: Session, olay: str, urun: Urun, depo_id: int, miktar: float, zaman: datetime) -> None:
+    if not WEBHOOK_ADRESI:
+        return
+    depo = tanim_onbellegi.getir(db, Depo, depo_id)
+    govde = {
+        "olay": olay,
+        "tarih": zaman.isoformat(),
+        "depo_id": depo_id,
+        "depo": depo.ad if depo else None,
+        "urun_id": urun.id,
+        "urun": urun.ad,
+        "sku": urun.sku,
+        "birim": urun.birim,
+        "miktar": miktar,
+        "guvenlik_stogu": urun.guvenlik_stogu,
+        "kapanis_esigi": kapanis_esigi(urun.guvenlik_stogu),
+    }
+    db.add(WebhookOlayi(olay=olay, govde=json.dumps(govde, ensure_ascii=False), sonraki_deneme=zaman))
+    db.info[_YENI_OLAY] = True
+
+@event.listens_for(OrmSession, "after_commit")
+def _commit_sonrasi(session: OrmSession) -> None:
+    if session.info.pop(_YENI_OLAY, False):
+        _uyandir()
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _geri_alindi(session: OrmSession, onceki_transaction) -> None:
+    session.info.pop(_YENI_OLAY, None)
+
+# ----------------------------------------------------------------
+# 2. YENİDEN KURMA (Kurulum, mutabakat onarımı, elle düzeltme sonrası)
+# ----------------------------------------------------------------
+def uyarilari_yenile(db: Session, bildir: bool = False) -> Tuple[int, int]:
+    """
+    Tüm sarf stok satırlarını bir kez tarar; eksik uyarıları açar, toparlanmış
+    olanları kapatır. bildir=False ise webhook olayı yazılmaz. Commit YAPMAZ.
+    Dönüş: (açılan, kapanan)
+    """
+    aktifler = {
+        (depo_id, urun_id): uyari_id for uyari_id, depo_id, urun_id in db.exec(
+            select(StokUyarisi.id, StokUyarisi.depo_id, StokUyarisi.urun_id)
+            .where(StokUyarisi.durum == StokUyariDurumu.AKTIF)
+        ).all()
+    }
+    acilan = kapanan = 0
+    for depo_id, urun_id, miktar, guvenlik_stogu in db.exec(
+        select(StokSarf.depo_id, StokSarf.urun_id, StokSarf.miktar, Urun.guvenlik_stogu)
+        .join(Urun, StokSarf.urun_id == Urun.id).where(Urun.tip == UrunTipi.SARF)
+    ).all():
+        uyari_id = aktifler.get((depo_id, urun_id))
+        if uyari_id is None and miktar <= guvenlik_stogu:
+            acilan += _uyari_ac(db, tanim_onbellegi.getir(db, Urun, urun_id), depo_id, miktar, bildir)
+        elif uyari_id is not None and miktar > kapanis_esigi(guvenlik_stogu):
+            kapanan += _uyari_kapat(db, tanim_onbellegi.getir(db, Urun, urun_id), depo_id, uyari_id, miktar, bildir)
+    return acilan, kapanan
+
+# ----------------------------------------------------------------
+# 3. WEBHOOK GÖNDERİMİ (Uygulama süreçleri, arka planda)
+# ----------------------------------------------------------------
+# Olaylar id sırasıyla, tüm worker'larda tek tek gönderilir: Sıradaki olay gönderilemezse
+# arkasındakiler bekler. Böylece aynı depo-ürünün "kritik" olayı "normal"den sonra
+# gelemez. Deneme hakkı biten olay HATA olur ve sıra ilerler.
+def _siradaki_olayi_al() -> Optional[Tuple[int, str, str, int]]:
+    """En eski bekleyen olayı, zamanı geldiyse koşullu UPDATE ile kiralar. (id, olay, govde, deneme)"""
+    with Session(engine) as db:
+        simdi = datetime.now()
+        siradaki = db.exec(
+            select(WebhookOlayi.id, WebhookOlayi.olay, WebhookOlayi.govde, WebhookOlayi.deneme, WebhookOlayi.sonraki_deneme)
+            .where(WebhookOlayi.durum == WebhookDurumu.BEKLIYOR).order_by(WebhookOlayi.id).limit(1)
+        ).first()
+        if siradaki is None or siradaki.sonraki_deneme > simdi:
+            return None
+        alindi = db.exec(
+            update(WebhookOlayi)
+            .where(WebhookOlayi.id == siradaki.id).where(WebhookOlayi.durum == WebhookDurumu.BEKLIYOR)
+            .where(WebhookOlayi.sonraki_deneme <= simdi)
+            .values(sonraki_deneme=simdi + KIRALAMA)
+        ).rowcount
+        db.commit()
+    return tuple(siradaki[:4]) if alindi else None
+
+def _gonder(olay_id: int, olay: str, govde: str) -> Optional[str]:
+    """Olayı POST eder. Başarılıysa None, değilse hata metni."""
+    veri = govde.encode("utf-8")
+    basliklar = {"Content-Type": "application/json; charset=utf-8", "X-Olay-Id": str(olay_id), "X-Olay": olay}
+    if WEBHOOK_SIRRI:
+        basliklar["X-Imza"] = "sha256=" + hmac.new(WEBHOOK_SIRRI.encode(), veri, hashlib.sha256).hexdigest()
+    istek = urllib.request.Request(WEBHOOK_ADRESI, data=veri, headers=basliklar, method="POST")
+    try:
+        with urllib.request.urlopen(istek, timeout=WEBHOOK_ZAMAN_ASIMI):
+            return None # 2xx (4xx/5xx HTTPError fırlatır)
+    except (urllib.error.URLError, OSError, ValueError) as hata:
+        return str(hata)[:500]
+
+def _sonuc_yaz(olay_id: int, deneme: int, hata: Optional[str]) -> None:
+    simdi = datetime.now()
+    deneme += 1
+    if hata is None:
+        degerler = dict(durum=WebhookDurumu.GONDERILDI, deneme=deneme, gonderim_tarihi=simdi, son_hata=None)
+    elif deneme >= EN_FAZLA_DENEME:
+        degerler = dict(durum=WebhookDurumu.HATA, deneme=deneme, son_hata=hata)
+    else:
+        bekleme = min(ILK_BEKLEME * 2 ** (deneme - 1), EN_UZUN_BEKLEME)
+        degerler = dict(deneme=deneme, son_hata=hata, sonraki_deneme=simdi + timedelta(seconds=bekleme))
+    with Session(engine) as db:
+        db.exec(update(WebhookOlayi).where(WebhookOlayi.id == olay_id).values(**degerler))
+        db.commit()
+
+def _eskileri_sil() -> None:
+    with Session(engine) as db:
+        db.exec(
+            delete(WebhookOlayi)
+            .where(col(WebhookOlayi.durum).in_((WebhookDurumu.GONDERILDI, WebhookDurumu.HATA)))
+            .where(WebhookOlayi.olusturma_tarihi < datetime.now() - SAKLAMA_SURESI)
+        )
+        db.commit()
+
+def kuyruk_durumu(db: Session) -> dict:
+    """Webhook kuyruğundaki olay sayıları (durum bazında)."""
+    sayilar = dict(db.exec(select(WebhookOlayi.durum, func.count()).group_by(WebhookOlayi.durum)).all())
+    return {durum.value: sayilar.get(durum, 0) for durum in WebhookDurumu}
+
+_dongu: Optional[asyncio.AbstractEventLoop] = None
+_uyandirma: Optional[asyncio.Event] = None
+
+def _uyandir() -> None:
+    """Yeni olay commit edildi: Bu süreçteki döngü aralığı beklemeden göndersin (herhangi bir thread'den)."""
+    if _dongu is not None and _uyandirma is not None:
+        try:
+            _dongu.call_soon_threadsafe(_uyandirma.set)
+        except RuntimeError: # Event loop kapanmış
+            pass
+
+async def webhook_dongusu() -> None:
+    """Webhook kuyruğunu gönderir (main.py lifespan başlatır, kapanışta iptal eder)."""
+    global _dongu, _uyandirma
+    if not WEBHOOK_ADRESI:
+        return
+    _dongu, _uyandirma = asyncio.get_running_loop(), asyncio.Event()
+    son_bakim = 0.0
+    while True:
+        try:
+            await asyncio.wait_for(_uyandirma.wait(), WEBHOOK_ARALIGI)
+        except asyncio.TimeoutError:
+            pass
+        _uyandirma.clear()
+        try:
+            if time.monotonic() - son_bakim >= BAKIM_ARALIGI:
+                await run_in_threadpool(_eskileri_sil)
+                son_bakim = time.monotonic()
+            for _ in range(TUR_BASINA_OLAY):
+                siradaki = await run_in_threadpool(_siradaki_olayi_al)
+                if siradaki is None:
+                    break
+                olay_id, olay, govde, deneme = siradaki
+                hata = await run_in_threadpool(_gonder, olay_id, olay, govde)
+                await run_in_threadpool(_sonuc_yaz, olay_id, deneme, hata)
+                WEBHOOK_GONDERIMI.artir(("basarili" if hata is None else "hata",))
+                if hata is not None:
+                    logger.warning("Stok uyarısı webhook'u gönderilemedi (olay %s, deneme %s): %s", olay_id, deneme + 1, hata)
+                    break
+        except Exception as hata: # Bir sonraki turda tekrar denenir
+            logger.warning("Webhook kuyruğu işletilemedi: %s", hata)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Uygulama açılış süresi ölçümü.
+
+Şemayı bir kez kurar (python -m app.komut kur ile aynı), sonra uvicorn'u
+--tekrar kez baştan başlatıp ilk başarılı isteğe kadar geçen süreyi ölçer.
+İki süre yazdırılır:
+  - Dış süre: Süreç başlatmadan ilk yanıta kadar (yorumlayıcı + uvicorn dahil)
+  - İç süre : app.main import'undan lifespan sonuna kadar (/metrics: depo_startup_seconds)
+Karşılaştırma için aynı ölçüm DB_OTOMATIK_KUR=1 (şemayı açılışta kuran eski
+davranış) ile de alınır. İç sürenin medyanı bütçeyi aşarsa 1 ile çıkar.
+Worker'lar aynı anda açılır; çekirdek sayısından fazla worker ölçümü CPU'ya bağlar.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.acilis_suresi                       # 5 tekrar, 1 worker
+    python -m bench.acilis_suresi --worker 4 --butce 2.5
+    ACILIS_DATABASE_URL=postgresql://... python -m bench.acilis_suresi
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Açılış süresi ölçümü")
+parser.add_argument("--tekrar", type=int, default=5, help="Her mod için başlatma sayısı")
+parser.add_argument("--worker", type=int, default=1, help="uvicorn worker sayısı")
+parser.add_argument("--butce", type=float, default=float(os.getenv("ACILIS_BUTCESI_SN", "3")),
+                    help="İç açılış süresi bütçesi (sn, Varsayılan: ACILIS_BUTCESI_SN)")
+parser.add_argument("--port", type=int, default=8150)
+argumanlar = parser.parse_args()
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "ACILIS_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_acilis_"), "acilis.db")
+)
+
+import httpx
+
+from app.database import engine, init_db
+
+def baslat_ve_olc(otomatik_kur: bool):
+    """Sunucuyu başlatır, ilk yanıta kadar geçen süreyi ve iç açılış süresini döner."""
+    ortam = {**os.environ, "DB_OTOMATIK_KUR": "1" if otomatik_kur else "0", "ACILIS_BUTCESI_SN": str(argumanlar.butce)}
+    baslangic = time.perf_counter()
+    surec = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(argumanlar.port),
+         "--workers", str(argumanlar.worker), "--log-level", "warning"],
+        env=ortam,
+    )
+    try:
+        while True:
+            if surec.poll() is not None:
+                raise RuntimeError("Sunucu açılmadan kapandı (şema kontrolü başarısız olabilir).")
+            try:
+                yanit = httpx.get(f"http://127.0.0.1:{argumanlar.port}/metrics", timeout=1)
+                if yanit.status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() - baslangic > 60:
+                raise RuntimeError("Sunucu 60 sn içinde açılmadı.")
+            time.sleep(0.02)
+        dis = time.perf_counter() - baslangic
+        ic = next(
+            float(satir.split()[-1]) for satir in yanit.text.splitlines() if satir.startswith("depo_startup_seconds ")
+        )
+        return dis, ic
+    finally:
+        surec.terminate()
+        surec.wait()
+
+def main() -> int:
+    init_db()
+    print(f"Veritabanı : {engine.url.render_as_string(hide_password=True)}")
+    print(f"Ölçüm      : {argumanlar.tekrar} tekrar, {argumanlar.worker} worker, iç süre bütçesi {argumanlar.butce} sn")
+
+    medyanlar = {}
+    for ad, otomatik_kur in (("sema kontrolü", False), ("otomatik kur", True)):
+        olcumler = [baslat_ve_olc(otomatik_kur) for _ in range(argumanlar.tekrar)]
+        dis = [o[0] for o in olcumler]
+        ic = [o[1] for o in olcumler]
+        medyanlar[ad] = statistics.median(ic)
+        print(f"{ad:14}: dış medyan {statistics.median(dis):6.2f} sn (en fazla {max(dis):6.2f}) | "
+              f"iç medyan {statistics.median(ic):6.3f} sn (en fazla {max(ic):6.3f})")
+
+    asildi = medyanlar["sema kontrolü"] > argumanlar.butce
+    print(f"Sonuç: Açılış bütçeyi aştı ({medyanlar['sema kontrolü']:.3f} > {argumanlar.butce} sn)." if asildi
+          else f"Sonuç: Açılış bütçe içinde ({medyanlar['sema kontrolü']:.3f} <= {argumanlar.butce} sn).")
+    return 1 if asildi else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Arama dizini hız ölçümü (otomatik tamamlama).
+
+Geçici bir veritabanına N ürün ve personel basar, arama dizinini
+kaynaktan kurar (app.arama.dizini_yenile) ve sık/seyrek geçen metinlerle
+ara() süresini ölçer. Her sorgu için en yavaş tekrarın süresi yazdırılır;
+hedefin (--hedef-ms) üstünde kalan varsa 1 ile çıkar.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.arama_hiz                       # 1.000.000 ürün
+    python -m bench.arama_hiz --urun 200000
+    ARAMA_DATABASE_URL=postgresql://... python -m bench.arama_hiz
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Arama dizini hız ölçümü")
+parser.add_argument("--urun", type=int, default=1_000_000, help="Basılacak ürün sayısı")
+parser.add_argument("--personel", type=int, default=20_000, help="Basılacak personel sayısı")
+parser.add_argument("--tekrar", type=int, default=20, help="Sorgu başına tekrar")
+parser.add_argument("--hedef-ms", type=float, default=10.0, help="Sorgu başına üst sınır (ms)")
+argumanlar = parser.parse_args()
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "ARAMA_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_arama_"), "arama.db")
+)
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.arama import AramaTuru, ara, dizini_yenile
+from app.database import engine, init_db
+from app.models import Urun, Personel, UrunTipi
+
+PARCA = 20_000
+ADLAR = ["İş", "Kaynak", "Işık", "Kablo", "Eldiven", "Vida", "Somun", "Matkap", "Çelik", "Şerit",
+         "Boya", "Fırça", "Gözlük", "Baret", "Ayakkabı", "Maske", "Pense", "Tornavida", "Ölçer", "Uç"]
+NITELIKLER = ["Büyük", "Küçük", "Paslanmaz", "Yalıtımlı", "Endüstriyel", "Mini", "Ağır Hizmet", "Izgaralı"]
+KISI_ADLARI = ["İsmail", "Ayşe", "Ilgaz", "Çağrı", "Gülşen", "Ömer", "Işıl", "Şükrü", "Ümit", "Derya"]
+SOYADLAR = ["Yılmaz", "Işık", "Öztürk", "Çelik", "Şahin", "Kılıç", "Aydın", "Doğan", "İnce", "Güneş"]
+
+SORGULAR = [
+    ("çok sık (tüm ürünlerde)", "URN-", [AramaTuru.URUN]),
+    ("sık ad", "kablo", None),
+    ("Türkçe büyük harf", "IŞIK", None),
+    ("nitelik + ad", "paslanmaz vida", [AramaTuru.URUN]),
+    ("SKU tam", "URN-0424242", [AramaTuru.URUN]),
+    ("seyrek", "zzq", None),
+    ("personel", "İsmail Işık", [AramaTuru.PERSONEL]),
+]
+
+def veri_bas():
+    rastgele = random.Random(7)
+    with engine.begin() as baglanti:
+        for bas in range(0, argumanlar.urun, PARCA):
+            baglanti.execute(insert(Urun), [
+                {
+                    "ad": f"{rastgele.choice(NITELIKLER)} {rastgele.choice(ADLAR)} {rastgele.randint(1, 500)}",
+                    "sku": f"URN-{i:07d}", "tip": UrunTipi.SARF, "birim": "Adet",
+                    "guvenlik_stogu": 0, "aktif_mi": True,
+                }
+                for i in range(bas, min(argumanlar.urun, bas + PARCA))
+            ])
+        baglanti.execute(insert(Personel), [
+            {"ad_soyad": f"{rastgele.choice(KISI_ADLARI)} {rastgele.choice(SOYADLAR)}", "aktif_mi": True}
+            for _ in range(argumanlar.personel)
+        ])
+
+def main() -> int:
+    init_db()
+    print(f"Veritabanı : {engine.url.render_as_string(hide_password=True)}")
+    baslangic = time.perf_counter()
+    veri_bas()
+    print(f"Veri       : {argumanlar.urun} ürün, {argumanlar.personel} personel ({time.perf_counter() - baslangic:.1f} sn)")
+
+    baslangic = time.perf_counter()
+    with Session(engine) as db:
+        adet = dizini_yenile(db)
+        db.commit()
+    print(f"Dizin      : {adet} kayıt ({time.perf_counter() - baslangic:.1f} sn)")
+
+    yavaslar = 0
+    with Session(engine) as db:
+        for ad, sorgu, turler in SORGULAR:
+            sureler = []
+            for _ in range(argumanlar.tekrar):
+                t = time.perf_counter()
+                sonuc = ara(db, sorgu, turler, limit=10)
+                sureler.append((time.perf_counter() - t) * 1000)
+            sureler.sort()
+            en_kotu = sureler[-1]
+            durum = "TAMAM" if en_kotu <= argumanlar.hedef_ms else "YAVAŞ"
+            yavaslar += durum == "YAVAŞ"
+            ornek = sonuc[0]["etiket"] if sonuc else "-"
+            print(f"{durum} {ad:26} '{sorgu}': medyan {sureler[len(sureler) // 2]:6.2f} ms, en kötü {en_kotu:6.2f} ms, {len(sonuc)} sonuç (ilk: {ornek})")
+
+    print(f"Sonuç: {yavaslar} sorgu {argumanlar.hedef_ms} ms hedefini aştı." if yavaslar else "Sonuç: Tüm sorgular hedefin altında.")
+    return 1 if yavaslar else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
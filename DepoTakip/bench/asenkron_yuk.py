@@ -0,0 +1,166 @@
+"""
+Senkron ve asenkron (DB_ASYNC=1) veritabanı yolunun yük altında karşılaştırılması.
+
+Geçici bir veritabanı hazırlar, her mod için ayrı bir uvicorn süreci (tek worker)
+başlatır ve aynı anda N istemciyle okuma (/rapor/ozet, /tanim/urun) ve yazma
+(/islem/giris) karışımı gönderir. Her mod için saniyedeki istek, gecikme
+yüzdelikleri ve hata sayısı yazdırılır.
+
+İstemciler de CPU harcar; tek çekirdekli makinede ölçüm istemci tarafından
+sınırlanır. Çok çekirdekte --surec ile istemciler birkaç sürece dağıtılmalıdır.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.asenkron_yuk --istemci 500 --istek 20 --surec 4
+    YUK_DATABASE_URL=postgresql://... python -m bench.asenkron_yuk
+
+Asenkron mod için sürücü gerekir: SQLite -> aiosqlite, PostgreSQL -> asyncpg.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+parser = argparse.ArgumentParser(description="Senkron / asenkron yük testi")
+parser.add_argument("--istemci", type=int, default=500, help="Aynı anda bağlı istemci sayısı")
+parser.add_argument("--istek", type=int, default=20, help="İstemci başına istek sayısı")
+parser.add_argument("--yazma-orani", type=float, default=0.2, help="İsteklerin yazma (giriş) olan oranı")
+parser.add_argument("--surec", type=int, default=1, help="İstemcilerin dağıtılacağı süreç sayısı")
+parser.add_argument("--port", type=int, default=8130, help="Test sunucusunun portu")
+argumanlar = parser.parse_args()
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "YUK_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_yuk_"), "yuk.db")
+)
+
+import httpx
+from sqlmodel import Session
+
+from app.database import engine, init_db
+from app.models import Depo, Bolum, Urun, UrunTipi
+from app.routers.islemler import StokGirisModel, stok_giris_uygula
+
+DEPO_SAYISI, URUN_SAYISI = 5, 50
+
+def hazirla():
+    init_db()
+    with Session(engine) as db:
+        son = random.randint(0, 10**9)
+        depolar = [Depo(ad=f"Yük Depo {son}-{i}") for i in range(DEPO_SAYISI)]
+        urunler = [
+            Urun(ad=f"Yük Ürün {i}", sku=f"YUK-{son}-{i}", tip=UrunTipi.SARF, birim="Adet", guvenlik_stogu=10)
+            for i in range(URUN_SAYISI)
+        ]
+        db.add_all(depolar + urunler + [Bolum(ad=f"Yük Bölüm {son}")])
+        db.commit()
+        for depo in depolar:
+            for urun in urunler:
+                stok_giris_uygula(StokGirisModel(urun_id=urun.id, depo_id=depo.id, miktar=100), db)
+        db.commit()
+        return [d.id for d in depolar], [u.id for u in urunler]
+
+async def istemci(http, depo_idler, urun_idler, gecikmeler, hatalar):
+    rastgele = random.Random()
+    for _ in range(argumanlar.istek):
+        baslangic = time.perf_counter()
+        try:
+            if rastgele.random() < argumanlar.yazma_orani:
+                yanit = await http.post("/islem/giris", json={
+                    "urun_id": rastgele.choice(urun_idler), "depo_id": rastgele.choice(depo_idler), "miktar": 1
+                })
+            elif rastgele.random() < 0.5:
+                yanit = await http.get("/rapor/ozet", params={"depo_id": rastgele.choice(depo_idler)})
+            else:
+                yanit = await http.get("/tanim/urun")
+            if yanit.status_code != 200:
+                hatalar.append(yanit.status_code)
+        except httpx.HTTPError as e:
+            hatalar.append(type(e).__name__)
+        gecikmeler.append(time.perf_counter() - baslangic)
+
+async def yuk_uygula(istemci_sayisi, depo_idler, urun_idler):
+    gecikmeler, hatalar = [], []
+    sinirlar = httpx.Limits(max_connections=istemci_sayisi, max_keepalive_connections=istemci_sayisi)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{argumanlar.port}", limits=sinirlar, timeout=120) as http:
+        baslangic = time.perf_counter()
+        await asyncio.gather(*[
+            istemci(http, depo_idler, urun_idler, gecikmeler, hatalar) for _ in range(istemci_sayisi)
+        ])
+        sure = time.perf_counter() - baslangic
+    return sure, gecikmeler, hatalar
+
+def _surec_yuku(istemci_sayisi, depo_idler, urun_idler, kuyruk):
+    kuyruk.put(asyncio.run(yuk_uygula(istemci_sayisi, depo_idler, urun_idler)))
+
+def olc(depo_idler, urun_idler):
+    """İstemcileri --surec kadar sürece bölüp aynı anda çalıştırır, sonuçları birleştirir."""
+    if argumanlar.surec <= 1:
+        sure, gecikmeler, hatalar = asyncio.run(yuk_uygula(argumanlar.istemci, depo_idler, urun_idler))
+        return sure, sorted(gecikmeler), hatalar
+    kuyruk = multiprocessing.Queue()
+    surecler = [
+        multiprocessing.Process(target=_surec_yuku, args=(argumanlar.istemci // argumanlar.surec, depo_idler, urun_idler, kuyruk))
+        for _ in range(argumanlar.surec)
+    ]
+    for s in surecler:
+        s.start()
+    parcalar = [kuyruk.get() for _ in surecler]
+    for s in surecler:
+        s.join()
+    return (
+        max(p[0] for p in parcalar),
+        sorted(g for p in parcalar for g in p[1]),
+        [h for p in parcalar for h in p[2]],
+    )
+
+def sunucu_baslat(asenkron: bool):
+    ortam = {**os.environ, "DB_ASYNC": "1" if asenkron else "0"}
+    surec = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(argumanlar.port),
+         "--workers", "1", "--log-level", "warning", "--backlog", str(max(2048, argumanlar.istemci * 2))],
+        env=ortam,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{argumanlar.port}/sistem/havuz", timeout=1)
+            return surec
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    surec.terminate()
+    raise RuntimeError("Test sunucusu başlamadı")
+
+def yuzdelik(sirali, oran):
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))] * 1000
+
+def main():
+    depo_idler, urun_idler = hazirla()
+    print(f"Veritabanı : {engine.url.render_as_string(hide_password=True)}")
+    print(f"Yük        : {argumanlar.istemci} istemci x {argumanlar.istek} istek, yazma oranı {argumanlar.yazma_orani}, {argumanlar.surec} süreç")
+
+    sonuclar = {}
+    for ad, asenkron in (("senkron", False), ("asenkron", True)):
+        surec = sunucu_baslat(asenkron)
+        try:
+            asyncio.run(yuk_uygula(20, depo_idler, urun_idler)) # Isınma (önbellek, havuz bağlantıları)
+            sure, gecikmeler, hatalar = olc(depo_idler, urun_idler)
+            havuz = httpx.get(f"http://127.0.0.1:{argumanlar.port}/sistem/havuz").json()
+        finally:
+            surec.terminate()
+            surec.wait()
+        istek_hizi = len(gecikmeler) / sure
+        sonuclar[ad] = istek_hizi
+        print(
+            f"{ad:8}: {istek_hizi:7.1f} istek/sn | p50 {yuzdelik(gecikmeler, 0.50):7.1f} ms | "
+            f"p95 {yuzdelik(gecikmeler, 0.95):7.1f} ms | p99 {yuzdelik(gecikmeler, 0.99):7.1f} ms | "
+            f"hata {len(hatalar)} {dict(Counter(hatalar)) if hatalar else ''}| havuz: {havuz.get('asenkron', havuz)}"
+        )
+    print(f"Oran (asenkron/senkron): {sonuclar['asenkron'] / sonuclar['senkron']:.2f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Rapor ve liste sorgularının index kullanımı kontrolü (EXPLAIN).
+
+Geçici bir veritabanına ~1M hareket ve demirbaş kaydı basar, istatistikleri
+toplar (ANALYZE) ve uygulamanın kurduğu sorguların (rapor.py / demirbas.py)
+planını alır. Her sorgu beklenen index'i kullanmıyorsa ya da tabloyu baştan
+sona tarıyorsa planı yazdırır ve 1 ile çıkar. Modellerdeki index'ler
+değiştirildiğinde veya sorgular elden geçirildiğinde çalıştırılmalıdır.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.indeks_kontrol                      # 1.000.000 hareket
+    python -m bench.indeks_kontrol --hareket 200000
+    INDEKS_DATABASE_URL=sqlite:///./depo.db python -m bench.indeks_kontrol --mevcut
+    INDEKS_DATABASE_URL=postgresql://... python -m bench.indeks_kontrol
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Sorgu planı / index kontrolü")
+parser.add_argument("--hareket", type=int, default=1_000_000, help="Basılacak hareket sayısı")
+parser.add_argument("--demirbas", type=int, default=100_000, help="Basılacak demirbaş sayısı")
+parser.add_argument("--mevcut", action="store_true", help="Veri basmadan INDEKS_DATABASE_URL'deki veriyle kontrol et")
+argumanlar = parser.parse_args()
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "INDEKS_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_indeks_"), "indeks.db")
+)
+
+from sqlalchemy import event, insert, text, tuple_
+from sqlmodel import Session, select
+
+from app.arama import dizini_yenile
+from app.database import engine, init_db
+from app.models import (
+    Depo, Bolum, Personel, Urun, DemirbasVarlik, Hareket,
+    UrunTipi, IslemTipi, DemirbasDurumu
+)
+from app.routers.rapor import VARSAYILAN_SAYFA_BOYUTU, HareketFiltre, _gecmis_sorgusu, _zimmet_sorgusu
+
+DEPO_SAYISI, BOLUM_SAYISI, PERSONEL_SAYISI, URUN_SAYISI = 20, 30, 2000, 5000
+PARCA = 20_000
+BUGUN = datetime(2025, 1, 1)
+
+# ----------------------------------------------------------------
+# VERİ BASMA
+# ----------------------------------------------------------------
+def _parca_parca_bas(baglanti, model, satir_uretici, adet: int):
+    for bas in range(0, adet, PARCA):
+        baglanti.execute(insert(model), [satir_uretici(i) for i in range(bas, min(adet, bas + PARCA))])
+
+def veri_bas():
+    rastgele = random.Random(42)
+    tipler = list(IslemTipi)
+    durumlar = list(DemirbasDurumu)
+
+    def hareket(i):
+        tip = rastgele.choice(tipler)
+        return {
+            "tarih": BUGUN - timedelta(minutes=rastgele.randrange(3 * 365 * 24 * 60)),
+            "islem_tipi": tip,
+            "urun_id": rastgele.randint(1, URUN_SAYISI),
+            "cikis_depo_id": rastgele.randint(1, DEPO_SAYISI) if tip in (IslemTipi.CIKIS, IslemTipi.TRANSFER, IslemTipi.ZIMMET_VER) else None,
+            "giris_depo_id": rastgele.randint(1, DEPO_SAYISI) if tip in (IslemTipi.GIRIS, IslemTipi.TRANSFER, IslemTipi.ZIMMET_IADE) else None,
+            "personel_id": rastgele.randint(1, PERSONEL_SAYISI) if tip in (IslemTipi.ZIMMET_VER, IslemTipi.ZIMMET_IADE) else None,
+            "miktar": rastgele.randint(1, 50),
+            "kullanici": "Sistem",
+        }
+
+    def demirbas(i):
+        durum = rastgele.choice(durumlar)
+        return {
+            "urun_id": rastgele.randint(1, URUN_SAYISI),
+            "ozel_kod": f"DMB-{i:07d}",
+            "durum": durum,
+            "bulundugu_depo_id": None if durum == DemirbasDurumu.ZIMMETLI else rastgele.randint(1, DEPO_SAYISI),
+            "zimmetli_personel_id": rastgele.randint(1, PERSONEL_SAYISI) if durum == DemirbasDurumu.ZIMMETLI else None,
+        }
+
+    with engine.begin() as baglanti:
+        _parca_parca_bas(baglanti, Depo, lambda i: {"ad": f"Depo {i}", "aktif_mi": True, "olusturma_tarihi": BUGUN}, DEPO_SAYISI)
+        _parca_parca_bas(baglanti, Bolum, lambda i: {"ad": f"Bölüm {i}", "aktif_mi": True}, BOLUM_SAYISI)
+        _parca_parca_bas(baglanti, Personel, lambda i: {"ad_soyad": f"Personel {i}", "bolum_id": i % BOLUM_SAYISI + 1, "aktif_mi": True}, PERSONEL_SAYISI)
+        _parca_parca_bas(baglanti, Urun, lambda i: {
+            "ad": f"Ürün {i}", "sku": f"SKU-{i:06d}", "tip": UrunTipi.SARF if i % 2 else UrunTipi.DEMIRBAS,
+            "birim": "Adet", "guvenlik_stogu": 10, "aktif_mi": True
+        }, URUN_SAYISI)
+        _parca_parca_bas(baglanti, DemirbasVarlik, demirbas, argumanlar.demirbas)
+        _parca_parca_bas(baglanti, Hareket, hareket, argumanlar.hareket)
+
+    with Session(engine) as db:
+        dizini_yenile(db) # Ürün adı filtresi arama dizininden okur
+        db.commit()
+
+    with engine.connect() as baglanti:
+        baglanti.execute(text("ANALYZE"))
+        baglanti.commit()
+
+# ----------------------------------------------------------------
+# PLAN KONTROLÜ
+# ----------------------------------------------------------------
+@event.listens_for(engine, "before_cursor_execute", retval=True)
+def _plan_iste(baglanti, imlec, cumle, parametreler, baglam, coklu):
+    # Uygulamanın kurduğu sorgu aynen çalıştırılır, sadece başına EXPLAIN eklenir
+    if baglam is not None and baglam.execution_options.get("plan"):
+        onek = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        cumle = onek + cumle
+    return cumle, parametreler
+
+def plan_al(sorgu) -> list:
+    with engine.connect() as baglanti:
+        sonuc = baglanti.execution_options(plan=True).execute(sorgu)
+        return [satir[-1] if engine.dialect.name == "sqlite" else satir[0] for satir in sonuc.cursor.fetchall()]
+
+def tam_tarama_var(plan: list, tablo: str) -> bool:
+    """Tablo index'siz (baştan sona) okunuyor mu?"""
+    for satir in plan:
+        if engine.dialect.name == "sqlite":
+            if satir.startswith(f"SCAN {tablo}") and "INDEX" not in satir:
+                return True
+        elif f"Seq Scan on {tablo}" in satir:
+            return True
+    return False
+
+def sorgular():
+    """
+    (ad, sorgu, tablo, beklenen index'ler). Sorgular uç noktaların kurduğuyla aynıdır.
+    Beklenen index'lerden en az biri planda geçmelidir (Ürün adı aramasında planlayıcı
+    seçiciliğe göre ürün index'ini ya da tarih sırasıyla okumayı seçebilir).
+    """
+    sayfa = VARSAYILAN_SAYFA_BOYUTU + 1 # hareket_gecmisi gibi: Sonraki sayfa var mı diye bir fazlası
+    gecmis = lambda **f: _gecmis_sorgusu(HareketFiltre(**f)).limit(sayfa)
+    return [
+        ("gecmis: tarih aralığı", gecmis(baslangic_tarihi=BUGUN - timedelta(days=7), bitis_tarihi=BUGUN),
+         "hareketler", ["ix_hareketler_tarih"]),
+        ("gecmis: işlem tipi", gecmis(islem_tipi=IslemTipi.ZIMMET_IADE),
+         "hareketler", ["ix_hareket_tip_tarih"]),
+        ("gecmis: işlem tipi + imleç", gecmis(islem_tipi=IslemTipi.GIRIS).where(
+            tuple_(Hareket.tarih, Hareket.id) < tuple_(BUGUN - timedelta(days=400), 500_000)),
+         "hareketler", ["ix_hareket_tip_tarih"]),
+        ("gecmis: personel", gecmis(personel_id=17),
+         "hareketler", ["ix_hareket_personel_tarih"]),
+        ("gecmis: depo (giriş veya çıkış)", gecmis(depo_id=3),
+         "hareketler", ["ix_hareket_cikis_depo_tarih", "ix_hareket_giris_depo_tarih"]),
+        ("gecmis: ürün adı", gecmis(urun_adi="Ürün 4321"),
+         "hareketler", ["ix_hareket_urun_tarih", "ix_hareketler_tarih"]),
+        ("zimmet listesi", _zimmet_sorgusu(None),
+         "demirbas_varliklar", ["ix_demirbas_durum_urun"]),
+        ("demirbaş listesi: durum", select(DemirbasVarlik).where(DemirbasVarlik.durum == DemirbasDurumu.ARIZALI),
+         "demirbas_varliklar", ["ix_demirbas_durum_urun"]),
+        ("demirbaş listesi: personel", select(DemirbasVarlik).where(DemirbasVarlik.zimmetli_personel_id == 17),
+         "demirbas_varliklar", ["ix_demirbas_personel"]),
+    ]
+
+def main() -> int:
+    init_db()
+    print(f"Veritabanı : {engine.url.render_as_string(hide_password=True)}")
+    if not argumanlar.mevcut:
+        baslangic = time.perf_counter()
+        veri_bas()
+        print(f"Veri       : {argumanlar.hareket} hareket, {argumanlar.demirbas} demirbaş ({time.perf_counter() - baslangic:.1f} sn)")
+
+    hatali = 0
+    for ad, sorgu, tablo, beklenenler in sorgular():
+        plan = plan_al(sorgu)
+        metin = "\n".join(plan)
+        kullanilan = [i for i in beklenenler if i in metin]
+        tam_tarama = tam_tarama_var(plan, tablo)
+
+        with Session(engine) as db:
+            baslangic = time.perf_counter()
+            db.exec(sorgu).all()
+            sure = (time.perf_counter() - baslangic) * 1000
+
+        if tam_tarama or not kullanilan:
+            hatali += 1
+            neden = "tam tarama" if tam_tarama else f"beklenen index yok: {' / '.join(beklenenler)}"
+            print(f"HATA  {ad:34} {sure:8.1f} ms ({neden})")
+            for satir in plan:
+                print(f"        {satir}")
+        else:
+            print(f"TAMAM {ad:34} {sure:8.1f} ms ({', '.join(kullanilan)})")
+
+    print(f"Sonuç: {hatali} sorgu index kullanmıyor." if hatali else "Sonuç: Tüm sorgular index kullanıyor.")
+    return 1 if hatali else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Mutabakat motoru hız ve doğruluk ölçümü.
+
+Geçici bir veritabanına N sarf hareketi ve demirbaş girişi/zimmeti basar,
+StokSarf ve DemirbasVarlik'ı logla tutarlı kurar, sonra bilinen sayıda fark
+(stok miktarı, silinmiş stok satırı, yanlış zimmet, eksi bakiyeli hareket) ekler.
+app.mutabakat.mutabakat() tam olarak bu farkları bulmalıdır; bulamazsa 1 ile
+çıkar. Saniyedeki hareket sayısı ve 50M satır için tahmini süre yazdırılır.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.mutabakat_hiz                       # 5.000.000 hareket
+    python -m bench.mutabakat_hiz --hareket 1000000 --surec 4
+    MUTABAKAT_DATABASE_URL=postgresql://... python -m bench.mutabakat_hiz
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Mutabakat motoru hız ölçümü")
+parser.add_argument("--hareket", type=int, default=5_000_000, help="Basılacak sarf hareketi sayısı")
+parser.add_argument("--demirbas", type=int, default=50_000, help="Basılacak demirbaş sayısı")
+parser.add_argument("--surec", type=int, default=1, help="Paralel süreç sayısı (urun_id'ye göre bölünür)")
+argumanlar = parser.parse_args()
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "MUTABAKAT_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_mutabakat_"), "mutabakat.db")
+)
+
+from sqlalchemy import insert, update, delete
+from sqlmodel import Session, select
+
+from app.database import engine, init_db
+from app.models import (
+    Depo, Bolum, Personel, Urun, StokSarf, DemirbasVarlik, Hareket,
+    UrunTipi, IslemTipi, DemirbasDurumu
+)
+from app.mutabakat import mutabakat
+
+DEPO_SAYISI, BOLUM_SAYISI, PERSONEL_SAYISI, URUN_SAYISI = 20, 30, 2000, 5000
+PARCA = 50_000
+BASLANGIC = datetime(2020, 1, 1)
+HEDEF_SATIR = 50_000_000
+
+# ----------------------------------------------------------------
+# VERİ BASMA (Log ve tablolar birbiriyle tutarlı)
+# ----------------------------------------------------------------
+def veri_bas() -> int:
+    rastgele = random.Random(11)
+    bakiyeler = defaultdict(float)
+    sarf_urunleri = range(1, URUN_SAYISI, 2)
+    demirbas_urunleri = range(2, URUN_SAYISI + 1, 2)
+    sayac = [0]
+
+    def hareket(tip, urun_id, miktar, cikis=None, giris=None, personel_id=None, bolum_id=None, demirbas_id=None):
+        sayac[0] += 1
+        return {
+            "tarih": BASLANGIC + timedelta(seconds=sayac[0]), "islem_tipi": tip, "urun_id": urun_id,
+            "cikis_depo_id": cikis, "giris_depo_id": giris, "personel_id": personel_id, "bolum_id": bolum_id,
+            "miktar": miktar, "demirbas_id": demirbas_id, "kullanici": "Sistem"
+        }
+
+    def sarf_hareketi():
+        urun_id, depo_id = rastgele.choice(sarf_urunleri), rastgele.randint(1, DEPO_SAYISI)
+        bakiye = bakiyeler[(depo_id, urun_id)]
+        secim = rastgele.random()
+        miktar = rastgele.randint(1, 20)
+        if secim < 0.5 or bakiye < miktar: # Stok yetmiyorsa giriş (uygulama da eksiye izin vermez)
+            bakiyeler[(depo_id, urun_id)] += miktar
+            return hareket(IslemTipi.GIRIS, urun_id, miktar, giris=depo_id)
+        if secim < 0.8:
+            bakiyeler[(depo_id, urun_id)] -= miktar
+            return hareket(IslemTipi.CIKIS, urun_id, miktar, cikis=depo_id, bolum_id=rastgele.randint(1, BOLUM_SAYISI))
+        hedef = depo_id % DEPO_SAYISI + 1
+        bakiyeler[(depo_id, urun_id)] -= miktar
+        bakiyeler[(hedef, urun_id)] += miktar
+        return hareket(IslemTipi.TRANSFER, urun_id, miktar, cikis=depo_id, giris=hedef)
+
+    with engine.begin() as baglanti:
+        baglanti.execute(insert(Depo), [{"ad": f"Depo {i}", "aktif_mi": True} for i in range(DEPO_SAYISI)])
+        baglanti.execute(insert(Bolum), [{"ad": f"Bölüm {i}", "aktif_mi": True} for i in range(BOLUM_SAYISI)])
+        baglanti.execute(insert(Personel), [{"ad_soyad": f"Personel {i}", "aktif_mi": True} for i in range(PERSONEL_SAYISI)])
+        baglanti.execute(insert(Urun), [
+            {"ad": f"Ürün {i}", "sku": f"SKU-{i:06d}", "tip": UrunTipi.SARF if i % 2 else UrunTipi.DEMIRBAS,
+             "birim": "Adet", "guvenlik_stogu": 0, "aktif_mi": True}
+            for i in range(1, URUN_SAYISI + 1)
+        ])
+
+        # Demirbaşlar: Giriş, bir kısmı zimmet, zimmetlilerin bir kısmı iade (ARIZALI)
+        demirbaslar, loglar = [], []
+        for i in range(1, argumanlar.demirbas + 1):
+            urun_id, depo_id = rastgele.choice(demirbas_urunleri), rastgele.randint(1, DEPO_SAYISI)
+            kayit = {"id": i, "urun_id": urun_id, "ozel_kod": f"DMB-{i:07d}", "durum": DemirbasDurumu.DEPODA,
+                     "bulundugu_depo_id": depo_id, "zimmetli_personel_id": None, "zimmetli_bolum_id": None}
+            loglar.append(hareket(IslemTipi.GIRIS, urun_id, 1, giris=depo_id, demirbas_id=i))
+            if i % 3 == 0:
+                personel_id = rastgele.randint(1, PERSONEL_SAYISI)
+                loglar.append(hareket(IslemTipi.ZIMMET_VER, urun_id, 1, cikis=depo_id, personel_id=personel_id, demirbas_id=i))
+                kayit.update(durum=DemirbasDurumu.ZIMMETLI, bulundugu_depo_id=None, zimmetli_personel_id=personel_id)
+                if i % 2 == 0:
+                    loglar.append(hareket(IslemTipi.ZIMMET_IADE, urun_id, 1, giris=1, personel_id=personel_id, demirbas_id=i))
+                    kayit.update(durum=DemirbasDurumu.ARIZALI, bulundugu_depo_id=1, zimmetli_personel_id=None)
+            demirbaslar.append(kayit)
+        for bas in range(0, len(demirbaslar), PARCA):
+            baglanti.execute(insert(DemirbasVarlik), demirbaslar[bas:bas + PARCA])
+        for bas in range(0, len(loglar), PARCA):
+            baglanti.execute(insert(Hareket), loglar[bas:bas + PARCA])
+
+        for bas in range(0, argumanlar.hareket, PARCA):
+            baglanti.execute(insert(Hareket), [sarf_hareketi() for _ in range(min(PARCA, argumanlar.hareket - bas))])
+        baglanti.execute(insert(StokSarf), [
+            {"depo_id": depo_id, "urun_id": urun_id, "miktar": miktar} for (depo_id, urun_id), miktar in bakiyeler.items()
+        ])
+    return sayac[0]
+
+def farklari_ekle() -> int:
+    """Bilinen sayıda tutarsızlık yaratır, eklenen fark sayısını döner."""
+    with Session(engine) as db:
+        stoklar = db.exec(select(StokSarf).where(StokSarf.miktar > 0).order_by(StokSarf.id).limit(3)).all()
+        db.exec(update(StokSarf).where(StokSarf.id == stoklar[0].id).values(miktar=StokSarf.miktar + 5))  # Miktar farkı
+        db.exec(delete(StokSarf).where(StokSarf.id == stoklar[1].id))                                      # Kayıp satır
+        db.exec(update(DemirbasVarlik).where(DemirbasVarlik.id == 3).values(zimmetli_personel_id=None))      # Yanlış zimmet
+        db.exec(update(DemirbasVarlik).where(DemirbasVarlik.id == 6).values(durum=DemirbasDurumu.ZIMMETLI))  # İade edilmemiş görünüyor
+        # Stoğu aşan çıkış: Hem eksi bakiye hem stok farkı
+        s = stoklar[2]
+        db.exec(insert(Hareket).values(
+            tarih=datetime.now(), islem_tipi=IslemTipi.CIKIS, urun_id=s.urun_id, cikis_depo_id=s.depo_id,
+            bolum_id=1, miktar=s.miktar + 1, kullanici="Sistem"
+        ))
+        db.commit()
+    return 6
+
+def main() -> int:
+    init_db()
+    print(f"Veritabanı : {engine.url.render_as_string(hide_password=True)}")
+    baslangic = time.perf_counter()
+    toplam = veri_bas()
+    print(f"Veri       : {toplam} hareket, {argumanlar.demirbas} demirbaş ({time.perf_counter() - baslangic:.1f} sn)")
+
+    baslangic = time.perf_counter()
+    sonuc = mutabakat(surec=argumanlar.surec)
+    sure = time.perf_counter() - baslangic
+    print(f"Temiz veri : {len(sonuc.farklar)} fark, {sonuc.okunan_hareket} hareket {sure:.1f} sn "
+          f"({sonuc.okunan_hareket / sure:,.0f} hareket/sn, 50M için ~{HEDEF_SATIR / (sonuc.okunan_hareket / sure) / 60:.1f} dk)")
+    hatali = len(sonuc.farklar)
+
+    beklenen = farklari_ekle()
+    sonuc = mutabakat(surec=argumanlar.surec)
+    for fark in sonuc.farklar:
+        print(f"        {fark}")
+    print(f"Bozuk veri : {len(sonuc.farklar)} fark bulundu (beklenen {beklenen})")
+    hatali += len(sonuc.farklar) != beklenen
+
+    print("Sonuç: Mutabakat hatalı." if hatali else "Sonuç: Tüm farklar doğru bulundu.")
+    return 1 if hatali else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
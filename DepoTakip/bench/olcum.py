@@ -0,0 +1,572 @@
+"""
+Tekrarlanabilir performans ölçümü: Veri basma, mikro ölçümler ve yük senaryosu.
+
+Üç adım, aynı veritabanı üzerinde çalışır (BENCH_DATABASE_URL, varsayılan
+./veri/bench/bench.db). Veri bir kez basılır, ölçümler istenildiği kadar tekrarlanır:
+
+  tohumla     Gerçekçi veri basar: N depo/bölüm/personel/ürün, milyonlarca Hareket,
+              demirbaşlar (giriş -> zimmet -> iade). Log tarih sırasıyla yazılır ve
+              StokSarf/DemirbasVarlik, özet ve arama dizini logla tutarlıdır
+              (python -m app.komut mutabakat temiz çıkar).
+  mikro       stok_giris (SARF ve DEMİRBAŞ), stok_transfer, zimmet_ver,
+              hareket_gecmisi, stok_durumu ve tek ürünün tüketim analizini
+              doğrudan (HTTP olmadan) ölçer.
+              Yazma ölçümleri veritabanına gerçekten yazar (commit dahil).
+  yuk         uvicorn başlatır, N istemciyle okuma/yazma karışımı gönderir;
+              işlem başına p50/p99 ve saniyedeki istek sayısını raporlar.
+  karsilastir İki JSON sonucunu karşılaştırır; eşikten fazla kötüleşme varsa 1 ile çıkar.
+
+mikro ve yuk sonuçları --json ile dosyaya yazılır (commit, veritabanı ve satır
+sayısı dahil); farklı commit'lerin sonuçları karsilastir ile kıyaslanır.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.olcum tohumla --hareket 5000000 [--sifirla]
+    python -m bench.olcum mikro --tekrar 300 --json veri/bench/mikro_yeni.json
+    python -m bench.olcum yuk --istemci 50 --sure 30 --json veri/bench/yuk_yeni.json
+    python -m bench.olcum karsilastir veri/bench/mikro_eski.json veri/bench/mikro_yeni.json --esik 15
+    BENCH_DATABASE_URL=postgresql://localhost/depo_bench python -m bench.olcum tohumla
+
+PostgreSQL'de tohumla boş bir veritabanı bekler (--sifirla sadece SQLite dosyasını siler).
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Performans ölçümü (veri basma / mikro / yük)")
+alt = parser.add_subparsers(dest="komut", required=True)
+
+p = alt.add_parser("tohumla", help="Ölçüm veritabanına gerçekçi veri basar")
+p.add_argument("--depo", type=int, default=20)
+p.add_argument("--bolum", type=int, default=40)
+p.add_argument("--personel", type=int, default=2000)
+p.add_argument("--urun", type=int, default=5000, help="Ürün sayısı (yarısı sarf, yarısı demirbaş)")
+p.add_argument("--hareket", type=int, default=1_000_000, help="Sarf hareketi sayısı")
+p.add_argument("--demirbas", type=int, default=100_000, help="Demirbaş sayısı")
+p.add_argument("--gun", type=int, default=730, help="Logun yayıldığı gün sayısı (bugünden geriye)")
+p.add_argument("--sifirla", action="store_true", help="SQLite dosyası varsa silip baştan bas")
+
+p = alt.add_parser("mikro", help="Tekil fonksiyonların gecikmesi")
+p.add_argument("--tekrar", type=int, default=200, help="Ölçüm başına çağrı sayısı")
+p.add_argument("--isinma", type=int, default=20, help="Ölçülmeyen ilk çağrı sayısı")
+p.add_argument("--sadece", nargs="*", help="Sadece bu ölçümleri çalıştır")
+p.add_argument("--json", help="Sonucun yazılacağı dosya")
+
+p = alt.add_parser("yuk", help="Eşzamanlı HTTP yük senaryosu")
+p.add_argument("--istemci", type=int, default=50, help="Aynı anda bağlı istemci sayısı")
+p.add_argument("--sure", type=float, default=30, help="Ölçüm süresi (sn)")
+p.add_argument("--isinma", type=float, default=3, help="Ölçülmeyen ısınma süresi (sn)")
+p.add_argument("--worker", type=int, default=1, help="uvicorn worker sayısı")
+p.add_argument("--asenkron", action="store_true", help="Sunucuyu DB_ASYNC=1 ile başlat")
+p.add_argument("--port", type=int, default=8140)
+p.add_argument("--json", help="Sonucun yazılacağı dosya")
+
+p = alt.add_parser("karsilastir", help="İki sonuç dosyasını karşılaştırır")
+p.add_argument("eski")
+p.add_argument("yeni")
+p.add_argument("--esik", type=float, default=20, help="Kötüleşme sayılacak yüzde")
+
+for p in alt.choices.values():
+    p.add_argument("--tohum", type=int, default=42, help="Rastgele sayı tohumu (tekrarlanabilirlik)")
+argumanlar = parser.parse_args()
+
+VARSAYILAN_KLASOR = os.path.join("veri", "bench")
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL", "sqlite:///" + os.path.join(VARSAYILAN_KLASOR, "bench.db")
+)
+if argumanlar.komut == "tohumla" and argumanlar.sifirla and os.environ["DATABASE_URL"].startswith("sqlite:///"):
+    # Engine kurulmadan (dosya açılmadan) silinmeli
+    dosya = os.environ["DATABASE_URL"][len("sqlite:///"):]
+    for ek in ("", "-wal", "-shm"):
+        if os.path.exists(dosya + ek):
+            os.remove(dosya + ek)
+if os.environ["DATABASE_URL"].startswith("sqlite:///"):
+    os.makedirs(os.path.dirname(os.environ["DATABASE_URL"][len("sqlite:///"):]) or ".", exist_ok=True)
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, select, func, col
+
+from app.arama import dizini_yenile
+from app.database import engine, init_db
+from app.models import (
+    Depo, Bolum, Personel, Urun, StokSarf, DemirbasVarlik, Hareket,
+    UrunTipi, IslemTipi, DemirbasDurumu
+)
+from app.ozet import ozet_yenile
+
+PARCA = 20_000
+
+def yuzdelik(sirali: list, oran: float) -> float:
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))] * 1000 if sirali else 0.0
+
+def ozetle(sureler: list, toplam_sure: float) -> dict:
+    sirali = sorted(sureler)
+    return {
+        "adet": len(sirali),
+        "islem_sn": round(len(sirali) / toplam_sure, 1) if toplam_sure else 0.0,
+        "ort_ms": round(sum(sirali) / len(sirali) * 1000, 3) if sirali else 0.0,
+        "p50_ms": round(yuzdelik(sirali, 0.50), 3),
+        "p99_ms": round(yuzdelik(sirali, 0.99), 3),
+    }
+
+def ortam_bilgisi() -> dict:
+    """Sonuçların hangi kod ve veriyle alındığı (karşılaştırmada gösterilir)."""
+    def git(*komut):
+        try:
+            return subprocess.run(["git", *komut], capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+    with Session(engine) as db:
+        hareket = db.exec(select(func.count()).select_from(Hareket)).one()
+        demirbas = db.exec(select(func.count()).select_from(DemirbasVarlik)).one()
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "degisiklik_var": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "tarih": datetime.now().isoformat(timespec="seconds"),
+        "veritabani": engine.url.render_as_string(hide_password=True),
+        "python": platform.python_version(),
+        "hareket": hareket,
+        "demirbas": demirbas,
+    }
+
+def json_yaz(sonuc: dict) -> None:
+    if not argumanlar.json:
+        return
+    os.makedirs(os.path.dirname(argumanlar.json) or ".", exist_ok=True)
+    with open(argumanlar.json, "w", encoding="utf-8") as f:
+        json.dump(sonuc, f, ensure_ascii=False, indent=2)
+    print(f"Sonuç yazıldı: {argumanlar.json}")
+
+# ----------------------------------------------------------------
+# 1. VERİ BASMA
+# ----------------------------------------------------------------
+URUN_KOKLERI = [
+    "Nitril Eldiven", "Toz Maskesi", "Kulak Tıkacı", "Kaynak Teli", "Kesme Diski", "Matkap Ucu",
+    "Vida", "Somun", "Kablo Bağı", "Silikon", "Temizlik Bezi", "A4 Kağıt", "Toner", "Pil",
+    "Dizüstü Bilgisayar", "Monitör", "El Terminali", "Yazıcı", "Matkap", "Kaynak Makinesi",
+    "Forklift Aküsü", "Telsiz", "Baret", "Transpalet", "Ölçü Aleti", "Kompresör",
+]
+URUN_EKLERI = ["S", "M", "L", "XL", "Standart", "Pro", "Endüstriyel", "Mini", "Plus", "Ağır Hizmet"]
+
+def _personel_adi(rastgele: random.Random, i: int) -> str:
+    adlar = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Ali", "Zeynep", "Mustafa", "Elif", "Hüseyin", "Şule", "İsmail", "Çağla"]
+    soyadlar = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın", "Özdemir", "Arslan", "Doğan", "Kılıç"]
+    return f"{rastgele.choice(adlar)} {rastgele.choice(soyadlar)} {i}"
+
+def tohumla() -> int:
+    init_db()
+    with Session(engine) as db:
+        if db.exec(select(Depo.id).limit(1)).first():
+            print("Veritabanı boş değil; SQLite için --sifirla kullanın ya da boş bir veritabanı verin.")
+            return 1
+
+    a = argumanlar
+    rastgele = random.Random(a.tohum)
+    bitis = datetime.now().replace(microsecond=0) - timedelta(minutes=1)
+    baslangic = bitis - timedelta(days=a.gun)
+    aralik = (bitis - baslangic).total_seconds()
+    sarf_urunleri = list(range(1, a.urun + 1, 2))
+    demirbas_urunleri = list(range(2, a.urun + 1, 2))
+    zaman = time.perf_counter()
+
+    def populer(liste):
+        # Az sayıda ürün/depo hareketlerin çoğunu alır (gerçek depolardaki gibi)
+        return liste[int(len(liste) * rastgele.random() ** 2)]
+
+    depolar = list(range(1, a.depo + 1))
+    with engine.begin() as baglanti:
+        baglanti.execute(insert(Depo), [{"ad": f"Depo {i:02d}", "aktif_mi": True, "olusturma_tarihi": baslangic} for i in depolar])
+        baglanti.execute(insert(Bolum), [{"ad": f"Bölüm {i:02d}", "aktif_mi": True} for i in range(1, a.bolum + 1)])
+        baglanti.execute(insert(Personel), [
+            {"ad_soyad": _personel_adi(rastgele, i), "bolum_id": rastgele.randint(1, a.bolum), "aktif_mi": True}
+            for i in range(1, a.personel + 1)
+        ])
+        baglanti.execute(insert(Urun), [
+            {"ad": f"{rastgele.choice(URUN_KOKLERI)} {rastgele.choice(URUN_EKLERI)} {i}", "sku": f"SKU-{i:06d}",
+             "tip": UrunTipi.SARF if i % 2 else UrunTipi.DEMIRBAS, "birim": "Adet",
+             "guvenlik_stogu": rastgele.choice([0, 5, 10, 20, 50]), "aktif_mi": True}
+            for i in range(1, a.urun + 1)
+        ])
+
+        # Demirbaşların yaşam döngüsü önceden planlanır: giriş -> (zimmet -> (iade))
+        # Son durumları tabloya, olayları zaman sırasıyla loga yazılır.
+        demirbas_olaylari, demirbaslar = [], []
+        for i in range(1, a.demirbas + 1):
+            urun_id, depo_id = populer(demirbas_urunleri), rastgele.choice(depolar)
+            zamanlar = sorted(rastgele.uniform(0, aralik) for _ in range(3))
+            kayit = {"id": i, "urun_id": urun_id, "ozel_kod": f"BEN-{i:08d}", "durum": DemirbasDurumu.DEPODA,
+                     "bulundugu_depo_id": depo_id, "zimmetli_personel_id": None, "zimmetli_bolum_id": None}
+            demirbas_olaylari.append((zamanlar[0], i, IslemTipi.GIRIS, urun_id, None, depo_id, None, None))
+            if rastgele.random() < 0.45:
+                personel_id, bolum_id = (rastgele.randint(1, a.personel), None) if rastgele.random() < 0.8 else (None, rastgele.randint(1, a.bolum))
+                demirbas_olaylari.append((zamanlar[1], i, IslemTipi.ZIMMET_VER, urun_id, depo_id, None, personel_id, bolum_id))
+                kayit.update(durum=DemirbasDurumu.ZIMMETLI, bulundugu_depo_id=None,
+                             zimmetli_personel_id=personel_id, zimmetli_bolum_id=bolum_id)
+                if rastgele.random() < 0.3:
+                    hedef = rastgele.choice(depolar)
+                    demirbas_olaylari.append((zamanlar[2], i, IslemTipi.ZIMMET_IADE, urun_id, None, hedef, personel_id, bolum_id))
+                    kayit.update(durum=rastgele.choice([DemirbasDurumu.DEPODA] * 3 + [DemirbasDurumu.ARIZALI, DemirbasDurumu.HURDA]),
+                                 bulundugu_depo_id=hedef, zimmetli_personel_id=None, zimmetli_bolum_id=None)
+            demirbaslar.append(kayit)
+        for bas in range(0, len(demirbaslar), PARCA):
+            baglanti.execute(insert(DemirbasVarlik), demirbaslar[bas:bas + PARCA])
+        heapq.heapify(demirbas_olaylari)
+
+        def log(saniye, tip, urun_id, cikis=None, giris=None, personel_id=None, bolum_id=None, miktar=1, demirbas_id=None):
+            return {
+                "tarih": baslangic + timedelta(seconds=saniye), "islem_tipi": tip, "urun_id": urun_id,
+                "cikis_depo_id": cikis, "giris_depo_id": giris, "personel_id": personel_id, "bolum_id": bolum_id,
+                "miktar": miktar, "demirbas_id": demirbas_id, "aciklama": None, "kullanici": "Sistem",
+            }
+
+        # Sarf hareketleri zamana eşit yayılır; demirbaş olayları araya zaman sırasıyla girer
+        bakiyeler = defaultdict(float)
+        parti, toplam = [], 0
+        for n in range(a.hareket):
+            saniye = aralik * (n + 0.5) / a.hareket
+            while demirbas_olaylari and demirbas_olaylari[0][0] <= saniye:
+                an, demirbas_id, tip, urun_id, cikis, giris, personel_id, bolum_id = heapq.heappop(demirbas_olaylari)
+                parti.append(log(an, tip, urun_id, cikis, giris, personel_id, bolum_id, demirbas_id=demirbas_id))
+
+            urun_id, depo_id = populer(sarf_urunleri), populer(depolar)
+            miktar = rastgele.choice([1, 1, 2, 5, 10, 20, 50])
+            secim = rastgele.random()
+            if secim < 0.45 or bakiyeler[(depo_id, urun_id)] < miktar: # Eksiye düşmez (uygulama da izin vermez)
+                miktar *= 4
+                bakiyeler[(depo_id, urun_id)] += miktar
+                parti.append(log(saniye, IslemTipi.GIRIS, urun_id, giris=depo_id, miktar=miktar))
+            elif secim < 0.85:
+                bakiyeler[(depo_id, urun_id)] -= miktar
+                parti.append(log(saniye, IslemTipi.CIKIS, urun_id, cikis=depo_id, miktar=miktar,
+                                 bolum_id=rastgele.randint(1, a.bolum)))
+            else:
+                hedef = rastgele.choice([d for d in depolar if d != depo_id] or depolar)
+                bakiyeler[(depo_id, urun_id)] -= miktar
+                bakiyeler[(hedef, urun_id)] += miktar
+                parti.append(log(saniye, IslemTipi.TRANSFER, urun_id, cikis=depo_id, giris=hedef, miktar=miktar))
+
+            if len(parti) >= PARCA:
+                baglanti.execute(insert(Hareket), parti)
+                toplam += len(parti)
+                parti = []
+                if toplam % (PARCA * 25) < PARCA:
+                    print(f"  {toplam:>10,} hareket ({time.perf_counter() - zaman:.0f} sn)")
+        while demirbas_olaylari:
+            an, demirbas_id, tip, urun_id, cikis, giris, personel_id, bolum_id = heapq.heappop(demirbas_olaylari)
+            parti.append(log(an, tip, urun_id, cikis, giris, personel_id, bolum_id, demirbas_id=demirbas_id))
+        if parti:
+            baglanti.execute(insert(Hareket), parti)
+            toplam += len(parti)
+
+        stoklar = [{"depo_id": d, "urun_id": u, "miktar": m} for (d, u), m in bakiyeler.items()]
+        for bas in range(0, len(stoklar), PARCA):
+            baglanti.execute(insert(StokSarf), stoklar[bas:bas + PARCA])
+
+    print(f"Log yazıldı: {toplam:,} hareket ({time.perf_counter() - zaman:.0f} sn). Özet ve arama dizini kuruluyor...")
+    with Session(engine) as db:
+        ozet_yenile(db)
+        dizini_yenile(db)
+        db.commit()
+    with engine.connect() as baglanti:
+        baglanti.execute(text("ANALYZE"))
+        baglanti.commit()
+    print(f"Veritabanı : {engine.url.render_as_string(hide_password=True)}")
+    print(f"Tamamlandı : {a.depo} depo, {a.personel} personel, {a.urun} ürün, {a.demirbas} demirbaş, "
+          f"{toplam:,} hareket ({time.perf_counter() - zaman:.0f} sn)")
+    return 0
+
+# ----------------------------------------------------------------
+# 2. MİKRO ÖLÇÜMLER (Uç nokta fonksiyonları, HTTP katmanı olmadan)
+# ----------------------------------------------------------------
+class Ornekler:
+    """Ölçümlerin kullanacağı gerçek kimlikler (veritabanından bir kez okunur)."""
+
+    def __init__(self, db: Session, rastgele: random.Random):
+        self.rastgele = rastgele
+        self.depolar = db.exec(select(Depo.id)).all()
+        self.bolumler = db.exec(select(Bolum.id)).all()
+        self.personeller = db.exec(select(Personel.id).limit(5000)).all()
+        self.sarf_urunleri = db.exec(select(Urun.id).where(Urun.tip == UrunTipi.SARF).limit(5000)).all()
+        self.demirbas_urunleri = db.exec(select(Urun.id).where(Urun.tip == UrunTipi.DEMIRBAS).limit(5000)).all()
+        self.urun_adlari = db.exec(select(Urun.ad).limit(500)).all()
+        # Zimmet verilebilecek demirbaşlar; her zimmet birini tüketir
+        self.depodaki_demirbaslar = list(db.exec(
+            select(DemirbasVarlik.id).where(DemirbasVarlik.durum == DemirbasDurumu.DEPODA)
+            .order_by(col(DemirbasVarlik.id).desc()).limit(50_000)
+        ).all())
+        if not (self.depolar and self.bolumler and self.personeller and self.sarf_urunleri and self.demirbas_urunleri):
+            raise SystemExit("Ölçüm veritabanı boş. Önce: python -m bench.olcum tohumla")
+
+    def sec(self, liste):
+        return self.rastgele.choice(liste)
+
+def _yazma(uygula, model_uretici):
+    """Uç noktanın yaptığı gibi: Yeni session, *_uygula, commit."""
+    def calistir():
+        with Session(engine) as db:
+            uygula(model_uretici(), db)
+            db.commit()
+    return calistir
+
+def mikro_olcumler(o: Ornekler) -> dict:
+    from app.routers.demirbas import ZimmetVerModel, zimmet_ver_uygula
+    from app.routers.islemler import (
+        StokGirisModel, StokTransferModel, stok_giris_uygula, stok_transfer_uygula
+    )
+    from app.rapor_onbellegi import rapor_onbellegi
+    from app.routers.rapor import HareketFiltre, StokFiltre, hareket_gecmisi, stok_durumu
+    from app.tuketim import ay_araligi, tuketim_analizi
+
+    # Sorgu yolunu ölç: Rapor önbelleği açık olsaydı tekrarlanan filtreler isabet olurdu
+    rapor_onbellegi.depo = None
+    toplam_cagri = argumanlar.tekrar + argumanlar.isinma
+
+    # Transfer kaynağı önceden beslenir ki ölçüm boyunca stok yetsin (ölçülmez)
+    kaynak, hedef = o.depolar[0], o.depolar[-1]
+    transfer_urunu = o.sarf_urunleri[0]
+    with Session(engine) as db:
+        stok_giris_uygula(StokGirisModel(urun_id=transfer_urunu, depo_id=kaynak, miktar=toplam_cagri), db)
+        db.commit()
+
+    def zimmet_modeli():
+        if not o.depodaki_demirbaslar:
+            raise SystemExit("Zimmet verilecek DEPODA demirbaş kalmadı; veriyi yeniden basın (tohumla --sifirla).")
+        return ZimmetVerModel(demirbas_id=o.depodaki_demirbaslar.pop(), personel_id=o.sec(o.personeller), aciklama="bench")
+
+    simdi = datetime.now()
+    gecmis_filtreleri = [
+        HareketFiltre(),
+        HareketFiltre(depo_id=o.sec(o.depolar)),
+        HareketFiltre(personel_id=o.sec(o.personeller)),
+        HareketFiltre(islem_tipi=IslemTipi.ZIMMET_VER),
+        HareketFiltre(baslangic_tarihi=simdi - timedelta(days=60), bitis_tarihi=simdi - timedelta(days=30)),
+        HareketFiltre(urun_adi=o.sec(o.urun_adlari).split()[0]),
+    ]
+
+    def gecmis():
+        with Session(engine) as db:
+            hareket_gecmisi(filtre=o.sec(gecmis_filtreleri), limit=50, imlec=None, db=db)
+
+    def stok():
+        with Session(engine) as db:
+            stok_durumu(StokFiltre(depo_id=o.sec(o.depolar)), tarih=None, db=db)
+
+    # Tek ürünün son 12 ayı (ürün kartındaki tüketim grafiği); tüm ürünler tek çağrıda saniyeler sürer
+    tuketim_araligi = ay_araligi(None, None)
+    def tuketim():
+        with Session(engine) as db:
+            tuketim_analizi(db, *tuketim_araligi, urun_id=o.sec(o.sarf_urunleri))
+
+    return {
+        "stok_giris_sarf": _yazma(stok_giris_uygula, lambda: StokGirisModel(
+            urun_id=o.sec(o.sarf_urunleri), depo_id=o.sec(o.depolar), miktar=5, aciklama="bench")),
+        "stok_giris_demirbas": _yazma(stok_giris_uygula, lambda: StokGirisModel(
+            urun_id=o.sec(o.demirbas_urunleri), depo_id=o.sec(o.depolar), miktar=1, aciklama="bench")),
+        "stok_giris_demirbas_10": _yazma(stok_giris_uygula, lambda: StokGirisModel(
+            urun_id=o.sec(o.demirbas_urunleri), depo_id=o.sec(o.depolar), miktar=10, aciklama="bench")),
+        "stok_transfer": _yazma(stok_transfer_uygula, lambda: StokTransferModel(
+            urun_id=transfer_urunu, cikis_depo_id=kaynak, giris_depo_id=hedef, miktar=1, aciklama="bench")),
+        "zimmet_ver": _yazma(zimmet_ver_uygula, zimmet_modeli),
+        "hareket_gecmisi": gecmis,
+        "stok_durumu": stok,
+        "tuketim_urun": tuketim,
+    }
+
+def mikro() -> int:
+    with Session(engine) as db:
+        ornekler = Ornekler(db, random.Random(argumanlar.tohum))
+    olcumler = mikro_olcumler(ornekler)
+    if argumanlar.sadece:
+        bilinmeyen = set(argumanlar.sadece) - set(olcumler)
+        if bilinmeyen:
+            print(f"Bilinmeyen ölçüm: {', '.join(sorted(bilinmeyen))}. Seçenekler: {', '.join(olcumler)}")
+            return 1
+        olcumler = {ad: f for ad, f in olcumler.items() if ad in argumanlar.sadece}
+
+    ortam = ortam_bilgisi()
+    print(f"Veritabanı : {ortam['veritabani']} ({ortam['hareket']:,} hareket, commit {ortam['commit']})")
+    sonuclar = {}
+    for ad, calistir in olcumler.items():
+        for _ in range(argumanlar.isinma):
+            calistir()
+        sureler = []
+        baslangic = time.perf_counter()
+        for _ in range(argumanlar.tekrar):
+            t = time.perf_counter()
+            calistir()
+            sureler.append(time.perf_counter() - t)
+        sonuclar[ad] = ozetle(sureler, time.perf_counter() - baslangic)
+        s = sonuclar[ad]
+        print(f"{ad:24} {s['islem_sn']:9.1f} işlem/sn | p50 {s['p50_ms']:8.2f} ms | p99 {s['p99_ms']:8.2f} ms")
+
+    json_yaz({"tur": "mikro", "ortam": ortam, "ayarlar": {"tekrar": argumanlar.tekrar, "isinma": argumanlar.isinma},
+              "sonuclar": sonuclar})
+    return 0
+
+# ----------------------------------------------------------------
+# 3. YÜK SENARYOSU (Gerçek HTTP, eşzamanlı istemciler)
+# ----------------------------------------------------------------
+# İşlem -> (ağırlık, istek üretici). Vardiya içi tipik karışım: çoğunluk okuma.
+def yuk_islemleri(o: Ornekler) -> dict:
+    simdi = datetime.now()
+    return {
+        "gecmis": (25, lambda: ("POST", "/rapor/gecmis", {"depo_id": o.sec(o.depolar)})),
+        "gecmis_tarih": (10, lambda: ("POST", "/rapor/gecmis", {
+            "baslangic_tarihi": (simdi - timedelta(days=o.rastgele.randint(30, 700))).isoformat()})),
+        "stok_durumu": (15, lambda: ("POST", "/rapor/stok-durumu", {"depo_id": o.sec(o.depolar)})),
+        "ozet": (15, lambda: ("GET", f"/rapor/ozet?depo_id={o.sec(o.depolar)}", None)),
+        "giris": (15, lambda: ("POST", "/islem/giris", {
+            "urun_id": o.sec(o.sarf_urunleri), "depo_id": o.sec(o.depolar), "miktar": 2})),
+        "cikis": (10, lambda: ("POST", "/islem/cikis", {
+            "urun_id": o.sec(o.sarf_urunleri), "depo_id": o.sec(o.depolar), "bolum_id": o.sec(o.bolumler), "miktar": 1})),
+        "zimmet": (5, lambda: ("POST", "/demirbas/zimmetle", {
+            "demirbas_id": o.depodaki_demirbaslar.pop() if o.depodaki_demirbaslar else 0,
+            "personel_id": o.sec(o.personeller)})),
+        "demirbas_giris": (5, lambda: ("POST", "/islem/giris", {
+            "urun_id": o.sec(o.demirbas_urunleri), "depo_id": o.sec(o.depolar), "miktar": 1})),
+    }
+
+# Yük altında beklenen iş kuralı yanıtları hata sayılmaz (örn. rastgele seçilen depoda stok yok)
+BEKLENEN_DURUMLAR = {"cikis": {400}}
+
+def sunucu_baslat():
+    import httpx
+
+    ortam = {**os.environ, "DB_ASYNC": "1" if argumanlar.asenkron else "0"}
+    surec = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(argumanlar.port),
+         "--workers", str(argumanlar.worker), "--log-level", "warning",
+         "--backlog", str(max(2048, argumanlar.istemci * 2))],
+        env=ortam,
+    )
+    for _ in range(150):
+        try:
+            httpx.get(f"http://127.0.0.1:{argumanlar.port}/sistem/havuz", timeout=1)
+            return surec
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    surec.terminate()
+    raise RuntimeError("Test sunucusu başlamadı")
+
+async def yuk_uygula(o: Ornekler, sure: float, kayit: bool):
+    import httpx
+
+    islemler = yuk_islemleri(o)
+    adlar = list(islemler)
+    agirliklar = [islemler[ad][0] for ad in adlar]
+    gecikmeler, durumlar = defaultdict(list), defaultdict(Counter)
+    sinirlar = httpx.Limits(max_connections=argumanlar.istemci, max_keepalive_connections=argumanlar.istemci)
+
+    async def istemci(http, bitis):
+        while time.perf_counter() < bitis:
+            ad = o.rastgele.choices(adlar, agirliklar)[0]
+            metot, yol, govde = islemler[ad][1]()
+            baslangic = time.perf_counter()
+            try:
+                yanit = await http.request(metot, yol, json=govde)
+                durum = yanit.status_code
+            except httpx.HTTPError as e:
+                durum = type(e).__name__
+            if kayit:
+                gecikmeler[ad].append(time.perf_counter() - baslangic)
+                durumlar[ad][durum] += 1
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{argumanlar.port}", limits=sinirlar, timeout=120) as http:
+        baslangic = time.perf_counter()
+        await asyncio.gather(*[istemci(http, baslangic + sure) for _ in range(argumanlar.istemci)])
+        gecen = time.perf_counter() - baslangic
+    return gecen, gecikmeler, durumlar
+
+def yuk() -> int:
+    import httpx
+
+    with Session(engine) as db:
+        ornekler = Ornekler(db, random.Random(argumanlar.tohum))
+    ortam = ortam_bilgisi()
+    print(f"Veritabanı : {ortam['veritabani']} ({ortam['hareket']:,} hareket, commit {ortam['commit']})")
+    print(f"Yük        : {argumanlar.istemci} istemci, {argumanlar.sure:.0f} sn, {argumanlar.worker} worker, "
+          f"{'asenkron' if argumanlar.asenkron else 'senkron'}")
+
+    surec = sunucu_baslat()
+    try:
+        asyncio.run(yuk_uygula(ornekler, argumanlar.isinma, kayit=False)) # Önbellek ve havuz ısınması
+        gecen, gecikmeler, durumlar = asyncio.run(yuk_uygula(ornekler, argumanlar.sure, kayit=True))
+        havuz = httpx.get(f"http://127.0.0.1:{argumanlar.port}/sistem/havuz").json()
+    finally:
+        surec.terminate()
+        surec.wait()
+
+    sonuclar, tum_sureler, toplam_hata = {}, [], 0
+    for ad, sureler in sorted(gecikmeler.items()):
+        hata = sum(adet for durum, adet in durumlar[ad].items()
+                   if not (isinstance(durum, int) and (durum < 400 or durum in BEKLENEN_DURUMLAR.get(ad, ()))))
+        sonuclar[ad] = {**ozetle(sureler, gecen), "hata": hata, "durumlar": {str(d): n for d, n in durumlar[ad].items()}}
+        tum_sureler += sureler
+        toplam_hata += hata
+        s = sonuclar[ad]
+        print(f"{ad:16} {s['adet']:7} istek | {s['islem_sn']:7.1f}/sn | p50 {s['p50_ms']:8.1f} ms | "
+              f"p99 {s['p99_ms']:8.1f} ms | hata {hata}")
+    toplam = {**ozetle(tum_sureler, gecen), "hata": toplam_hata}
+    print(f"{'TOPLAM':16} {toplam['adet']:7} istek | {toplam['islem_sn']:7.1f}/sn | p50 {toplam['p50_ms']:8.1f} ms | "
+          f"p99 {toplam['p99_ms']:8.1f} ms | hata {toplam_hata}")
+
+    json_yaz({
+        "tur": "yuk", "ortam": ortam,
+        "ayarlar": {k: getattr(argumanlar, k) for k in ("istemci", "sure", "worker", "asenkron", "tohum")},
+        "toplam": toplam, "sonuclar": sonuclar, "havuz": havuz,
+    })
+    return 1 if toplam_hata else 0
+
+# ----------------------------------------------------------------
+# 4. KARŞILAŞTIRMA
+# ----------------------------------------------------------------
+def karsilastir() -> int:
+    with open(argumanlar.eski, encoding="utf-8") as f:
+        eski = json.load(f)
+    with open(argumanlar.yeni, encoding="utf-8") as f:
+        yeni = json.load(f)
+    if eski.get("tur") != yeni.get("tur"):
+        print(f"Farklı türde sonuçlar karşılaştırılamaz: {eski.get('tur')} / {yeni.get('tur')}")
+        return 1
+    for ad, sonuc in (("Eski", eski), ("Yeni", yeni)):
+        o = sonuc["ortam"]
+        print(f"{ad}: commit {o['commit']}{' (+değişiklik)' if o['degisiklik_var'] else ''}, {o['tarih']}, {o['hareket']:,} hareket")
+    # Yazma ölçümleri her çalıştırmada birkaç bin hareket ekler; %5'e kadar fark aynı veri sayılır
+    hareket_farki = abs(yeni["ortam"]["hareket"] - eski["ortam"]["hareket"]) / max(eski["ortam"]["hareket"], 1)
+    if hareket_farki > 0.05 or eski["ortam"]["veritabani"] != yeni["ortam"]["veritabani"]:
+        print("UYARI: Sonuçlar farklı veri/veritabanı üzerinde alınmış.")
+
+    def degisim(e, y):
+        return (y - e) / e * 100 if e else 0.0
+
+    satirlar = list(yeni["sonuclar"].items()) + ([("TOPLAM", yeni["toplam"])] if "toplam" in yeni else [])
+    kotulesen = 0
+    for ad, y in satirlar:
+        e = eski["toplam"] if ad == "TOPLAM" else eski["sonuclar"].get(ad)
+        if e is None:
+            print(f"{ad:24} (yeni ölçüm)")
+            continue
+        # Gecikmede artış, hızda düşüş kötüleşmedir
+        farklar = {"p50": degisim(e["p50_ms"], y["p50_ms"]), "p99": degisim(e["p99_ms"], y["p99_ms"]),
+                   "hız": -degisim(e["islem_sn"], y["islem_sn"])}
+        kotu = [k for k, v in farklar.items() if v > argumanlar.esik]
+        kotulesen += bool(kotu)
+        print(f"{ad:24} p50 {e['p50_ms']:8.2f} -> {y['p50_ms']:8.2f} ms ({farklar['p50']:+6.1f}%) | "
+              f"p99 {e['p99_ms']:8.2f} -> {y['p99_ms']:8.2f} ms ({farklar['p99']:+6.1f}%) | "
+              f"{e['islem_sn']:8.1f} -> {y['islem_sn']:8.1f}/sn"
+              + (f"  KÖTÜLEŞTİ ({', '.join(kotu)})" if kotu else ""))
+    print(f"Sonuç: {kotulesen} ölçüm %{argumanlar.esik:g} eşiğinden fazla kötüleşti." if kotulesen
+          else f"Sonuç: %{argumanlar.esik:g} eşiğini aşan kötüleşme yok.")
+    return 1 if kotulesen else 0
+
+if __name__ == "__main__":
+    komutlar = {"tohumla": tohumla, "mikro": mikro, "yuk": yuk, "karsilastir": karsilastir}
+    sys.exit(komutlar[argumanlar.komut]())
\ No newline at end of file
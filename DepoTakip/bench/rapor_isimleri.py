@@ -0,0 +1,106 @@
+"""
+Hareket raporunda kaynak/hedef isim çözümlemesinin maliyet ölçümü.
+
+Geçici bir SQLite veritabanına N hareket yazar ve /rapor/gecmis'in satır
+üretme yolunu (sorgu + _rapor_satiri) iki şekilde ölçer:
+  - eski : Depo tablosu yalnızca cikis_depo_id üzerinden bağlanır (hedef "Depo" yazılır)
+  - yeni : Depo tablosu iki takma adla (cikis + giris) bağlanır, isimler gerçek
+
+Her iki durumda da çalışan SQL cümlesi sayısı yazdırılır; satır başına ek sorgu
+olmadığı için bu sayı hareket sayısından bağımsız ve sabit kalmalıdır.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.rapor_isimleri --hareket 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Rapor isim çözümleme ölçümü")
+parser.add_argument("--hareket", type=int, default=100_000, help="Üretilecek hareket sayısı")
+parser.add_argument("--depo", type=int, default=20, help="Depo sayısı")
+argumanlar = parser.parse_args()
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_rapor_"), "rapor.db")
+
+from sqlalchemy import event
+from sqlmodel import Session, select, insert
+
+from app.database import engine, init_db
+from app.models import Depo, Bolum, Personel, Urun, UrunTipi, Hareket, IslemTipi
+from app.routers.rapor import HareketFiltre, HareketRaporu, _gecmis_sorgusu, _rapor_satiri
+
+def doldur():
+    init_db()
+    with Session(engine) as db:
+        db.exec(insert(Depo), params=[{"ad": f"Depo {i}", "aktif_mi": True, "olusturma_tarihi": datetime.now()} for i in range(argumanlar.depo)])
+        db.exec(insert(Bolum), params=[{"ad": f"Bölüm {i}", "aktif_mi": True} for i in range(10)])
+        db.exec(insert(Personel), params=[{"ad_soyad": f"Personel {i}", "aktif_mi": True} for i in range(50)])
+        db.exec(insert(Urun), params=[
+            {"ad": f"Ürün {i}", "sku": f"SKU-{i}", "tip": UrunTipi.SARF, "birim": "Adet", "guvenlik_stogu": 0, "aktif_mi": True}
+            for i in range(200)
+        ])
+        rastgele = random.Random(42)
+        simdi = datetime.now()
+        satirlar = []
+        for i in range(argumanlar.hareket):
+            tip = rastgele.choice((IslemTipi.GIRIS, IslemTipi.CIKIS, IslemTipi.TRANSFER))
+            satirlar.append({
+                "tarih": simdi - timedelta(seconds=i),
+                "islem_tipi": tip,
+                "urun_id": rastgele.randint(1, 200),
+                "cikis_depo_id": None if tip == IslemTipi.GIRIS else rastgele.randint(1, argumanlar.depo),
+                "giris_depo_id": None if tip == IslemTipi.CIKIS else rastgele.randint(1, argumanlar.depo),
+                "bolum_id": rastgele.randint(1, 10) if tip == IslemTipi.CIKIS else None,
+                "miktar": rastgele.randint(1, 50),
+                "kullanici": "Sistem",
+            })
+        db.exec(insert(Hareket), params=satirlar)
+        db.commit()
+
+def eski_satirlar(db):
+    """Önceki sürümün sorgu şekli: Depo yalnızca çıkış tarafından bağlanır."""
+    from app.models import Personel as P, Bolum as B
+    query = select(Hareket, Urun, Depo, P, B).join(Urun)
+    query = query.join(Depo, Hareket.cikis_depo_id == Depo.id, isouter=True)
+    query = query.join(P, Hareket.personel_id == P.id, isouter=True)
+    query = query.join(B, Hareket.bolum_id == B.id, isouter=True)
+    query = query.order_by(Hareket.tarih.desc(), Hareket.id.desc()).execution_options(yield_per=1000)
+    for h, u, d, p, b in db.exec(query):
+        yield HareketRaporu(
+            tarih=h.tarih, islem=h.islem_tipi, urun=u.ad, miktar=h.miktar,
+            kaynak=d.ad if d else "-", hedef="Depo" if h.giris_depo_id else "-",
+            aciklama=h.aciklama or ""
+        )
+
+def yeni_satirlar(db):
+    query = _gecmis_sorgusu(HareketFiltre()).execution_options(yield_per=1000)
+    for satir in db.exec(query):
+        yield _rapor_satiri(*satir)
+
+def olc(ad, uretici):
+    sayac = [0]
+    def say(*_):
+        sayac[0] += 1
+    event.listen(engine, "before_cursor_execute", say)
+    try:
+        with Session(engine) as db:
+            baslangic = time.perf_counter()
+            adet = sum(1 for _ in uretici(db))
+            sure = time.perf_counter() - baslangic
+    finally:
+        event.remove(engine, "before_cursor_execute", say)
+    print(f"{ad:5}: {adet} satır, {sure:.2f} sn, 100k satır başına {sure / adet * 100_000:.2f} sn, SQL cümlesi: {sayac[0]}")
+    return sure / adet
+
+def main():
+    doldur()
+    eski = olc("eski", eski_satirlar)
+    yeni = olc("yeni", yeni_satirlar)
+    print(f"Oran (yeni/eski): {yeni / eski:.2f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
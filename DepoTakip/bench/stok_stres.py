@@ -0,0 +1,185 @@
+"""
+Stok motoru eşzamanlılık stres testi.
+
+32 iş parçacığı aynı ürün üzerinde aynı anda giriş / çıkış / transfer yapar.
+Sonunda şunlar doğrulanır:
+  - Hiçbir depoda stok eksiye düşmemiştir.
+  - Her depodaki miktar = Başlangıç + Başarılı girişler - Başarılı çıkışlar +/- transferler.
+  - Stok tablosu Hareket logundan yeniden hesaplanan bakiyeyle birebir aynıdır.
+  - Artımlı güncellenen stok özet tablosu sıfırdan hesaplanan özetle aynıdır.
+  - Aynı depoya transfer reddedilir (400) ve ne stoğu ne özeti değiştirir.
+
+Kullanım (DepoTakip klasöründen):
+    python -m bench.stok_stres
+    STRES_DATABASE_URL=postgresql://... python -m bench.stok_stres --yazici 32 --islem 200
+
+Varsayılan olarak geçici bir SQLite dosyası kullanır; gerçek veritabanına dokunmaz.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+parser = argparse.ArgumentParser(description="Stok motoru eşzamanlılık stres testi")
+parser.add_argument("--yazici", type=int, default=32, help="Aynı anda çalışan iş parçacığı sayısı")
+parser.add_argument("--islem", type=int, default=100, help="İş parçacığı başına işlem sayısı")
+parser.add_argument("--depo", type=int, default=3, help="Depo sayısı")
+parser.add_argument("--baslangic", type=float, default=500, help="Depo başına başlangıç stoğu")
+argumanlar = parser.parse_args()
+
+# Engine, app.database import edilirken kurulduğu için adres önceden ayarlanmalı
+os.environ["DATABASE_URL"] = os.getenv(
+    "STRES_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="depo_stres_"), "stres.db")
+)
+
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.database import engine, init_db
+from app.models import Depo, Bolum, Urun, UrunTipi, StokSarf, Hareket, IslemTipi
+from app.ozet import ozet_yenile
+from app.routers.islemler import (
+    StokGirisModel, StokCikisModel, StokTransferModel,
+    stok_giris_uygula, stok_cikis_uygula, stok_transfer_uygula
+)
+
+def hazirla():
+    init_db()
+    with Session(engine) as db:
+        son = random.randint(0, 10**9)
+        depolar = [Depo(ad=f"Stres Depo {son}-{i}") for i in range(argumanlar.depo)]
+        bolum = Bolum(ad=f"Stres Bölüm {son}")
+        urun = Urun(ad="Stres Eldiven", sku=f"STRES-{son}", tip=UrunTipi.SARF, birim="Adet")
+        db.add_all(depolar + [bolum, urun])
+        db.commit()
+        for depo in depolar:
+            stok_giris_uygula(StokGirisModel(urun_id=urun.id, depo_id=depo.id, miktar=argumanlar.baslangic), db)
+        db.commit()
+        return [d.id for d in depolar], bolum.id, urun.id
+
+def calistir(depo_idler, bolum_id, urun_id, beklenen, kilit, sayac):
+    rastgele = random.Random()
+    for _ in range(argumanlar.islem):
+        tip = rastgele.choice(("giris", "cikis", "cikis", "transfer", "transfer"))
+        miktar = rastgele.randint(1, 40)
+        kaynak, hedef = rastgele.sample(depo_idler, 2)
+
+        while True:
+            try:
+                with Session(engine) as db:
+                    if tip == "giris":
+                        stok_giris_uygula(StokGirisModel(urun_id=urun_id, depo_id=kaynak, miktar=miktar), db)
+                    elif tip == "cikis":
+                        stok_cikis_uygula(StokCikisModel(urun_id=urun_id, depo_id=kaynak, bolum_id=bolum_id, miktar=miktar), db)
+                    else:
+                        stok_transfer_uygula(StokTransferModel(urun_id=urun_id, cikis_depo_id=kaynak, giris_depo_id=hedef, miktar=miktar), db)
+                    db.commit()
+            except HTTPException:
+                with kilit:
+                    sayac["reddedilen"] += 1
+                break
+            except OperationalError:
+                # SQLite "database is locked" / PostgreSQL deadlock: İşlem hiç yazılmadı, tekrar dene
+                with kilit:
+                    sayac["tekrar"] += 1
+                time.sleep(rastgele.random() / 100)
+                continue
+
+            with kilit:
+                sayac["basarili"] += 1
+                if tip == "giris":
+                    beklenen[kaynak] += miktar
+                elif tip == "cikis":
+                    beklenen[kaynak] -= miktar
+                else:
+                    beklenen[kaynak] -= miktar
+                    beklenen[hedef] += miktar
+            break
+
+def ayni_depo_transferi(depo_idler, urun_id):
+    """Kaynak = hedef transfer 400 ile reddedilmeli; hiçbir şey yazılmamalı (özet sonra doğrulanır)."""
+    with Session(engine) as db:
+        try:
+            stok_transfer_uygula(StokTransferModel(
+                urun_id=urun_id, cikis_depo_id=depo_idler[0], giris_depo_id=depo_idler[0], miktar=1), db)
+            db.commit()
+        except HTTPException as hata:
+            if hata.status_code == 400:
+                return []
+            return [f"Aynı depo transferi beklenmeyen hata verdi: {hata.status_code} {hata.detail}"]
+    return ["Aynı depo transferi kabul edildi (400 bekleniyordu)"]
+
+def dogrula(depo_idler, urun_id, beklenen):
+    hatalar = []
+    with Session(engine) as db:
+        stoklar = db.exec(
+            select(StokSarf).where(StokSarf.urun_id == urun_id)
+        ).all()
+        gercek = defaultdict(float)
+        for stok in stoklar:
+            gercek[stok.depo_id] += stok.miktar
+            if stok.miktar < 0:
+                hatalar.append(f"Depo {stok.depo_id}: Stok eksiye düştü ({stok.miktar})")
+
+        if len(stoklar) != len({s.depo_id for s in stoklar}):
+            hatalar.append("Aynı depo/ürün için birden fazla stok satırı var")
+
+        # Hareket logundan bakiye
+        defter = defaultdict(float)
+        for h in db.exec(select(Hareket).where(Hareket.urun_id == urun_id)).all():
+            if h.islem_tipi == IslemTipi.GIRIS:
+                defter[h.giris_depo_id] += h.miktar
+            elif h.islem_tipi == IslemTipi.CIKIS:
+                defter[h.cikis_depo_id] -= h.miktar
+            elif h.islem_tipi == IslemTipi.TRANSFER:
+                defter[h.cikis_depo_id] -= h.miktar
+                defter[h.giris_depo_id] += h.miktar
+
+        hatalar.extend(ozet_yenile(db, sadece_dogrula=True))
+
+    for depo_id in depo_idler:
+        if gercek[depo_id] != beklenen[depo_id]:
+            hatalar.append(f"Depo {depo_id}: Stok {gercek[depo_id]}, beklenen {beklenen[depo_id]}")
+        if gercek[depo_id] != defter[depo_id]:
+            hatalar.append(f"Depo {depo_id}: Stok {gercek[depo_id]}, Hareket logu {defter[depo_id]}")
+    return gercek, hatalar
+
+def main():
+    depo_idler, bolum_id, urun_id = hazirla()
+    beklenen = defaultdict(float, {d: argumanlar.baslangic for d in depo_idler})
+    sayac = defaultdict(int)
+    kilit = threading.Lock()
+
+    baslangic = time.perf_counter()
+    isler = [
+        threading.Thread(target=calistir, args=(depo_idler, bolum_id, urun_id, beklenen, kilit, sayac))
+        for _ in range(argumanlar.yazici)
+    ]
+    for t in isler:
+        t.start()
+    for t in isler:
+        t.join()
+    sure = time.perf_counter() - baslangic
+
+    hatalar = ayni_depo_transferi(depo_idler, urun_id)
+    gercek, dogrulama_hatalari = dogrula(depo_idler, urun_id, beklenen)
+    hatalar += dogrulama_hatalari
+    print(f"Veritabanı  : {engine.url.render_as_string(hide_password=True)}")
+    print(f"Yazıcı      : {argumanlar.yazici} x {argumanlar.islem} işlem, {sure:.2f} sn")
+    print(f"Başarılı    : {sayac['basarili']}, Yetersiz stok: {sayac['reddedilen']}, Tekrar: {sayac['tekrar']}")
+    print(f"Depo stokları: {dict(gercek)}")
+    if hatalar:
+        print("HATA:")
+        for hata in hatalar:
+            print("  -", hata)
+        sys.exit(1)
+    print("TAMAM: Stok tablosu, özet, beklenen toplamlar ve Hareket logu birebir tutarlı.")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file